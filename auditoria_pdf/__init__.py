@@ -4,10 +4,25 @@ Sistema de Auditoria PDF para Comissões por Recebimento.
 Este pacote fornece funcionalidade para gerar relatórios PDF detalhados
 de auditoria para comissões por recebimento, mostrando todo o processo
 de cálculo de TCMP/FCMP e comissões finais.
+
+O orquestrador (que traz o reportlab) é importado no primeiro acesso; a
+coleta de dados e o cache de fragmentos (auditoria_pdf.core) não dependem
+do reportlab.
 """
 
-from auditoria_pdf.auditoria_orchestrator import AuditoriaOrchestrator
+import importlib
 
 __all__ = ['AuditoriaOrchestrator']
 __version__ = '1.0.0'
 
+
+def __getattr__(nome):
+    if nome == 'AuditoriaOrchestrator':
+        valor = importlib.import_module('.auditoria_orchestrator', __name__).AuditoriaOrchestrator
+        globals()[nome] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
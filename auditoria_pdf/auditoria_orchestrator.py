@@ -9,8 +9,12 @@ from typing import Optional
 
 from auditoria_pdf.core.data_collector import AuditoriaDataCollector
 from auditoria_pdf.core.audit_data_builder import AuditDataBuilder
+from auditoria_pdf.core.fragment_cache import CacheFragmentosPDF, impressao_digital, obter_cache_fragmentos
 from auditoria_pdf.generators.pdf_generator import AuditoriaPDFGenerator
 
+# O INFO de PDF incremental indisponível é emitido uma vez por processo
+_AVISO_INCREMENTAL_EMITIDO = False
+
 
 class AuditoriaOrchestrator:
     """
@@ -44,7 +48,61 @@ class AuditoriaOrchestrator:
         # Inicializar componentes
         self.data_collector = AuditoriaDataCollector(recebimento_orchestrator, calc_comissao)
         self.data_builder = AuditDataBuilder()
-        self.pdf_generator = AuditoriaPDFGenerator()
+        self.pdf_generator = AuditoriaPDFGenerator(workers=self._workers_pdf())
+    
+    def _workers_pdf(self) -> int:
+        """
+        Processos para renderizar as seções do PDF em paralelo.
+        
+        PARAMS `auditoria_pdf_workers` (ou variável de ambiente
+        COMISSOES_AUDITORIA_PDF_WORKERS): 'auto' usa as CPUs disponíveis;
+        0 ou 1 (padrão) gera o PDF em série.
+        """
+        valor = None
+        try:
+            valor = self.calc_comissao.params.get("auditoria_pdf_workers")
+        except Exception:
+            pass
+        if valor is None or str(valor).strip() in ("", "nan", "None"):
+            valor = os.getenv("COMISSOES_AUDITORIA_PDF_WORKERS", "0")
+        valor = str(valor).strip().lower()
+        if valor == "auto":
+            return os.cpu_count() or 1
+        try:
+            return max(0, int(float(valor)))
+        except ValueError:
+            print(f"[AUDITORIA] Valor inválido para auditoria_pdf_workers: {valor!r}; gerando em série.")
+            return 0
+    
+    def _cache_fragmentos(self) -> Optional[CacheFragmentosPDF]:
+        """
+        Cache dos fragmentos por processo (geração incremental).
+        
+        PARAMS `auditoria_pdf_incremental` (padrão sim) desativa com não/0;
+        diretório e desativação também por COMISSOES_CACHE_AUDITORIA_PDF.
+        Requer pypdf para mesclar os fragmentos; sem ele registra um INFO (uma vez).
+        """
+        valor = None
+        try:
+            valor = self.calc_comissao.params.get("auditoria_pdf_incremental")
+        except Exception:
+            pass
+        if valor is not None and str(valor).strip().lower() in ("0", "false", "nao", "não", "n", "no", "off"):
+            return None
+        cache = obter_cache_fragmentos(self.mes, self.ano)
+        if cache is None:
+            return None
+        from auditoria_pdf.utils.pdf_utils import mesclagem_disponivel
+        if not mesclagem_disponivel():
+            global _AVISO_INCREMENTAL_EMITIDO
+            if not _AVISO_INCREMENTAL_EMITIDO:
+                print(
+                    "[AUDITORIA] INFO: PDF incremental indisponível (pypdf não instalado; "
+                    "ver requirements-opcional.txt). O PDF será gerado por completo."
+                )
+                _AVISO_INCREMENTAL_EMITIDO = True
+            return None
+        return cache
     
     def gerar_auditoria(self) -> Optional[str]:
         """
@@ -97,8 +155,20 @@ class AuditoriaOrchestrator:
             print(f"[AUDITORIA] [ETAPA 3/4] Nome do arquivo: {filename}")
             print(f"[AUDITORIA] [ETAPA 3/4] Caminho completo: {filepath}")
             
+            # Impressões digitais dos dados coletados (reaproveitamento de fragmentos)
+            cache = self._cache_fragmentos()
+            impressoes = None
+            if cache is not None:
+                impressoes = [
+                    impressao_digital(processo_dados, idx)
+                    for idx, processo_dados in enumerate(dados_brutos['processos'], 1)
+                ]
+                print(f"[AUDITORIA] [ETAPA 3/4] Cache de fragmentos: {cache.diretorio}")
+            
             # Gerar PDF
-            arquivo_gerado = self.pdf_generator.gerar_pdf(dados_auditoria, filepath)
+            arquivo_gerado = self.pdf_generator.gerar_pdf(
+                dados_auditoria, filepath, cache=cache, impressoes=impressoes
+            )
             
             # 4. Verificar resultado
             print("[AUDITORIA] [ETAPA 4/4] Verificando arquivo gerado...")
@@ -7,6 +7,8 @@ import pandas as pd
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from src.core.process_index import ProcessIndex
+
 
 class AuditoriaDataCollector:
     """
@@ -26,6 +28,20 @@ class AuditoriaDataCollector:
         self.state_manager = recebimento_orchestrator.state_manager
         self.metricas_calc = recebimento_orchestrator.metricas_calc
 
+    def _obter_indice_processos(self, df_comercial: pd.DataFrame) -> ProcessIndex:
+        """
+        Índice por processo da Análise Comercial: reutiliza o do CalculoComissao
+        quando for o mesmo DataFrame; caso contrário constrói (e guarda) um novo.
+        """
+        indice = self.calc_comissao._obter_indice_processos()
+        if indice.df is df_comercial:
+            return indice
+        local = getattr(self, "_indice_processos_local", None)
+        if local is None or local.df is not df_comercial:
+            local = ProcessIndex(df_comercial)
+            self._indice_processos_local = local
+        return local
+
     def coletar_dados_auditoria(self, mes: int, ano: int) -> dict:
         """
         Coleta todos os dados necessários para auditoria do mês/ano.
@@ -185,17 +201,16 @@ class AuditoriaDataCollector:
         Returns:
             Dicionário com dados do processo ou None se não encontrado
         """
-        # Buscar processo na análise comercial
-        proc_col = self._encontrar_coluna(df_comercial, ["Processo", "processo"])
-        if not proc_col:
+        # Buscar processo na análise comercial (índice por processo)
+        indice = self._obter_indice_processos(df_comercial)
+        if not indice.coluna_processo:
             print(
                 f"[AUDITORIA] [COLETA] Coluna 'Processo' não encontrada na Análise Comercial"
             )
             return None
 
-        itens_processo = df_comercial[
-            df_comercial[proc_col].astype(str).str.strip() == str(processo_id).strip()
-        ]
+        itens_processo = indice.itens(processo_id)
+        resumo = indice.resumo(processo_id)
 
         if itens_processo.empty:
             print(
@@ -221,7 +236,7 @@ class AuditoriaDataCollector:
             "numero_nf": str(primeira_linha.get("Numero NF", "-")).strip(),
             "cliente": str(primeira_linha.get("Cliente", "-")).strip(),
             "operacao": str(primeira_linha.get("Operação", "-")).strip(),
-            "valor_total": self._calcular_valor_total_processo(itens_processo),
+            "valor_total": resumo["valor_total"],
         }
 
         # Itens do processo
@@ -260,19 +275,6 @@ class AuditoriaDataCollector:
             "comissoes": comissoes,
         }
 
-    def _calcular_valor_total_processo(self, itens_processo: pd.DataFrame) -> float:
-        """Calcula valor total do processo somando todos os itens."""
-        valor_col = self._encontrar_coluna(
-            itens_processo, ["Valor Realizado", "valor realizado"]
-        )
-        if not valor_col:
-            return 0.0
-
-        try:
-            return float(itens_processo[valor_col].sum())
-        except Exception:
-            return 0.0
-
     def _coletar_itens_processo(self, itens_processo: pd.DataFrame) -> List[Dict]:
         """Coleta detalhes de cada item do processo."""
         itens = []
@@ -366,6 +368,7 @@ class AuditoriaDataCollector:
             colaboradores_df=colaboradores_df,
             atribuicoes_df=atribuicoes_df,
             recebe_por_recebimento_ids=recebe_por_recebimento_ids,
+            indice_processos=self._obter_indice_processos(df_comercial),
         )
 
         # Identificar colaboradores do processo
@@ -529,12 +532,13 @@ class AuditoriaDataCollector:
                 colaboradores_df=colaboradores_df,
                 atribuicoes_df=atribuicoes_df,
                 recebe_por_recebimento_ids=recebe_por_recebimento_ids,
+                indice_processos=self._obter_indice_processos(df_comercial),
             )
             colaboradores = identificador.identificar_colaboradores(processo_id)
 
             taxas_colaboradores = []
             for colab in colaboradores:
-                # Obter regra de comissão
+                # Obter regra de comissão (índice pré-compilado de CONFIG_COMISSAO)
                 regra = self.calc_comissao._get_regra_comissao(
                     linha=linha,
                     grupo=grupo,
@@ -542,12 +546,15 @@ class AuditoriaDataCollector:
                     tipo_mercadoria=tipo_merc,
                     cargo=colab["cargo"],
                 )
+                if regra is None:
+                    print(
+                        f"[AUDITORIA] [COLETA] Nenhuma regra de comissão para {colab['nome']}/{colab['cargo']} ({linha}/{grupo}/{subgrupo}/{tipo_merc})"
+                    )
+                    return None
 
-                taxa_rateio = (
-                    float(regra.get("taxa_rateio_maximo_pct", 0.0) or 0.0) / 100.0
-                )
-                fatia_cargo = float(regra.get("fatia_cargo_pct", 0.0) or 0.0) / 100.0
-                taxa = taxa_rateio * fatia_cargo
+                taxa_rateio = float(regra.taxa_rateio_maximo_pct or 0.0) / 100.0
+                fatia_cargo = float(regra.fatia_cargo_pct or 0.0) / 100.0
+                taxa = regra.taxa_efetiva
 
                 taxas_colaboradores.append(
                     {
@@ -606,6 +613,7 @@ class AuditoriaDataCollector:
                 colaboradores_df=colaboradores_df,
                 atribuicoes_df=atribuicoes_df,
                 recebe_por_recebimento_ids=recebe_por_recebimento_ids,
+                indice_processos=self._obter_indice_processos(df_comercial),
             )
             colaboradores = identificador.identificar_colaboradores(processo_id)
 
@@ -810,6 +818,7 @@ class AuditoriaDataCollector:
                                 colaboradores_df=colaboradores_df,
                                 atribuicoes_df=atribuicoes_df,
                                 recebe_por_recebimento_ids=recebe_por_recebimento_ids,
+                                indice_processos=self._obter_indice_processos(df_comercial),
                             )
                             colaboradores_info = (
                                 identificador.identificar_colaboradores(processo_id)
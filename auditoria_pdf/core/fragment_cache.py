@@ -0,0 +1,172 @@
+"""
+Cache dos fragmentos PDF renderizados por processo.
+
+Reexecutar o mesmo mês (comum após correções de regras) renderizava de novo
+todos os processos do Auditoria_Recebimento_MM_YYYY.pdf. Com o cache, cada
+processo é identificado por uma impressão digital dos dados coletados
+(AuditoriaDataCollector._coletar_dados_processo), do número do processo no
+relatório e do código que renderiza as seções; fragmentos com a mesma
+impressão digital são reaproveitados e apenas os processos alterados são
+renderizados antes da mesclagem final.
+
+Configuração pela variável de ambiente COMISSOES_CACHE_AUDITORIA_PDF:
+    (ausente)          cache ativo em <raiz do projeto>/.cache/auditoria_pdf
+    0 | off | false    cache desativado
+    <diretório>        cache ativo no diretório informado
+
+Os fragmentos ficam em uma subpasta por mês (MM_YYYY); após cada geração são
+mantidos apenas os fragmentos usados no PDF daquele mês.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+from datetime import date, datetime
+from typing import Iterable, Optional, Tuple
+
+VERSAO_FRAGMENTO = 1
+_RAIZ_PACOTE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_PADRAO = os.path.join(os.path.dirname(_RAIZ_PACOTE), ".cache", "auditoria_pdf")
+_DESATIVADO = ("0", "off", "false", "nao", "não", "desativado")
+
+# Código que define o conteúdo de um fragmento (formatação + renderização)
+_CODIGO_RENDERIZACAO = ("generators", "styles", "utils", os.path.join("core", "audit_data_builder.py"))
+_ASSINATURA_CODIGO: Optional[str] = None
+
+
+def _assinatura_codigo() -> str:
+    """Hash dos módulos que formatam e renderizam as seções (calculado uma vez)."""
+    global _ASSINATURA_CODIGO
+    if _ASSINATURA_CODIGO is None:
+        arquivos = []
+        for item in _CODIGO_RENDERIZACAO:
+            caminho = os.path.join(_RAIZ_PACOTE, item)
+            if os.path.isdir(caminho):
+                arquivos.extend(
+                    os.path.join(caminho, nome)
+                    for nome in os.listdir(caminho)
+                    if nome.endswith(".py")
+                )
+            elif os.path.exists(caminho):
+                arquivos.append(caminho)
+        h = hashlib.sha256()
+        for arquivo in sorted(arquivos):
+            h.update(os.path.relpath(arquivo, _RAIZ_PACOTE).encode("utf-8"))
+            with open(arquivo, "rb") as f:
+                h.update(f.read())
+        _ASSINATURA_CODIGO = h.hexdigest()
+    return _ASSINATURA_CODIGO
+
+
+def _canonico(valor):
+    """Converte os dados coletados em uma estrutura JSON estável."""
+    if isinstance(valor, dict):
+        return [[str(k), _canonico(v)] for k, v in sorted(valor.items(), key=lambda kv: str(kv[0]))]
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if hasattr(valor, "item") and not isinstance(valor, (str, bytes)):
+        try:
+            valor = valor.item()  # escalares numpy
+        except (TypeError, ValueError):
+            return str(valor)
+    if isinstance(valor, float):
+        return repr(valor) if math.isnan(valor) or math.isinf(valor) else valor
+    if valor is None or isinstance(valor, (str, int, bool)):
+        return valor
+    return str(valor)
+
+
+def impressao_digital(dados_processo: dict, numero: int) -> str:
+    """
+    Impressão digital de um processo do relatório.
+
+    Args:
+        dados_processo: Dados brutos coletados do processo
+        numero: Número sequencial do processo no relatório (aparece no separador)
+    """
+    descricao = json.dumps(
+        [VERSAO_FRAGMENTO, _assinatura_codigo(), numero, _canonico(dados_processo)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(descricao.encode("utf-8")).hexdigest()[:32]
+
+
+class CacheFragmentosPDF:
+    """Fragmentos PDF por processo, identificados pela impressão digital."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.acertos = 0
+        self.falhas = 0
+
+    def _base(self, impressao: str) -> str:
+        return os.path.join(self.diretorio, impressao)
+
+    def obter(self, impressao: str) -> Optional[Tuple[str, int]]:
+        """Retorna (caminho do fragmento, páginas) ou None se não estiver no cache."""
+        base = self._base(impressao)
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                paginas = int(json.load(f)["paginas"])
+            if os.path.exists(base + ".pdf") and paginas > 0:
+                self.acertos += 1
+                return base + ".pdf", paginas
+        except (OSError, ValueError, KeyError):
+            pass
+        self.falhas += 1
+        return None
+
+    def guardar(self, impressao: str, arquivo: str, paginas: int, processo_id: str = "") -> str:
+        """Copia um fragmento renderizado para o cache e retorna o caminho no cache."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        base = self._base(impressao)
+        tmp = f"{base}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(arquivo, tmp)
+            os.replace(tmp, base + ".pdf")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "paginas": paginas,
+                        "processo": processo_id,
+                        "criado_em": datetime.now().isoformat(timespec="seconds"),
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp, base + ".json")
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return base + ".pdf"
+
+    def limpar(self, manter: Iterable[str]) -> int:
+        """Remove os fragmentos cuja impressão digital não está em `manter`."""
+        manter = set(manter)
+        removidos = 0
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError:
+            return 0
+        for nome in nomes:
+            impressao, _ = os.path.splitext(nome)
+            if impressao in manter:
+                continue
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+                removidos += nome.endswith(".pdf")
+            except OSError:
+                pass
+        return removidos
+
+
+def obter_cache_fragmentos(mes: int, ano: int) -> Optional[CacheFragmentosPDF]:
+    """Cache do mês configurado por COMISSOES_CACHE_AUDITORIA_PDF (None se desativado)."""
+    config = os.getenv("COMISSOES_CACHE_AUDITORIA_PDF", "").strip()
+    if config.lower() in _DESATIVADO:
+        return None
+    return CacheFragmentosPDF(os.path.join(config or DIRETORIO_PADRAO, f"{mes:02d}_{ano}"))
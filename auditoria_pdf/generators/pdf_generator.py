@@ -3,8 +3,13 @@ Gerador principal de PDF de auditoria.
 """
 
 import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from reportlab.platypus import SimpleDocTemplate
+from typing import List, Optional
+from reportlab.platypus import SimpleDocTemplate, PageBreak
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
 
@@ -22,6 +27,94 @@ from auditoria_pdf.generators import section_tcmp
 from auditoria_pdf.generators import section_fcmp
 from auditoria_pdf.generators import section_comissoes
 from auditoria_pdf.generators import section_resumo
+from auditoria_pdf.core.fragment_cache import CacheFragmentosPDF
+from auditoria_pdf.utils.pdf_utils import mesclagem_disponivel, mesclar_pdfs
+
+
+def _novo_documento(filepath: str) -> SimpleDocTemplate:
+    """Documento A4 com as margens padrão da auditoria."""
+    return SimpleDocTemplate(
+        filepath,
+        pagesize=A4,
+        rightMargin=MARGEM_DIREITA,
+        leftMargin=MARGEM_ESQUERDA,
+        topMargin=MARGEM_SUPERIOR,
+        bottomMargin=MARGEM_INFERIOR
+    )
+
+
+def gerar_secoes_processo(story, processo_dados: dict, numero: int):
+    """
+    Adiciona à story o separador e as seções de um processo.
+    
+    Args:
+        story: Lista de elementos do PDF
+        processo_dados: Dados formatados do processo
+        numero: Número sequencial do processo no relatório (o mesmo do índice)
+    """
+    processo_id = processo_dados['dados_gerais']['processo_id']
+    
+    # Separador de processo
+    section_header.gerar_separador_processo(story, processo_id, numero)
+    
+    # Seção 1: Dados do processo
+    section_processo.gerar_secao_dados_processo(story, processo_dados)
+    
+    # Seção 2: Itens do processo
+    section_processo.gerar_secao_itens_processo(story, processo_dados)
+    
+    # Seção 3: Pagamentos
+    section_pagamentos.gerar_secao_pagamentos(story, processo_dados)
+    
+    # Seção 4: Colaboradores
+    section_colaboradores.gerar_secao_colaboradores(story, processo_dados)
+    
+    # Seção 5: TCMP
+    section_tcmp.gerar_secao_tcmp(story, processo_dados)
+    
+    # Seção 6: FCMP
+    section_fcmp.gerar_secao_fcmp(story, processo_dados)
+    
+    # Seção 7: Comissões
+    section_comissoes.gerar_secao_comissoes(story, processo_dados)
+    
+    # Seção 8: Resumo
+    section_resumo.gerar_secao_resumo(story, processo_dados)
+
+
+def renderizar_processo(processo_dados: dict, numero: int, filepath: str) -> int:
+    """
+    Renderiza as seções de um processo em um PDF próprio (fragmento).
+    
+    Executada nos processos do pool. A quebra de página inicial do separador
+    é descartada: na mesclagem cada fragmento já começa em página nova.
+    
+    Returns:
+        Número de páginas do fragmento
+    """
+    story = []
+    gerar_secoes_processo(story, processo_dados, numero)
+    while story and isinstance(story[0], PageBreak):
+        story.pop(0)
+    doc = _novo_documento(filepath)
+    doc.build(story)
+    return doc.page
+
+
+def paginas_iniciais(paginas_capa: int, paginas_processos: List[int]) -> List[int]:
+    """
+    Página inicial (1-based) de cada processo no arquivo mesclado.
+    
+    Args:
+        paginas_capa: Páginas ocupadas por capa + índice
+        paginas_processos: Páginas de cada fragmento, na ordem do relatório
+    """
+    inicios = []
+    pagina = paginas_capa + 1
+    for paginas in paginas_processos:
+        inicios.append(pagina)
+        pagina += paginas
+    return inicios
 
 
 class AuditoriaPDFGenerator:
@@ -29,28 +122,50 @@ class AuditoriaPDFGenerator:
     Gerador de PDF de auditoria para comissões por recebimento.
     """
     
-    def gerar_pdf(self, dados_auditoria: dict, filepath: str) -> str:
+    def __init__(self, workers: int = 0):
+        """
+        Args:
+            workers: Processos usados para renderizar as seções em paralelo
+                (0 ou 1 = geração em série em um único doc.build)
+        """
+        self.workers = workers or 0
+    
+    def gerar_pdf(
+        self,
+        dados_auditoria: dict,
+        filepath: str,
+        cache: Optional[CacheFragmentosPDF] = None,
+        impressoes: Optional[List[str]] = None
+    ) -> str:
         """
         Gera o PDF de auditoria.
         
         Args:
             dados_auditoria: Dicionário com dados completos para auditoria
             filepath: Caminho onde o PDF será salvo
+            cache: Cache de fragmentos por processo (opcional)
+            impressoes: Impressão digital de cada processo, na ordem de
+                dados_auditoria['processos'] (obrigatória com cache)
             
         Returns:
             Caminho do arquivo PDF gerado
         """
         print(f"[AUDITORIA] [PDF] Iniciando geração do PDF: {filepath}")
         
+        processos = dados_auditoria.get('processos', [])
+        if cache is not None and (not impressoes or len(impressoes) != len(processos)):
+            cache = None
+        if processos and (cache is not None or (self.workers > 1 and len(processos) > 1)):
+            if not mesclagem_disponivel():
+                print("[AUDITORIA] [PDF] pypdf não disponível para mesclar fragmentos; gerando em série.")
+            else:
+                try:
+                    return self._gerar_pdf_fragmentos(dados_auditoria, filepath, cache, impressoes)
+                except Exception as e:
+                    print(f"[AUDITORIA] [PDF] AVISO: geração por fragmentos falhou ({e}); gerando em série.")
+        
         # Criar documento
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=A4,
-            rightMargin=MARGEM_DIREITA,
-            leftMargin=MARGEM_ESQUERDA,
-            topMargin=MARGEM_SUPERIOR,
-            bottomMargin=MARGEM_INFERIOR
-        )
+        doc = _novo_documento(filepath)
         
         # Story (lista de elementos do PDF)
         story = []
@@ -74,35 +189,7 @@ class AuditoriaPDFGenerator:
         
         for idx, processo_dados in enumerate(processos, 1):
             print(f"[AUDITORIA] [PDF] Processando processo {idx}/{len(processos)}...")
-            
-            processo_id = processo_dados['dados_gerais']['processo_id']
-            
-            # Separador de processo
-            section_header.gerar_separador_processo(story, processo_id, idx)
-            
-            # Seção 1: Dados do processo
-            section_processo.gerar_secao_dados_processo(story, processo_dados)
-            
-            # Seção 2: Itens do processo
-            section_processo.gerar_secao_itens_processo(story, processo_dados)
-            
-            # Seção 3: Pagamentos
-            section_pagamentos.gerar_secao_pagamentos(story, processo_dados)
-            
-            # Seção 4: Colaboradores
-            section_colaboradores.gerar_secao_colaboradores(story, processo_dados)
-            
-            # Seção 5: TCMP
-            section_tcmp.gerar_secao_tcmp(story, processo_dados)
-            
-            # Seção 6: FCMP
-            section_fcmp.gerar_secao_fcmp(story, processo_dados)
-            
-            # Seção 7: Comissões
-            section_comissoes.gerar_secao_comissoes(story, processo_dados)
-            
-            # Seção 8: Resumo
-            section_resumo.gerar_secao_resumo(story, processo_dados)
+            gerar_secoes_processo(story, processo_dados, idx)
         
         # Construir PDF
         print("[AUDITORIA] [PDF] Construindo PDF final...")
@@ -121,4 +208,126 @@ class AuditoriaPDFGenerator:
             import traceback
             traceback.print_exc()
             raise
-
+    
+    def _gerar_pdf_fragmentos(
+        self,
+        dados_auditoria: dict,
+        filepath: str,
+        cache: Optional[CacheFragmentosPDF] = None,
+        impressoes: Optional[List[str]] = None
+    ) -> str:
+        """
+        Monta o PDF a partir de um fragmento por processo: capa + índice +
+        fragmentos mesclados, com marcadores por processo.
+        
+        Fragmentos presentes no cache (mesma impressão digital) são
+        reaproveitados; os demais são renderizados, em um pool de processos
+        quando workers > 1, e guardados no cache.
+        
+        A numeração dos processos (índice e separadores) é a mesma da geração em
+        série; o índice passa a mostrar a página inicial de cada processo.
+        """
+        processos = dados_auditoria['processos']
+        inicio = time.perf_counter()
+        pasta = tempfile.mkdtemp(prefix="auditoria_pdf_")
+        try:
+            fragmentos = [None] * len(processos)
+            paginas = [0] * len(processos)
+            pendentes = []
+            for i in range(len(processos)):
+                encontrado = cache.obter(impressoes[i]) if cache is not None else None
+                if encontrado:
+                    fragmentos[i], paginas[i] = encontrado
+                else:
+                    fragmentos[i] = os.path.join(pasta, f"processo_{i + 1:05d}.pdf")
+                    pendentes.append(i)
+            if cache is not None:
+                print(
+                    f"[AUDITORIA] [PDF] Fragmentos reaproveitados do cache: "
+                    f"{len(processos) - len(pendentes)}/{len(processos)}"
+                )
+            
+            workers = min(self.workers, len(pendentes))
+            if workers > 1:
+                print(
+                    f"[AUDITORIA] [PDF] Renderizando {len(pendentes)} processo(s) "
+                    f"em {workers} processo(s) paralelo(s)..."
+                )
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futuros = [
+                        (i, pool.submit(renderizar_processo, processos[i], i + 1, fragmentos[i]))
+                        for i in pendentes
+                    ]
+                    for i, futuro in futuros:
+                        paginas[i] = futuro.result()
+            elif pendentes:
+                print(f"[AUDITORIA] [PDF] Renderizando {len(pendentes)} processo(s)...")
+                for i in pendentes:
+                    paginas[i] = renderizar_processo(processos[i], i + 1, fragmentos[i])
+            
+            if cache is not None:
+                for i in pendentes:
+                    try:
+                        processo_id = str(processos[i]['dados_gerais']['processo_id'])
+                        cache.guardar(impressoes[i], fragmentos[i], paginas[i], processo_id)
+                    except Exception as e:
+                        print(f"[AUDITORIA] [PDF] AVISO: fragmento não guardado no cache ({e})")
+            
+            capa = os.path.join(pasta, "capa_indice.pdf")
+            paginas_capa = self._renderizar_capa_indice(dados_auditoria, capa, paginas)
+            inicios = paginas_iniciais(paginas_capa, paginas)
+            
+            marcadores = [("Capa e índice", 0)]
+            for idx, (processo_dados, pagina) in enumerate(zip(processos, inicios), 1):
+                processo_id = processo_dados['dados_gerais']['processo_id']
+                marcadores.append((f"Processo {idx}: {processo_id}", pagina - 1))
+            
+            print("[AUDITORIA] [PDF] Mesclando fragmentos...")
+            mesclar_pdfs([capa] + fragmentos, filepath, marcadores)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+        
+        if cache is not None:
+            removidos = cache.limpar(impressoes)
+            if removidos:
+                print(f"[AUDITORIA] [PDF] {removidos} fragmento(s) obsoleto(s) removido(s) do cache")
+        
+        print(
+            f"[AUDITORIA] [PDF] PDF gerado com sucesso: {filepath} "
+            f"({paginas_capa + sum(paginas)} página(s) em {time.perf_counter() - inicio:.1f}s)"
+        )
+        if os.path.exists(filepath):
+            tamanho = os.path.getsize(filepath)
+            print(f"[AUDITORIA] [PDF] Tamanho do arquivo: {tamanho / 1024:.2f} KB")
+        return filepath
+    
+    def _renderizar_capa_indice(self, dados_auditoria: dict, filepath: str, paginas: List[int]) -> int:
+        """
+        Renderiza capa + índice com a página inicial de cada processo.
+        
+        Se o número de páginas do próprio índice mudar ao incluir as páginas,
+        renderiza de novo com a contagem corrigida.
+        
+        Returns:
+            Número de páginas de capa + índice
+        """
+        paginas_capa = 2
+        for _ in range(3):
+            story = []
+            section_header.gerar_capa(
+                story,
+                dados_auditoria['mes'],
+                dados_auditoria['ano'],
+                dados_auditoria['data_geracao']
+            )
+            section_header.gerar_indice(
+                story,
+                dados_auditoria['processos'],
+                paginas_iniciais(paginas_capa, paginas)
+            )
+            doc = _novo_documento(filepath)
+            doc.build(story)
+            if doc.page == paginas_capa:
+                break
+            paginas_capa = doc.page
+        return paginas_capa
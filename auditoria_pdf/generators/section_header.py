@@ -71,13 +71,15 @@ def gerar_capa(story, mes: int, ano: int, data_geracao: datetime):
     adicionar_quebra_pagina(story)
 
 
-def gerar_indice(story, processos: list):
+def gerar_indice(story, processos: list, paginas: list = None):
     """
     Gera o índice do relatório.
     
     Args:
         story: Lista de elementos do PDF
         processos: Lista de dados dos processos
+        paginas: Página inicial de cada processo (opcional; conhecida quando
+            o PDF é montado a partir de fragmentos)
     """
     # Título do índice
     titulo = Paragraph("ÍNDICE DE PROCESSOS", STYLE_TITULO_SECAO)
@@ -106,6 +108,8 @@ def gerar_indice(story, processos: list):
             cliente = cliente[:47] + "..."
         
         item_texto = f"{idx}. <b>Processo {processo_id}</b> - {cliente} - {valor_total}"
+        if paginas and idx <= len(paginas):
+            item_texto += f" - pág. {paginas[idx - 1]}"
         item = Paragraph(item_texto, STYLE_CORPO)
         story.append(item)
         adicionar_espacamento(story, 'pequeno')
@@ -92,3 +92,37 @@ def sanitizar_texto(texto: str) -> str:
     
     return texto_str
 
+
+
+def mesclagem_disponivel() -> bool:
+    """Indica se o pypdf (opcional) está instalado para mesclar fragmentos."""
+    try:
+        import pypdf  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def mesclar_pdfs(arquivos: list, destino: str, marcadores: list = None) -> int:
+    """
+    Mescla arquivos PDF em um único arquivo, na ordem recebida (requer pypdf).
+    
+    Args:
+        arquivos: Caminhos dos PDFs a mesclar
+        destino: Caminho do PDF final
+        marcadores: Lista de (título, página 0-based) para os marcadores do leitor
+        
+    Returns:
+        Número de páginas do PDF final
+    """
+    from pypdf import PdfWriter
+    
+    writer = PdfWriter()
+    for arquivo in arquivos:
+        writer.append(arquivo)
+    for titulo, pagina in marcadores or []:
+        if 0 <= pagina < len(writer.pages):
+            writer.add_outline_item(titulo, pagina)
+    with open(destino, "wb") as f:
+        writer.write(f)
+    return len(writer.pages)
@@ -1,11 +1,10 @@
-﻿import pandas as pd
+import pandas as pd
 import numpy as np
 import os
-import preparar_dados_mensais
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
 import calendar
+import importlib
+import importlib.util
 import time
 import logging
 import unicodedata
@@ -21,58 +20,134 @@ import os, sys
 # Imports dos novos serviços refatorados (FASE 1-4)
 from models.process_state import ProcessStateManager
 
-# Imports opcionais dos serviços (podem não existir ainda)
-try:
-    from services.payment_mapper import PaymentMapper
-    from services.payment_commission_calculator import PaymentCommissionCalculator
-    from services.payment_processor import PaymentProcessor
-    from services.reconciliation_calculator import ReconciliationCalculator
-    from services.reconciliation_processor import ReconciliationProcessor
-    from services.process_metrics_calculator import ProcessMetricsCalculator
-    from services.financial_payments_loader import FinancialPaymentsLoader
-except ImportError:
-    # Criar classes mock mínimas se os módulos não existirem
-    class PaymentMapper:
-        pass
-
-    class PaymentCommissionCalculator:
-        pass
-
-    class PaymentProcessor:
-        pass
-
-    class ReconciliationCalculator:
-        pass
-
-    class ReconciliationProcessor:
-        pass
-
-    class ProcessMetricsCalculator:
-        def __init__(self, **kwargs):
+# Módulos pesados ou de uso eventual são importados na primeira utilização
+# (ver __getattr__ abaixo e --profile-startup):
+#   - preparar_dados_mensais (converte a Análise Comercial ao ser importado);
+#   - busca de câmbio (RateFetcher/RateValidator, requests);
+#   - reportlab (PDF de detalhamento);
+#   - serviços opcionais em services.* (podem não existir ainda).
+MODULOS_SOB_DEMANDA = (
+    "preparar_dados_mensais",
+    "src.currency.rate_fetcher",
+    "src.currency.rate_validator",
+    "reportlab.platypus",
+    "openpyxl",
+)
+
+_SERVICOS_LEGADOS = None
+
+
+def _servicos_legados() -> Dict[str, type]:
+    """Classes dos serviços em services.* (ou substitutos mínimos), carregadas uma vez."""
+    global _SERVICOS_LEGADOS
+    if _SERVICOS_LEGADOS is not None:
+        return _SERVICOS_LEGADOS
+    try:
+        from services.payment_mapper import PaymentMapper
+        from services.payment_commission_calculator import PaymentCommissionCalculator
+        from services.payment_processor import PaymentProcessor
+        from services.reconciliation_calculator import ReconciliationCalculator
+        from services.reconciliation_processor import ReconciliationProcessor
+        from services.process_metrics_calculator import ProcessMetricsCalculator
+        from services.financial_payments_loader import FinancialPaymentsLoader
+    except ImportError:
+        # Criar classes mock mínimas se os módulos não existirem
+        class PaymentMapper:
+            pass
+
+        class PaymentCommissionCalculator:
             pass
 
-        def calculate_for_process(self, processo):
-            return {}, {}
+        class PaymentProcessor:
+            pass
+
+        class ReconciliationCalculator:
+            pass
+
+        class ReconciliationProcessor:
+            pass
+
+        class ProcessMetricsCalculator:
+            def __init__(self, **kwargs):
+                pass
 
-    class FinancialPaymentsLoader:
-        def load_from_file(self, filepath):
-            return pd.DataFrame()
+            def calculate_for_process(self, processo):
+                return {}, {}
+
+        class FinancialPaymentsLoader:
+            def load_from_file(self, filepath):
+                return pd.DataFrame()
+
+    _SERVICOS_LEGADOS = {
+        "PaymentMapper": PaymentMapper,
+        "PaymentCommissionCalculator": PaymentCommissionCalculator,
+        "PaymentProcessor": PaymentProcessor,
+        "ReconciliationCalculator": ReconciliationCalculator,
+        "ReconciliationProcessor": ReconciliationProcessor,
+        "ProcessMetricsCalculator": ProcessMetricsCalculator,
+        "FinancialPaymentsLoader": FinancialPaymentsLoader,
+    }
+    return _SERVICOS_LEGADOS
+
+
+def __getattr__(nome: str):
+    """Compatibilidade: nomes antes importados no topo do módulo, agora sob demanda."""
+    if nome == "preparar_dados_mensais":
+        return importlib.import_module("preparar_dados_mensais")
+    if nome in ("RateFetcher", "RateValidator"):
+        return getattr(importlib.import_module("src.currency"), nome)
+    if nome == "requests":
+        try:
+            return importlib.import_module("requests")
+        except Exception:
+            return None
+    if nome in (
+        "PaymentMapper",
+        "PaymentCommissionCalculator",
+        "PaymentProcessor",
+        "ReconciliationCalculator",
+        "ReconciliationProcessor",
+        "ProcessMetricsCalculator",
+        "FinancialPaymentsLoader",
+    ):
+        return _servicos_legados()[nome]
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 
 # Imports de compatibilidade - funções utilitárias migradas para src/utils/
 from src.utils.normalization import (
     normalize_text as _normalize_text,
     calcular_atingimento as _calcular_atingimento,
+    categorize_shared_columns,
 )
-from src.utils.styling import style_output_workbook
+from src.utils.styling import style_output_workbook, cores_por_coluna
 
 # Imports dos novos loaders de dados
 from src.io.config_loader import ConfigLoader
-from src.io.data_loader import DataLoader
+from src.io.data_loader import DataLoader, ENTRADAS_INDEPENDENTES_DO_MES
+from src.io.saida_excel import PlanilhaSaida
 from src.utils.logging import ValidationLogger
+from src.utils import diagnostics
+from src.core.regras_comissao import RegraComissaoIndex
+from src.core.faturamento_fornecedores import FaturamentoFornecedoresCache
+from src.core.motor_faturamento import MotorComissoesLote
+from src.core.fator_correcao_cache import (
+    FatorCorrecaoCache,
+    copiar_detalhes_fc,
+    normalizar_valor_chave,
+)
+from src.core.goal_index import (
+    TABELAS_METAS,
+    GoalIndex,
+    MetaNaoEncontrada,
+    TabelaMetasIndisponivel,
+)
+from src.core.process_index import ProcessIndex
+from src.recebimento.estado.state_backend import criar_backend_estado
 
-# Novos serviços de câmbio centralizados
-from src.currency import RateFetcher, RateStorage, RateValidator, RateCalculator
+# Novos serviços de câmbio centralizados (busca/validação: sob demanda)
+from src.currency.rate_storage import RateStorage
+from src.currency.rate_calculator import RateCalculator
 
 # Flag simples de verbosidade (NÃO muda cálculo)
 LOG_VERBOSE = os.getenv("COMISSOES_VERBOSE", "0") == "1"
@@ -196,6 +271,15 @@ def _debug(msg: str):
         print(msg)
 
 
+def _diag_rent(msg: str):
+    """Depuração de rentabilidade (DEBUG_RENTABILIDADE=1 ou COMISSOES_VERBOSE=1).
+
+    Nos caminhos quentes, proteger o bloco com diagnostics.ativo("rentabilidade")
+    para não pagar a formatação das mensagens.
+    """
+    diagnostics.debug("rentabilidade", msg)
+
+
 # ======== ESTILIZAÇÃO DO EXCEL (pós-processamento, sem mudar dados) ========
 # Funções de estilização foram migradas para src/utils/styling.py
 # Imports movidos para o topo do arquivo junto com outros imports de compatibilidade
@@ -211,20 +295,11 @@ def _debug(msg: str):
 # TODO: Remover estas definições após migração completa
 
 
+# Biblioteca para PDF: verificada sem importar (o import fica em _gerar_detalhamento_pdf).
+# Se não existir, o script funcionará sem gerar o PDF.
 try:
-    import requests
-except Exception:
-    requests = None
-
-# Tenta importar a biblioteca para PDF. Se não existir, o script funcionará sem gerar o PDF.
-try:
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_LEFT
-    from reportlab.lib.units import inch
-
-    REPORTLAB_DISPONIVEL = True
-except ImportError:
+    REPORTLAB_DISPONIVEL = importlib.util.find_spec("reportlab") is not None
+except (ImportError, ValueError):
     REPORTLAB_DISPONIVEL = False
 
 # --- CONFIGURAÇÕES E CONSTANTES ---
@@ -244,6 +319,33 @@ FORCE_DEBUG_TERMINAL = False
 # Nome do arquivo de saída (será gerado dinamicamente em _gerar_saida_impl)
 NOME_ARQUIVO_SAIDA = None
 
+# Perfis de saída (PARAMS.perfil_saida), do mais enxuto ao mais completo
+PERFIS_SAIDA = ("producao", "auditoria", "depuracao")
+PERFIS_SAIDA_ALIASES = {
+    "production": "producao",
+    "produção": "producao",
+    "audit": "auditoria",
+    "debug": "depuracao",
+    "depuração": "depuracao",
+}
+# Perfil mínimo das abas opcionais de Comissoes_Calculadas (as demais são sempre geradas)
+PERFIL_ABAS_SAIDA = {
+    "VALIDACAO": "auditoria",
+    "DIAGNOSTICO_FALTAS": "auditoria",
+    "DEBUG_RECEBIMENTOS_RAW": "depuracao",
+    "DEBUG_RECEBIMENTOS": "depuracao",
+    "DEBUG_ENV": "depuracao",
+    "DEBUG_ANALISE_INFO": "depuracao",
+    "DEBUG_ANALISE_SAMPLE": "depuracao",
+    "DEBUG_FORNECEDORES": "depuracao",
+    "DEBUG_PAGAMENTOS_FINANCEIRO": "depuracao",
+}
+
+
+def _nao_vazia(df):
+    """O próprio DataFrame, ou None quando ausente/vazio (a aba não é gravada)."""
+    return df if df is not None and not df.empty else None
+
 
 class CalculoComissao:
     """
@@ -258,6 +360,20 @@ class CalculoComissao:
         self.validation_logger = ValidationLogger()
         self.legacy_token = "__legacy__"
         self.cache_regras = {}
+        # Índice pré-compilado de CONFIG_COMISSAO (ver _obter_indice_regras)
+        self._indice_regras = None
+        self._indice_regras_origem = None
+        # Índice de metas por tipo, com relatório de faltas (ver _obter_indice_metas)
+        self._indice_metas = None
+        self._indice_metas_origem = ()
+        # Índice por processo da ANALISE_COMERCIAL_COMPLETA (ver _obter_indice_processos)
+        self._indice_processos = None
+        self._indice_processos_origem = None
+        # Cache de faturamento por fornecedor (ver _obter_cache_fornecedores)
+        self._cache_fornecedores = None
+        self._cache_fornecedores_origem = None
+        # Cache LRU do FC por (colaborador, cargo, contexto, período) (ver _obter_cache_fc)
+        self._cache_fc = None
         # Serviços de câmbio baseados em JSON persistente
         self.rate_storage = RateStorage("data/currency_rates/monthly_avg_rates.json")
         self.rate_calculator = RateCalculator(self.rate_storage)
@@ -285,6 +401,17 @@ class CalculoComissao:
         self.pagamentos_processados_por_processo = {}
         # NOVO (DEBUG): DataFrame com pagamentos normalizados do FinancialPaymentsLoader
         self.pagamentos_financeiro_normalizados = pd.DataFrame()
+        # Execução em lote (ver executar_lote): entradas independentes do mês
+        # compartilhadas entre os meses e estado de recebimento do mês anterior
+        self.entradas_compartilhadas = None
+        self.estado_recebimento = None
+        # Worker do adapter: abas de Regras_Comissoes já carregadas ({} = preencher)
+        self.configuracoes_compartilhadas = None
+        # (índice de retenção do preparador, mes, ano) — ver _obter_retencao_linha
+        self.indice_retencao = None
+        # Última saída: segundos de construção + gravação por aba e abas fora do perfil
+        self.tempos_abas_saida = {}
+        self.abas_fora_do_perfil = []
 
     def _log_validacao(self, nivel, mensagem, contexto={}):
         """Adiciona uma entrada ao log de validação."""
@@ -315,7 +442,7 @@ class CalculoComissao:
         """
         try:
             processo_str = str(processo).strip() if processo else None
-            if not processo_str:
+            if not processo_str or not self._perfil_saida_inclui("depuracao"):
                 return
 
             # Inicializar lista se não existir
@@ -348,8 +475,24 @@ class CalculoComissao:
             config_path = os.path.join("config", ARQUIVO_REGRAS_XLSX)
             if not os.path.exists(config_path):
                 config_path = ARQUIVO_REGRAS_XLSX
-            config_data = config_loader.load_configs(config_path)
+            if self.configuracoes_compartilhadas:
+                config_data = {
+                    nome: df.copy() if hasattr(df, "copy") else df
+                    for nome, df in self.configuracoes_compartilhadas.items()
+                }
+                _info("[CARGA] Reaproveitando configurações em memória")
+            else:
+                config_data = config_loader.load_configs(config_path)
+                if self.configuracoes_compartilhadas is not None:
+                    self.configuracoes_compartilhadas.update(
+                        {
+                            nome: df.copy() if hasattr(df, "copy") else df
+                            for nome, df in config_data.items()
+                        }
+                    )
             self.data.update(config_data)
+            # Índice de metas (GoalIndex) construído uma vez sobre as configurações carregadas
+            self._obter_indice_metas()
 
             # Processar PARAMS primeiro para obter mes/ano se necessário
             params_df = self.data.get("PARAMS", pd.DataFrame())
@@ -400,6 +543,16 @@ class CalculoComissao:
 
             # NOVO: Usar DataLoader para carregar dados de entrada
             data_loader = DataLoader(validation_logger=self.validation_logger)
+            quadros_preparados = self._obter_quadros_preparados(
+                mes_apuracao, ano_apuracao
+            )
+            if self.entradas_compartilhadas:
+                for nome, df in self.entradas_compartilhadas.items():
+                    quadros_preparados.setdefault(nome, df.copy())
+                _info(
+                    "[CARGA] Reaproveitando do lote: "
+                    + ", ".join(self.entradas_compartilhadas)
+                )
             input_data = data_loader.load_input_data(
                 mes=mes_apuracao,
                 ano=ano_apuracao,
@@ -408,8 +561,17 @@ class CalculoComissao:
                 arquivo_conversoes=ARQUIVO_CONVERSOES,
                 arquivo_faturados_ytd=ARQUIVO_FATURADOS_YTD,
                 arquivo_rentabilidade=ARQUIVO_RENTABILIDADE,
+                paralelo=self._modo_carga_entradas() == "paralelo",
+                progress_callback=self._registrar_tempo_carga,
+                quadros_preparados=quadros_preparados,
             )
+            if self.entradas_compartilhadas is not None:
+                for nome in ENTRADAS_INDEPENDENTES_DO_MES:
+                    if nome in input_data and nome not in self.entradas_compartilhadas:
+                        self.entradas_compartilhadas[nome] = input_data[nome].copy()
             self.data.update(input_data)
+            # Índice por processo construído uma vez sobre a Análise Comercial carregada
+            self._obter_indice_processos()
 
             # Garantir que METAS_FORNECEDORES existe (já foi normalizado pelo ConfigLoader)
             if "METAS_FORNECEDORES" not in self.data:
@@ -611,9 +773,23 @@ class CalculoComissao:
             self.data["CARGOS"], left_on="cargo", right_on="nome_cargo", how="left"
         )
 
+        if self._usar_colunas_categoricas():
+            try:
+                aplicadas = categorize_shared_columns(self.data)
+                if aplicadas:
+                    _info(
+                        "[CATEGORIAS] Colunas categóricas compartilhadas: "
+                        + ", ".join(f"{d} ({n})" for d, n in aplicadas.items())
+                    )
+            except Exception as e:
+                self._log_validacao(
+                    "AVISO", f"Falha ao converter colunas categóricas: {e}", {}
+                )
+
     def _calcular_realizado(self):
         """Calcula os valores realizados para faturamento, conversão e rentabilidade."""
         self.realizado = {}
+        self._invalidar_cache_fc()
         # FATURADOS: garantir colunas esperadas e agregar com segurança
         df_fat = self.data.get("FATURADOS", pd.DataFrame()).copy()
         if "Valor Realizado" not in df_fat.columns:
@@ -661,22 +837,23 @@ class CalculoComissao:
         # ========================================================================
         # DEBUG RENTABILIDADE: Carregamento de Rentabilidade Realizada
         # ========================================================================
-        print("\n" + "=" * 80)
-        print("DEBUG RENTABILIDADE: CARREGAMENTO DE RENTABILIDADE REALIZADA")
-        print("=" * 80)
-        print(f"DataFrame carregado: {len(rent_realizada)} linhas")
-        if not rent_realizada.empty:
-            print(f"Colunas disponíveis: {list(rent_realizada.columns)}")
-            print(f"Primeiras 3 linhas:")
-            for idx, row in rent_realizada.head(3).iterrows():
-                print(
-                    f"  - Linha: {row.get('linha', 'N/A')}, Grupo: {row.get('Grupo', 'N/A')}, "
-                    f"Subgrupo: {row.get('Subgrupo', 'N/A')}, Tipo: {row.get('Tipo de Mercadoria', 'N/A')}, "
-                    f"Rent: {row.get('rentabilidade_realizada_pct', 'N/A')}"
-                )
-        else:
-            print("AVISO: DataFrame de rentabilidade está VAZIO!")
-        print("=" * 80 + "\n")
+        if diagnostics.ativo("rentabilidade"):
+            _diag_rent("\n" + "=" * 80)
+            _diag_rent("DEBUG RENTABILIDADE: CARREGAMENTO DE RENTABILIDADE REALIZADA")
+            _diag_rent("=" * 80)
+            _diag_rent(f"DataFrame carregado: {len(rent_realizada)} linhas")
+            if not rent_realizada.empty:
+                _diag_rent(f"Colunas disponíveis: {list(rent_realizada.columns)}")
+                _diag_rent(f"Primeiras 3 linhas:")
+                for idx, row in rent_realizada.head(3).iterrows():
+                    _diag_rent(
+                        f"  - Linha: {row.get('linha', 'N/A')}, Grupo: {row.get('Grupo', 'N/A')}, "
+                        f"Subgrupo: {row.get('Subgrupo', 'N/A')}, Tipo: {row.get('Tipo de Mercadoria', 'N/A')}, "
+                        f"Rent: {row.get('rentabilidade_realizada_pct', 'N/A')}"
+                    )
+            else:
+                _diag_rent("AVISO: DataFrame de rentabilidade está VAZIO!")
+            _diag_rent("=" * 80 + "\n")
 
         # NOVO: Garantir que valores de índice sejam strings normalizadas para correspondência exata
         if not rent_realizada.empty:
@@ -690,124 +867,102 @@ class CalculoComissao:
         )["rentabilidade_realizada_pct"]
 
         # DEBUG: Mostrar índices criados
-        print("=" * 80)
-        print("DEBUG RENTABILIDADE: ÍNDICES CRIADOS DA SERIES")
-        print("=" * 80)
-        if isinstance(self.realizado["rentabilidade"], pd.Series):
-            print(f"Total de índices: {len(self.realizado['rentabilidade'])}")
-            print(f"Primeiros 5 índices:")
-            for idx in list(self.realizado["rentabilidade"].index)[:5]:
-                print(f"  - {idx} -> {self.realizado['rentabilidade'][idx]}")
-        else:
-            print("AVISO: Series de rentabilidade não foi criada corretamente!")
-        print("=" * 80 + "\n")
+        if diagnostics.ativo("rentabilidade"):
+            _diag_rent("=" * 80)
+            _diag_rent("DEBUG RENTABILIDADE: ÍNDICES CRIADOS DA SERIES")
+            _diag_rent("=" * 80)
+            if isinstance(self.realizado["rentabilidade"], pd.Series):
+                _diag_rent(f"Total de índices: {len(self.realizado['rentabilidade'])}")
+                _diag_rent(f"Primeiros 5 índices:")
+                for idx in list(self.realizado["rentabilidade"].index)[:5]:
+                    _diag_rent(f"  - {idx} -> {self.realizado['rentabilidade'][idx]}")
+            else:
+                _diag_rent("AVISO: Series de rentabilidade não foi criada corretamente!")
+            _diag_rent("=" * 80 + "\n")
+
+    def _obter_indice_metas(self) -> GoalIndex:
+        """
+        Retorna o índice de metas (GoalIndex), reconstruído somente quando
+        METAS_APLICACAO, METAS_INDIVIDUAIS ou META_RENTABILIDADE forem trocadas.
+        """
+        origem = tuple(self.data.get(nome) for nome in TABELAS_METAS)
+        indice = getattr(self, "_indice_metas", None)
+        if indice is None or any(
+            atual is not anterior
+            for atual, anterior in zip(origem, self._indice_metas_origem)
+        ):
+            indice = GoalIndex(*origem)
+            self._indice_metas = indice
+            self._indice_metas_origem = origem
+        return indice
+
+    def _obter_indice_processos(self) -> ProcessIndex:
+        """
+        Retorna o índice por processo (ProcessIndex) da ANALISE_COMERCIAL_COMPLETA,
+        reconstruído somente quando o DataFrame for trocado.
+        """
+        df_anal = self.data.get("ANALISE_COMERCIAL_COMPLETA")
+        indice = getattr(self, "_indice_processos", None)
+        if indice is None or self._indice_processos_origem is not df_anal:
+            indice = ProcessIndex(df_anal)
+            self._indice_processos = indice
+            self._indice_processos_origem = df_anal
+        return indice
 
     def _get_meta(self, tipo_meta, chave):
         """Busca o valor da meta correspondente."""
+        indice = self._obter_indice_metas()
         try:
-            if tipo_meta in ["faturamento_linha", "conversao_linha"]:
-                df = self.data["METAS_APLICACAO"]
-                tipo_meta_busca = tipo_meta.replace("_linha", "")
-                linha, tipo_mercadoria = chave
-                valor = df[
-                    (df["linha"] == linha)
-                    & (df["tipo_mercadoria"] == tipo_mercadoria)
-                    & (df["tipo_meta"] == tipo_meta_busca)
-                ]["valor_meta"].iloc[0]
-                return valor
-            elif tipo_meta in ["faturamento_individual", "conversao_individual"]:
-                df = self.data["METAS_INDIVIDUAIS"]
-                tipo_meta_busca = tipo_meta.replace("_individual", "")
-                valor = df[
-                    (df["colaborador"] == chave) & (df["tipo_meta"] == tipo_meta_busca)
-                ]["valor_meta"].iloc[0]
-                return valor
-            elif tipo_meta == "rentabilidade":
+            if tipo_meta == "rentabilidade":
                 # ========================================================================
                 # DEBUG RENTABILIDADE: Busca de Meta de Rentabilidade
                 # ========================================================================
-                df = self.data["META_RENTABILIDADE"]
                 linha, grupo, subgrupo, tipo_mercadoria = chave
+                debug_rent = diagnostics.ativo("rentabilidade")
 
-                print(f"\n[DEBUG RENTABILIDADE] Buscando meta de rentabilidade:")
-                print(
-                    f"  - Chave original: linha='{linha}', grupo='{grupo}', subgrupo='{subgrupo}', tipo='{tipo_mercadoria}'"
-                )
-                print(f"  - Total de metas disponíveis: {len(df)}")
-
-                # NOVO: Normalizar valores da chave para garantir correspondência exata
-                linha_norm = (
-                    str(linha).strip()
-                    if linha is not None and not pd.isna(linha)
-                    else ""
-                )
-                grupo_norm = (
-                    str(grupo).strip()
-                    if grupo is not None and not pd.isna(grupo)
-                    else ""
-                )
-                subgrupo_norm = (
-                    str(subgrupo).strip()
-                    if subgrupo is not None and not pd.isna(subgrupo)
-                    else ""
-                )
-                tipo_norm = (
-                    str(tipo_mercadoria).strip()
-                    if tipo_mercadoria is not None and not pd.isna(tipo_mercadoria)
-                    else ""
-                )
-
-                print(
-                    f"  - Chave normalizada: linha='{linha_norm}', grupo='{grupo_norm}', subgrupo='{subgrupo_norm}', tipo='{tipo_norm}'"
-                )
-
-                # Buscar com valores normalizados
-                filtro = (
-                    (df["linha"].astype(str).str.strip() == linha_norm)
-                    & (df["grupo"].astype(str).str.strip() == grupo_norm)
-                    & (df["subgrupo"].astype(str).str.strip() == subgrupo_norm)
-                    & (df["tipo_mercadoria"].astype(str).str.strip() == tipo_norm)
-                )
-                candidatos = df[filtro]
-                print(
-                    f"  - Candidatos encontrados (busca normalizada): {len(candidatos)}"
-                )
-
-                if len(candidatos) > 0:
-                    valor = candidatos["meta_rentabilidade_alvo_pct"].iloc[0]
-                    print(f"  - Meta encontrada: {valor}")
-                    print("=" * 80)
-                    return valor
-                else:
-                    # DEBUG: Log quando não encontra
-                    print(
-                        f"  - AVISO: Meta não encontrada para chave normalizada. Tentando busca sem normalização..."
+                if debug_rent:
+                    _diag_rent(f"\n[DEBUG RENTABILIDADE] Buscando meta de rentabilidade:")
+                    _diag_rent(
+                        f"  - Chave original: linha='{linha}', grupo='{grupo}', subgrupo='{subgrupo}', tipo='{tipo_mercadoria}'"
                     )
-                    # Fallback: tentar sem normalização (busca original)
-                    filtro_original = (
-                        (df["linha"] == linha)
-                        & (df["grupo"] == grupo)
-                        & (df["subgrupo"] == subgrupo)
-                        & (df["tipo_mercadoria"] == tipo_mercadoria)
+                    _diag_rent(f"  - Total de metas disponíveis: {indice.total_rentabilidade}")
+                    linha_norm, grupo_norm, subgrupo_norm, tipo_norm = (
+                        indice.chave_rentabilidade_normalizada(chave)
                     )
-                    candidatos_original = df[filtro_original]
-                    print(
-                        f"  - Candidatos encontrados (busca original): {len(candidatos_original)}"
+                    _diag_rent(
+                        f"  - Chave normalizada: linha='{linha_norm}', grupo='{grupo_norm}', subgrupo='{subgrupo_norm}', tipo='{tipo_norm}'"
                     )
-                    if len(candidatos_original) > 0:
-                        valor = candidatos_original["meta_rentabilidade_alvo_pct"].iloc[
-                            0
-                        ]
-                        print(f"  - Meta encontrada (busca original): {valor}")
-                        print("=" * 80)
-                        return valor
-                    else:
-                        print(
+
+                try:
+                    valor, origem = indice.buscar_rentabilidade(chave)
+                except TabelaMetasIndisponivel:
+                    raise
+                except MetaNaoEncontrada as e:
+                    # Sem meta nem com busca normalizada nem original: retorna None
+                    # (o FC registra o aviso); a falta vai para o relatório do índice
+                    if debug_rent:
+                        _diag_rent(
                             f"  - ERRO: Meta NÃO encontrada nem com busca normalizada nem original!"
                         )
-                        print("=" * 80)
-                    # Se ainda não encontrou, deixar o erro ser capturado pelo except abaixo
+                        _diag_rent("=" * 80)
+                    indice.registrar_falta(tipo_meta, chave, e.args[0] if e.args else "")
+                    return None
+
+                if debug_rent:
+                    if origem == "normalizada":
+                        _diag_rent(f"  - Meta encontrada: {valor}")
+                    else:
+                        _diag_rent(f"  - Meta encontrada (busca original): {valor}")
+                    _diag_rent("=" * 80)
+                return valor
+
+            return indice.buscar(tipo_meta, chave)
         except (IndexError, KeyError) as e:
+            # Cada chave ausente é registrada uma única vez no log de validação;
+            # as repetições ficam apenas no relatório de faltas do GoalIndex.
+            motivo = e.args[0] if isinstance(e, MetaNaoEncontrada) and e.args else str(e)
+            if not indice.registrar_falta(tipo_meta, chave, motivo):
+                return None
             # NOVO: Log mais detalhado para rentabilidade
             if tipo_meta == "rentabilidade":
                 linha, grupo, subgrupo, tipo_mercadoria = (
@@ -825,14 +980,14 @@ class CalculoComissao:
                         "grupo": grupo,
                         "subgrupo": subgrupo,
                         "tipo_mercadoria": tipo_mercadoria,
-                        "erro": str(e),
+                        "erro": motivo,
                     },
                 )
             else:
                 self._log_validacao(
                     "AVISO",
                     f"Meta não encontrada para tipo '{tipo_meta}' e chave '{chave}'.",
-                    {"tipo_meta": tipo_meta, "chave": chave, "erro": str(e)},
+                    {"tipo_meta": tipo_meta, "chave": chave, "erro": motivo},
                 )
             return None
         except Exception as e:
@@ -843,7 +998,6 @@ class CalculoComissao:
                 {"tipo_meta": tipo_meta, "chave": chave, "erro": str(e)},
             )
             return None
-        return None
 
     def _calcular_fc_historico_wrapper(
         self,
@@ -864,8 +1018,9 @@ class CalculoComissao:
         realizado_original = self.realizado
 
         try:
-            # Substituir por realizados históricos
+            # Substituir por realizados históricos (FCs memorizados ficam obsoletos)
             self.realizado = realizados_historicos
+            self._invalidar_cache_fc()
 
             # Calcular FC com os realizados históricos
             fc, detalhes = self._calcular_fc_para_item(
@@ -883,6 +1038,96 @@ class CalculoComissao:
         finally:
             # Restaurar realizados originais
             self.realizado = realizado_original
+            self._invalidar_cache_fc()
+
+    def _obter_cache_fc(self) -> FatorCorrecaoCache:
+        """
+        Retorna o cache LRU do FC. O tamanho é definido por
+        PARAMS.cache_fc_max_entradas (padrão 50000; 0 desativa o cache).
+        """
+        cache = getattr(self, "_cache_fc", None)
+        if cache is None:
+            try:
+                max_entradas = int(float(self.params.get("cache_fc_max_entradas", 50000)))
+            except Exception:
+                max_entradas = 50000
+            cache = FatorCorrecaoCache(max_entradas)
+            self._cache_fc = cache
+        return cache
+
+    def _invalidar_cache_fc(self):
+        """Descarta os FCs memorizados (chamar sempre que self.realizado mudar)."""
+        cache = getattr(self, "_cache_fc", None)
+        if cache is not None:
+            cache.invalidar()
+
+    def _resumo_faltas_diagnostico(self) -> pd.DataFrame:
+        """Resumo único de faltas: diagnósticos por categoria + metas do GoalIndex."""
+        extras = []
+        indice_metas = getattr(self, "_indice_metas", None)
+        if indice_metas is not None and indice_metas.total_faltas:
+            relatorio = indice_metas.relatorio_faltas()
+            relatorio["categoria"] = "metas"
+            relatorio["motivo"] = relatorio["tipo_meta"] + ": " + relatorio["motivo"]
+            extras.append(relatorio)
+        return diagnostics.resumo_faltas(extras=extras)
+
+    def _log_estatisticas_cache_fc(self, contexto):
+        indice_metas = getattr(self, "_indice_metas", None)
+        if indice_metas is not None and indice_metas.total_faltas:
+            relatorio = indice_metas.relatorio_faltas()
+            _info(
+                f"[METAS] {contexto}: {indice_metas.total_faltas} consulta(s) sem meta "
+                f"em {len(relatorio)} chave(s) distinta(s)"
+            )
+        cache = getattr(self, "_cache_fc", None)
+        if cache is None:
+            return
+        est = cache.estatisticas()
+        _info(
+            f"[FC-CACHE] {contexto}: hits={est['hits']} misses={est['misses']} "
+            f"(acerto {est['taxa_acerto']:.1%}), entradas={est['entradas']}/{est['max_entradas']}, "
+            f"invalidações={est['invalidacoes']}"
+        )
+
+    @staticmethod
+    def _chave_cache_fc(
+        nome_colab, cargo_colab, item_faturado, mes_apuracao_override, ano_apuracao_override
+    ):
+        """
+        Chave do FC: colaborador, cargo, contexto do item e período de apuração.
+
+        O período vem dos overrides ou de 'Dt Emissão' (mesma regra usada nas
+        metas de fornecedor); sem data válida fica None (mês/ano corrente).
+        """
+        mes = mes_apuracao_override
+        ano = ano_apuracao_override
+        if mes is None or ano is None:
+            dt_emissao = item_faturado.get("Dt Emissão")
+            try:
+                dt = (
+                    dt_emissao
+                    if isinstance(dt_emissao, (pd.Timestamp, datetime))
+                    else pd.to_datetime(dt_emissao)
+                )
+                if pd.isna(dt):
+                    dt = None
+            except Exception:
+                dt = None
+            if mes is None:
+                mes = dt.month if dt is not None else None
+            if ano is None:
+                ano = dt.year if dt is not None else None
+        return (
+            normalizar_valor_chave(nome_colab),
+            normalizar_valor_chave(cargo_colab),
+            normalizar_valor_chave(item_faturado["Negócio"]),
+            normalizar_valor_chave(item_faturado["Grupo"]),
+            normalizar_valor_chave(item_faturado["Subgrupo"]),
+            normalizar_valor_chave(item_faturado["Tipo de Mercadoria"]),
+            mes,
+            ano,
+        )
 
     def _calcular_fc_para_item(
         self,
@@ -894,10 +1139,70 @@ class CalculoComissao:
     ):
         """Calcula um FC único para um colaborador e um item faturado específico.
 
+        O resultado é memorizado por (colaborador, cargo, contexto, período) no
+        cache LRU do FC; em acertos, as linhas de DEBUG_FORNECEDORES do cálculo
+        original são reproduzidas com o código do item atual.
+
         Args:
             mes_apuracao_override: Mês de apuração a ser usado (útil para reconciliações)
             ano_apuracao_override: Ano de apuração a ser usado (útil para reconciliações)
         """
+        cache = self._obter_cache_fc()
+        try:
+            chave = self._chave_cache_fc(
+                nome_colab,
+                cargo_colab,
+                item_faturado,
+                mes_apuracao_override,
+                ano_apuracao_override,
+            )
+            hash(chave)
+        except Exception:
+            chave = None
+
+        if chave is None or not cache.ativo:
+            return self._calcular_fc_para_item_sem_cache(
+                nome_colab,
+                cargo_colab,
+                item_faturado,
+                mes_apuracao_override,
+                ano_apuracao_override,
+            )
+
+        memorizado = cache.obter(chave)
+        if memorizado is not None:
+            fc, detalhes_fc, entradas_debug = memorizado
+            if entradas_debug:
+                cod_produto = item_faturado.get("Código Produto", None)
+                for entrada in entradas_debug:
+                    nova = dict(entrada)
+                    nova["cod_produto"] = cod_produto
+                    self.debug_fornecedores.append(nova)
+            return fc, copiar_detalhes_fc(detalhes_fc)
+
+        inicio_debug = len(self.debug_fornecedores)
+        fc, detalhes_fc = self._calcular_fc_para_item_sem_cache(
+            nome_colab,
+            cargo_colab,
+            item_faturado,
+            mes_apuracao_override,
+            ano_apuracao_override,
+        )
+        entradas_debug = tuple(dict(e) for e in self.debug_fornecedores[inicio_debug:])
+        cache.guardar(
+            chave, (fc, copiar_detalhes_fc(detalhes_fc), entradas_debug)
+        )
+        return fc, detalhes_fc
+
+    def _calcular_fc_para_item_sem_cache(
+        self,
+        nome_colab,
+        cargo_colab,
+        item_faturado,
+        mes_apuracao_override=None,
+        ano_apuracao_override=None,
+    ):
+        """Cálculo efetivo do FC (sem memorização); ver _calcular_fc_para_item."""
         import time
 
         tempo_fc_inicio = time.time()
@@ -912,6 +1217,7 @@ class CalculoComissao:
 
         # Estrutura para coletar detalhes por componente do FC
         detalhes_fc = {}
+        debug_rent = diagnostics.ativo("rentabilidade")
 
         # Verificar se há metas de fornecedores (que podem acionar busca de taxas de câmbio)
         linha_do_item = item_faturado.get("Negócio")
@@ -992,53 +1298,56 @@ class CalculoComissao:
                     for v in chave_busca
                 )
 
-                # DEBUG: Log detalhado para rentabilidade (SEMPRE)
+                # DEBUG: Log detalhado para rentabilidade (DEBUG_RENTABILIDADE/COMISSOES_VERBOSE)
                 series_rent = self.realizado[realizado_key]
-                indices_disponiveis = (
-                    list(series_rent.index)[:5]
-                    if isinstance(series_rent, pd.Series)
-                    else []
-                )
-                print(f"\n[DEBUG RENTABILIDADE] Buscando rentabilidade realizada:")
-                print(
-                    f"  - Item: {item_faturado.get('Código Produto', 'N/A')} (Processo: {item_faturado.get('Processo', 'N/A')})"
-                )
-                print(f"  - Chave original: {chave_busca}")
-                print(f"  - Chave normalizada: {chave_normalizada}")
-                print(f"  - Índices disponíveis (amostra): {indices_disponiveis}")
+                if debug_rent:
+                    indices_disponiveis = (
+                        list(series_rent.index)[:5]
+                        if isinstance(series_rent, pd.Series)
+                        else []
+                    )
+                    _diag_rent(f"\n[DEBUG RENTABILIDADE] Buscando rentabilidade realizada:")
+                    _diag_rent(
+                        f"  - Item: {item_faturado.get('Código Produto', 'N/A')} (Processo: {item_faturado.get('Processo', 'N/A')})"
+                    )
+                    _diag_rent(f"  - Chave original: {chave_busca}")
+                    _diag_rent(f"  - Chave normalizada: {chave_normalizada}")
+                    _diag_rent(f"  - Índices disponíveis (amostra): {indices_disponiveis}")
 
                 # Tentar busca com chave normalizada
-                realizado = self.realizado[realizado_key].get(chave_normalizada, None)
-                print(f"  - Resultado busca normalizada: {realizado}")
+                realizado = series_rent.get(chave_normalizada, None)
+                if debug_rent:
+                    _diag_rent(f"  - Resultado busca normalizada: {realizado}")
 
                 # Se não encontrou, tentar com chave original (fallback)
                 if realizado is None or (
                     isinstance(realizado, (int, float))
                     and realizado == 0
-                    and chave_normalizada not in self.realizado[realizado_key].index
+                    and chave_normalizada not in series_rent.index
                 ):
-                    realizado = self.realizado[realizado_key].get(chave_busca, 0)
-                    print(f"  - Resultado busca original (fallback): {realizado}")
-                    if realizado == 0:
-                        print(
-                            f"  - AVISO: Rentabilidade não encontrada para chave {chave_normalizada} (original: {chave_busca}). Retornando 0."
-                        )
+                    realizado = series_rent.get(chave_busca, 0)
+                    if debug_rent:
+                        _diag_rent(f"  - Resultado busca original (fallback): {realizado}")
+                        if realizado == 0:
+                            _diag_rent(
+                                f"  - AVISO: Rentabilidade não encontrada para chave {chave_normalizada} (original: {chave_busca}). Retornando 0."
+                            )
 
-                # Se ainda não encontrou, logar aviso
+                # Se ainda não encontrou, logar aviso (uma vez por chave; repetições
+                # ficam no resumo de faltas)
                 if realizado is None or (
                     isinstance(realizado, (int, float)) and realizado == 0
                 ):
                     # Verificar se a chave existe no índice (pode ser problema de correspondência)
-                    series_rent = self.realizado[realizado_key]
                     if (
                         isinstance(series_rent, pd.Series)
                         and chave_normalizada not in series_rent.index
                     ):
-                        print(
-                            f"  - ERRO: Chave {chave_normalizada} NÃO existe no índice da Series!"
-                        )
-                        # Verificar se há chaves similares
-                        if isinstance(series_rent, pd.Series):
+                        if debug_rent:
+                            _diag_rent(
+                                f"  - ERRO: Chave {chave_normalizada} NÃO existe no índice da Series!"
+                            )
+                            # Verificar se há chaves similares
                             chaves_similares = [
                                 idx
                                 for idx in series_rent.index
@@ -1046,19 +1355,24 @@ class CalculoComissao:
                                 == str(chave_normalizada[0]).strip().upper()
                             ]
                             if chaves_similares:
-                                print(
+                                _diag_rent(
                                     f"  - Chaves similares encontradas (mesma linha): {chaves_similares[:3]}"
                                 )
-                        self._log_validacao(
-                            "AVISO",
-                            f"Rentabilidade não encontrada para chave {chave_normalizada} (item: {item_faturado.get('Código Produto', 'N/A')})",
-                            {
-                                "chave_busca": chave_normalizada,
-                                "chave_original": chave_busca,
-                                "item": item_faturado.get("Código Produto", None),
-                                "processo": item_faturado.get("Processo", None),
-                            },
-                        )
+                        if diagnostics.registrar_falta(
+                            "rentabilidade",
+                            ("realizado", chave_normalizada),
+                            "rentabilidade realizada não encontrada",
+                        ):
+                            self._log_validacao(
+                                "AVISO",
+                                f"Rentabilidade não encontrada para chave {chave_normalizada} (item: {item_faturado.get('Código Produto', 'N/A')})",
+                                {
+                                    "chave_busca": chave_normalizada,
+                                    "chave_original": chave_busca,
+                                    "item": item_faturado.get("Código Produto", None),
+                                    "processo": item_faturado.get("Processo", None),
+                                },
+                            )
                     realizado = realizado if realizado is not None else 0
 
                 # garantir que realizado de rentabilidade esteja em decimal (ex: 0.12)
@@ -1071,10 +1385,11 @@ class CalculoComissao:
                 except Exception:
                     pass
 
-                print(
-                    f"  - Realizado final (após conversão): {realizado} (tipo: {type(realizado).__name__})"
-                )
-                print("=" * 80)
+                if debug_rent:
+                    _diag_rent(
+                        f"  - Realizado final (após conversão): {realizado} (tipo: {type(realizado).__name__})"
+                    )
+                    _diag_rent("=" * 80)
 
             meta = self._get_meta(tipo_meta, meta_chave)
 
@@ -1082,24 +1397,29 @@ class CalculoComissao:
             # DEBUG RENTABILIDADE: Cálculo do Componente FC
             # ========================================================================
             if tipo_meta == "rentabilidade":
-                print(f"\n[DEBUG RENTABILIDADE] Calculando componente FC:")
-                print(f"  - Realizado: {realizado}")
-                print(f"  - Meta: {meta}")
-                print(f"  - Peso: {peso}")
+                if debug_rent:
+                    _diag_rent(f"\n[DEBUG RENTABILIDADE] Calculando componente FC:")
+                    _diag_rent(f"  - Realizado: {realizado}")
+                    _diag_rent(f"  - Meta: {meta}")
+                    _diag_rent(f"  - Peso: {peso}")
 
                 if meta is None:
-                    print(f"  - ERRO: Meta de rentabilidade é None!")
-                    self._log_validacao(
-                        "AVISO",
-                        f"Meta de rentabilidade é None para item {item_faturado.get('Código Produto', 'N/A')}",
-                        {
-                            "item": item_faturado.get("Código Produto", None),
-                            "chave": meta_chave,
-                            "realizado": realizado,
-                        },
-                    )
-                elif realizado == 0:
-                    print(f"  - AVISO: Realizado é 0 para chave {meta_chave}")
+                    if debug_rent:
+                        _diag_rent(f"  - ERRO: Meta de rentabilidade é None!")
+                    if diagnostics.registrar_falta(
+                        "rentabilidade", ("meta", meta_chave), "meta de rentabilidade é None"
+                    ):
+                        self._log_validacao(
+                            "AVISO",
+                            f"Meta de rentabilidade é None para item {item_faturado.get('Código Produto', 'N/A')}",
+                            {
+                                "item": item_faturado.get("Código Produto", None),
+                                "chave": meta_chave,
+                                "realizado": realizado,
+                            },
+                        )
+                elif realizado == 0 and debug_rent:
+                    _diag_rent(f"  - AVISO: Realizado é 0 para chave {meta_chave}")
 
             atingimento = _calcular_atingimento(realizado, meta)
 
@@ -1108,12 +1428,12 @@ class CalculoComissao:
             componente_fc = atingimento_cap * peso
             fc_total_item += componente_fc
 
-            if tipo_meta == "rentabilidade":
-                print(f"  - Atingimento: {atingimento:.4f}")
-                print(f"  - Atingimento (cap): {atingimento_cap:.4f}")
-                print(f"  - Componente FC: {componente_fc:.6f}")
-                print(f"  - FC total acumulado: {fc_total_item:.6f}")
-                print("=" * 80)
+            if tipo_meta == "rentabilidade" and debug_rent:
+                _diag_rent(f"  - Atingimento: {atingimento:.4f}")
+                _diag_rent(f"  - Atingimento (cap): {atingimento_cap:.4f}")
+                _diag_rent(f"  - Componente FC: {componente_fc:.6f}")
+                _diag_rent(f"  - FC total acumulado: {fc_total_item:.6f}")
+                _diag_rent("=" * 80)
 
             # armazenar detalhe deste componente
             detalhes_fc[tipo_meta] = {
@@ -1144,16 +1464,10 @@ class CalculoComissao:
                     .unique()
                 )
                 # Se houver pelo menos uma linha atribuída, usamos a primeira para retenção
-                if len(linhas_do_gerente) > 0 and "RETENCAO_CLIENTES" in self.data:
-                    linha_gerente = linhas_do_gerente[0]
-                    df_ret = self.data.get("RETENCAO_CLIENTES", pd.DataFrame())
-                    # Filtra pela linha
-                    ret_row = df_ret[df_ret["linha"] == linha_gerente]
-                    if not ret_row.empty:
-                        clientes_ant = ret_row.iloc[0].get(
-                            "clientes_mes_anterior", None
-                        )
-                        clientes_atual = ret_row.iloc[0].get("clientes_mes_atual", None)
+                if len(linhas_do_gerente) > 0:
+                    retencao_linha = self._obter_retencao_linha(linhas_do_gerente[0])
+                    if retencao_linha is not None:
+                        clientes_ant, clientes_atual = retencao_linha
                         # Calcular taxa de retenção com tratamento correto para meta zero
                         taxa_retencao = _calcular_atingimento(
                             clientes_atual, clientes_ant
@@ -1323,40 +1637,13 @@ class CalculoComissao:
                             meta_ytd = 0.0
 
                         # Calcular faturamento realizado YTD para este fabricante/fornecedor
-                        faturados_ytd = self.data.get("FATURADOS_YTD", pd.DataFrame())
-                        if faturados_ytd.empty:
-                            faturamento_realizado_ytd = 0.0
-                        else:
-                            filt = faturados_ytd["Fabricante"] == fornecedor_nome
-                            vendas_fornecedor = faturados_ytd[filt].copy()
-                            if "Dt Emissão" in vendas_fornecedor.columns:
-                                vendas_fornecedor["mes"] = vendas_fornecedor[
-                                    "Dt Emissão"
-                                ].dt.month
-                            else:
-                                # Se não houver data de emissão, assume-se todo o faturamento no mês de apuração
-                                vendas_fornecedor["mes"] = mes_apuracao
-
-                            # Montar mapa de faturamento mensal em BRL
-                            faturamento_mensal_brl: Dict[int, float] = {}
-                            for mes in range(1, mes_apuracao + 1):
-                                vendas_do_mes = vendas_fornecedor[
-                                    vendas_fornecedor["mes"] == mes
-                                ]
-                                soma_brl = (
-                                    vendas_do_mes["Valor Realizado"].sum()
-                                    if not vendas_do_mes.empty
-                                    else 0.0
-                                )
-                                faturamento_mensal_brl[mes] = float(soma_brl)
-
-                            # Converter YTD usando apenas taxas já armazenadas no JSON
-                            faturamento_realizado_ytd = self.rate_calculator.calcular_faturamento_convertido_ytd(  # type: ignore[attr-defined]
-                                faturamento_mensal_brl=faturamento_mensal_brl,
-                                moeda=moeda,
-                                ano=ano_corrente,
-                                mes_final=mes_apuracao,
+                        # (matriz Fabricante × mês pré-calculada uma vez por execução)
+                        cache_fornecedores = self._obter_cache_fornecedores()
+                        faturamento_realizado_ytd = (
+                            cache_fornecedores.faturamento_convertido_ytd(
+                                fornecedor_nome, moeda, ano_corrente, mes_apuracao
                             )
+                        )
 
                     # Cálculo do atingimento e componente
                     atingimento = _calcular_atingimento(
@@ -1381,78 +1668,11 @@ class CalculoComissao:
                     except Exception:
                         pass
                     # Coleta de depuração para este cálculo de fornecedor
-                    # Sanity-check: recompute converted faturamento from the ON-DISK FATURADOS_YTD file and taxas
+                    # Sanity-check: recompute converted faturamento from the load-time supplier cache
                     try:
-                        safe_total = 0.0
-                        # try to reload the source FATURADOS_YTD from disk to avoid mutated in-memory frames
-                        try:
-                            faturados_ytd_disk = pd.read_excel(ARQUIVO_FATURADOS_YTD)
-                        except Exception:
-                            # fallback: use whatever is in memory
-                            faturados_ytd_disk = self.data.get(
-                                "FATURADOS_YTD", pd.DataFrame()
-                            )
-
-                        # find fabricante and valor columns
-                        if not faturados_ytd_disk.empty:
-                            fab_col = next(
-                                (
-                                    c
-                                    for c in faturados_ytd_disk.columns
-                                    if "fabricante" in str(c).lower()
-                                    or "fornecedor" in str(c).lower()
-                                ),
-                                None,
-                            )
-                            val_col = next(
-                                (
-                                    c
-                                    for c in faturados_ytd_disk.columns
-                                    if "valor" in str(c).lower()
-                                ),
-                                None,
-                            )
-                            dt_col_local = next(
-                                (
-                                    c
-                                    for c in faturados_ytd_disk.columns
-                                    if "dt" in str(c).lower()
-                                    or "data" in str(c).lower()
-                                ),
-                                None,
-                            )
-                            if fab_col and val_col:
-                                # filter case-insensitive
-                                filt_disk = faturados_ytd_disk[
-                                    faturados_ytd_disk[fab_col]
-                                    .astype(str)
-                                    .str.upper()
-                                    .str.contains(
-                                        str(fornecedor_nome).upper(), na=False
-                                    )
-                                ].copy()
-                                if dt_col_local and dt_col_local in filt_disk.columns:
-                                    filt_disk["mes"] = pd.to_datetime(
-                                        filt_disk[dt_col_local], errors="coerce"
-                                    ).dt.month
-                                else:
-                                    filt_disk["mes"] = mes_apuracao
-                                for m in range(1, int(mes_apuracao) + 1):
-                                    soma_brl = (
-                                        filt_disk[filt_disk["mes"] == m][val_col].sum()
-                                        if not filt_disk.empty
-                                        else 0.0
-                                    )
-                                    taxa_m = None
-                                    if (
-                                        moeda
-                                        and taxas
-                                        and moeda in taxas
-                                        and m in taxas[moeda]
-                                    ):
-                                        taxa_m = taxas[moeda].get(m)
-                                    if taxa_m and taxa_m != 0:
-                                        safe_total += float(soma_brl) * float(taxa_m)
+                        safe_total = cache_fornecedores.faturamento_convertido_verificacao(
+                            fornecedor_nome, moeda, ano_corrente, mes_apuracao
+                        )
                     except Exception:
                         safe_total = faturamento_realizado_ytd
 
@@ -1506,13 +1726,13 @@ class CalculoComissao:
                     }
                     # Observações sobre taxas usadas (se houver)
                     taxas_obs = {}
-                    if (
-                        moeda
-                        and "taxas" in locals()
-                        and isinstance(taxas, dict)
-                        and moeda in taxas
-                    ):
-                        taxas_obs = taxas.get(moeda, {})
+                    if moeda:
+                        try:
+                            taxas_obs = cache_fornecedores.taxas_ytd(
+                                moeda, ano_corrente, mes_apuracao
+                            )
+                        except Exception:
+                            taxas_obs = {}
                     debug_entry["taxas_usadas"] = str(taxas_obs)
                     # Indica se houve meses sem taxa (None)
                     taxas_meses_none = [
@@ -1574,6 +1794,32 @@ class CalculoComissao:
     # As taxas são pré-carregadas ANTES do loop de itens para evitar travamentos.
 
     # ------------------ Estado e Reconciliacao (Recebimentos) ------------------
+    def _criar_backend_estado(self, tabela):
+        """
+        Backend persistente do estado conforme PARAMS (estado_backend =
+        excel | sqlite | parquet; estado_backend_caminho opcional).
+
+        Retorna None (aba ESTADO do Excel, comportamento original) quando não
+        configurado ou quando o backend não puder ser criado.
+        """
+        tipo = self.params.get("estado_backend", "excel")
+        caminho = self.params.get("estado_backend_caminho") or None
+        try:
+            if caminho is not None and pd.isna(caminho):
+                caminho = None
+            if tipo is None or pd.isna(tipo):
+                tipo = "excel"
+            return criar_backend_estado(
+                tipo, base_path=self.base_path, tabela=tabela, caminho=caminho
+            )
+        except Exception as e:
+            self._log_validacao(
+                "AVISO",
+                f"Backend de estado '{tipo}' indisponível; usando a aba ESTADO do Excel: {e}",
+                {},
+            )
+            return None
+
     def _carregar_estado(self):
         """
         Carrega ou inicializa o arquivo de estado que guarda adiantamentos e reconciliações.
@@ -1581,6 +1827,7 @@ class CalculoComissao:
         REFATORADO (FASE 2): Usa ProcessStateManager para gerenciar o estado.
         """
         try:
+            self.state_manager.backend = self._criar_backend_estado("estado_processos")
             filepath = os.path.join(self.base_path, "Estado_Processos_Recebimento.xlsx")
             self.state_manager.load_from_file(filepath)
             # Manter self.estado para compatibilidade com código existente
@@ -1607,75 +1854,20 @@ class CalculoComissao:
     def _get_valor_total_processo(self, proc):
         """Retorna a soma de 'Valor Realizado' de todos os itens do processo no arquivo ANALISE_COMERCIAL_COMPLETA.
 
-        Proc pode ser string ou número; fazemos comparação por string trimmed.
+        Proc pode ser string ou número; fazemos comparação por string trimmed
+        (consulta ao índice por processo, ver _obter_indice_processos).
         Retorna float (0.0 se não encontrado ou erro).
         """
         try:
-            df_anal = self.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
-            if df_anal.empty:
-                return 0.0
-            # Normalizar coluna de processo
-            possible_proc_cols = [
-                c
-                for c in df_anal.columns
-                if str(c).strip().lower().replace("\ufeff", "") == "processo"
-            ]
-            if not possible_proc_cols:
-                # tentar variações
-                for cand in ("PROCESSO", "processo"):
-                    if cand in df_anal.columns:
-                        possible_proc_cols = [cand]
-                        break
-            if not possible_proc_cols:
-                return 0.0
-            proc_col = possible_proc_cols[0]
+            indice = self._obter_indice_processos()
             proc_s = str(proc).strip()
-            mask = df_anal[proc_col].astype(str).str.strip() == proc_s
-            subset = df_anal[mask]
-            if subset.empty:
+            if proc_s not in indice:
                 # tentar correspondência numérica
                 try:
-                    proc_int = int(float(proc))
-                    mask2 = df_anal[proc_col].astype(str).str.strip() == str(proc_int)
-                    subset = df_anal[mask2]
+                    proc_s = str(int(float(proc)))
                 except Exception:
                     pass
-            if subset.empty:
-                return 0.0
-            # possíveis colunas de valor realizado
-            valor_cols = [
-                c
-                for c in subset.columns
-                if str(c).strip().lower().replace("\ufeff", "")
-                in (
-                    "valor realizado",
-                    "valor_realizado",
-                    "valorrealizado",
-                    "valor realizado total",
-                    "valor realizado (brl)",
-                )
-            ]
-            if not valor_cols:
-                # tentar nomes com acentos/alternativas
-                alt = [
-                    c
-                    for c in subset.columns
-                    if "valor" in str(c).lower().replace("\ufeff", "")
-                    and "real" in str(c).lower().replace("\ufeff", "")
-                ]
-                valor_cols = alt
-            if not valor_cols:
-                return 0.0
-            # somar valores numéricos
-            total = 0.0
-            for c in valor_cols:
-                try:
-                    total += float(
-                        pd.to_numeric(subset[c], errors="coerce").fillna(0.0).sum()
-                    )
-                except Exception:
-                    continue
-            return float(total)
+            return indice.valor_total(proc_s)
         except Exception:
             return 0.0
 
@@ -1791,7 +1983,7 @@ class CalculoComissao:
                 return
 
             # Preparar calculadora de métricas
-            metrics_calc = ProcessMetricsCalculator(
+            metrics_calc = _servicos_legados()["ProcessMetricsCalculator"](
                 analise_comercial_df=self.data.get(
                     "ANALISE_COMERCIAL_COMPLETA", pd.DataFrame()
                 ),
@@ -2062,8 +2254,8 @@ class CalculoComissao:
                     )
                     continue
 
-            # NOVO (DEBUG): Salvar logs de eventos acumulados no estado
-            for proc in processos:
+            # NOVO (DEBUG): Salvar logs de eventos acumulados no estado (perfil 'depuracao')
+            for proc in processos if self._perfil_saida_inclui("depuracao") else []:
                 try:
                     proc_str = str(proc).strip()
                     logs_eventos = self.logs_eventos_por_processo.get(proc_str, [])
@@ -2132,7 +2324,7 @@ class CalculoComissao:
             _info(
                 "[Recebimentos] Início do cálculo de comissões por recebimento (nova lógica)"
             )
-            loader = FinancialPaymentsLoader()
+            loader = _servicos_legados()["FinancialPaymentsLoader"]()
             # NOVO: Procurar arquivo primeiro em dados_entrada/, depois na raiz
             path_fin_entrada = os.path.join("dados_entrada", "Análise Financeira.xlsx")
             path_fin_raiz = os.path.join(self.base_path, "Análise Financeira.xlsx")
@@ -2191,7 +2383,7 @@ class CalculoComissao:
             def _fc_constante(_n, _c, _item, *_args, **_kwargs):
                 return 1.0, {}
 
-            metrics_calc_temp = ProcessMetricsCalculator(
+            metrics_calc_temp = _servicos_legados()["ProcessMetricsCalculator"](
                 analise_comercial_df=df_anal,
                 regras_comissao_getter=self._get_regra_comissao,
                 fc_calculator_func=_fc_constante,
@@ -2335,7 +2527,7 @@ class CalculoComissao:
                     fcmp_dict = metrics.get("FCMP", {}) or {}
                     if not tcmp_dict:
                         # Fallback: calcular agora (processo já faturado)
-                        tcmp_dict, fcmp_dict = ProcessMetricsCalculator(
+                        tcmp_dict, fcmp_dict = _servicos_legados()["ProcessMetricsCalculator"](
                             analise_comercial_df=df_anal,
                             regras_comissao_getter=self._get_regra_comissao,
                             fc_calculator_func=self._calcular_fc_para_item,
@@ -2385,6 +2577,8 @@ class CalculoComissao:
             # Isso será refatorado na Etapa 2.2 com método dedicado
             processos_com_pagamentos = set(
                 self.pagamentos_processados_por_processo.keys()
+                if self._perfil_saida_inclui("depuracao")
+                else []
             )
             if processos_com_pagamentos:
                 _info(
@@ -2493,14 +2687,41 @@ class CalculoComissao:
             )
             self.comissoes_recebimento_df = pd.DataFrame()
 
+    def _obter_indice_regras(self) -> RegraComissaoIndex:
+        """
+        Retorna o índice pré-compilado de CONFIG_COMISSAO, compilando-o uma
+        única vez por tabela carregada (recompila se a aba for substituída).
+        """
+        df_regras = self.data.get("CONFIG_COMISSAO", pd.DataFrame())
+        indice = getattr(self, "_indice_regras", None)
+        if indice is None or self._indice_regras_origem is not df_regras:
+            indice = RegraComissaoIndex(df_regras, self.legacy_token)
+            self._indice_regras = indice
+            self._indice_regras_origem = df_regras
+            self.cache_regras = {}
+        return indice
+
+    def _obter_cache_fornecedores(self) -> FaturamentoFornecedoresCache:
+        """
+        Retorna o cache de faturamento por fornecedor (Fabricante × mês em BRL e
+        totais convertidos), construído uma única vez para o FATURADOS_YTD carregado.
+        """
+        faturados_ytd = self.data.get("FATURADOS_YTD", pd.DataFrame())
+        cache = getattr(self, "_cache_fornecedores", None)
+        if cache is None or self._cache_fornecedores_origem is not faturados_ytd:
+            cache = FaturamentoFornecedoresCache(faturados_ytd, self.rate_calculator)
+            self._cache_fornecedores = cache
+            self._cache_fornecedores_origem = faturados_ytd
+        return cache
+
     def _get_regra_comissao(self, linha, grupo, subgrupo, tipo_mercadoria, cargo):
         """Busca a regra de comissão aplicável considerando hierarquia de especificidade."""
+        indice = self._obter_indice_regras()
         chave_cache = (linha, grupo, subgrupo, tipo_mercadoria, cargo)
         if chave_cache in self.cache_regras:
             return self.cache_regras[chave_cache]
 
-        df_regras = self.data.get("CONFIG_COMISSAO", pd.DataFrame())
-        if df_regras.empty:
+        if indice.vazio:
             self._log_validacao(
                 "ERRO",
                 "Tabela CONFIG_COMISSAO indisponível para cálculo de regras.",
@@ -2509,38 +2730,10 @@ class CalculoComissao:
             self.cache_regras[chave_cache] = None
             return None
 
-        filtros = [
-            (df_regras["linha"] == linha)
-            & (df_regras["grupo"] == grupo)
-            & (df_regras["subgrupo"] == subgrupo)
-            & (df_regras["tipo_mercadoria"] == tipo_mercadoria),
-            (df_regras["linha"] == linha)
-            & (df_regras["grupo"] == grupo)
-            & (
-                (df_regras["subgrupo"].isna())
-                | (df_regras["subgrupo"] == self.legacy_token)
-            )
-            & (df_regras["tipo_mercadoria"] == tipo_mercadoria),
-            (df_regras["linha"] == linha)
-            & ((df_regras["grupo"].isna()) | (df_regras["grupo"] == self.legacy_token))
-            & (
-                (df_regras["subgrupo"].isna())
-                | (df_regras["subgrupo"] == self.legacy_token)
-            )
-            & (df_regras["tipo_mercadoria"] == tipo_mercadoria),
-            (df_regras["linha"] == self.legacy_token)
-            & (df_regras["tipo_mercadoria"] == self.legacy_token),
-        ]
-
-        for filtro in filtros:
-            try:
-                regra = df_regras[filtro & (df_regras["cargo"] == cargo)]
-            except Exception:
-                regra = pd.DataFrame()
-            if not regra.empty:
-                regra_row = regra.iloc[0]
-                self.cache_regras[chave_cache] = regra_row
-                return regra_row
+        regra = indice.buscar(linha, grupo, subgrupo, tipo_mercadoria, cargo)
+        if regra is not None:
+            self.cache_regras[chave_cache] = regra
+            return regra
 
         self._log_validacao(
             "ERRO",
@@ -2749,6 +2942,13 @@ class CalculoComissao:
                 "timestamp": datetime.now().isoformat(),
             }
 
+        # Motor legado (padrão) ou em lote (opcional, PARAMS.modo_calculo_faturamento)
+        if self._modo_calculo_faturamento() == "vetorizado":
+            self._calcular_comissoes_vetorizado(
+                df_faturados, df_atribuicoes_gestao, df_colabs_com_cargos, inicio_etapa5
+            )
+            return
+
         try:
             total_items_step5 = len(df_faturados) if df_faturados is not None else 0
         except Exception:
@@ -3173,22 +3373,213 @@ class CalculoComissao:
             f"[Etapa 5] CONCLUÍDA: {processed_step5} itens processados em {tempo_total_etapa5:.2f}s "
             f"(média: {tempo_total_etapa5/processed_step5:.2f}s/item, {len(comissoes_calculadas)} comissões calculadas)"
         )
+        self._log_estatisticas_cache_fc("Etapa 5")
 
-    def _handle_cross_selling_prompt(self, processo, consultor, linha, taxa):
-        """Mostra prompt interativo no terminal para decisão A ou B sobre o cross-selling.
+    def _usar_colunas_categoricas(self) -> bool:
+        """
+        Converte hierarquia/cargo/colaborador em Categorical compartilhado.
 
-        Retorna 'A' ou 'B'. Usa cross_selling_default_option quando a entrada for vazia (modo não interativo).
+        Definido por PARAMS.colunas_categoricas ou pela variável de ambiente
+        COMISSOES_COLUNAS_CATEGORICAS (o parâmetro tem precedência).
         """
-        default = self.params.get("cross_selling_default_option", "A")
-        prompt = (
-            f"\n------------------------------------------------------------------\n"
-        )
-        prompt += "[!] ALERTA DE CROSS-SELLING DETECTADO\n\n"
-        prompt += f"Processo: {processo}\n"
-        prompt += f"Consultor Externo: {consultor}\n"
-        prompt += f"Linha da Venda: {linha} (fora de sua carteira)\n\n"
-        prompt += (
-            f"Escolha como a comissão de Cross-Selling de {taxa}% será tratada:\n\n"
+        valor = self.params.get("colunas_categoricas")
+        if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+            valor = os.getenv("COMISSOES_COLUNAS_CATEGORICAS", "nao")
+        return str(valor).strip().lower() in ("1", "true", "yes", "sim", "s")
+
+    def _modo_carga_entradas(self) -> str:
+        """
+        Carga dos arquivos de entrada: 'sequencial' (padrão) ou 'paralelo'.
+
+        Definido por PARAMS.modo_carga_entradas ou pela variável de ambiente
+        COMISSOES_CARGA_ENTRADAS (o parâmetro tem precedência).
+        """
+        modo = self.params.get("modo_carga_entradas")
+        if modo is None or (isinstance(modo, float) and pd.isna(modo)):
+            modo = os.getenv("COMISSOES_CARGA_ENTRADAS", "sequencial")
+        modo = str(modo).strip().lower()
+        return "paralelo" if modo in ("paralelo", "parallel", "processos") else "sequencial"
+
+    def _motor_saida_excel(self) -> str:
+        """
+        Motor de gravação de Comissoes_Calculadas: 'auto' (padrão: xlsxwriter
+        se instalado, senão openpyxl em streaming), 'xlsxwriter', 'openpyxl'
+        ou 'pandas' (pd.ExcelWriter + reestilização do arquivo, como antes).
+
+        Definido por PARAMS.motor_saida_excel ou pela variável de ambiente
+        COMISSOES_MOTOR_SAIDA (o parâmetro tem precedência).
+        """
+        motor = self.params.get("motor_saida_excel")
+        if motor is None or (isinstance(motor, float) and pd.isna(motor)):
+            motor = os.getenv("COMISSOES_MOTOR_SAIDA", "auto")
+        return str(motor).strip().lower()
+
+    def _perfil_saida(self) -> str:
+        """
+        Abas geradas em Comissoes_Calculadas: 'producao' (abas de negócio),
+        'auditoria' (+ VALIDACAO e DIAGNOSTICO_FALTAS) ou 'depuracao' (padrão:
+        + abas DEBUG_* e logs de eventos/pagamentos por processo no ESTADO).
+
+        Definido por PARAMS.perfil_saida ou pela variável de ambiente
+        COMISSOES_PERFIL_SAIDA (o parâmetro tem precedência).
+        """
+        perfil = self.params.get("perfil_saida")
+        if perfil is None or (isinstance(perfil, float) and pd.isna(perfil)):
+            perfil = os.getenv("COMISSOES_PERFIL_SAIDA", "depuracao")
+        perfil = str(perfil).strip().lower()
+        perfil = PERFIS_SAIDA_ALIASES.get(perfil, perfil)
+        return perfil if perfil in PERFIS_SAIDA else "depuracao"
+
+    def _perfil_saida_inclui(self, perfil: str) -> bool:
+        """True se o perfil de saída atual é `perfil` ou mais completo."""
+        return PERFIS_SAIDA.index(self._perfil_saida()) >= PERFIS_SAIDA.index(perfil)
+
+    @contextmanager
+    def _medir_aba(self, nome: str):
+        """Registra em tempos_abas_saida o tempo de construção + gravação da aba."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos_abas_saida[nome] = time.perf_counter() - inicio
+
+    def _escrever_aba(self, writer, nome: str, construir):
+        """
+        Grava a aba `nome` com o DataFrame de construir() (None: aba não gravada).
+
+        Abas fora do perfil de saída não são construídas.
+        """
+        if not self._perfil_saida_inclui(PERFIL_ABAS_SAIDA.get(nome, "producao")):
+            self.abas_fora_do_perfil.append(nome)
+            return
+        with self._medir_aba(nome):
+            try:
+                df = construir()
+                if df is not None:
+                    writer.escrever(df, nome)
+            except Exception as e:
+                self._log_validacao("AVISO", f"Falha ao escrever {nome}: {e}", {})
+
+    def _registrar_tempo_carga(self, nome: str, segundos: float, linhas: int):
+        """Reporta o tempo de carga de um arquivo de entrada ao log e ao tracker."""
+        mensagem = f"{nome}: {linhas} linha(s) em {segundos:.2f}s"
+        _info(f"[CARGA] {mensagem}")
+        _tracker_update("Carregar arquivos", mensagem)
+
+    def _obter_retencao_linha(self, linha):
+        """
+        (clientes_mes_anterior, clientes_mes_atual) da linha para o componente
+        de retenção do FC; None quando a linha não tem dados de retenção.
+
+        Consulta o índice de retenção do preparador (janelas de 24 meses
+        calculadas em memória) quando disponível; caso contrário, a tabela
+        RETENCAO_CLIENTES carregada de Retencao_Clientes.xlsx.
+        """
+        if self.indice_retencao is not None:
+            indice, mes, ano = self.indice_retencao
+            return indice.retencao(linha, mes, ano)
+        df_ret = self.data.get("RETENCAO_CLIENTES")
+        if df_ret is None:
+            return None
+        ret_row = df_ret[df_ret["linha"] == linha]
+        if ret_row.empty:
+            return None
+        return (
+            ret_row.iloc[0].get("clientes_mes_anterior", None),
+            ret_row.iloc[0].get("clientes_mes_atual", None),
+        )
+
+    def _obter_quadros_preparados(self, mes: int, ano: int) -> Dict[str, pd.DataFrame]:
+        """
+        Saídas do preparador de dados gravadas neste mesmo processo para o
+        mês/ano (Faturados, Conversões, Faturados_YTD, Retenção), reaproveitadas
+        em memória no lugar da releitura dos xlsx.
+        """
+        arquivos = {
+            "FATURADOS": ARQUIVO_FATURADOS or "Faturados.xlsx",
+            "CONVERSOES": ARQUIVO_CONVERSOES or "Conversões.xlsx",
+            "FATURADOS_YTD": ARQUIVO_FATURADOS_YTD
+            or os.path.join(self.base_path, "Faturados_YTD.xlsx"),
+            "RETENCAO_CLIENTES": os.path.join(self.base_path, "Retencao_Clientes.xlsx"),
+        }
+        try:
+            import preparar_dados_mensais
+
+            quadros = preparar_dados_mensais.obter_quadros_preparados(
+                mes,
+                ano,
+                arquivos,
+                leitura={"FATURADOS_YTD": {"parse_dates": ["Dt Emissão"]}},
+            )
+        except Exception as e:
+            _info(f"[CARGA] AVISO: saídas do preparador indisponíveis em memória ({e})")
+            return {}
+        if quadros:
+            _info(f"[CARGA] Reaproveitando em memória: {', '.join(quadros)}")
+        if "RETENCAO_CLIENTES" in quadros:
+            indice = preparar_dados_mensais.obter_indice_retencao(
+                mes, ano, arquivos["RETENCAO_CLIENTES"]
+            )
+            if indice is not None:
+                self.indice_retencao = (indice, mes, ano)
+                _info("[CARGA] Retenção de clientes consultada no índice em memória")
+        return quadros
+
+    def _modo_calculo_faturamento(self) -> str:
+        """
+        Motor de cálculo de COMISSOES_CALCULADAS: 'legado' (padrão) ou 'vetorizado'.
+
+        Definido por PARAMS.modo_calculo_faturamento ou pela variável de ambiente
+        COMISSOES_MODO_FATURAMENTO (o parâmetro tem precedência). O motor em lote
+        expande itens × colaboradores com merges e resolve regra e FC uma vez por
+        chave distinta, com resultado idêntico ao legado.
+        """
+        modo = self.params.get("modo_calculo_faturamento")
+        if modo is None or (isinstance(modo, float) and pd.isna(modo)):
+            modo = os.getenv("COMISSOES_MODO_FATURAMENTO", "legado")
+        modo = str(modo).strip().lower()
+        return "vetorizado" if modo in ("vetorizado", "lote", "vectorized") else "legado"
+
+    def _calcular_comissoes_vetorizado(
+        self, df_faturados, df_atribuicoes_gestao, df_colabs_com_cargos, inicio_etapa5
+    ):
+        """Calcula COMISSOES_CALCULADAS com o motor em lote (MotorComissoesLote)."""
+        total_items_step5 = len(df_faturados) if df_faturados is not None else 0
+        _info(
+            f"[Etapa 5.4] Iniciando processamento vetorizado de {total_items_step5} itens..."
+        )
+        try:
+            motor = MotorComissoesLote(self)
+            self.comissoes_df = motor.calcular(
+                df_faturados, df_atribuicoes_gestao, df_colabs_com_cargos, info=_info
+            )
+        except Exception as e:
+            self.comissoes_df = pd.DataFrame()
+            _info(f"[Etapa 5.6] ERRO no cálculo vetorizado: {e}")
+            raise
+
+        tempo_total_etapa5 = time.time() - inicio_etapa5
+        _info(
+            f"[Etapa 5] CONCLUÍDA: {total_items_step5} itens processados em {tempo_total_etapa5:.2f}s "
+            f"(motor vetorizado, {len(self.comissoes_df)} comissões calculadas)"
+        )
+        self._log_estatisticas_cache_fc("Etapa 5")
+
+    def _handle_cross_selling_prompt(self, processo, consultor, linha, taxa):
+        """Mostra prompt interativo no terminal para decisão A ou B sobre o cross-selling.
+
+        Retorna 'A' ou 'B'. Usa cross_selling_default_option quando a entrada for vazia (modo não interativo).
+        """
+        default = self.params.get("cross_selling_default_option", "A")
+        prompt = (
+            f"\n------------------------------------------------------------------\n"
+        )
+        prompt += "[!] ALERTA DE CROSS-SELLING DETECTADO\n\n"
+        prompt += f"Processo: {processo}\n"
+        prompt += f"Consultor Externo: {consultor}\n"
+        prompt += f"Linha da Venda: {linha} (fora de sua carteira)\n\n"
+        prompt += (
+            f"Escolha como a comissão de Cross-Selling de {taxa}% será tratada:\n\n"
         )
         prompt += "(A) SUBTRAIR da Taxa de Rateio:\n"
         prompt += "    - A comissão de Cross-Selling será paga ao Consultor Externo.\n"
@@ -3595,6 +3986,550 @@ class CalculoComissao:
             self._log_validacao("ERRO", f"Falha ao gerar saída: {e}", {})
             raise
 
+    def _aba_comissoes_recebimento(self):
+        """COMISSOES_RECEBIMENTO: uma linha por pagamento do processo (None: sem recebimentos)."""
+        if (
+            hasattr(self, "comissoes_recebimento_df")
+            and self.comissoes_recebimento_df is not None
+            and not self.comissoes_recebimento_df.empty
+        ):
+            df_rec_raw = self.data.get("RECEBIMENTOS", pd.DataFrame())
+            base = self.comissoes_recebimento_df.copy()
+            # Validar que cada processo pertence a uma única linha; se mais de uma, avisar e excluir
+            try:
+                linhas_por_proc = base.groupby("processo")["linha"].nunique(
+                    dropna=False
+                )
+                procs_multilinha = set(
+                    linhas_por_proc[linhas_por_proc > 1].index.tolist()
+                )
+                for p in procs_multilinha:
+                    self._log_validacao(
+                        "AVISO",
+                        f"Processo com múltiplas linhas na COMISSOES_RECEBIMENTO (ignorado): {p}",
+                        {"processo": p},
+                    )
+                if procs_multilinha:
+                    base = base[~base["processo"].isin(procs_multilinha)]
+            except Exception:
+                pass
+
+            # Derivar a linha do processo (única) para exibir
+            try:
+                linha_proc_map = (
+                    base.groupby("processo")["linha"]
+                    .agg(
+                        lambda s: (
+                            s.dropna().iloc[0] if len(s.dropna()) > 0 else None
+                        )
+                    )
+                    .to_dict()
+                )
+                base["linha_processo"] = base["processo"].map(linha_proc_map)
+            except Exception:
+                base["linha_processo"] = None
+
+            # Anexar DATA_RECEBIMENTO por (processo, valor, sequencia) para diferenciar pagamentos repetidos
+            if (
+                df_rec_raw is not None
+                and not df_rec_raw.empty
+                and all(
+                    c in df_rec_raw.columns
+                    for c in ["PROCESSO", "DATA_RECEBIMENTO", "VALOR_RECEBIDO"]
+                )
+            ):
+                df_r = df_rec_raw[
+                    ["PROCESSO", "DATA_RECEBIMENTO", "VALOR_RECEBIDO"]
+                ].copy()
+                df_r["PROCESSO"] = df_r["PROCESSO"].astype(str).str.strip()
+                df_r["_seq"] = df_r.groupby(
+                    ["PROCESSO", "VALOR_RECEBIDO"]
+                ).cumcount()
+                base["processo"] = base["processo"].astype(str).str.strip()
+                base["_seq"] = base.groupby(
+                    ["processo", "faturamento_item"]
+                ).cumcount()
+                df_join = base.merge(
+                    df_r,
+                    left_on=["processo", "faturamento_item", "_seq"],
+                    right_on=["PROCESSO", "VALOR_RECEBIDO", "_seq"],
+                    how="left",
+                )
+                for cdrop in ["PROCESSO", "VALOR_RECEBIDO", "_seq"]:
+                    if cdrop in df_join.columns:
+                        df_join = df_join.drop(columns=[cdrop])
+            else:
+                df_join = base.copy()
+
+            # Agregar por processo + DATA + linha + colaborador (uma linha por pagamento/colaborador);
+            # se houver divergência de taxa/PE entre itens desse pagamento, detalhar por contexto e sinalizar.
+            gb_main = [
+                k
+                for k in [
+                    "processo",
+                    "DATA_RECEBIMENTO",
+                    "linha_processo",
+                    "nome_colaborador",
+                ]
+                if k in df_join.columns
+            ]
+            out_rows = []
+            for keys, g in df_join.groupby(gb_main, dropna=False):
+                try:
+                    div_rateio = (
+                        g["taxa_rateio_aplicada"].nunique(dropna=False) > 1
+                        if "taxa_rateio_aplicada" in g.columns
+                        else False
+                    )
+                    div_pe = (
+                        g["percentual_elegibilidade_pe"].nunique(dropna=False)
+                        > 1
+                        if "percentual_elegibilidade_pe" in g.columns
+                        else False
+                    )
+                    if not (div_rateio or div_pe):
+                        row = {
+                            "processo": (
+                                keys[gb_main.index("processo")]
+                                if "processo" in gb_main
+                                else None
+                            ),
+                            "DATA_RECEBIMENTO": (
+                                keys[gb_main.index("DATA_RECEBIMENTO")]
+                                if "DATA_RECEBIMENTO" in gb_main
+                                else None
+                            ),
+                            "linha": (
+                                keys[gb_main.index("linha_processo")]
+                                if "linha_processo" in gb_main
+                                else None
+                            ),
+                            "nome_colaborador": (
+                                keys[gb_main.index("nome_colaborador")]
+                                if "nome_colaborador" in gb_main
+                                else None
+                            ),
+                            "valor_recebido_total": (
+                                g["faturamento_item"].sum()
+                                if "faturamento_item" in g.columns
+                                else 0.0
+                            ),
+                            "comissao_total": (
+                                g["comissao_calculada"].sum()
+                                if "comissao_calculada" in g.columns
+                                else 0.0
+                            ),
+                            "taxa_rateio_aplicada": (
+                                g["taxa_rateio_aplicada"].iloc[0]
+                                if "taxa_rateio_aplicada" in g.columns
+                                and len(g) > 0
+                                else None
+                            ),
+                            "percentual_elegibilidade_pe": (
+                                g["percentual_elegibilidade_pe"].iloc[0]
+                                if "percentual_elegibilidade_pe" in g.columns
+                                and len(g) > 0
+                                else None
+                            ),
+                        }
+                        # percentual de comissão para referência
+                        try:
+                            row["percentual_comissao"] = float(
+                                row["taxa_rateio_aplicada"]
+                            ) * float(row["percentual_elegibilidade_pe"])
+                        except Exception:
+                            row["percentual_comissao"] = None
+                        out_rows.append(row)
+                    else:
+                        # detalhar por contexto (linha/grupo/subgrupo/tipo) e sinalizar divergência
+                        inner_keys = [
+                            c
+                            for c in [
+                                "linha",
+                                "grupo",
+                                "subgrupo",
+                                "tipo_mercadoria",
+                            ]
+                            if c in g.columns
+                        ]
+                        for _, gi in g.groupby(inner_keys, dropna=False):
+                            row = {
+                                "processo": (
+                                    keys[gb_main.index("processo")]
+                                    if "processo" in gb_main
+                                    else None
+                                ),
+                                "DATA_RECEBIMENTO": (
+                                    keys[gb_main.index("DATA_RECEBIMENTO")]
+                                    if "DATA_RECEBIMENTO" in gb_main
+                                    else None
+                                ),
+                                "linha": (
+                                    gi["linha"].iloc[0]
+                                    if "linha" in gi.columns and len(gi) > 0
+                                    else (
+                                        keys[gb_main.index("linha_processo")]
+                                        if "linha_processo" in gb_main
+                                        else None
+                                    )
+                                ),
+                                "nome_colaborador": (
+                                    keys[gb_main.index("nome_colaborador")]
+                                    if "nome_colaborador" in gb_main
+                                    else None
+                                ),
+                                "valor_recebido_total": (
+                                    gi["faturamento_item"].sum()
+                                    if "faturamento_item" in gi.columns
+                                    else 0.0
+                                ),
+                                "comissao_total": (
+                                    gi["comissao_calculada"].sum()
+                                    if "comissao_calculada" in gi.columns
+                                    else 0.0
+                                ),
+                                "taxa_rateio_aplicada": (
+                                    gi["taxa_rateio_aplicada"].iloc[0]
+                                    if "taxa_rateio_aplicada" in gi.columns
+                                    and len(gi) > 0
+                                    else None
+                                ),
+                                "percentual_elegibilidade_pe": (
+                                    gi["percentual_elegibilidade_pe"].iloc[0]
+                                    if "percentual_elegibilidade_pe"
+                                    in gi.columns
+                                    and len(gi) > 0
+                                    else None
+                                ),
+                                "aviso_divergencia": "Divergencia de taxa_rateio e/ou PE entre itens deste pagamento",
+                            }
+                            try:
+                                row["percentual_comissao"] = float(
+                                    row["taxa_rateio_aplicada"]
+                                ) * float(row["percentual_elegibilidade_pe"])
+                            except Exception:
+                                row["percentual_comissao"] = None
+                            # incluir contexto somente quando divergente
+                            for c in ["grupo", "subgrupo", "tipo_mercadoria"]:
+                                if c in gi.columns:
+                                    row[c] = gi[c].iloc[0]
+                            out_rows.append(row)
+                except Exception:
+                    continue
+            df_out = pd.DataFrame(out_rows)
+            # Garantir presença da coluna de comissão
+            try:
+                if not df_out.empty and "comissao_total" not in df_out.columns:
+                    df_out["comissao_total"] = 0.0
+            except Exception:
+                pass
+
+            # Ordenação
+            sort_cols = [
+                c
+                for c in ["processo", "DATA_RECEBIMENTO"]
+                if c in df_out.columns
+            ]
+            if sort_cols:
+                df_out = df_out.sort_values(sort_cols)
+
+            # NOVO: Adicionar seção de avisos para documentos não mapeados
+            if (
+                hasattr(self, "documentos_nao_mapeados_nf")
+                and not self.documentos_nao_mapeados_nf.empty
+            ):
+                # Criar linhas de separação
+                separador1 = pd.DataFrame([{c: "" for c in df_out.columns}])
+                separador2 = pd.DataFrame(
+                    [
+                        {
+                            "processo": "⚠️ ATENÇÃO: Documentos da Análise Financeira não encontrados na Análise Comercial",
+                            **{
+                                c: "" for c in df_out.columns if c != "processo"
+                            },
+                        }
+                    ]
+                )
+                separador3 = pd.DataFrame([{c: "" for c in df_out.columns}])
+
+                # Preparar DataFrame de avisos com colunas compatíveis
+                avisos = self.documentos_nao_mapeados_nf.copy()
+                avisos_formatted = pd.DataFrame()
+
+                # Mapear colunas dos avisos para colunas existentes
+                if "DOCUMENTO_ORIGINAL" in avisos.columns:
+                    avisos_formatted["processo"] = avisos["DOCUMENTO_ORIGINAL"]
+                if "DOCUMENTO_NORMALIZADO" in avisos.columns:
+                    avisos_formatted["linha"] = "Doc (6 dig): " + avisos[
+                        "DOCUMENTO_NORMALIZADO"
+                    ].astype(str)
+                if "VALOR" in avisos.columns:
+                    avisos_formatted["valor_recebido_total"] = avisos["VALOR"]
+                if "CLIENTE" in avisos.columns:
+                    avisos_formatted["nome_colaborador"] = "Cliente: " + avisos[
+                        "CLIENTE"
+                    ].astype(str)
+                if "DATA" in avisos.columns:
+                    avisos_formatted["DATA_RECEBIMENTO"] = avisos["DATA"]
+                if "MOTIVO" in avisos.columns:
+                    avisos_formatted["taxa_rateio_aplicada"] = avisos["MOTIVO"]
+
+                # Preencher colunas faltantes
+                for col in df_out.columns:
+                    if col not in avisos_formatted.columns:
+                        avisos_formatted[col] = ""
+
+                # Reordenar colunas para corresponder ao df_out
+                avisos_formatted = avisos_formatted[df_out.columns]
+
+                # Combinar: dados + separadores + avisos
+                df_final = pd.concat(
+                    [
+                        df_out,
+                        separador1,
+                        separador2,
+                        separador3,
+                        avisos_formatted,
+                    ],
+                    ignore_index=True,
+                )
+
+                df_out = df_final
+
+            if getattr(self, "_logger", None):
+                self._logger.info(
+                    "Aba COMISSOES_RECEBIMENTO escrita (1 linha por pagamento; inclui linha do processo)."
+                )
+                if (
+                    hasattr(self, "documentos_nao_mapeados_nf")
+                    and not self.documentos_nao_mapeados_nf.empty
+                ):
+                    self._logger.info(
+                        f"  - {len(self.documentos_nao_mapeados_nf)} documentos não mapeados incluídos como avisos."
+                    )
+            return df_out
+        return None
+
+    def _aba_debug_env(self):
+        """DEBUG_ENV: colunas das entradas e colaboradores por recebimento."""
+        env = []
+        try:
+            rec = self.data.get("RECEBIMENTOS", pd.DataFrame())
+            env.append(
+                {
+                    "categoria": "RECEBIMENTOS_cols",
+                    "detalhe": (
+                        ", ".join([str(c) for c in rec.columns])
+                        if rec is not None and not rec.empty
+                        else ""
+                    ),
+                }
+            )
+        except Exception:
+            pass
+        try:
+            anal = self.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
+            env.append(
+                {
+                    "categoria": "ANALISE_cols",
+                    "detalhe": (
+                        ", ".join([str(c) for c in anal.columns])
+                        if anal is not None and not anal.empty
+                        else ""
+                    ),
+                }
+            )
+        except Exception:
+            pass
+        try:
+            rcv_set = sorted(list(getattr(self, "recebe_por_recebimento", set())))
+            env.append(
+                {
+                    "categoria": "recebe_por_recebimento",
+                    "detalhe": ", ".join(rcv_set),
+                }
+            )
+        except Exception:
+            pass
+        # merge com qualquer coleta anterior
+        try:
+            env.extend(getattr(self, "debug_env", []))
+        except Exception:
+            pass
+        return _nao_vazia(pd.DataFrame(env))
+
+    def _aba_debug_analise_info(self):
+        """DEBUG_ANALISE_INFO: colunas do ANALISE_COMERCIAL_COMPLETA, para verificar headers."""
+        anal = self.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
+        if anal is None or anal.empty:
+            return None
+        info_rows = []
+        try:
+            info_rows.append(
+                {"colunas_analise": ", ".join([str(c) for c in anal.columns.tolist()])}
+            )
+        except Exception:
+            pass
+        return pd.DataFrame(info_rows)
+
+    def _aba_debug_analise_sample(self):
+        """DEBUG_ANALISE_SAMPLE: amostra de colunas relevantes do ANALISE_COMERCIAL_COMPLETA."""
+        anal = self.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
+        if anal is None or anal.empty:
+            return None
+        wanted = [
+            "Processo",
+            "Negcio",
+            "Negocio",
+            "Grupo",
+            "Subgrupo",
+            "Tipo de Mercadoria",
+            "Tipo Mercadoria",
+            "Consultor Interno",
+            "Consultor",
+            "Representante-pedido",
+            "Representante",
+        ]
+        have = [c for c in wanted if c in anal.columns]
+        return anal[have].head(200) if have else None
+
+    def _aba_debug_fornecedores(self):
+        """DEBUG_FORNECEDORES: uma linha por (colaborador, linha_item, fornecedor_index) atribuída."""
+        df_debug_fornecedores = pd.DataFrame(self.debug_fornecedores)
+        if not df_debug_fornecedores.empty:
+            # Normalizar campos esperados
+            if "peso_fornecedor" in df_debug_fornecedores.columns:
+                df_debug_fornecedores["peso_fornecedor"] = pd.to_numeric(
+                    df_debug_fornecedores["peso_fornecedor"], errors="coerce"
+                ).fillna(0.0)
+
+            # Mapear atribuições por colaborador para identificar quais linhas devem ser consideradas
+            df_atr = self.data.get("ATRIBUICOES", pd.DataFrame())
+            atrib_map = {}
+            if (
+                not df_atr.empty
+                and "colaborador" in df_atr.columns
+                and "linha" in df_atr.columns
+            ):
+                for col, grp in df_atr.groupby("colaborador"):
+                    atrib_map[col] = set(grp["linha"].dropna().tolist())
+
+            # Filtrar: manter apenas linhas onde o colaborador tem a linha atribuída e peso_fornecedor > 0
+            def _row_deve_ser_mantida(row):
+                try:
+                    colab = row.get("colaborador")
+                    linha = row.get("linha_item")
+                    peso = float(row.get("peso_fornecedor") or 0.0)
+                    if peso <= 0:
+                        return False
+                    if colab in atrib_map:
+                        return linha in atrib_map[colab]
+                    # Se colaborador não tem atribuições registradas, assumir conservador: não manter
+                    return False
+                except Exception:
+                    return False
+
+            mask = df_debug_fornecedores.apply(_row_deve_ser_mantida, axis=1)
+            df_debug_fornecedores = df_debug_fornecedores[mask].copy()
+
+            # Deduplicar: manter apenas uma ocorrência por (colaborador, linha_item, fornecedor_index)
+            dedup_dbg = [
+                c
+                for c in ["colaborador", "linha_item", "fornecedor_index"]
+                if c in df_debug_fornecedores.columns
+            ]
+            if dedup_dbg:
+                df_debug_fornecedores = df_debug_fornecedores.drop_duplicates(
+                    subset=dedup_dbg, keep="last"
+                ).reset_index(drop=True)
+
+            return _nao_vazia(df_debug_fornecedores)
+        return None
+
+    def _aba_cross_selling(self):
+        """CROSS_SELLING_DECISIONS: registro das decisões tomadas."""
+        if self.cross_selling_decisions:
+            df_cs = pd.DataFrame(
+                [
+                    {
+                        "processo": p,
+                        "consultor": v.get("consultor"),
+                        "linha": v.get("linha"),
+                        "taxa_pct": v.get("taxa"),
+                        "decision": v.get("decision"),
+                        "timestamp": v.get("timestamp"),
+                    }
+                    for p, v in self.cross_selling_decisions.items()
+                ]
+            )
+            return df_cs
+        return None
+
+    def _aba_estado(self):
+        """ESTADO: snapshot atual do estado de recebimentos/reconciliações."""
+        # Preferir o estado do state_manager quando disponível
+        df_estado = None
+        try:
+            if (
+                hasattr(self, "state_manager")
+                and getattr(self.state_manager, "estado", None) is not None
+            ):
+                df_estado = self.state_manager.estado.copy()
+        except Exception:
+            df_estado = None
+
+        if df_estado is None:
+            df_estado = getattr(self, "estado", None)
+
+        if df_estado is None:
+            # Criar DataFrame vazio com todas as colunas (incluindo debug) para evitar erro no frontend ao ler a aba
+            from models.process_state import ESTADO_COLUMNS
+
+            df_estado = pd.DataFrame(columns=ESTADO_COLUMNS)
+        else:
+            # Normalizar o estado para garantir que todas as colunas estejam presentes
+            df_estado = self.state_manager._normalize_estado(df_estado)
+            if LOG_VERBOSE:
+                _info(
+                    f"[DEBUG] Estado antes de salvar: {len(df_estado)} processos, colunas={list(df_estado.columns)}"
+                )
+                processos_com_debug = df_estado[
+                    df_estado["LOG_EVENTOS"].notna()
+                    | df_estado["PAGAMENTOS_PROCESSADOS"].notna()
+                ]
+                if not processos_com_debug.empty:
+                    _info(
+                        f"[DEBUG] Processos com dados de debug: {len(processos_com_debug)} - {sorted(processos_com_debug['PROCESSO'].astype(str).tolist())}"
+                    )
+
+        return df_estado
+
+    def _aba_debug_pagamentos_financeiro(self):
+        """DEBUG_PAGAMENTOS_FINANCEIRO: pagamentos do financeiro normalizados."""
+        if (
+            hasattr(self, "pagamentos_financeiro_normalizados")
+            and self.pagamentos_financeiro_normalizados is not None
+            and not self.pagamentos_financeiro_normalizados.empty
+        ):
+            df_debug_pagamentos = self.pagamentos_financeiro_normalizados.copy()
+            # Adicionar comentário explicativo na primeira linha (como linha de dados)
+            # Nota: openpyxl não suporta comentários em células facilmente, então adicionamos uma linha de cabeçalho explicativo
+            return df_debug_pagamentos
+        else:
+            # Criar DataFrame vazio com colunas esperadas
+            df_debug_pagamentos = pd.DataFrame(
+                columns=[
+                    "DOCUMENTO_ORIGINAL",
+                    "VALOR_PAGO",
+                    "DATA_PAGAMENTO",
+                    "ID_CLIENTE",
+                    "TIPO_PAGAMENTO",
+                    "PROCESSO",
+                    "DOCUMENTO_NORMALIZADO",
+                ]
+            )
+            return df_debug_pagamentos
+
     def _gerar_saida_impl(self):
         """Implementação da geração do arquivo Excel (com try/except externo)."""
         # Gerar nome do arquivo com timestamp atual
@@ -3602,6 +4537,13 @@ class CalculoComissao:
         NOME_ARQUIVO_SAIDA = "Comissoes_Calculadas_{}.xlsx".format(
             datetime.now().strftime("%Y%m%d_%H%M%S")
         )
+        # Modo lote: dois meses podem terminar no mesmo segundo
+        if os.path.exists(NOME_ARQUIVO_SAIDA):
+            mes_ap = int(self.params.get("mes_apuracao", 0) or 0)
+            ano_ap = int(self.params.get("ano_apuracao", 0) or 0)
+            NOME_ARQUIVO_SAIDA = NOME_ARQUIVO_SAIDA.replace(
+                ".xlsx", f"_{mes_ap:02d}_{ano_ap}.xlsx"
+            )
 
         if not hasattr(self, "comissoes_df") or self.comissoes_df.empty:
             _info("Nenhuma comissão foi calculada. O arquivo de saída não será gerado.")
@@ -3901,735 +4843,177 @@ class CalculoComissao:
             pass
 
         # detalhes do FC foram incorporados em self.comissoes_df
-        df_validacao = pd.DataFrame(self.validation_log)
-        df_debug_fornecedores = pd.DataFrame(self.debug_fornecedores)
-
-        with pd.ExcelWriter(NOME_ARQUIVO_SAIDA, engine="openpyxl") as writer:
-            # Se sinalizado que não houve faturamento no mês, inserir uma linha de aviso
-            try:
-                if getattr(self, "_no_faturamento_mes", False):
-                    aviso_row = {
-                        "id_colaborador": "",
-                        "nome_colaborador": "AVISO: Nenhum item faturado neste mês",
-                        "cargo": "",
-                        "processo": "",
-                        "cod_produto": "",
-                        "descricao_produto": "",
-                        "linha": "",
-                        "grupo": "",
-                        "subgrupo": "",
-                        "tipo_mercadoria": "",
-                        "faturamento_item": 0.0,
-                        "taxa_rateio_aplicada": 0.0,
-                        "percentual_elegibilidade_pe": 0.0,
-                        "fator_correcao_fc": 0.0,
-                        "comissao_potencial_maxima": 0.0,
-                        "comissao_calculada": 0.0,
-                    }
-                    # Garantir que as colunas existam e inserir linha no topo
-                    cols = (
-                        df_comissoes.columns.tolist()
-                        if not df_comissoes.empty
-                        else list(aviso_row.keys())
-                    )
-                    df_aviso = pd.DataFrame([aviso_row], columns=cols)
-                    if df_comissoes.empty:
-                        df_to_write = df_aviso
-                    else:
-                        df_to_write = pd.concat(
-                            [df_aviso, df_comissoes], ignore_index=True, sort=False
-                        )
-                    df_to_write.to_excel(
-                        writer, sheet_name="COMISSOES_CALCULADAS", index=False
-                    )
-                else:
-                    df_comissoes.to_excel(
-                        writer, sheet_name="COMISSOES_CALCULADAS", index=False
-                    )
-            except Exception:
-                df_comissoes.to_excel(
-                    writer, sheet_name="COMISSOES_CALCULADAS", index=False
-                )
-            df_resumo.to_excel(writer, sheet_name="RESUMO_COLABORADOR", index=False)
-            # Aba: COMISSOES_RECEBIMENTO (uma linha por pagamento do processo)
-            try:
-                if (
-                    hasattr(self, "comissoes_recebimento_df")
-                    and self.comissoes_recebimento_df is not None
-                    and not self.comissoes_recebimento_df.empty
-                ):
-                    df_rec_raw = self.data.get("RECEBIMENTOS", pd.DataFrame())
-                    base = self.comissoes_recebimento_df.copy()
-                    # Validar que cada processo pertence a uma única linha; se mais de uma, avisar e excluir
-                    try:
-                        linhas_por_proc = base.groupby("processo")["linha"].nunique(
-                            dropna=False
-                        )
-                        procs_multilinha = set(
-                            linhas_por_proc[linhas_por_proc > 1].index.tolist()
+        # VALIDACAO registra o log até este ponto
+        registros_validacao = list(self.validation_log)
+        self.tempos_abas_saida = {}
+        self.abas_fora_do_perfil = []
+
+        # Gravação em uma passada, com estilos aplicados durante a escrita
+        motor_saida = self._motor_saida_excel()
+        inicio_saida = time.perf_counter()
+        with PlanilhaSaida(NOME_ARQUIVO_SAIDA, motor_saida) as writer:
+            with self._medir_aba("COMISSOES_CALCULADAS"):
+                # Se sinalizado que não houve faturamento no mês, inserir uma linha de aviso
+                try:
+                    if getattr(self, "_no_faturamento_mes", False):
+                        aviso_row = {
+                            "id_colaborador": "",
+                            "nome_colaborador": "AVISO: Nenhum item faturado neste mês",
+                            "cargo": "",
+                            "processo": "",
+                            "cod_produto": "",
+                            "descricao_produto": "",
+                            "linha": "",
+                            "grupo": "",
+                            "subgrupo": "",
+                            "tipo_mercadoria": "",
+                            "faturamento_item": 0.0,
+                            "taxa_rateio_aplicada": 0.0,
+                            "percentual_elegibilidade_pe": 0.0,
+                            "fator_correcao_fc": 0.0,
+                            "comissao_potencial_maxima": 0.0,
+                            "comissao_calculada": 0.0,
+                        }
+                        # Garantir que as colunas existam e inserir linha no topo
+                        cols = (
+                            df_comissoes.columns.tolist()
+                            if not df_comissoes.empty
+                            else list(aviso_row.keys())
                         )
-                        for p in procs_multilinha:
-                            self._log_validacao(
-                                "AVISO",
-                                f"Processo com múltiplas linhas na COMISSOES_RECEBIMENTO (ignorado): {p}",
-                                {"processo": p},
-                            )
-                        if procs_multilinha:
-                            base = base[~base["processo"].isin(procs_multilinha)]
-                    except Exception:
-                        pass
-
-                    # Derivar a linha do processo (única) para exibir
-                    try:
-                        linha_proc_map = (
-                            base.groupby("processo")["linha"]
-                            .agg(
-                                lambda s: (
-                                    s.dropna().iloc[0] if len(s.dropna()) > 0 else None
-                                )
+                        df_aviso = pd.DataFrame([aviso_row], columns=cols)
+                        if df_comissoes.empty:
+                            df_to_write = df_aviso
+                        else:
+                            df_to_write = pd.concat(
+                                [df_aviso, df_comissoes], ignore_index=True, sort=False
                             )
-                            .to_dict()
+                        writer.escrever(
+                            df_to_write,
+                            "COMISSOES_CALCULADAS",
+                            cores_colunas=cores_por_coluna(df_to_write.columns),
                         )
-                        base["linha_processo"] = base["processo"].map(linha_proc_map)
-                    except Exception:
-                        base["linha_processo"] = None
-
-                    # Anexar DATA_RECEBIMENTO por (processo, valor, sequencia) para diferenciar pagamentos repetidos
-                    if (
-                        df_rec_raw is not None
-                        and not df_rec_raw.empty
-                        and all(
-                            c in df_rec_raw.columns
-                            for c in ["PROCESSO", "DATA_RECEBIMENTO", "VALOR_RECEBIDO"]
-                        )
-                    ):
-                        df_r = df_rec_raw[
-                            ["PROCESSO", "DATA_RECEBIMENTO", "VALOR_RECEBIDO"]
-                        ].copy()
-                        df_r["PROCESSO"] = df_r["PROCESSO"].astype(str).str.strip()
-                        df_r["_seq"] = df_r.groupby(
-                            ["PROCESSO", "VALOR_RECEBIDO"]
-                        ).cumcount()
-                        base["processo"] = base["processo"].astype(str).str.strip()
-                        base["_seq"] = base.groupby(
-                            ["processo", "faturamento_item"]
-                        ).cumcount()
-                        df_join = base.merge(
-                            df_r,
-                            left_on=["processo", "faturamento_item", "_seq"],
-                            right_on=["PROCESSO", "VALOR_RECEBIDO", "_seq"],
-                            how="left",
-                        )
-                        for cdrop in ["PROCESSO", "VALOR_RECEBIDO", "_seq"]:
-                            if cdrop in df_join.columns:
-                                df_join = df_join.drop(columns=[cdrop])
                     else:
-                        df_join = base.copy()
-
-                    # Agregar por processo + DATA + linha + colaborador (uma linha por pagamento/colaborador);
-                    # se houver divergência de taxa/PE entre itens desse pagamento, detalhar por contexto e sinalizar.
-                    gb_main = [
-                        k
-                        for k in [
-                            "processo",
-                            "DATA_RECEBIMENTO",
-                            "linha_processo",
-                            "nome_colaborador",
-                        ]
-                        if k in df_join.columns
-                    ]
-                    out_rows = []
-                    for keys, g in df_join.groupby(gb_main, dropna=False):
-                        try:
-                            div_rateio = (
-                                g["taxa_rateio_aplicada"].nunique(dropna=False) > 1
-                                if "taxa_rateio_aplicada" in g.columns
-                                else False
-                            )
-                            div_pe = (
-                                g["percentual_elegibilidade_pe"].nunique(dropna=False)
-                                > 1
-                                if "percentual_elegibilidade_pe" in g.columns
-                                else False
-                            )
-                            if not (div_rateio or div_pe):
-                                row = {
-                                    "processo": (
-                                        keys[gb_main.index("processo")]
-                                        if "processo" in gb_main
-                                        else None
-                                    ),
-                                    "DATA_RECEBIMENTO": (
-                                        keys[gb_main.index("DATA_RECEBIMENTO")]
-                                        if "DATA_RECEBIMENTO" in gb_main
-                                        else None
-                                    ),
-                                    "linha": (
-                                        keys[gb_main.index("linha_processo")]
-                                        if "linha_processo" in gb_main
-                                        else None
-                                    ),
-                                    "nome_colaborador": (
-                                        keys[gb_main.index("nome_colaborador")]
-                                        if "nome_colaborador" in gb_main
-                                        else None
-                                    ),
-                                    "valor_recebido_total": (
-                                        g["faturamento_item"].sum()
-                                        if "faturamento_item" in g.columns
-                                        else 0.0
-                                    ),
-                                    "comissao_total": (
-                                        g["comissao_calculada"].sum()
-                                        if "comissao_calculada" in g.columns
-                                        else 0.0
-                                    ),
-                                    "taxa_rateio_aplicada": (
-                                        g["taxa_rateio_aplicada"].iloc[0]
-                                        if "taxa_rateio_aplicada" in g.columns
-                                        and len(g) > 0
-                                        else None
-                                    ),
-                                    "percentual_elegibilidade_pe": (
-                                        g["percentual_elegibilidade_pe"].iloc[0]
-                                        if "percentual_elegibilidade_pe" in g.columns
-                                        and len(g) > 0
-                                        else None
-                                    ),
-                                }
-                                # percentual de comissão para referência
-                                try:
-                                    row["percentual_comissao"] = float(
-                                        row["taxa_rateio_aplicada"]
-                                    ) * float(row["percentual_elegibilidade_pe"])
-                                except Exception:
-                                    row["percentual_comissao"] = None
-                                out_rows.append(row)
-                            else:
-                                # detalhar por contexto (linha/grupo/subgrupo/tipo) e sinalizar divergência
-                                inner_keys = [
-                                    c
-                                    for c in [
-                                        "linha",
-                                        "grupo",
-                                        "subgrupo",
-                                        "tipo_mercadoria",
-                                    ]
-                                    if c in g.columns
-                                ]
-                                for _, gi in g.groupby(inner_keys, dropna=False):
-                                    row = {
-                                        "processo": (
-                                            keys[gb_main.index("processo")]
-                                            if "processo" in gb_main
-                                            else None
-                                        ),
-                                        "DATA_RECEBIMENTO": (
-                                            keys[gb_main.index("DATA_RECEBIMENTO")]
-                                            if "DATA_RECEBIMENTO" in gb_main
-                                            else None
-                                        ),
-                                        "linha": (
-                                            gi["linha"].iloc[0]
-                                            if "linha" in gi.columns and len(gi) > 0
-                                            else (
-                                                keys[gb_main.index("linha_processo")]
-                                                if "linha_processo" in gb_main
-                                                else None
-                                            )
-                                        ),
-                                        "nome_colaborador": (
-                                            keys[gb_main.index("nome_colaborador")]
-                                            if "nome_colaborador" in gb_main
-                                            else None
-                                        ),
-                                        "valor_recebido_total": (
-                                            gi["faturamento_item"].sum()
-                                            if "faturamento_item" in gi.columns
-                                            else 0.0
-                                        ),
-                                        "comissao_total": (
-                                            gi["comissao_calculada"].sum()
-                                            if "comissao_calculada" in gi.columns
-                                            else 0.0
-                                        ),
-                                        "taxa_rateio_aplicada": (
-                                            gi["taxa_rateio_aplicada"].iloc[0]
-                                            if "taxa_rateio_aplicada" in gi.columns
-                                            and len(gi) > 0
-                                            else None
-                                        ),
-                                        "percentual_elegibilidade_pe": (
-                                            gi["percentual_elegibilidade_pe"].iloc[0]
-                                            if "percentual_elegibilidade_pe"
-                                            in gi.columns
-                                            and len(gi) > 0
-                                            else None
-                                        ),
-                                        "aviso_divergencia": "Divergencia de taxa_rateio e/ou PE entre itens deste pagamento",
-                                    }
-                                    try:
-                                        row["percentual_comissao"] = float(
-                                            row["taxa_rateio_aplicada"]
-                                        ) * float(row["percentual_elegibilidade_pe"])
-                                    except Exception:
-                                        row["percentual_comissao"] = None
-                                    # incluir contexto somente quando divergente
-                                    for c in ["grupo", "subgrupo", "tipo_mercadoria"]:
-                                        if c in gi.columns:
-                                            row[c] = gi[c].iloc[0]
-                                    out_rows.append(row)
-                        except Exception:
-                            continue
-                    df_out = pd.DataFrame(out_rows)
-                    # Garantir presença da coluna de comissão
-                    try:
-                        if not df_out.empty and "comissao_total" not in df_out.columns:
-                            df_out["comissao_total"] = 0.0
-                    except Exception:
-                        pass
-
-                    # Ordenação
-                    sort_cols = [
-                        c
-                        for c in ["processo", "DATA_RECEBIMENTO"]
-                        if c in df_out.columns
-                    ]
-                    if sort_cols:
-                        df_out = df_out.sort_values(sort_cols)
-
-                    # NOVO: Adicionar seção de avisos para documentos não mapeados
-                    if (
-                        hasattr(self, "documentos_nao_mapeados_nf")
-                        and not self.documentos_nao_mapeados_nf.empty
-                    ):
-                        # Criar linhas de separação
-                        separador1 = pd.DataFrame([{c: "" for c in df_out.columns}])
-                        separador2 = pd.DataFrame(
-                            [
-                                {
-                                    "processo": "⚠️ ATENÇÃO: Documentos da Análise Financeira não encontrados na Análise Comercial",
-                                    **{
-                                        c: "" for c in df_out.columns if c != "processo"
-                                    },
-                                }
-                            ]
+                        writer.escrever(
+                            df_comissoes,
+                            "COMISSOES_CALCULADAS",
+                            cores_colunas=cores_por_coluna(df_comissoes.columns),
                         )
-                        separador3 = pd.DataFrame([{c: "" for c in df_out.columns}])
-
-                        # Preparar DataFrame de avisos com colunas compatíveis
-                        avisos = self.documentos_nao_mapeados_nf.copy()
-                        avisos_formatted = pd.DataFrame()
-
-                        # Mapear colunas dos avisos para colunas existentes
-                        if "DOCUMENTO_ORIGINAL" in avisos.columns:
-                            avisos_formatted["processo"] = avisos["DOCUMENTO_ORIGINAL"]
-                        if "DOCUMENTO_NORMALIZADO" in avisos.columns:
-                            avisos_formatted["linha"] = "Doc (6 dig): " + avisos[
-                                "DOCUMENTO_NORMALIZADO"
-                            ].astype(str)
-                        if "VALOR" in avisos.columns:
-                            avisos_formatted["valor_recebido_total"] = avisos["VALOR"]
-                        if "CLIENTE" in avisos.columns:
-                            avisos_formatted["nome_colaborador"] = "Cliente: " + avisos[
-                                "CLIENTE"
-                            ].astype(str)
-                        if "DATA" in avisos.columns:
-                            avisos_formatted["DATA_RECEBIMENTO"] = avisos["DATA"]
-                        if "MOTIVO" in avisos.columns:
-                            avisos_formatted["taxa_rateio_aplicada"] = avisos["MOTIVO"]
-
-                        # Preencher colunas faltantes
-                        for col in df_out.columns:
-                            if col not in avisos_formatted.columns:
-                                avisos_formatted[col] = ""
-
-                        # Reordenar colunas para corresponder ao df_out
-                        avisos_formatted = avisos_formatted[df_out.columns]
-
-                        # Combinar: dados + separadores + avisos
-                        df_final = pd.concat(
-                            [
-                                df_out,
-                                separador1,
-                                separador2,
-                                separador3,
-                                avisos_formatted,
-                            ],
-                            ignore_index=True,
+                except Exception:
+                    if "COMISSOES_CALCULADAS" not in writer.abas:
+                        writer.escrever(
+                            df_comissoes,
+                            "COMISSOES_CALCULADAS",
+                            cores_colunas=cores_por_coluna(df_comissoes.columns),
                         )
+            for nome, construir in (
+                ("RESUMO_COLABORADOR", lambda: df_resumo),
+                ("COMISSOES_RECEBIMENTO", self._aba_comissoes_recebimento),
+                ("VALIDACAO", lambda: pd.DataFrame(registros_validacao)),
+                ("DIAGNOSTICO_FALTAS", lambda: _nao_vazia(self._resumo_faltas_diagnostico())),
+                # Abas de DEBUG adicionais para diagnosticar COMISSOES_RECEBIMENTO
+                ("DEBUG_RECEBIMENTOS_RAW", lambda: _nao_vazia(self.data.get("RECEBIMENTOS"))),
+                (
+                    "DEBUG_RECEBIMENTOS",
+                    lambda: _nao_vazia(pd.DataFrame(getattr(self, "debug_recebimentos", []))),
+                ),
+                ("DEBUG_ENV", self._aba_debug_env),
+                ("DEBUG_ANALISE_INFO", self._aba_debug_analise_info),
+                ("DEBUG_ANALISE_SAMPLE", self._aba_debug_analise_sample),
+                ("DEBUG_FORNECEDORES", self._aba_debug_fornecedores),
+                ("CROSS_SELLING_DECISIONS", self._aba_cross_selling),
+            ):
+                self._escrever_aba(writer, nome, construir)
+            with self._medir_aba("RECONCILIACAO"):
+                # Aba: RECONCILIACAO (detalhamento e resumo de saldos)
+                try:
+                    detalhes = getattr(self, "reconciliacao_detalhada_list", [])
+                    resumo = getattr(self, "reconciliacao_resumo_list", [])
 
-                        df_final.to_excel(
-                            writer, sheet_name="COMISSOES_RECEBIMENTO", index=False
-                        )
+                    if detalhes:
+                        df_reconciliacao_detalhada = pd.DataFrame(detalhes)
+                        if (
+                            hasattr(self, "comissoes_df")
+                            and isinstance(self.comissoes_df, pd.DataFrame)
+                            and not self.comissoes_df.empty
+                        ):
+                            colunas_base = [
+                                c
+                                for c in self.comissoes_df.columns
+                                if c in df_reconciliacao_detalhada.columns
+                            ]
+                            colunas_extra = [
+                                c
+                                for c in df_reconciliacao_detalhada.columns
+                                if c not in colunas_base
+                            ]
+                            if colunas_base:
+                                df_reconciliacao_detalhada = df_reconciliacao_detalhada[
+                                    colunas_base + colunas_extra
+                                ]
                     else:
-                        df_out.to_excel(
-                            writer, sheet_name="COMISSOES_RECEBIMENTO", index=False
-                        )
-
-                    if getattr(self, "_logger", None):
-                        self._logger.info(
-                            "Aba COMISSOES_RECEBIMENTO escrita (1 linha por pagamento; inclui linha do processo)."
+                        _info(
+                            "Nenhuma reconciliação foi processada. Aba 'RECONCILIACAO' ficará vazia."
                         )
-                        if (
-                            hasattr(self, "documentos_nao_mapeados_nf")
-                            and not self.documentos_nao_mapeados_nf.empty
+                        if hasattr(self, "comissoes_df") and isinstance(
+                            self.comissoes_df, pd.DataFrame
                         ):
-                            self._logger.info(
-                                f"  - {len(self.documentos_nao_mapeados_nf)} documentos não mapeados incluídos como avisos."
+                            df_reconciliacao_detalhada = pd.DataFrame(
+                                columns=self.comissoes_df.columns
                             )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever COMISSOES_RECEBIMENTO: {e}", {}
-                )
-            df_validacao.to_excel(writer, sheet_name="VALIDACAO", index=False)
-            # Abas de DEBUG adicionais para diagnosticar COMISSOES_RECEBIMENTO
-            try:
-                rec_raw = self.data.get("RECEBIMENTOS", pd.DataFrame())
-                if rec_raw is not None and not rec_raw.empty:
-                    rec_raw.to_excel(
-                        writer, sheet_name="DEBUG_RECEBIMENTOS_RAW", index=False
-                    )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever DEBUG_RECEBIMENTOS_RAW: {e}", {}
-                )
-
-            try:
-                dbg_rec_df = pd.DataFrame(getattr(self, "debug_recebimentos", []))
-                if not dbg_rec_df.empty:
-                    dbg_rec_df.to_excel(
-                        writer, sheet_name="DEBUG_RECEBIMENTOS", index=False
-                    )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever DEBUG_RECEBIMENTOS: {e}", {}
-                )
-
-            try:
-                env = []
-                try:
-                    rec = self.data.get("RECEBIMENTOS", pd.DataFrame())
-                    env.append(
-                        {
-                            "categoria": "RECEBIMENTOS_cols",
-                            "detalhe": (
-                                ", ".join([str(c) for c in rec.columns])
-                                if rec is not None and not rec.empty
-                                else ""
-                            ),
-                        }
-                    )
-                except Exception:
-                    pass
-                try:
-                    anal = self.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
-                    env.append(
-                        {
-                            "categoria": "ANALISE_cols",
-                            "detalhe": (
-                                ", ".join([str(c) for c in anal.columns])
-                                if anal is not None and not anal.empty
-                                else ""
-                            ),
-                        }
-                    )
-                except Exception:
-                    pass
-                try:
-                    rcv_set = sorted(
-                        list(getattr(self, "recebe_por_recebimento", set()))
-                    )
-                    env.append(
-                        {
-                            "categoria": "recebe_por_recebimento",
-                            "detalhe": ", ".join(rcv_set),
-                        }
-                    )
-                except Exception:
-                    pass
-                # merge com qualquer coleta anterior
-                try:
-                    env.extend(getattr(self, "debug_env", []))
-                except Exception:
-                    pass
-                dbg_env_df = pd.DataFrame(env)
-                if not dbg_env_df.empty:
-                    dbg_env_df.to_excel(writer, sheet_name="DEBUG_ENV", index=False)
-            except Exception as e:
-                self._log_validacao("AVISO", f"Falha ao escrever DEBUG_ENV: {e}", {})
-
-            # Aba com amostra e colunas do ANALISE_COMERCIAL_COMPLETA para verificar headers
-            try:
-                anal = self.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
-                if anal is not None and not anal.empty:
-                    info_rows = []
-                    try:
-                        info_rows.append(
-                            {
-                                "colunas_analise": ", ".join(
-                                    [str(c) for c in anal.columns.tolist()]
-                                )
-                            }
-                        )
-                    except Exception:
-                        pass
-                    df_info = pd.DataFrame(info_rows)
-                    df_info.to_excel(
-                        writer, sheet_name="DEBUG_ANALISE_INFO", index=False
-                    )
-                    # Amostra de colunas relevantes, quando existirem
-                    wanted = [
-                        "Processo",
-                        "Negcio",
-                        "Negocio",
-                        "Grupo",
-                        "Subgrupo",
-                        "Tipo de Mercadoria",
-                        "Tipo Mercadoria",
-                        "Consultor Interno",
-                        "Consultor",
-                        "Representante-pedido",
-                        "Representante",
-                    ]
-                    have = [c for c in wanted if c in anal.columns]
-                    if have:
-                        anal[have].head(200).to_excel(
-                            writer, sheet_name="DEBUG_ANALISE_SAMPLE", index=False
-                        )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever DEBUG_ANALISE_*: {e}", {}
-                )
-            # Aba de depuração detalhada para metas de fornecedores
-            # Limpeza persistente da aba DEBUG_FORNECEDORES: manter apenas uma linha por (colaborador, linha_item, fornecedor_index)
-            try:
-                if not df_debug_fornecedores.empty:
-                    # Normalizar campos esperados
-                    if "peso_fornecedor" in df_debug_fornecedores.columns:
-                        df_debug_fornecedores["peso_fornecedor"] = pd.to_numeric(
-                            df_debug_fornecedores["peso_fornecedor"], errors="coerce"
-                        ).fillna(0.0)
-
-                    # Mapear atribuições por colaborador para identificar quais linhas devem ser consideradas
-                    df_atr = self.data.get("ATRIBUICOES", pd.DataFrame())
-                    atrib_map = {}
-                    if (
-                        not df_atr.empty
-                        and "colaborador" in df_atr.columns
-                        and "linha" in df_atr.columns
-                    ):
-                        for col, grp in df_atr.groupby("colaborador"):
-                            atrib_map[col] = set(grp["linha"].dropna().tolist())
-
-                    # Filtrar: manter apenas linhas onde o colaborador tem a linha atribuída e peso_fornecedor > 0
-                    def _row_deve_ser_mantida(row):
-                        try:
-                            colab = row.get("colaborador")
-                            linha = row.get("linha_item")
-                            peso = float(row.get("peso_fornecedor") or 0.0)
-                            if peso <= 0:
-                                return False
-                            if colab in atrib_map:
-                                return linha in atrib_map[colab]
-                            # Se colaborador não tem atribuições registradas, assumir conservador: não manter
-                            return False
-                        except Exception:
-                            return False
-
-                    mask = df_debug_fornecedores.apply(_row_deve_ser_mantida, axis=1)
-                    df_debug_fornecedores = df_debug_fornecedores[mask].copy()
-
-                    # Deduplicar: manter apenas uma ocorrência por (colaborador, linha_item, fornecedor_index)
-                    dedup_dbg = [
-                        c
-                        for c in ["colaborador", "linha_item", "fornecedor_index"]
-                        if c in df_debug_fornecedores.columns
-                    ]
-                    if dedup_dbg:
-                        df_debug_fornecedores = df_debug_fornecedores.drop_duplicates(
-                            subset=dedup_dbg, keep="last"
-                        ).reset_index(drop=True)
-
-                    # Escrever a aba de depuração limpa
-                    if not df_debug_fornecedores.empty:
-                        df_debug_fornecedores.to_excel(
-                            writer, sheet_name="DEBUG_FORNECEDORES", index=False
-                        )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO",
-                    f"Falha ao limpar DEBUG_FORNECEDORES antes de salvar: {e}",
-                    {},
-                )
+                        else:
+                            df_reconciliacao_detalhada = pd.DataFrame()
 
-            # Aba: CROSS_SELLING_DECISIONS (registro das decisões tomadas)
-            try:
-                if self.cross_selling_decisions:
-                    df_cs = pd.DataFrame(
-                        [
-                            {
-                                "processo": p,
-                                "consultor": v.get("consultor"),
-                                "linha": v.get("linha"),
-                                "taxa_pct": v.get("taxa"),
-                                "decision": v.get("decision"),
-                                "timestamp": v.get("timestamp"),
-                            }
-                            for p, v in self.cross_selling_decisions.items()
-                        ]
+                    writer.escrever(
+                        df_reconciliacao_detalhada,
+                        "RECONCILIACAO",
+                        cores_colunas=cores_por_coluna(df_reconciliacao_detalhada.columns),
                     )
-                    df_cs.to_excel(
-                        writer, sheet_name="CROSS_SELLING_DECISIONS", index=False
-                    )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever CROSS_SELLING_DECISIONS: {e}", {}
-                )
-            # Aba: RECONCILIACAO (detalhamento e resumo de saldos)
-            try:
-                detalhes = getattr(self, "reconciliacao_detalhada_list", [])
-                resumo = getattr(self, "reconciliacao_resumo_list", [])
-
-                if detalhes:
-                    df_reconciliacao_detalhada = pd.DataFrame(detalhes)
-                    if (
-                        hasattr(self, "comissoes_df")
-                        and isinstance(self.comissoes_df, pd.DataFrame)
-                        and not self.comissoes_df.empty
-                    ):
-                        colunas_base = [
-                            c
-                            for c in self.comissoes_df.columns
-                            if c in df_reconciliacao_detalhada.columns
-                        ]
-                        colunas_extra = [
-                            c
-                            for c in df_reconciliacao_detalhada.columns
-                            if c not in colunas_base
-                        ]
-                        if colunas_base:
-                            df_reconciliacao_detalhada = df_reconciliacao_detalhada[
-                                colunas_base + colunas_extra
-                            ]
-                else:
                     _info(
-                        "Nenhuma reconciliação foi processada. Aba 'RECONCILIACAO' ficará vazia."
-                    )
-                    if hasattr(self, "comissoes_df") and isinstance(
-                        self.comissoes_df, pd.DataFrame
-                    ):
-                        df_reconciliacao_detalhada = pd.DataFrame(
-                            columns=self.comissoes_df.columns
-                        )
-                    else:
-                        df_reconciliacao_detalhada = pd.DataFrame()
-
-                df_reconciliacao_detalhada.to_excel(
-                    writer, sheet_name="RECONCILIACAO", index=False
-                )
-                _info(
-                    f"Aba 'RECONCILIACAO' (Detalhada) gerada com {len(df_reconciliacao_detalhada)} linhas."
-                )
-
-                if resumo:
-                    df_reconciliacao_resumo = pd.DataFrame(resumo)
-                    start_row_resumo = len(df_reconciliacao_detalhada) + 3
-                    df_reconciliacao_resumo.to_excel(
-                        writer,
-                        sheet_name="RECONCILIACAO",
-                        index=False,
-                        startrow=start_row_resumo,
+                        f"Aba 'RECONCILIACAO' (Detalhada) gerada com {len(df_reconciliacao_detalhada)} linhas."
                     )
-                    _info("Resumo de reconciliação adicionado ao final da aba.")
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever RECONCILIACAO: {e}", {}
-                )
 
-            # Aba: ESTADO (salva o snapshot atual do estado de recebimentos/reconciliações)
-            try:
-                # Preferir o estado do state_manager quando disponível
-                df_estado = None
-                try:
-                    if (
-                        hasattr(self, "state_manager")
-                        and getattr(self.state_manager, "estado", None) is not None
-                    ):
-                        df_estado = self.state_manager.estado.copy()
-                except Exception:
-                    df_estado = None
-
-                if df_estado is None:
-                    df_estado = getattr(self, "estado", None)
-
-                if df_estado is None:
-                    # Criar DataFrame vazio com todas as colunas (incluindo debug) para evitar erro no frontend ao ler a aba
-                    from models.process_state import ESTADO_COLUMNS
-
-                    df_estado = pd.DataFrame(columns=ESTADO_COLUMNS)
-                else:
-                    # Normalizar o estado para garantir que todas as colunas estejam presentes
-                    df_estado = self.state_manager._normalize_estado(df_estado)
-                    if LOG_VERBOSE:
-                        _info(
-                            f"[DEBUG] Estado antes de salvar: {len(df_estado)} processos, colunas={list(df_estado.columns)}"
+                    if resumo:
+                        df_reconciliacao_resumo = pd.DataFrame(resumo)
+                        start_row_resumo = len(df_reconciliacao_detalhada) + 3
+                        writer.escrever(
+                            df_reconciliacao_resumo,
+                            "RECONCILIACAO",
+                            linha_inicial=start_row_resumo,
                         )
-                        processos_com_debug = df_estado[
-                            df_estado["LOG_EVENTOS"].notna()
-                            | df_estado["PAGAMENTOS_PROCESSADOS"].notna()
-                        ]
-                        if not processos_com_debug.empty:
-                            _info(
-                                f"[DEBUG] Processos com dados de debug: {len(processos_com_debug)} - {sorted(processos_com_debug['PROCESSO'].astype(str).tolist())}"
-                            )
-
-                df_estado.to_excel(writer, sheet_name="ESTADO", index=False)
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO", f"Falha ao escrever ESTADO no arquivo de saída: {e}", {}
-                )
+                        _info("Resumo de reconciliação adicionado ao final da aba.")
+                except Exception as e:
+                    self._log_validacao(
+                        "AVISO", f"Falha ao escrever RECONCILIACAO: {e}", {}
+                    )
+            self._escrever_aba(writer, "ESTADO", self._aba_estado)
+            self._escrever_aba(
+                writer, "DEBUG_PAGAMENTOS_FINANCEIRO", self._aba_debug_pagamentos_financeiro
+            )
 
-            # NOVO (DEBUG): Aba DEBUG_PAGAMENTOS_FINANCEIRO com dados normalizados
+        # Motor legado (pd.ExcelWriter): cores de grupo aplicadas reabrindo o arquivo
+        if writer.motor == "pandas":
             try:
-                if (
-                    hasattr(self, "pagamentos_financeiro_normalizados")
-                    and self.pagamentos_financeiro_normalizados is not None
-                    and not self.pagamentos_financeiro_normalizados.empty
-                ):
-                    df_debug_pagamentos = self.pagamentos_financeiro_normalizados.copy()
-                    # Adicionar comentário explicativo na primeira linha (como linha de dados)
-                    # Nota: openpyxl não suporta comentários em células facilmente, então adicionamos uma linha de cabeçalho explicativo
-                    df_debug_pagamentos.to_excel(
-                        writer, sheet_name="DEBUG_PAGAMENTOS_FINANCEIRO", index=False
-                    )
-                else:
-                    # Criar DataFrame vazio com colunas esperadas
-                    df_debug_pagamentos = pd.DataFrame(
-                        columns=[
-                            "DOCUMENTO_ORIGINAL",
-                            "VALOR_PAGO",
-                            "DATA_PAGAMENTO",
-                            "ID_CLIENTE",
-                            "TIPO_PAGAMENTO",
-                            "PROCESSO",
-                            "DOCUMENTO_NORMALIZADO",
-                        ]
-                    )
-                    df_debug_pagamentos.to_excel(
-                        writer, sheet_name="DEBUG_PAGAMENTOS_FINANCEIRO", index=False
-                    )
-            except Exception as e:
-                self._log_validacao(
-                    "AVISO",
-                    f"Falha ao escrever DEBUG_PAGAMENTOS_FINANCEIRO: {e}",
-                    {},
+                style_output_workbook(NOME_ARQUIVO_SAIDA)
+            except Exception:
+                pass
+        _info(
+            f"[SAIDA] {len(writer.abas)} aba(s) gravada(s) em "
+            f"{time.perf_counter() - inicio_saida:.2f}s (motor {writer.motor}, "
+            f"perfil {self._perfil_saida()})."
+        )
+        _info(
+            "[SAIDA] Tempo por aba: "
+            + ", ".join(
+                f"{nome} {segundos:.2f}s"
+                for nome, segundos in sorted(
+                    self.tempos_abas_saida.items(), key=lambda item: -item[1]
                 )
-
-        try:
-            style_output_workbook(NOME_ARQUIVO_SAIDA)
-        except Exception:
-            pass
+            )
+        )
+        if self.abas_fora_do_perfil:
+            _info(
+                f"[SAIDA] Fora do perfil (não construídas): {', '.join(self.abas_fora_do_perfil)}"
+            )
 
         _info(
             f"\nCálculo finalizado. Arquivo de saída Excel gerado: {NOME_ARQUIVO_SAIDA}"
@@ -4665,6 +5049,8 @@ class CalculoComissao:
         """Executa o fluxo completo de cálculo de comissões."""
         # Decisões passadas via API/UI (lista de dicts com 'processo' e 'decision')
         self.decisoes_passadas = decisoes_cross_selling or []
+        # Contadores de faltas (aba DIAGNOSTICO_FALTAS) valem por execução
+        diagnostics.limpar()
         _info("Iniciando cálculo de comissões...")
         _phase("1. Carregando arquivos...")
         with _timer_ctx("Carregar arquivos", _safe_percent("carregar")):
@@ -4722,7 +5108,11 @@ class CalculoComissao:
 
                 print("[RECEBIMENTO] [ETAPA 1/6] Importando RecebimentoOrchestrator...")
                 orchestrator = RecebimentoOrchestrator(
-                    self, mes_apuracao, ano_apuracao, self.base_path
+                    self,
+                    mes_apuracao,
+                    ano_apuracao,
+                    self.base_path,
+                    state_manager=self.estado_recebimento,
                 )
                 print(
                     "[RECEBIMENTO] [ETAPA 1/6] RecebimentoOrchestrator inicializado com sucesso"
@@ -4730,6 +5120,8 @@ class CalculoComissao:
 
                 print("[RECEBIMENTO] [ETAPA 2/6] Iniciando execução do orquestrador...")
                 arquivo_recebimento = orchestrator.executar()
+                # Estado ao fim do mês (repassado ao mês seguinte em lote)
+                self.estado_recebimento = orchestrator.state_manager
 
                 print("\n" + "=" * 80)
                 print(
@@ -4779,157 +5171,383 @@ class CalculoComissao:
             pass
 
 
-if __name__ == "__main__":
+def _localizar_arquivo_rentabilidade(mes: int, ano: int) -> Optional[str]:
+    """
+    Arquivo de rentabilidade agrupada do mês: procura primeiro em
+    dados_entrada/rentabilidades/, depois em rentabilidades/.
+    """
+    import glob
+
+    mm = str(mes).zfill(2)
+    candidato1 = f"dados_entrada/rentabilidades/rentabilidade_{mm}_{ano}_agrupada.xlsx"
+    candidato2 = f"rentabilidades/rentabilidade_{mm}_{ano}_agrupada.xlsx"
+
+    # Buscar com glob em ambos os locais
+    encontrados = glob.glob(
+        f"dados_entrada/rentabilidades/*{mm}*{ano}*agrupada*.xlsx"
+    ) + glob.glob(f"rentabilidades/*{mm}*{ano}*agrupada*.xlsx")
+
+    arquivo = None
+    if encontrados:
+        arquivo = encontrados[0]
+    elif os.path.exists(candidato1):
+        # fallback para nome padrão caso não encontre agrupada
+        arquivo = candidato1
+    elif os.path.exists(candidato2):
+        arquivo = candidato2
+
+    if arquivo:
+        _info(f"Usando arquivo de rentabilidade: {arquivo}")
+    else:
+        _info(
+            f"Aviso: não foi encontrado arquivo de rentabilidade agrupada para {mm}/{ano}. "
+            f"Procurados em: dados_entrada/rentabilidades/ e rentabilidades/"
+        )
+    return arquivo
+
+
+def _periodos_entre(mes_inicial: int, ano_inicial: int, mes_final: int, ano_final: int):
+    """Lista [(mes, ano), ...] de mes_inicial/ano_inicial até mes_final/ano_final (inclusive)."""
+    inicio = ano_inicial * 12 + (mes_inicial - 1)
+    fim = ano_final * 12 + (mes_final - 1)
+    return [(indice % 12 + 1, indice // 12) for indice in range(inicio, fim + 1)]
+
+
+def _periodo_final_cli(argv=None):
+    """
+    (mes_final, ano_final) de --mes-final/--ano-final; (None, None) sem --mes-final.
+
+    O modo lote só é ativado com --mes-final escrito por extenso: sem
+    allow_abbrev, --mes/--ano não são lidos como abreviações de
+    --mes-final/--ano-final.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not any(arg == "--mes-final" or arg.startswith("--mes-final=") for arg in argv):
+        return None, None
     try:
-        # ------------------------------------------------------------------
-        # 0. Verificação/atualização prévia de taxas de câmbio
-        #    (ANTES de solicitar mês/ano ao usuário)
-        # ------------------------------------------------------------------
-        def _atualizar_taxas_cambio_iniciais() -> None:
-            """
-            Garante que o JSON de câmbio tenha taxas de JAN até o último mês
-            FECHADO do ano atual, para todas as moedas de METAS_FORNECEDORES.
-
-            Regra:
-            - Considera apenas ano atual
-            - Usa meses 1..(mes_atual-1) como "últimos meses fechados"
-            - Nunca busca nem sobrescreve taxa do mês atual
-            - Se uma taxa não puder ser buscada nas APIs, usa média do ano
-              até o mês anterior e marca o registro como fallback, com
-              observação clara no JSON.
-            """
-            from pathlib import Path
-
-            now = datetime.now()
-            ano_atual = now.year
-            mes_atual = now.month
-            mes_limite = mes_atual - 1
+        import argparse
 
-            _log_cambio(
-                f"Iniciando verificação de taxas de câmbio para ano={ano_atual}, meses 1..{max(mes_limite,0)}."
-            )
+        parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+        parser.add_argument("--mes-final", type=int)
+        parser.add_argument("--ano-final", type=int)
+        args, _ = parser.parse_known_args(argv)
+        return args.mes_final, args.ano_final
+    except Exception:
+        return None, None
 
-            if mes_limite <= 0:
-                _log_cambio(
-                    "Nenhum mês fechado no ano atual ainda (mes_atual=1). Pulando verificação de câmbio."
-                )
-                return
 
-            metas_path = Path("config/METAS_FORNECEDORES.csv")
-            if not metas_path.exists():
-                _log_cambio(
-                    f"Arquivo {metas_path} não encontrado. Não há metas de fornecedores para derivar moedas; pulando verificação de câmbio."
-                )
-                return
+def executar_lote(periodos) -> list:
+    """
+    Executa preparador + cálculo para vários meses, em ordem cronológica.
 
-            try:
-                metas_df = pd.read_csv(metas_path, sep=";")
-            except Exception as e:
-                _log_cambio(
-                    f"Falha ao ler METAS_FORNECEDORES.csv para verificação de câmbio: {e}"
-                )
-                return
+    A Análise Comercial é lida e preparada uma única vez (PreparadorLote), as
+    janelas de retenção são reaproveitadas entre meses consecutivos, as
+    entradas independentes do mês (Análise Comercial, recebimentos, status)
+    são carregadas no primeiro mês e repassadas em memória aos seguintes, e
+    o estado de recebimento de cada mês é repassado em memória ao próximo.
 
-            if "moeda" not in metas_df.columns:
-                _log_cambio(
-                    "Coluna 'moeda' não encontrada em METAS_FORNECEDORES.csv; pulando verificação de câmbio."
-                )
-                return
+    Um mês com erro interrompe o lote: os meses seguintes dependem do estado
+    de recebimento dele.
 
-            moedas = (
-                metas_df["moeda"]
-                .dropna()
-                .map(lambda m: str(m).strip().upper())
-                .tolist()
-            )
-            moedas = [m for m in moedas if m and m != "BRL"]
-            moedas_unicas = sorted(set(moedas))
+    Args:
+        periodos: Iterável de (mes, ano)
 
-            if not moedas_unicas:
-                _log_cambio(
-                    "Nenhuma moeda de fornecedor encontrada em METAS_FORNECEDORES.csv (após remover BRL). Nada a fazer."
-                )
-                return
+    Returns:
+        Lista de dicts {mes, ano, arquivo, segundos} dos meses executados
+    """
+    global ARQUIVO_FATURADOS, ARQUIVO_CONVERSOES, ARQUIVO_FATURADOS_YTD
+    global ARQUIVO_RENTABILIDADE
+
+    periodos = sorted({(int(m), int(a)) for m, a in periodos}, key=lambda p: (p[1], p[0]))
+    if not periodos:
+        return []
+    _info(
+        f"[LOTE] {len(periodos)} mês(es): "
+        f"{periodos[0][0]:02d}/{periodos[0][1]} a {periodos[-1][0]:02d}/{periodos[-1][1]}"
+    )
 
-            _log_cambio(
-                f"Moedas de fornecedores detectadas: {', '.join(moedas_unicas)}."
-            )
+    import preparar_dados_mensais
+
+    preparador = preparar_dados_mensais.PreparadorLote()
+    with _timer_ctx("Executar preparador de dados", _safe_percent("preparador")):
+        if not preparador.carregar(periodos[0]):
+            raise RuntimeError("preparador não conseguiu ler a Análise Comercial")
+
+    entradas_compartilhadas = {}
+    estado_recebimento = None
+    resultados = []
+    for mes, ano in periodos:
+        inicio = time.perf_counter()
+        _phase(f"[LOTE] Mês {mes:02d}/{ano}")
+        with _timer_ctx("Executar preparador de dados", _safe_percent("preparador")):
+            preparador.gerar(mes, ano)
+        ARQUIVO_FATURADOS = "Faturados.xlsx"
+        ARQUIVO_CONVERSOES = "Conversões.xlsx"
+        ARQUIVO_FATURADOS_YTD = "Faturados_YTD.xlsx"
+        ARQUIVO_RENTABILIDADE = _localizar_arquivo_rentabilidade(mes, ano)
 
-            storage = RateStorage("data/currency_rates/monthly_avg_rates.json")
-            validator = RateValidator(storage)
-            # Timeout maior porque essa etapa roda poucas vezes e pode demorar
-            # alguns minutos sem impactar a experiência do usuário.
-            fetcher = RateFetcher(timeout=60.0, max_retries=2)
+        calculadora = CalculoComissao()
+        calculadora.params["mes_apuracao"] = mes
+        calculadora.params["ano_apuracao"] = ano
+        calculadora.entradas_compartilhadas = entradas_compartilhadas
+        calculadora.estado_recebimento = estado_recebimento
+        calculadora.executar()
+        estado_recebimento = calculadora.estado_recebimento
 
-            faltantes = validator.identificar_taxas_faltantes(
-                moedas_unicas, ano_atual, mes_limite
-            )
+        segundos = time.perf_counter() - inicio
+        resultados.append(
+            {"mes": mes, "ano": ano, "arquivo": NOME_ARQUIVO_SAIDA, "segundos": segundos}
+        )
+        _info(f"[LOTE] {mes:02d}/{ano} concluído em {segundos:.1f}s ({NOME_ARQUIVO_SAIDA})")
+        _tracker_update("Lote", f"{mes:02d}/{ano} concluído")
 
-            if not faltantes:
-                _log_cambio(
-                    "Todas as taxas necessárias (JAN até último mês fechado) já estão presentes no JSON. Nenhuma busca adicional requerida."
-                )
-                return
+    total = sum(r["segundos"] for r in resultados)
+    _info(f"[LOTE] {len(resultados)} mês(es) processado(s) em {total:.1f}s")
+    return resultados
 
-            _log_cambio(
-                f"{len(faltantes)} taxa(s) faltante(s) detectada(s) para o ano {ano_atual}. Iniciando busca nas APIs..."
-            )
 
-            for moeda, ano, mes in faltantes:
-                _log_cambio(f"Buscando taxa média para {moeda} {ano}-{mes:02d}...")
-                resultado = fetcher.buscar_taxa_media_mensal(moeda, ano, mes)
-
-                if resultado is not None:
-                    taxa_media, fonte, dias = resultado
-                    storage.salvar_taxa(
-                        moeda=moeda,
-                        ano=ano,
-                        mes=mes,
-                        taxa_media=taxa_media,
-                        fonte=fonte,
-                        dias_utilizados=dias,
-                        fallback=False,
-                        observacao=None,
-                    )
-                    _log_cambio(
-                        f"✓ Taxa registrada para {moeda} {ano}-{mes:02d}: {taxa_media:.6f} (fonte={fonte}, dias={dias})."
-                    )
-                    continue
+# ------------------------------------------------------------------
+# 0. Verificação/atualização prévia de taxas de câmbio
+#    (ANTES de solicitar mês/ano ao usuário; também usada pelo worker do adapter)
+# ------------------------------------------------------------------
+def _atualizar_taxas_cambio_iniciais() -> None:
+    """
+    Garante que o JSON de câmbio tenha taxas de JAN até o último mês
+    FECHADO do ano atual, para todas as moedas de METAS_FORNECEDORES.
+
+    Regra:
+    - Considera apenas ano atual
+    - Usa meses 1..(mes_atual-1) como "últimos meses fechados"
+    - Nunca busca nem sobrescreve taxa do mês atual
+    - Se uma taxa não puder ser buscada nas APIs, usa média do ano
+      até o mês anterior e marca o registro como fallback, com
+      observação clara no JSON.
+    """
+    from pathlib import Path
 
-                # Fallback: usar média do ano até mês anterior
-                taxa_fallback = storage.calcular_media_ano_ate_mes(
-                    moeda, ano, mes - 1
-                )
-                if taxa_fallback is not None:
-                    observacao = (
-                        f"FALHA AO BUSCAR TAXA NAS APIS PARA {moeda} {ano}-{mes:02d}; "
-                        f"USANDO MÉDIA DO ANO ATÉ {ano}-{mes-1:02d} COMO FALLBACK."
-                    )
-                    storage.salvar_taxa(
-                        moeda=moeda,
-                        ano=ano,
-                        mes=mes,
-                        taxa_media=taxa_fallback,
-                        fonte="fallback_media_anual",
-                        dias_utilizados=max(1, mes - 1),
-                        fallback=True,
-                        observacao=observacao,
-                    )
-                    _log_cambio(
-                        f"ATENÇÃO: não foi possível obter taxa real para {moeda} {ano}-{mes:02d}. "
-                        f"Registrada taxa de fallback ({taxa_fallback:.6f}) com observação no JSON."
-                    )
-                else:
-                    _log_cambio(
-                        f"AVISO CRÍTICO: não foi possível obter taxa nem calcular média do ano para {moeda} {ano}-{mes:02d}. "
-                        f"Esse mês/ano permanecerá sem taxa registrada."
-                    )
+    now = datetime.now()
+    ano_atual = now.year
+    mes_atual = now.month
+    mes_limite = mes_atual - 1
+
+    _log_cambio(
+        f"Iniciando verificação de taxas de câmbio para ano={ano_atual}, meses 1..{max(mes_limite,0)}."
+    )
+
+    if mes_limite <= 0:
+        _log_cambio(
+            "Nenhum mês fechado no ano atual ainda (mes_atual=1). Pulando verificação de câmbio."
+        )
+        return
+
+    metas_path = Path("config/METAS_FORNECEDORES.csv")
+    if not metas_path.exists():
+        _log_cambio(
+            f"Arquivo {metas_path} não encontrado. Não há metas de fornecedores para derivar moedas; pulando verificação de câmbio."
+        )
+        return
+
+    try:
+        metas_df = pd.read_csv(metas_path, sep=";")
+    except Exception as e:
+        _log_cambio(
+            f"Falha ao ler METAS_FORNECEDORES.csv para verificação de câmbio: {e}"
+        )
+        return
 
-            storage.atualizar_metadata(moedas_unicas)
+    if "moeda" not in metas_df.columns:
+        _log_cambio(
+            "Coluna 'moeda' não encontrada em METAS_FORNECEDORES.csv; pulando verificação de câmbio."
+        )
+        return
+
+    moedas = (
+        metas_df["moeda"]
+        .dropna()
+        .map(lambda m: str(m).strip().upper())
+        .tolist()
+    )
+    moedas = [m for m in moedas if m and m != "BRL"]
+    moedas_unicas = sorted(set(moedas))
+
+    if not moedas_unicas:
+        _log_cambio(
+            "Nenhuma moeda de fornecedor encontrada em METAS_FORNECEDORES.csv (após remover BRL). Nada a fazer."
+        )
+        return
+
+    _log_cambio(
+        f"Moedas de fornecedores detectadas: {', '.join(moedas_unicas)}."
+    )
+
+    from src.currency import RateFetcher, RateValidator
+
+    storage = RateStorage("data/currency_rates/monthly_avg_rates.json")
+    validator = RateValidator(storage)
+    # Timeout maior porque essa etapa roda poucas vezes e pode demorar
+    # alguns minutos sem impactar a experiência do usuário.
+    fetcher = RateFetcher(timeout=60.0, max_retries=2)
+
+    faltantes = validator.identificar_taxas_faltantes(
+        moedas_unicas, ano_atual, mes_limite
+    )
+
+    if not faltantes:
+        _log_cambio(
+            "Todas as taxas necessárias (JAN até último mês fechado) já estão presentes no JSON. Nenhuma busca adicional requerida."
+        )
+        return
+
+    _log_cambio(
+        f"{len(faltantes)} taxa(s) faltante(s) detectada(s) para o ano {ano_atual}. Iniciando busca nas APIs..."
+    )
+
+    for moeda, ano, mes in faltantes:
+        _log_cambio(f"Buscando taxa média para {moeda} {ano}-{mes:02d}...")
+        resultado = fetcher.buscar_taxa_media_mensal(moeda, ano, mes)
+
+        if resultado is not None:
+            taxa_media, fonte, dias = resultado
+            storage.salvar_taxa(
+                moeda=moeda,
+                ano=ano,
+                mes=mes,
+                taxa_media=taxa_media,
+                fonte=fonte,
+                dias_utilizados=dias,
+                fallback=False,
+                observacao=None,
+            )
+            _log_cambio(
+                f"✓ Taxa registrada para {moeda} {ano}-{mes:02d}: {taxa_media:.6f} (fonte={fonte}, dias={dias})."
+            )
+            continue
+
+        # Fallback: usar média do ano até mês anterior
+        taxa_fallback = storage.calcular_media_ano_ate_mes(
+            moeda, ano, mes - 1
+        )
+        if taxa_fallback is not None:
+            observacao = (
+                f"FALHA AO BUSCAR TAXA NAS APIS PARA {moeda} {ano}-{mes:02d}; "
+                f"USANDO MÉDIA DO ANO ATÉ {ano}-{mes-1:02d} COMO FALLBACK."
+            )
+            storage.salvar_taxa(
+                moeda=moeda,
+                ano=ano,
+                mes=mes,
+                taxa_media=taxa_fallback,
+                fonte="fallback_media_anual",
+                dias_utilizados=max(1, mes - 1),
+                fallback=True,
+                observacao=observacao,
+            )
+            _log_cambio(
+                f"ATENÇÃO: não foi possível obter taxa real para {moeda} {ano}-{mes:02d}. "
+                f"Registrada taxa de fallback ({taxa_fallback:.6f}) com observação no JSON."
+            )
+        else:
             _log_cambio(
-                "Verificação/atualização de taxas de câmbio concluída. JSON atualizado em data/currency_rates/monthly_avg_rates.json."
+                f"AVISO CRÍTICO: não foi possível obter taxa nem calcular média do ano para {moeda} {ano}-{mes:02d}. "
+                f"Esse mês/ano permanecerá sem taxa registrada."
             )
 
+    storage.atualizar_metadata(moedas_unicas)
+    _log_cambio(
+        "Verificação/atualização de taxas de câmbio concluída. JSON atualizado em data/currency_rates/monthly_avg_rates.json."
+    )
+
+
+def _ler_importtime(texto: str) -> list:
+    """
+    Lê a saída de `python -X importtime` e devolve os módulos importados
+    diretamente pelo script: [(módulo, segundos acumulados, [(submódulo, segundos)])].
+    Os submódulos (primeiro nível abaixo) vêm do mais caro para o mais barato.
+    """
+    registros = []
+    filhos = []
+    for linha in texto.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:") :].split("|")
+        if len(partes) != 3:
+            continue
+        try:
+            segundos = int(partes[1]) / 1e6
+        except ValueError:
+            continue  # cabeçalho "self [us] | cumulative | imported package"
+        nome = partes[2].rstrip()
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        nome = nome.strip()
+        # A saída é pós-ordem: os submódulos aparecem antes do módulo que os importou
+        if nivel == 1:
+            filhos.append((nome, segundos))
+        elif nivel == 0:
+            registros.append((nome, segundos, sorted(filhos, key=lambda f: -f[1])))
+            filhos = []
+    return registros
+
+
+def _perfil_inicializacao(limite: int = 15) -> int:
+    """
+    --profile-startup: importa calculo_comissoes em um processo novo com
+    `python -X importtime`, lista o tempo de importação por módulo e o custo
+    de cada módulo carregado sob demanda (MODULOS_SOB_DEMANDA).
+    """
+    import subprocess
+
+    # __import__ (e não importlib.import_module) para o -X importtime medir o módulo
+    script = (
+        "import sys\n"
+        "import calculo_comissoes\n"
+        f"for nome in {MODULOS_SOB_DEMANDA!r}:\n"
+        "    if nome in sys.modules:\n"
+        "        print(nome, 'inicio')\n"
+        "        continue\n"
+        "    try:\n"
+        "        __import__(nome)\n"
+        "        print(nome, 'ok')\n"
+        "    except Exception:\n"
+        "        print(nome, 'indisponivel')\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    registros = {nome: (seg, filhos) for nome, seg, filhos in _ler_importtime(proc.stderr)}
+    if proc.returncode != 0 or "calculo_comissoes" not in registros:
+        _info(f"[STARTUP] Falha ao medir a importação: {proc.stderr.strip()[-500:]}")
+        return 1
+
+    total, filhos = registros["calculo_comissoes"]
+    _info(f"[STARTUP] import calculo_comissoes: {total:.3f}s")
+    for nome, segundos in filhos[:limite]:
+        _info(f"[STARTUP]   {nome:<45} {segundos:7.3f}s")
+    if len(filhos) > limite:
+        resto = sum(seg for _, seg in filhos[limite:])
+        _info(f"[STARTUP]   {f'(outros {len(filhos) - limite})':<45} {resto:7.3f}s")
+
+    situacao = dict(linha.split(" ", 1) for linha in proc.stdout.splitlines() if " " in linha)
+    _info("[STARTUP] Sob demanda (custo na primeira utilização):")
+    for nome in MODULOS_SOB_DEMANDA:
+        estado = situacao.get(nome)
+        if estado == "ok" and nome in registros:
+            descricao = f"{registros[nome][0]:7.3f}s"
+        elif estado == "inicio":
+            descricao = "já importado no início"
+        else:
+            descricao = "indisponível"
+        _info(f"[STARTUP]   {nome:<45} {descricao}")
+    return 0
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        sys.exit(_perfil_inicializacao())
+
+    try:
         # Executar verificação de câmbio antes de qualquer outra ação
         _atualizar_taxas_cambio_iniciais()
 
@@ -4940,7 +5558,7 @@ if __name__ == "__main__":
             try:
                 import argparse
 
-                parser = argparse.ArgumentParser(add_help=False)
+                parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
                 parser.add_argument("--mes", type=int)
                 parser.add_argument("--ano", type=int)
                 args, _ = parser.parse_known_args()
@@ -5014,71 +5632,48 @@ if __name__ == "__main__":
 
         mes, ano = solicitar_mes_ano()
 
-        # Sempre executar o preparador de dados no início para garantir que os arquivos
-        # Faturados.xlsx, Conversões.xlsx, Faturados_YTD.xlsx e Retencao_Clientes.xlsx
-        # sejam gerados para o mês/ano selecionado.
-        try:
-            with _timer_ctx(
-                "Executar preparador de dados", _safe_percent("preparador")
-            ):
-                _info(f"Executando o preparador de dados para {mes}/{ano}...")
-                import preparar_dados_mensais
-
-                if not preparar_dados_mensais.run_preparador(mes, ano):
-                    msg = "ERRO: O script 'preparar_dados_mensais.py' encontrou um erro. Abortando."
-                    print(msg)
-                    _tracker_abort(msg)
-                _info("Preparador de dados executado com sucesso.")
-        except Exception as e:
-            msg = f"AVISO: falha ao executar o preparador de dados automaticamente: {e}. Abortando."
-            print(msg)
-            _tracker_abort(msg)
-        # Atualizar variáveis de arquivo para usar arquivos gerados pelo preparador (os nomes fixos esperados)
-        ARQUIVO_FATURADOS = "Faturados.xlsx"
-        ARQUIVO_CONVERSOES = "Conversões.xlsx"
-        ARQUIVO_FATURADOS_YTD = "Faturados_YTD.xlsx"
-
-        # Selecionar o arquivo de rentabilidade agrupada correto na pasta 'rentabilidades'
-        mm = str(mes).zfill(2)
-        import glob
-
-        # NOVO: Procurar primeiro em dados_entrada/rentabilidades, depois em rentabilidades/
-        candidato1 = (
-            f"dados_entrada/rentabilidades/rentabilidade_{mm}_{ano}_agrupada.xlsx"
-        )
-        candidato2 = f"rentabilidades/rentabilidade_{mm}_{ano}_agrupada.xlsx"
-
-        # Buscar com glob em ambos os locais
-        encontrados1 = glob.glob(
-            f"dados_entrada/rentabilidades/*{mm}*{ano}*agrupada*.xlsx"
-        )
-        encontrados2 = glob.glob(f"rentabilidades/*{mm}*{ano}*agrupada*.xlsx")
-
-        encontrados = encontrados1 + encontrados2
-
-        if encontrados:
-            ARQUIVO_RENTABILIDADE = encontrados[0]
-            _info(f"Usando arquivo de rentabilidade: {ARQUIVO_RENTABILIDADE}")
+        # Modo lote: --mes-final/--ano-final processa de mes/ano até o período final
+        mes_final, ano_final = _periodo_final_cli()
+        if isinstance(mes_final, int) and 1 <= mes_final <= 12:
+            resultados = executar_lote(
+                _periodos_entre(mes, ano, mes_final, ano_final or ano)
+            )
+            _tracker_finish(True, f"Lote concluído: {len(resultados)} mês(es)")
         else:
-            # fallback para nome padrão caso não encontre agrupada
-            if os.path.exists(candidato1):
-                ARQUIVO_RENTABILIDADE = candidato1
-                _info(f"Usando arquivo de rentabilidade: {ARQUIVO_RENTABILIDADE}")
-            elif os.path.exists(candidato2):
-                ARQUIVO_RENTABILIDADE = candidato2
-                _info(f"Usando arquivo de rentabilidade: {ARQUIVO_RENTABILIDADE}")
-            else:
-                _info(
-                    f"Aviso: não foi encontrado arquivo de rentabilidade agrupada para {mm}/{ano}. "
-                    f"Procurados em: dados_entrada/rentabilidades/ e rentabilidades/"
-                )
 
-        calculadora = CalculoComissao()
-        # Definir mes/ano de apuração nos params para uso em todo o fluxo
-        calculadora.params["mes_apuracao"] = mes
-        calculadora.params["ano_apuracao"] = ano
-        calculadora.executar()
-        _tracker_finish(True, f"Arquivo gerado: {NOME_ARQUIVO_SAIDA}")
+            # Sempre executar o preparador de dados no início para garantir que os arquivos
+            # Faturados.xlsx, Conversões.xlsx, Faturados_YTD.xlsx e Retencao_Clientes.xlsx
+            # sejam gerados para o mês/ano selecionado.
+            try:
+                with _timer_ctx(
+                    "Executar preparador de dados", _safe_percent("preparador")
+                ):
+                    _info(f"Executando o preparador de dados para {mes}/{ano}...")
+                    import preparar_dados_mensais
+
+                    if not preparar_dados_mensais.run_preparador(mes, ano):
+                        msg = "ERRO: O script 'preparar_dados_mensais.py' encontrou um erro. Abortando."
+                        print(msg)
+                        _tracker_abort(msg)
+                    _info("Preparador de dados executado com sucesso.")
+            except Exception as e:
+                msg = f"AVISO: falha ao executar o preparador de dados automaticamente: {e}. Abortando."
+                print(msg)
+                _tracker_abort(msg)
+            # Atualizar variáveis de arquivo para usar arquivos gerados pelo preparador (os nomes fixos esperados)
+            ARQUIVO_FATURADOS = "Faturados.xlsx"
+            ARQUIVO_CONVERSOES = "Conversões.xlsx"
+            ARQUIVO_FATURADOS_YTD = "Faturados_YTD.xlsx"
+
+            # Selecionar o arquivo de rentabilidade agrupada correto na pasta 'rentabilidades'
+            ARQUIVO_RENTABILIDADE = _localizar_arquivo_rentabilidade(mes, ano)
+
+            calculadora = CalculoComissao()
+            # Definir mes/ano de apuração nos params para uso em todo o fluxo
+            calculadora.params["mes_apuracao"] = mes
+            calculadora.params["ano_apuracao"] = ano
+            calculadora.executar()
+            _tracker_finish(True, f"Arquivo gerado: {NOME_ARQUIVO_SAIDA}")
     except Exception as e:
         _tracker_finish(False, str(e))
         msg = f"\nOcorreu um erro fatal durante a execução: {e}"
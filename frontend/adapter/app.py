@@ -11,6 +11,7 @@ import subprocess
 import uuid
 import asyncio
 import sys
+import threading
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from datetime import datetime
@@ -54,6 +55,26 @@ except Exception:
 
 PROGRESS_FILE = os.path.join(ROBO_ROOT_PATH, "progress.json")
 
+# Pool de workers de cálculo (ver calculo_worker.py): processos que mantêm
+# configurações e entradas carregadas entre jobs. COMISSOES_ADAPTER_WORKERS=0
+# volta ao subprocesso por /calcular e à execução no próprio adapter.
+try:
+    if str(adapter_dir) not in sys.path:
+        sys.path.insert(0, str(adapter_dir))
+except Exception:
+    pass
+from calculo_worker import (
+    ESTADOS_FINAIS,
+    TAREFAS,
+    CalculoWorkerPool,
+    ContextoAquecido,
+)
+
+try:
+    ADAPTER_WORKERS = int(os.getenv("COMISSOES_ADAPTER_WORKERS", "1"))
+except ValueError:
+    ADAPTER_WORKERS = 1
+
 # ==================== LOGGING (Arquivo) ====================
 import logging
 from logging.handlers import RotatingFileHandler
@@ -138,8 +159,10 @@ def get_resultado_path() -> Optional[Path]:
 
 def read_excel_sheet(filepath: Path, sheet_name: str) -> pd.DataFrame:
     """Lê uma aba do Excel preservando ordem de colunas"""
+    from src.io.input_cache import ler_excel
+
     try:
-        df = pd.read_excel(
+        df = ler_excel(
             filepath, sheet_name=sheet_name, dtype=str, keep_default_na=False
         )
         # Preservar ordem original das colunas
@@ -747,71 +770,133 @@ FASES_CALCULO = [
 ]
 
 
-async def monitorar_processo(
-    job_id: str, process: subprocess.Popen, mes: int, ano: int
-):
-    """Monitora processo em background e garante status final."""
+# Pool de workers (None: subprocesso por /calcular e execução local)
+pool_calculo: Optional[CalculoWorkerPool] = None
+# Sem pool: contexto aquecido no próprio adapter, um job por vez
+_contexto_local: Optional[ContextoAquecido] = None
+_lock_local = threading.Lock()
 
+
+@app.on_event("startup")
+async def iniciar_pool_calculo():
+    global pool_calculo
+    if ADAPTER_WORKERS <= 0:
+        return
     try:
-        while process.poll() is None:
-            await asyncio.sleep(2)
+        pool_calculo = CalculoWorkerPool(ROBO_ROOT_PATH, processos=ADAPTER_WORKERS).iniciar()
+    except Exception as e:
+        logging.getLogger(__name__).error(
+            f"[WORKER] Pool de workers indisponível ({e}); usando subprocesso"
+        )
+        pool_calculo = None
 
-        return_code = process.returncode
 
-        # Consolidar status final sem sobrescrever o que o processo gerou
-        try:
-            with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                progress_data = json.load(f)
-        except Exception:
-            progress_data = {
+@app.on_event("shutdown")
+async def encerrar_pool_calculo():
+    if pool_calculo is not None:
+        pool_calculo.encerrar()
+
+
+def _executar_local(tipo: str, **parametros):
+    """Executa um job no processo do adapter (sem pool), com o mesmo contexto aquecido."""
+    global _contexto_local
+    with _lock_local, _cwd(ROBO_ROOT_PATH):
+        if _contexto_local is None:
+            _contexto_local = ContextoAquecido(ROBO_ROOT_PATH)
+        return TAREFAS[tipo](_contexto_local, **parametros)
+
+
+async def _executar_job(tipo: str, **parametros):
+    """Executa o job no pool (ou localmente) sem bloquear o event loop."""
+    if pool_calculo is not None:
+        return await asyncio.to_thread(pool_calculo.executar, tipo, **parametros)
+    return await asyncio.to_thread(_executar_local, tipo, **parametros)
+
+
+def _consolidar_progresso(job_id: str, sucesso: bool, etapa_erro: str):
+    """Grava o status final do job sem sobrescrever o que o cálculo gerou."""
+    try:
+        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
+            progress_data = json.load(f)
+    except Exception:
+        progress_data = {
+            "job_id": job_id,
+            "percent": 0,
+            "etapa": "",
+            "mensagens": [],
+            "status": "em_andamento",
+        }
+
+    if progress_data.get("job_id") != job_id:
+        progress_data.update(
+            {
                 "job_id": job_id,
                 "percent": 0,
                 "etapa": "",
                 "mensagens": [],
                 "status": "em_andamento",
             }
+        )
 
-        if progress_data.get("job_id") != job_id:
+    if progress_data.get("status") not in ("concluido", "erro"):
+        if sucesso:
+            resultado_path = get_resultado_path()
+            etapa_final = "Concluído" if resultado_path else "Processo finalizado"
+            progress_data.update(
+                {
+                    "etapa": etapa_final,
+                    "percent": 100,
+                    "status": "concluido",
+                }
+            )
+        else:
             progress_data.update(
                 {
-                    "job_id": job_id,
-                    "percent": 0,
-                    "etapa": "",
-                    "mensagens": [],
-                    "status": "em_andamento",
+                    "etapa": etapa_erro,
+                    "status": "erro",
+                    "percent": 100,
                 }
             )
 
-        if progress_data.get("status") not in ("concluido", "erro"):
-            if return_code == 0:
-                resultado_path = get_resultado_path()
-                etapa_final = "Concluído" if resultado_path else "Processo finalizado"
-                progress_data.update(
-                    {
-                        "etapa": etapa_final,
-                        "percent": 100,
-                        "status": "concluido",
-                    }
-                )
-            else:
-                progress_data.update(
-                    {
-                        "etapa": f"Processo finalizado (código: {return_code})",
-                        "status": "erro",
-                        "percent": 100,
-                    }
-                )
-
-            try:
-                with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-                    json.dump(progress_data, f, ensure_ascii=False)
-            except Exception:
-                pass
+        try:
+            with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
+                json.dump(progress_data, f, ensure_ascii=False)
+        except Exception:
+            pass
+
+
+async def monitorar_processo(
+    job_id: str, process: subprocess.Popen, mes: int, ano: int
+):
+    """Monitora processo em background e garante status final."""
 
+    try:
+        while process.poll() is None:
+            await asyncio.sleep(2)
+
+        return_code = process.returncode
+        _consolidar_progresso(
+            job_id, return_code == 0, f"Processo finalizado (código: {return_code})"
+        )
     finally:
         processos_ativos.pop(job_id, None)
 
 
+async def monitorar_job(job_id: str):
+    """Monitora um job do pool de workers e garante status final."""
+    job = pool_calculo.status(job_id)
+    while job is not None and job["status"] not in ESTADOS_FINAIS:
+        await asyncio.sleep(2)
+        job = pool_calculo.status(job_id)
+    if job is None:
+        return
+    if job["status"] == "cancelado":
+        etapa_erro = "Cálculo cancelado"
+    else:
+        etapa_erro = f"Processo finalizado com erro: {job['erro']}"
+    _consolidar_progresso(job_id, job["status"] == "concluido", etapa_erro)
+
+
 @app.post("/calcular")
 async def iniciar_calculo(
     mes: int = Query(..., ge=1, le=12), ano: int = Query(..., ge=2000, le=2100)
@@ -831,6 +916,19 @@ async def iniciar_calculo(
     with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
         json.dump(progress_data, f, ensure_ascii=False)
 
+    # Worker do pool: mesmo fluxo do CLI (câmbio, preparador, cálculo) com dados aquecidos
+    if pool_calculo is not None:
+        pool_calculo.submeter(
+            "calcular",
+            job_id=job_id,
+            mes=mes,
+            ano=ano,
+            atualizar_cambio=True,
+            arquivo_progresso=PROGRESS_FILE,
+        )
+        asyncio.create_task(monitorar_job(job_id))
+        return {"job_id": job_id, "message": "Cálculo iniciado"}
+
     # Disparar subprocesso
     script_path = Path(ROBO_ROOT_PATH) / "calculo_comissoes.py"
     if not script_path.exists():
@@ -863,6 +961,18 @@ async def iniciar_calculo(
     return {"job_id": job_id, "message": "Cálculo iniciado"}
 
 
+@app.post("/cancelar/{job_id}")
+async def cancelar_calculo(job_id: str):
+    """Cancela um cálculo na fila ou em execução"""
+    if pool_calculo is not None and pool_calculo.cancelar(job_id):
+        return {"job_id": job_id, "message": "Cálculo cancelado"}
+    process = processos_ativos.get(job_id)
+    if process is not None and process.poll() is None:
+        process.terminate()
+        return {"job_id": job_id, "message": "Cálculo cancelado"}
+    raise HTTPException(status_code=404, detail="Job não encontrado ou já finalizado")
+
+
 @app.get("/progresso/{job_id}")
 async def consultar_progresso(job_id: str):
     """Consulta progresso do cálculo"""
@@ -945,132 +1055,11 @@ async def executar_prescan(payload: ExecPrescanRequest):
 
     try:
         logger.info(f"[PRESCAN] Iniciando pré-scan para {payload.mes}/{payload.ano}")
-
-        # Instanciar e carregar dados
-        from calculo_comissoes import CalculoComissao
-
-        with _cwd(ROBO_ROOT_PATH):
-            # Verificar se os arquivos já existem e são recentes (últimos 5 minutos)
-            # para evitar reexecutar o preparador desnecessariamente
-            # IMPORTANTE: Se o CSV não existir mas o XLSX existir, sempre executar o preparador para converter
-            arquivo_csv = Path("Analise_Comercial_Completa.csv")
-            arquivo_xlsx = Path("Analise_Comercial_Completa.xlsx")
-            precisa_converter = not arquivo_csv.exists() and arquivo_xlsx.exists()
-
-            arquivos_necessarios = [
-                Path("Faturados.xlsx"),
-                Path("Conversões.xlsx"),
-                Path("Faturados_YTD.xlsx"),
-            ]
-            arquivos_existem = all(f.exists() for f in arquivos_necessarios)
-            arquivos_recentes = False
-            if arquivos_existem:
-                import time
-
-                tempo_atual = time.time()
-                arquivos_recentes = all(
-                    (tempo_atual - f.stat().st_mtime) < 300  # 5 minutos
-                    for f in arquivos_necessarios
-                )
-
-            if arquivos_existem and arquivos_recentes and not precisa_converter:
-                logger.info(
-                    "[PRESCAN] Arquivos já existem e são recentes, pulando preparador"
-                )
-            else:
-                if precisa_converter:
-                    logger.info(
-                        "[PRESCAN] Arquivo XLSX detectado sem CSV correspondente, executando preparador para conversão"
-                    )
-                logger.info("[PRESCAN] Executando preparador de dados...")
-                # Preparar dados do mês/ano antes do pré-scan (necessário para popular FATURADOS etc.)
-                try:
-                    import preparar_dados_mensais
-
-                    preparar_dados_mensais.run_preparador(payload.mes, payload.ano)
-                    logger.info("[PRESCAN] Preparador concluído")
-                except Exception as e:
-                    logger.error(
-                        f"[PRESCAN] Erro no preparador: {e}\n{traceback.format_exc()}"
-                    )
-                    # Não abortar, mas registrar no detalhe do erro do endpoint se falhar
-                    raise HTTPException(
-                        status_code=500, detail=f"Falha no preparador: {e}"
-                    )
-
-            logger.info("[PRESCAN] Configurando caminhos de arquivos...")
-            # Ajustar caminhos como no CLI principal
-            try:
-                import calculo_comissoes as cc
-
-                cc.ARQUIVO_FATURADOS = "Faturados.xlsx"
-                cc.ARQUIVO_CONVERSOES = "Conversões.xlsx"
-                cc.ARQUIVO_FATURADOS_YTD = "Faturados_YTD.xlsx"
-                mm = str(payload.mes).zfill(2)
-                import glob as _glob
-
-                encontrados = _glob.glob(
-                    str(Path("rentabilidades") / f"*{mm}*{payload.ano}*agrupada*.xlsx")
-                )
-                if encontrados:
-                    cc.ARQUIVO_RENTABILIDADE = encontrados[0]
-                    logger.info(
-                        f"[PRESCAN] Arquivo de rentabilidade: {cc.ARQUIVO_RENTABILIDADE}"
-                    )
-                else:
-                    padrao = (
-                        Path("rentabilidades")
-                        / f"rentabilidade_{mm}_{payload.ano}_agrupada.xlsx"
-                    )
-                    if padrao.exists():
-                        cc.ARQUIVO_RENTABILIDADE = str(padrao)
-                        logger.info(
-                            f"[PRESCAN] Arquivo de rentabilidade: {cc.ARQUIVO_RENTABILIDADE}"
-                        )
-                    else:
-                        # Se não encontrou, deixar None (o código defensivo tratará)
-                        cc.ARQUIVO_RENTABILIDADE = None
-                        logger.warning(
-                            f"[PRESCAN] Arquivo de rentabilidade não encontrado para {mm}/{payload.ano}"
-                        )
-            except Exception as e:
-                logger.error(
-                    f"[PRESCAN] Erro ao configurar caminhos: {e}\n{traceback.format_exc()}"
-                )
-                # Se houver erro, garantir que None seja definido para evitar NameError
-                cc.ARQUIVO_RENTABILIDADE = None
-
-            logger.info("[PRESCAN] Instanciando CalculoComissao...")
-            calc = CalculoComissao()
-
-            logger.info("[PRESCAN] Carregando dados...")
-            # Carregar e pré-processar dados existentes
-            calc._carregar_dados()
-            logger.info("[PRESCAN] Pré-processando dados...")
-            calc._preprocessar_dados()
-
-            logger.info("[PRESCAN] Rodando detecção de cross-selling...")
-            # Rodar apenas detecção
-            calc._detectar_cross_selling()
-
-        casos = getattr(calc, "casos_cross_selling_detectados", []) or []
-        logger.info(f"[PRESCAN] Detecção concluída: {len(casos)} caso(s) encontrado(s)")
-
-        # Normalizar tipos simples
-        out = []
-        for c in casos:
-            out.append(
-                {
-                    "processo": str(c.get("processo")),
-                    "consultor": c.get("consultor"),
-                    "linha": c.get("linha"),
-                    "taxa": float(c.get("taxa", 0.0)),
-                }
-            )
-        logger.info(f"[PRESCAN] Retornando {len(out)} caso(s)")
+        # Preparador, carga, pré-processamento e detecção no worker; os dados
+        # carregados ficam no worker para o /api/executar-calculo do mesmo mês
+        out = await _executar_job("prescan", mes=payload.mes, ano=payload.ano)
+        logger.info(f"[PRESCAN] Detecção concluída: {len(out)} caso(s) encontrado(s)")
         return out
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"[PRESCAN] Erro fatal: {e}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Erro no pré-scan: {str(e)}")
@@ -1079,52 +1068,14 @@ async def executar_prescan(payload: ExecPrescanRequest):
 @app.post("/api/executar-calculo")
 async def executar_calculo(payload: ExecCalculoRequest):
     try:
-        # Execução síncrona com decisões vindas da UI
-        from calculo_comissoes import CalculoComissao
-
-        with _cwd(ROBO_ROOT_PATH):
-            # Preparar dados do mês/ano antes da execução
-            try:
-                import preparar_dados_mensais
-
-                preparar_dados_mensais.run_preparador(payload.mes, payload.ano)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Falha no preparador: {e}")
-
-            # Ajustar caminhos como no CLI principal
-            try:
-                import calculo_comissoes as cc
-
-                cc.ARQUIVO_FATURADOS = "Faturados.xlsx"
-                cc.ARQUIVO_CONVERSOES = "Conversões.xlsx"
-                cc.ARQUIVO_FATURADOS_YTD = "Faturados_YTD.xlsx"
-                mm = str(payload.mes).zfill(2)
-                import glob as _glob
-
-                encontrados = _glob.glob(
-                    str(Path("rentabilidades") / f"*{mm}*{payload.ano}*agrupada*.xlsx")
-                )
-                if encontrados:
-                    cc.ARQUIVO_RENTABILIDADE = encontrados[0]
-                else:
-                    padrao = (
-                        Path("rentabilidades")
-                        / f"rentabilidade_{mm}_{payload.ano}_agrupada.xlsx"
-                    )
-                    if padrao.exists():
-                        cc.ARQUIVO_RENTABILIDADE = str(padrao)
-                    else:
-                        # Se não encontrou, deixar None (o código defensivo tratará)
-                        cc.ARQUIVO_RENTABILIDADE = None
-            except Exception:
-                # Se houver erro, garantir que None seja definido para evitar NameError
-                cc.ARQUIVO_RENTABILIDADE = None
-
-            calc = CalculoComissao()
-            calc.executar(decisoes_cross_selling=payload.decisoes_cross_selling or [])
+        # Execução com decisões vindas da UI, reaproveitando os dados do pré-scan
+        await _executar_job(
+            "calcular",
+            mes=payload.mes,
+            ano=payload.ano,
+            decisoes_cross_selling=payload.decisoes_cross_selling or [],
+        )
         return {"success": True, "message": "Cálculo concluído"}
-    except HTTPException:
-        raise
     except Exception as e:
         import traceback
 
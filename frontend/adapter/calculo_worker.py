@@ -0,0 +1,434 @@
+"""
+Pool de workers de cálculo do adapter.
+
+Cada worker é um processo local de longa duração que importa o robô uma vez e
+mantém aquecidos, entre um job e outro:
+    - a Análise Comercial preparada (PreparadorLote), reaproveitada por todos
+      os meses;
+    - as abas de Regras_Comissoes e as entradas independentes do mês
+      (Recebimentos, Pagamentos Regulares, Análise Comercial, Status);
+    - as saídas do preparador do último mês gerado: pré-scan → decisão →
+      cálculo do mesmo mês não roda o preparador nem relê essas entradas.
+Tudo é descartado quando a impressão digital (tamanho e mtime) dos arquivos
+de entrada monitorados muda (upload da Análise Comercial, edição das regras...).
+
+Os jobs entram por uma fila e recebem um job_id. Um job na fila pode ser
+cancelado; um job em execução é cancelado encerrando o processo do worker, que
+é recriado (sem os dados aquecidos). Jobs de um mês/ano vão de preferência ao
+worker que já tem esse mês preparado.
+
+Os workers compartilham os arquivos de ROBO_ROOT_PATH (Faturados.xlsx,
+Conversões.xlsx...): com mais de um worker, meses diferentes calculados ao
+mesmo tempo disputam os mesmos arquivos. Por isso o padrão é um worker.
+
+Uso:
+    pool = CalculoWorkerPool(ROBO_ROOT_PATH)
+    pool.iniciar()
+    job_id = pool.submeter("prescan", mes=8, ano=2025)
+    casos = pool.executar("calcular", mes=8, ano=2025, decisoes_cross_selling=[])
+    pool.cancelar(job_id)
+    pool.encerrar()
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Entradas cuja alteração invalida os dados aquecidos (relativos a ROBO_ROOT_PATH)
+ARQUIVOS_MONITORADOS = (
+    "Analise_Comercial_Completa.csv",
+    "Analise_Comercial_Completa.xlsx",
+    os.path.join("dados_entrada", "Analise_Comercial_Completa.csv"),
+    os.path.join("dados_entrada", "Analise_Comercial_Completa.xlsx"),
+    "Recebimentos_do_Mes.xlsx",
+    "Pagamentos_Regulares_do_Mes.xlsx",
+    "Status_Pagamentos_Processos.xlsx",
+    "Regras_Comissoes.xlsx",
+)
+DIRETORIOS_MONITORADOS = ("config",)
+
+ESTADOS_FINAIS = ("concluido", "erro", "cancelado")
+
+
+def impressao_digital(root_path: str) -> Tuple:
+    """(caminho relativo, tamanho, mtime_ns) dos arquivos de entrada monitorados."""
+    caminhos = list(ARQUIVOS_MONITORADOS)
+    for diretorio in DIRETORIOS_MONITORADOS:
+        try:
+            nomes = sorted(os.listdir(os.path.join(root_path, diretorio)))
+        except OSError:
+            continue
+        caminhos.extend(os.path.join(diretorio, nome) for nome in nomes)
+    assinatura = []
+    for relativo in caminhos:
+        try:
+            st = os.stat(os.path.join(root_path, relativo))
+        except OSError:
+            continue
+        assinatura.append((relativo, st.st_size, st.st_mtime_ns))
+    return tuple(assinatura)
+
+
+class ContextoAquecido:
+    """Dados do robô mantidos em memória por um worker entre jobs."""
+
+    def __init__(self, root_path: str):
+        self.root_path = str(root_path)
+        self.assinatura = None
+        # PreparadorLote com a Análise Comercial preparada
+        self.preparador = None
+        # Abas de Regras_Comissoes (ver CalculoComissao.configuracoes_compartilhadas)
+        self.configuracoes: Dict[str, Any] = {}
+        # Entradas independentes do mês (ver CalculoComissao.entradas_compartilhadas)
+        self.entradas: Dict[str, Any] = {}
+        # Último mês/ano gerado pelo preparador
+        self.periodo: Optional[Tuple[int, int]] = None
+
+    def validar(self) -> bool:
+        """Descarta os dados se os arquivos de entrada mudaram; True se continuam válidos."""
+        assinatura = impressao_digital(self.root_path)
+        if assinatura == self.assinatura:
+            return True
+        if self.assinatura is not None:
+            print("[WORKER] Arquivos de entrada alterados: descartando dados em memória")
+        self.assinatura = assinatura
+        self.preparador = None
+        self.configuracoes = {}
+        self.entradas = {}
+        self.periodo = None
+        return False
+
+    def preparar(self, mes: int, ano: int):
+        """Garante as saídas do preparador do mês e aponta os arquivos do cálculo para elas."""
+        # O import pode converter a Análise Comercial xlsx → csv: validar depois dele
+        import preparar_dados_mensais
+        import calculo_comissoes as cc
+
+        self.validar()
+        if self.periodo == (mes, ano) and preparar_dados_mensais.saidas_vigentes(mes, ano):
+            print(f"[WORKER] Saídas do preparador de {mes:02d}/{ano} reaproveitadas")
+        else:
+            if self.preparador is None:
+                self.preparador = preparar_dados_mensais.PreparadorLote()
+            if not self.preparador.gerar(mes, ano):
+                self.preparador = None
+                raise RuntimeError("preparador não conseguiu ler a Análise Comercial")
+            self.periodo = (mes, ano)
+
+        # Caminhos como no CLI principal
+        cc.ARQUIVO_FATURADOS = "Faturados.xlsx"
+        cc.ARQUIVO_CONVERSOES = "Conversões.xlsx"
+        cc.ARQUIVO_FATURADOS_YTD = "Faturados_YTD.xlsx"
+        cc.ARQUIVO_RENTABILIDADE = cc._localizar_arquivo_rentabilidade(mes, ano)
+
+    def calculadora(self, mes: int, ano: int):
+        """CalculoComissao do mês usando os dados aquecidos."""
+        import calculo_comissoes as cc
+
+        self.preparar(mes, ano)
+        calc = cc.CalculoComissao()
+        calc.params["mes_apuracao"] = mes
+        calc.params["ano_apuracao"] = ano
+        calc.configuracoes_compartilhadas = self.configuracoes
+        calc.entradas_compartilhadas = self.entradas
+        return calc
+
+
+def tarefa_prescan(contexto: ContextoAquecido, mes: int, ano: int):
+    """Carrega e pré-processa o mês e devolve os casos de cross-selling detectados."""
+    calc = contexto.calculadora(mes, ano)
+    calc._carregar_dados()
+    calc._preprocessar_dados()
+    calc._detectar_cross_selling()
+    casos = getattr(calc, "casos_cross_selling_detectados", []) or []
+    return [
+        {
+            "processo": str(c.get("processo")),
+            "consultor": c.get("consultor"),
+            "linha": c.get("linha"),
+            "taxa": float(c.get("taxa", 0.0)),
+        }
+        for c in casos
+    ]
+
+
+def tarefa_calcular(
+    contexto: ContextoAquecido,
+    mes: int,
+    ano: int,
+    decisoes_cross_selling=None,
+    atualizar_cambio: bool = False,
+    job_id: Optional[str] = None,
+    arquivo_progresso: Optional[str] = None,
+):
+    """Cálculo completo do mês (como `python calculo_comissoes.py --mes --ano`)."""
+    import calculo_comissoes as cc
+
+    # Progresso por etapa no arquivo do adapter (como COMISSOES_JOB_ID no CLI)
+    cc.TRACKER = None
+    if job_id and arquivo_progresso and cc.ProgressTracker is not None:
+        cc.TRACKER = cc.ProgressTracker(job_id, arquivo_progresso)
+        cc.TRACKER.start()
+        cc._TRACKER_FINISHED = False
+    try:
+        if atualizar_cambio:
+            cc._atualizar_taxas_cambio_iniciais()
+        calc = contexto.calculadora(mes, ano)
+        calc.executar(decisoes_cross_selling=decisoes_cross_selling or [])
+        cc._tracker_finish(True, f"Arquivo gerado: {cc.NOME_ARQUIVO_SAIDA}")
+        return {"arquivo": cc.NOME_ARQUIVO_SAIDA}
+    except BaseException as e:
+        cc._tracker_finish(False, str(e))
+        raise
+    finally:
+        cc.TRACKER = None
+
+
+TAREFAS: Dict[str, Callable[..., Any]] = {
+    "prescan": tarefa_prescan,
+    "calcular": tarefa_calcular,
+}
+
+
+def _executar_worker(root_path, conexao, tarefas):
+    """Laço do processo worker: executa os jobs recebidos com o contexto aquecido."""
+    os.chdir(root_path)
+    if root_path not in sys.path:
+        sys.path.insert(0, root_path)
+    tarefas = tarefas or TAREFAS
+    contexto = ContextoAquecido(root_path)
+    while True:
+        try:
+            job = conexao.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, tipo, parametros = job
+        try:
+            resultado = tarefas[tipo](contexto, **parametros)
+            conexao.send((job_id, True, resultado, contexto.periodo))
+        except (Exception, SystemExit) as e:
+            traceback.print_exc()
+            conexao.send((job_id, False, f"{type(e).__name__}: {e}", contexto.periodo))
+
+
+class CalculoWorkerPool:
+    """
+    Pool de processos workers com fila de jobs, job_id e cancelamento.
+
+    Args:
+        root_path: Raiz do robô (diretório de trabalho dos workers)
+        processos: Número de workers
+        tarefas: {tipo: função(contexto, **parametros)}; padrão TAREFAS
+            (funções de módulo, para serem enviadas ao processo)
+    """
+
+    def __init__(self, root_path, processos: int = 1, tarefas=None):
+        self.root_path = str(root_path)
+        self.processos = max(1, int(processos))
+        self._tarefas = tarefas
+        self._mp = mp.get_context("spawn")
+        self._lock = threading.RLock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._eventos: Dict[str, threading.Event] = {}
+        self._pendentes: deque = deque()
+        self._workers = []
+        self._coletor = None
+        self._ativo = False
+
+    # ------------------------------------------------------------------ ciclo de vida
+    def iniciar(self):
+        if self._ativo:
+            return self
+        self._workers = [self._criar_worker(i) for i in range(self.processos)]
+        self._ativo = True
+        self._coletor = threading.Thread(
+            target=self._coletar, name="calculo-worker-coletor", daemon=True
+        )
+        self._coletor.start()
+        atexit.register(self.encerrar)
+        print(f"[WORKER] Pool iniciado com {self.processos} worker(s) em {self.root_path}")
+        return self
+
+    def encerrar(self, timeout: float = 5.0):
+        """Encerra os workers (jobs em execução são interrompidos)."""
+        with self._lock:
+            if not self._ativo:
+                return
+            self._ativo = False
+            for job_id in list(self._pendentes):
+                self._finalizar(job_id, "cancelado", erro="pool encerrado")
+            self._pendentes.clear()
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker["conexao"].send(None)
+            except Exception:
+                pass
+        for worker in workers:
+            worker["processo"].join(timeout)
+            if worker["processo"].is_alive():
+                worker["processo"].terminate()
+                worker["processo"].join(timeout)
+            if worker["job_id"]:
+                self._finalizar(worker["job_id"], "cancelado", erro="pool encerrado")
+
+    def _criar_worker(self, indice: int) -> Dict[str, Any]:
+        # Um pipe por worker: encerrar um worker no meio de um envio não afeta os demais
+        conexao, conexao_worker = self._mp.Pipe()
+        processo = self._mp.Process(
+            target=_executar_worker,
+            args=(self.root_path, conexao_worker, self._tarefas),
+            name=f"calculo-worker-{indice}",
+        )
+        processo.start()
+        conexao_worker.close()
+        return {"processo": processo, "conexao": conexao, "job_id": None, "periodo": None}
+
+    def _recriar_worker(self, indice: int):
+        antigo = self._workers[indice]
+        if antigo["processo"].is_alive():
+            antigo["processo"].terminate()
+        antigo["processo"].join(5)
+        antigo["conexao"].close()
+        self._workers[indice] = self._criar_worker(indice)
+
+    # ------------------------------------------------------------------ jobs
+    def submeter(self, tipo: str, job_id: Optional[str] = None, **parametros) -> str:
+        """Coloca um job na fila e devolve o job_id."""
+        job_id = job_id or str(uuid.uuid4())
+        with self._lock:
+            if not self._ativo:
+                raise RuntimeError("pool de workers não iniciado")
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "tipo": tipo,
+                "parametros": parametros,
+                "status": "na_fila",
+                "resultado": None,
+                "erro": None,
+                "criado": time.time(),
+                "inicio": None,
+                "fim": None,
+                "worker": None,
+            }
+            self._eventos[job_id] = threading.Event()
+            self._pendentes.append(job_id)
+            self._despachar()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def aguardar(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Espera o job terminar (ou o timeout) e devolve seu estado."""
+        evento = self._eventos.get(job_id)
+        if evento is not None:
+            evento.wait(timeout)
+        return self.status(job_id)
+
+    def executar(self, tipo: str, **parametros) -> Any:
+        """Submete e espera o job; devolve o resultado ou levanta RuntimeError."""
+        job = self.aguardar(self.submeter(tipo, **parametros))
+        if job["status"] != "concluido":
+            raise RuntimeError(job["erro"] or f"job {job['status']}")
+        return job["resultado"]
+
+    def cancelar(self, job_id: str) -> bool:
+        """Cancela um job na fila ou em execução; False se já terminou ou não existe."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in ESTADOS_FINAIS:
+                return False
+            if job["status"] == "na_fila":
+                self._pendentes.remove(job_id)
+                self._finalizar(job_id, "cancelado", erro="cancelado pelo usuário")
+                return True
+            indice = job["worker"]
+            print(f"[WORKER] Cancelando job {job_id}: reiniciando worker {indice}")
+            self._recriar_worker(indice)
+            self._finalizar(job_id, "cancelado", erro="cancelado pelo usuário")
+            self._despachar()
+            return True
+
+    def _finalizar(self, job_id: str, status: str, resultado=None, erro=None):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update({"status": status, "resultado": resultado, "erro": erro, "fim": time.time()})
+        evento = self._eventos.get(job_id)
+        if evento is not None:
+            evento.set()
+
+    def _despachar(self):
+        """Envia jobs da fila aos workers livres (preferindo o que já tem o mês)."""
+        with self._lock:
+            while self._ativo and self._pendentes:
+                livres = [i for i, w in enumerate(self._workers) if w["job_id"] is None]
+                if not livres:
+                    return
+                job_id = self._pendentes.popleft()
+                job = self._jobs[job_id]
+                periodo = (job["parametros"].get("mes"), job["parametros"].get("ano"))
+                indice = next(
+                    (i for i in livres if self._workers[i]["periodo"] == periodo), livres[0]
+                )
+                worker = self._workers[indice]
+                worker["job_id"] = job_id
+                job.update({"status": "executando", "inicio": time.time(), "worker": indice})
+                worker["conexao"].send((job_id, job["tipo"], job["parametros"]))
+
+    def _coletar(self):
+        """Thread do adapter: recebe os resultados e vigia workers encerrados."""
+        while self._ativo:
+            with self._lock:
+                conexoes = {id(w["conexao"]): i for i, w in enumerate(self._workers)}
+                lista = [w["conexao"] for w in self._workers]
+            try:
+                prontas = multiprocessing.connection.wait(lista, timeout=0.5)
+            except (OSError, ValueError):
+                prontas = []  # conexão fechada por um cancelamento: próxima volta
+            with self._lock:
+                for conexao in prontas:
+                    indice = conexoes.get(id(conexao))
+                    worker = self._workers[indice] if indice is not None else None
+                    # Conexão de um worker recriado (cancelamento): ignorar
+                    if worker is None or worker["conexao"] is not conexao:
+                        continue
+                    try:
+                        job_id, ok, valor, periodo = conexao.recv()
+                    except (EOFError, OSError):
+                        continue  # worker encerrado: tratado abaixo
+                    if worker["job_id"] != job_id:
+                        continue
+                    worker["job_id"] = None
+                    worker["periodo"] = tuple(periodo) if periodo else None
+                    if ok:
+                        self._finalizar(job_id, "concluido", resultado=valor)
+                    else:
+                        self._finalizar(job_id, "erro", erro=valor)
+                for indice, worker in enumerate(self._workers):
+                    if self._ativo and not worker["processo"].is_alive():
+                        job_id = worker["job_id"]
+                        codigo = worker["processo"].exitcode
+                        print(f"[WORKER] Worker {indice} encerrado (código {codigo}); recriando")
+                        worker["conexao"].close()
+                        self._workers[indice] = self._criar_worker(indice)
+                        if job_id:
+                            self._finalizar(
+                                job_id, "erro", erro=f"worker encerrado (código {codigo})"
+                            )
+                self._despachar()
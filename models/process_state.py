@@ -33,19 +33,29 @@ class ProcessStateManager:
     Implementação mínima para compatibilidade.
     """
 
-    def __init__(self):
-        """Inicializa o gerenciador de estado."""
+    def __init__(self, backend=None):
+        """
+        Inicializa o gerenciador de estado.
+
+        Args:
+            backend: Backend persistente (src.recebimento.estado.state_backend);
+                     None mantém o arquivo Excel
+        """
         self.estado = pd.DataFrame(columns=ESTADO_COLUMNS)
+        self.backend = backend
 
     def load_from_file(self, filepath: str):
         """
-        Carrega o estado de um arquivo Excel.
+        Carrega o estado de um arquivo Excel (ou do backend, se configurado e
+        já populado; na primeira execução o Excel serve de importação).
 
         Args:
             filepath: Caminho para o arquivo Excel
         """
         try:
-            if os.path.exists(filepath):
+            if self.backend is not None and self.backend.existe():
+                self.estado = self._normalize_estado(self.backend.carregar())
+            elif os.path.exists(filepath):
                 self.estado = pd.read_excel(filepath, sheet_name="ESTADO")
                 # Normalizar colunas
                 self.estado = self._normalize_estado(self.estado)
@@ -58,7 +68,7 @@ class ProcessStateManager:
 
     def save_to_file(self, filepath: str):
         """
-        Salva o estado em um arquivo Excel.
+        Salva o estado em um arquivo Excel (ou no backend, se configurado).
 
         Args:
             filepath: Caminho para o arquivo Excel
@@ -67,6 +77,10 @@ class ProcessStateManager:
             # Normalizar antes de salvar
             self.estado = self._normalize_estado(self.estado)
 
+            if self.backend is not None:
+                self.backend.salvar(self.estado)
+                return
+
             # Criar diretório se não existir
             os.makedirs(
                 os.path.dirname(filepath) if os.path.dirname(filepath) else ".",
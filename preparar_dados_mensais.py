@@ -1,32 +1,26 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
 import unicodedata
+import calendar
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from src.io.input_cache import ler_com_cache, ler_csv, ler_excel
+from src.core.retencao_clientes import IndiceRetencaoClientes
+from src.utils.date_parsing import parse_datas
 
 
 # --- FUNÇÕES AUXILIARES ---
-def _parse_dates_smart(series):
+def _parse_dates_smart(series, coluna=None, relatar=False):
     """
     Parse dates intelligently, detecting ISO format (YYYY-MM-DD) automatically.
     Falls back to day-first or month-first parsing for ambiguous formats.
-    """
-    raw = series.astype(str).str.strip().replace({"nan": ""})
-    raw_clean = raw.str.replace("\u00a0", " ", regex=False).str.replace(
-        "T", " ", regex=False
-    )
-
-    # Check if most values match ISO format pattern (YYYY-MM-DD)
-    iso_pattern = r"^\d{4}-\d{2}-\d{2}"
-    iso_count = raw_clean.str.match(iso_pattern, na=False).sum()
 
-    # If >= 50% are ISO format, use yearfirst=True
-    if iso_count >= max(1, int(0.5 * len(raw_clean))):
-        return pd.to_datetime(raw_clean, yearfirst=True, errors="coerce")
-    else:
-        # Try both dayfirst and monthfirst, choose the one with fewer NaT
-        parsed1 = pd.to_datetime(raw_clean, dayfirst=True, errors="coerce")
-        parsed2 = pd.to_datetime(raw_clean, dayfirst=False, errors="coerce")
-        return parsed1 if parsed1.isna().sum() <= parsed2.isna().sum() else parsed2
+    A conversão é feita por valor distinto e memorizada (src/utils/date_parsing.py).
+    """
+    return parse_datas(series, coluna=coluna, relatar=relatar)
 
 
 # --- CONFIGURAÇÕES ---
@@ -130,7 +124,7 @@ csv_path = _encontrar_arquivo_entrada(ARQUIVO_ANALISE_COMPLETA)
 if xlsx_path and not csv_path:
     try:
         print(f"Detectado {xlsx_path} - convertendo para .csv...")
-        df_temp = pd.read_excel(xlsx_path, dtype=str)
+        df_temp = ler_excel(xlsx_path, dtype=str)
         # Salvar CSV na raiz (onde o código espera)
         df_temp.to_csv(ARQUIVO_ANALISE_COMPLETA, index=False, encoding="utf-8-sig")
         print(f"[OK] Conversao concluida: {ARQUIVO_ANALISE_COMPLETA} criado.")
@@ -198,1663 +192,1134 @@ def _detect_sep(path, encodings=("utf-8-sig", "utf-8", "latin1")):
     return ",", encodings[0]
 
 
-def gerar_faturados(df, mes, ano):
-    """Gera o arquivo Faturados.xlsx filtrando por mês/ano e operações relevantes."""
-    arquivo_saida = "Faturados.xlsx"
-    print(f"\nIniciando a geração do arquivo '{arquivo_saida}'...")
+# --- LEITURA EM BLOCOS DA ANÁLISE COMERCIAL (CSV) ---
+# Linhas por bloco: a memória de pico é limitada pelo bloco + linhas mantidas
+TAMANHO_BLOCO_ANALISE = 50000
+# Meses de histórico antes do mês de apuração usados pela retenção (janela
+# de 24 meses terminando no mês anterior)
+MESES_HISTORICO_ANALISE = 24
+# Identifica a função de leitura no cache de entradas (mudar ao alterar filtros/colunas)
+LEITOR_ANALISE_BLOCOS = "csv_analise_blocos_v1"
+
+# Colunas lidas: as usadas por alguma saída ou pela detecção de datas/status
+_COLUNAS_ANALISE = {
+    _norm(c)
+    for c in DEFAULT_WANTED_FATURADOS
+    + DEFAULT_CONVERSOES_COLS
+    + DEFAULT_YTD_WANTED
+    + ["Data Aceite", "Dt Aceite", "Dt Entrada"]
+}
+
+
+def _coluna_data(n):
+    """Nome normalizado de coluna de data (Dt Emissão / Data Aceite e variantes)."""
+    return (
+        n in (_norm("Dt Emissão"), _norm("Data Aceite"), _norm("Dt Aceite"), _norm("Dt Entrada"))
+        or ("dt" in n and "emiss" in n)
+        or ("aceite" in n and "data" in n)
+    )
 
-    # localizar coluna de data (Dt Emissão) e parse robusto
-    date_col = None
-    for c in df.columns:
-        if _norm(c) == _norm("Dt Emissão") or (
-            "dt" in _norm(c) and "emiss" in _norm(c)
-        ):
-            date_col = c
-            break
+
+def _coluna_usada_pelo_preparador(nome):
+    n = _norm(nome)
+    return n in _COLUNAS_ANALISE or _coluna_data(n)
+
+
+def _filtro_periodo_analise(bloco, mes, ano):
+    """
+    Linhas do bloco que alguma saída a partir de mes/ano pode usar.
+
+    O filtro olha só o ano (4 dígitos) das colunas de data, sem interpretar
+    dia/mês, e é conservador:
+      - qualquer data no ano de apuração ou depois (Faturados/Conversões/YTD);
+      - processos FATURADO com data a partir do ano do início da janela de
+        retenção;
+      - linhas sem ano reconhecível em nenhuma data são mantidas.
+    """
+    colunas_data = [c for c in bloco.columns if _coluna_data(_norm(c))]
+    if not colunas_data:
+        return pd.Series(True, index=bloco.index)
+    anos = pd.concat(
+        [
+            pd.to_numeric(bloco[c].str.extract(r"(\d{4})", expand=False), errors="coerce")
+            for c in colunas_data
+        ],
+        axis=1,
+    ).max(axis=1)
+
+    inicio_retencao = ano * 12 + (mes - 1) - MESES_HISTORICO_ANALISE
+    colunas_status = [c for c in bloco.columns if _norm(c) == _norm("Status Processo")]
+    if colunas_status:
+        faturado = pd.concat(
+            [bloco[c].astype(str).str.strip().str.upper() == "FATURADO" for c in colunas_status],
+            axis=1,
+        ).any(axis=1)
+    else:
+        faturado = pd.Series(True, index=bloco.index)
+    return anos.isna() | (anos >= ano) | (faturado & (anos >= inicio_retencao // 12))
+
+
+def _ler_analise_csv_blocos(caminho, sep, encoding, engine="c", periodo=None):
+    """
+    Lê o CSV da Análise Comercial em blocos de TAMANHO_BLOCO_ANALISE linhas,
+    apenas com as colunas usadas pelo preparador e, com `periodo` (mes, ano),
+    descartando em cada bloco as linhas fora do histórico necessário
+    (_filtro_periodo_analise). Todas as colunas são lidas como texto.
+    """
+    kwargs = dict(
+        sep=sep,
+        engine=engine,
+        on_bad_lines="warn",
+        dtype=str,
+        encoding=encoding,
+        usecols=_coluna_usada_pelo_preparador,
+    )
+    blocos = []
+    lidas = 0
+    with pd.read_csv(caminho, chunksize=TAMANHO_BLOCO_ANALISE, **kwargs) as leitor:
+        for bloco in leitor:
+            lidas += len(bloco)
+            if periodo is not None:
+                bloco = bloco[_filtro_periodo_analise(bloco, *periodo)]
+            blocos.append(bloco)
+    if not blocos:
+        return pd.read_csv(caminho, nrows=0, **kwargs)
+    df = pd.concat(blocos, ignore_index=True)
+    print(
+        f"Leitura em blocos: {len(blocos)} bloco(s), {lidas} linha(s) lida(s), "
+        f"{len(df)} mantida(s), {df.shape[1]} coluna(s)."
+    )
+    return df
+
+
+def _modo_leitura_analise():
+    """'blocos' (padrão) ou 'completa' (COMISSOES_LEITURA_ANALISE)."""
+    modo = os.getenv("COMISSOES_LEITURA_ANALISE", "blocos").strip().lower()
+    return "completa" if modo in ("completa", "completo", "legado", "python") else "blocos"
+
+
+def _ler_analise_csv(caminho, periodo=None):
+    """
+    Lê o CSV da Análise Comercial detectando separador e encoding.
+
+    No modo 'blocos' usa o engine C em blocos com colunas/linhas podadas
+    (engine python se o C falhar); no modo 'completa' lê o arquivo inteiro
+    com o engine python, como antes.
+
+    Returns:
+        (DataFrame, encoding, separador); DataFrame None se nenhuma leitura funcionou.
+    """
+    encodings_to_try = ["utf-8-sig", "utf-8", "latin1"]
+    sep_detected, _ = _detect_sep(caminho, encodings_to_try)
+    blocos = _modo_leitura_analise() == "blocos"
+    last_exc = None
+    for enc in encodings_to_try:
+        engines = ("c", "python") if blocos else ("python",)
+        for engine in engines:
+            try:
+                if blocos:
+                    df = ler_com_cache(
+                        caminho,
+                        LEITOR_ANALISE_BLOCOS,
+                        _ler_analise_csv_blocos,
+                        sep=sep_detected,
+                        encoding=enc,
+                        engine=engine,
+                        periodo=tuple(periodo) if periodo else None,
+                    )
+                else:
+                    df = ler_csv(
+                        caminho,
+                        sep=sep_detected,
+                        engine="python",
+                        on_bad_lines="warn",
+                        dtype=str,
+                        encoding=enc,
+                    )
+                df.columns = [c.strip() for c in df.columns]
+                print(f"Arquivo lido com sucesso com encoding={enc} and sep='{sep_detected}'.")
+                return df, enc, sep_detected
+            except UnicodeDecodeError as e:
+                last_exc = e
+                break
+            except Exception as e:
+                last_exc = e
+        print(f"Aviso: falha ao ler com encoding={enc}: {last_exc}")
+    print(f"Último erro de leitura de '{caminho}': {last_exc}")
+    return None, None, sep_detected
+
+
+# --- PIPELINE DE PREPARAÇÃO (quadro único) ---
+# Operações aceitas em Faturados/Conversões (código antes de " - ")
+OPERACOES_VALIDAS = {"FLOC", "IMO2", "OR19", "P205", "PSEM", "PSER", "SERV", "PVEN", "PVMA"}
+
+# Faturados_YTD: frases completas do SQL, com fallback pelo código curto
+OPERACOES_YTD_FRASES = {
+    _norm("IMO2 - VENDA IMOBILIZADO"),
+    _norm("OR19 - VENDA A ORDEM POR CONTA DE TERCEIRO"),
+    _norm("P205 - SIMPLES FATURAMENTO"),
+    _norm("PVEN - PEDIDO DE VENDA"),
+    _norm("PVMA - PEDIDO DE VENDA MANUTENÇÃO"),
+}
+OPERACOES_YTD_CODIGOS = {"IMO2", "OR19", "P205", "PVEN", "PVMA"}
+
+# Retenção: frases completas do SQL
+OPERACOES_RETENCAO = {
+    _norm("PSEM - PEDIDO DE VENDA/REV. MANUT. E SERVIÇO"),
+    _norm("PSER - PEDIDO SERVIÇO"),
+    _norm("PVMA - PEDIDO DE VENDA MANUTENÇÃO"),
+    _norm("FLOC - FATURA DE LOCAÇÃO EQUIPAMENTOS"),
+    _norm("IMO2 - VENDA IMOBILIZADO"),
+    _norm("OR19 - VENDA A ORDEM POR CONTA DE TERCEIRO"),
+    _norm("P205 - SIMPLES FATURAMENTO"),
+    _norm("PVEN - PEDIDO DE VENDA"),
+}
+
+COLUNAS_RETENCAO = ["linha", "clientes_mes_anterior", "clientes_mes_atual"]
+
+ARQUIVO_SAIDA_CONVERSOES = "Conversões.xlsx"
+ARQUIVO_SAIDA_FATURADOS_YTD = "Faturados_YTD.xlsx"
+ARQUIVO_SAIDA_RETENCAO = "Retencao_Clientes.xlsx"
+
+# Acima deste total de linhas os arquivos de saída são gravados em paralelo
+LIMIAR_GRAVACAO_PARALELA = 20000
+
+# Quadros gravados neste processo: caminho absoluto -> (mes, ano, assinatura, DataFrame)
+_QUADROS_PREPARADOS = {}
+# Índices de retenção das Retencao_Clientes gravadas: caminho absoluto -> (mes, ano, assinatura, índice)
+_INDICES_RETENCAO = {}
+
+
+def _por_valor_distinto(serie, funcao):
+    """
+    Aplica `funcao` (Series -> Series) apenas aos valores distintos de `serie`
+    e devolve o resultado alinhado às linhas originais.
+
+    Colunas como 'Operação' têm poucos valores distintos; o factorize evita
+    repetir a normalização/split em cada linha da base.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    resultado = funcao(pd.Series(unicos, dtype=serie.dtype))
+    return pd.Series(resultado.to_numpy()[codigos], index=serie.index)
+
+
+def _codigo_operacao(serie):
+    """Código da operação (ex.: 'PVEN - PEDIDO DE VENDA' -> 'PVEN')."""
+    return (
+        serie.astype(str)
+        .str.strip()
+        .str.split(" - ", n=1)
+        .str[0]
+        .str.split()
+        .str[0]
+        .str.upper()
+    )
+
+
+def _operacao_ytd_permitida(val):
+    s = str(val)
+    n = _norm(s)
+    # exact normalized phrase match
+    if n in OPERACOES_YTD_FRASES:
+        return True
+    # check prefix code
+    code = s.strip().split(" - ")[0].split()[0].upper() if s.strip() != "" else ""
+    if code in OPERACOES_YTD_CODIGOS:
+        return True
+    # last resort: check if any allowed code appears in the normalized string
+    return any(ac.lower() in n for ac in OPERACOES_YTD_CODIGOS)
+
+
+def _operacao_retencao_permitida(x):
+    # Valores no arquivo podem ser siglas curtas (ex: "PVEN") enquanto a lista contém
+    # descrições completas (ex: "pven - pedido de venda"): aceitar o valor contido
+    # em alguma operação permitida OU se alguma operação permitida começa com ele
+    return any(x in a or a.startswith(x) for a in OPERACOES_RETENCAO if x)
+
+
+def preparar_quadro_analise(df):
+    """
+    Prepara a Análise Comercial uma única vez para todas as saídas do mês.
+
+    Detecta as colunas de data, operação, status, negócio e cliente, converte
+    as datas (Dt Emissão e Data Aceite) e calcula as máscaras compartilhadas
+    de status/operação. O DataFrame recebido não é alterado.
+
+    Returns:
+        Dicionário com o DataFrame (datas já convertidas), as colunas
+        detectadas e as máscaras usadas pelos montadores de cada arquivo.
+    """
+    df = df.copy(deep=False)
+    normas = {c: _norm(c) for c in df.columns}
+    colunas = {}
+    for c, n in normas.items():
+        colunas.setdefault(n, c)
+
+    date_col = next(
+        (
+            c
+            for c, n in normas.items()
+            if n == _norm("Dt Emissão") or ("dt" in n and "emiss" in n)
+        ),
+        None,
+    )
+    aceite_col = next(
+        (
+            c
+            for c, n in normas.items()
+            if n == _norm("Data Aceite") or ("aceite" in n and "data" in n)
+        ),
+        None,
+    )
+    if aceite_col is None:
+        # tentar por colunas comuns
+        for alt in ["Data Aceite", "Dt Aceite", "Dt Entrada"]:
+            aceite_col = colunas.get(_norm(alt))
+            if aceite_col:
+                break
+
+    quadro = {
+        "df": df,
+        "colunas": colunas,
+        "date_col": date_col,
+        "aceite_col": aceite_col,
+        "op_col": colunas.get("operacao"),
+        "status_col": colunas.get(_norm("Status Processo")),
+        "negocio_col": colunas.get("negocio"),
+        "cliente_col": colunas.get(_norm("Cliente")),
+        "amostra_data": [],
+    }
+
+    if date_col is not None:
+        quadro["amostra_data"] = df[date_col].astype(str).head(5).tolist()
+        df[date_col] = _parse_dates_smart(df[date_col], date_col, relatar=True)
+    if aceite_col is not None and aceite_col != date_col:
+        df[aceite_col] = _parse_dates_smart(df[aceite_col], aceite_col, relatar=True)
+
+    if quadro["status_col"] is not None:
+        quadro["faturado"] = (
+            df[quadro["status_col"]].astype(str).str.strip().str.upper() == "FATURADO"
+        )
+    op_col = quadro["op_col"]
+    if op_col is not None:
+        quadro["op_codigo"] = _por_valor_distinto(df[op_col], _codigo_operacao)
+        quadro["op_valida"] = quadro["op_codigo"].isin(OPERACOES_VALIDAS)
+        quadro["op_ytd"] = _por_valor_distinto(
+            df[op_col], lambda s: s.map(_operacao_ytd_permitida).astype(bool)
+        )
+        quadro["op_retencao"] = _por_valor_distinto(
+            df[op_col],
+            lambda s: s.astype(str)
+            .map(_norm)
+            .map(_operacao_retencao_permitida)
+            .astype(bool),
+        )
+    return quadro
+
+
+def _mascara_mes(datas, mes, ano):
+    return (datas.dt.month == mes) & (datas.dt.year == ano)
+
+
+def _selecionar_colunas(quadro, mascara, desejadas, completar=True):
+    """
+    Recorta as linhas da máscara nas colunas desejadas, localizando cada uma
+    pelo nome exato ou normalizado. Com `completar`, colunas ausentes são
+    criadas vazias; sem ele, ficam de fora.
+    """
+    df = quadro["df"]
+    origens = {}
+    for want in desejadas:
+        origem = want if want in df.columns else quadro["colunas"].get(_norm(want))
+        if origem is not None:
+            origens[want] = origem
+    recorte = df.loc[mascara, list(origens.values())]
+    recorte.columns = list(origens.keys())
+    if not completar:
+        return recorte
+    for want in desejadas:
+        if want not in origens:
+            recorte[want] = pd.NA
+    return recorte[desejadas]
+
+
+def _carregar_aliases():
+    """Mapa alias -> nome padrão dos colaboradores (Regras_Comissoes.xlsx/ALIASES), ou None."""
+    try:
+        if os.path.exists("Regras_Comissoes.xlsx"):
+            aliases_df = ler_excel("Regras_Comissoes.xlsx", sheet_name="ALIASES")
+            return (
+                aliases_df[aliases_df["entidade"] == "colaborador"]
+                .set_index("alias")["padrao"]
+                .to_dict()
+            )
+    except Exception as e:
+        print(f"AVISO: Falha ao carregar aliases: {e}")
+    return None
+
+
+def _aplicar_aliases(df_out, alias_map, rotulo):
+    """Aplica os aliases de colaboradores em Consultor Interno e Representante-pedido."""
+    if alias_map is None:
+        return
+    try:
+        for col in ("Consultor Interno", "Representante-pedido"):
+            if col in df_out.columns:
+                df_out[col] = df_out[col].astype(str).replace(alias_map).str.strip()
+        print(f"[DEBUG {rotulo}] Aliases aplicados com sucesso.")
+    except Exception as e:
+        print(f"AVISO: Falha ao aplicar aliases em {rotulo}: {e}")
+
+
+def _montar_faturados(quadro, mes, ano, alias_map=None):
+    """Monta Faturados (mês/ano por Dt Emissão e operações relevantes)."""
+    print(f"\nIniciando a geração do arquivo '{ARQUIVO_SAIDA_FATURADOS}'...")
+    df, date_col = quadro["df"], quadro["date_col"]
     if date_col is None:
         print(
             "ERRO: não foi possível localizar coluna de data 'Dt Emissão' para faturados. Gerando arquivo vazio com cabeçalho."
         )
-        # criar arquivo vazio com cabeçalho esperado
-        df_out = pd.DataFrame(columns=DEFAULT_WANTED_FATURADOS)
-        try:
-            df_out.to_excel(arquivo_saida, index=False)
-            print(
-                f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_out)} linhas (vazio)."
-            )
-            return True
-        except Exception as e:
-            print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-            return False
+        return pd.DataFrame(columns=DEFAULT_WANTED_FATURADOS)
 
+    datas = df[date_col]
     print(f"[DEBUG Faturados] Coluna de data detectada: '{date_col}'")
+    print(f"[DEBUG Faturados] Amostra Dt Emissão (bruto): {quadro['amostra_data']}")
     print(
-        f"[DEBUG Faturados] Amostra Dt Emissão (bruto): {df[date_col].astype(str).head(5).tolist()}"
-    )
-    df[date_col] = _parse_dates_smart(df[date_col])
-    print(
-        f"[DEBUG Faturados] Tipo após parse: {df[date_col].dtype}, válidas: {int(df[date_col].notna().sum())} de {len(df)}"
+        f"[DEBUG Faturados] Tipo após parse: {datas.dtype}, válidas: {int(datas.notna().sum())} de {len(df)}"
     )
     try:
-        amostra = df[date_col].dropna().astype(str).head(5).tolist()
+        amostra = datas.dropna().astype(str).head(5).tolist()
         print(f"[DEBUG Faturados] Amostra Dt Emissão (parse): {amostra}")
     except Exception:
         pass
 
-    filtro = (df[date_col].dt.month == mes) & (df[date_col].dt.year == ano)
-    df_filtrado = df[filtro].copy()
+    filtro = _mascara_mes(datas, mes, ano)
     print(
-        f"[DEBUG Faturados] Encontradas {len(df_filtrado)} linhas para {mes:02d}/{ano} por Dt Emissão."
+        f"[DEBUG Faturados] Encontradas {int(filtro.sum())} linhas para {mes:02d}/{ano} por Dt Emissão."
     )
-
-    if df_filtrado.empty:
+    if not filtro.any():
         print(
             "Nenhum dado encontrado para o período selecionado por Dt Emissão. Gerando 'Faturados.xlsx' vazio com cabeçalho."
         )
-        df_out = pd.DataFrame(columns=DEFAULT_WANTED_FATURADOS)
-        try:
-            df_out.to_excel(arquivo_saida, index=False)
-            print(
-                f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_out)} linhas (vazio)."
-            )
-            return True
-        except Exception as e:
-            print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-            return False
+        return pd.DataFrame(columns=DEFAULT_WANTED_FATURADOS)
 
-    # aplicar filtro por operações (tolerante)
-    operacoes_validas = {
-        "FLOC",
-        "IMO2",
-        "OR19",
-        "P205",
-        "PSEM",
-        "PSER",
-        "SERV",
-        "PVEN",
-        "PVMA",
-    }
-    op_col = None
-    for c in df_filtrado.columns:
-        if _norm(c) == "operacao" or _norm(c) == "operação":
-            op_col = c
-            break
-    if op_col is not None:
+    if quadro["op_col"] is not None:
         print(
-            f"[DEBUG Faturados] Coluna 'Operação' detectada: '{op_col}'. Aplicando filtro de operações válidas."
-        )
-        before_ops = len(df_filtrado)
-        df_filtrado["operacao_codigo"] = (
-            df_filtrado[op_col]
-            .astype(str)
-            .str.strip()
-            .str.split(" - ", n=1)
-            .str[0]
-            .str.split()
-            .str[0]
-            .str.upper()
+            f"[DEBUG Faturados] Coluna 'Operação' detectada: '{quadro['op_col']}'. Aplicando filtro de operações válidas."
         )
         try:
-            unique_codes = sorted(
-                df_filtrado["operacao_codigo"].dropna().unique().tolist()
-            )
+            unique_codes = sorted(quadro["op_codigo"][filtro].dropna().unique().tolist())
             print(f"[DEBUG Faturados] Códigos de operação detectados: {unique_codes}")
         except Exception:
             pass
-        df_filtrado = df_filtrado[
-            df_filtrado["operacao_codigo"].isin(operacoes_validas)
-        ].copy()
-        if "operacao_codigo" in df_filtrado.columns:
-            df_filtrado = df_filtrado.drop(columns=["operacao_codigo"])
-        after_ops = len(df_filtrado)
+        before_ops = int(filtro.sum())
+        filtro = filtro & quadro["op_valida"]
         print(
-            f"[DEBUG Faturados] Filtragem por operação: {before_ops} -> {after_ops} linhas."
+            f"[DEBUG Faturados] Filtragem por operação: {before_ops} -> {int(filtro.sum())} linhas."
         )
     else:
         print(
             "AVISO: coluna 'Operação' não encontrada; gerando faturados sem filtro por operação."
         )
 
-    # escolher colunas básicas para o arquivo de faturados (preserve as existentes)
-    wanted = [
-        "Código Produto",
-        "Descrição Produto",
-        "Qtde Atendida",
-        "Operação",
-        "Processo",
-        "Status Processo",
-        "Dt Emissão",
-        "Valor Realizado",
-        "Consultor Interno",
-        "Representante-pedido",
-        "Gerente Comercial-Pedido",
-        "Aplicação Mat./Serv.",
-        "Cliente",
-        "Nome Cliente",
-        "Cidade",
-        "UF",
-        "Tipo de Mercadoria",
-        "Subgrupo",
-        "Grupo",
-        "Negócio",
-    ]
-    for want in wanted:
-        if want not in df_filtrado.columns:
-            # tentar encontrar por nome normalizado
-            found = None
-            for c in df_filtrado.columns:
-                if _norm(c) == _norm(want):
-                    found = c
-                    break
-            if found:
-                df_filtrado = df_filtrado.rename(columns={found: want})
-            else:
-                df_filtrado[want] = pd.NA
-
-    df_out = df_filtrado[wanted].copy()
-
-    # Aplicar aliases de colaboradores nas colunas Consultor Interno e Representante-pedido
-    try:
-        if os.path.exists("Regras_Comissoes.xlsx"):
-            import openpyxl
-
-            aliases_df = pd.read_excel("Regras_Comissoes.xlsx", sheet_name="ALIASES")
-            alias_map = (
-                aliases_df[aliases_df["entidade"] == "colaborador"]
-                .set_index("alias")["padrao"]
-                .to_dict()
-            )
-
-            if "Consultor Interno" in df_out.columns:
-                df_out["Consultor Interno"] = (
-                    df_out["Consultor Interno"]
-                    .astype(str)
-                    .replace(alias_map)
-                    .str.strip()
-                )
-            if "Representante-pedido" in df_out.columns:
-                df_out["Representante-pedido"] = (
-                    df_out["Representante-pedido"]
-                    .astype(str)
-                    .replace(alias_map)
-                    .str.strip()
-                )
-
-            print("[DEBUG Faturados] Aliases aplicados com sucesso.")
-    except Exception as e:
-        print(f"AVISO: Falha ao aplicar aliases: {e}")
-
-    try:
-        df_out.to_excel(arquivo_saida, index=False)
-        print(
-            f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_out)} linhas."
-        )
-        return True
-    except Exception as e:
-        print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-        return False
-
-
-def gerar_conversoes(df, mes, ano):
-    """Gera o arquivo Conversões.xlsx filtrando por 'Data Aceite' (quando existir) e por mês/ano."""
-    arquivo_saida = "Conversões.xlsx"
-    print(f"\nIniciando a geração do arquivo '{arquivo_saida}'...")
+    df_out = _selecionar_colunas(quadro, filtro, DEFAULT_WANTED_FATURADOS)
+    _aplicar_aliases(df_out, alias_map, "Faturados")
+    return df_out
 
-    # localizar coluna 'Data Aceite' ou alternativa
-    data_aceite_col = None
-    for c in df.columns:
-        if _norm(c) == _norm("Data Aceite") or (
-            "aceite" in _norm(c) and "data" in _norm(c)
-        ):
-            data_aceite_col = c
-            break
-    if data_aceite_col is None:
-        # tentar por colunas comuns
-        for alt in ["Data Aceite", "Dt Aceite", "Dt Entrada"]:
-            for c in df.columns:
-                if _norm(c) == _norm(alt):
-                    data_aceite_col = c
-                    break
-            if data_aceite_col:
-                break
 
-    if data_aceite_col is None:
+def _montar_conversoes(quadro, mes, ano, alias_map=None):
+    """Monta Conversões (mês/ano por Data Aceite); None quando não há colunas aproveitáveis."""
+    print(f"\nIniciando a geração do arquivo '{ARQUIVO_SAIDA_CONVERSOES}'...")
+    df, aceite_col = quadro["df"], quadro["aceite_col"]
+    if aceite_col is None:
         print(
             "AVISO: coluna 'Data Aceite' não encontrada; gerando 'Conversões.xlsx' vazio com cabeçalho."
         )
-        # gerar arquivo vazio com colunas base
-        arquivo_saida = "Conversões.xlsx"
-        base_cols = [
-            "Código Produto",
-            "Descrição Produto",
-            "Qtde Atendida",
-            "Operação",
-            "Processo",
-            "Status Processo",
-            "Data Aceite",
-            "Valor Orçado",
-            "Valor Realizado",
-            "Consultor Interno",
-            "Representante-pedido",
-            "Gerente Comercial-Pedido",
-            "Aplicação Mat./Serv.",
-            "Cliente",
-            "Nome Cliente",
-            "Cidade",
-            "UF",
-            "Tipo de Mercadoria",
-            "Subgrupo",
-            "Grupo",
-            "Negócio",
-        ]
-        df_final = pd.DataFrame(columns=base_cols)
-        try:
-            df_final.to_excel(arquivo_saida, index=False)
-            print(
-                f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_final)} linhas (vazio)."
-            )
-            return True
-        except Exception as e:
-            print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-            return False
+        return pd.DataFrame(columns=DEFAULT_CONVERSOES_COLS)
 
-    df[data_aceite_col] = _parse_dates_smart(df[data_aceite_col])
-
-    n_invalid = df[data_aceite_col].isna().sum()
+    datas = df[aceite_col]
+    n_invalid = datas.isna().sum()
     if n_invalid > 0:
         print(
             f"AVISO: {n_invalid} linhas com 'Data Aceite' inválida; essas linhas serão ignoradas."
         )
 
-    filtro = (df[data_aceite_col].dt.month == mes) & (
-        df[data_aceite_col].dt.year == ano
-    )
-    df_filtrado = df[filtro].copy()
+    filtro = _mascara_mes(datas, mes, ano)
     print(
-        f"Encontradas {len(df_filtrado)} linhas para o período de {mes}/{ano} (Data Aceite)."
+        f"Encontradas {int(filtro.sum())} linhas para o período de {mes}/{ano} (Data Aceite)."
     )
-
-    if df_filtrado.empty:
+    if not filtro.any():
         print(
             "Nenhum dado convertido encontrado para o período selecionado. Gerando 'Conversões.xlsx' vazio com cabeçalho."
         )
-        arquivo_saida = "Conversões.xlsx"
-        base_cols = [
-            "Código Produto",
-            "Descrição Produto",
-            "Qtde Atendida",
-            "Operação",
-            "Processo",
-            "Status Processo",
-            "Data Aceite",
-            "Valor Orçado",
-            "Valor Realizado",
-            "Consultor Interno",
-            "Representante-pedido",
-            "Gerente Comercial-Pedido",
-            "Aplicação Mat./Serv.",
-            "Cliente",
-            "Nome Cliente",
-            "Cidade",
-            "UF",
-            "Tipo de Mercadoria",
-            "Subgrupo",
-            "Grupo",
-            "Negócio",
-        ]
-        df_final = pd.DataFrame(columns=base_cols)
-        try:
-            df_final.to_excel(arquivo_saida, index=False)
-            print(
-                f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_final)} linhas (vazio)."
-            )
-            return True
-        except Exception as e:
-            print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-            return False
+        return pd.DataFrame(columns=DEFAULT_CONVERSOES_COLS)
 
-    # aplicar filtro de operações semelhante ao faturados
-    operacoes_validas = {
-        "FLOC",
-        "IMO2",
-        "OR19",
-        "P205",
-        "PSEM",
-        "PSER",
-        "SERV",
-        "PVEN",
-        "PVMA",
-    }
-    op_col = None
-    for c in df_filtrado.columns:
-        if _norm(c) == "operacao" or _norm(c) == "operação":
-            op_col = c
-            break
-    if op_col is not None:
-        before_ops = len(df_filtrado)
-        df_filtrado["operacao_codigo"] = (
-            df_filtrado[op_col]
-            .astype(str)
-            .str.strip()
-            .str.split(" - ", n=1)
-            .str[0]
-            .str.split()
-            .str[0]
-            .str.upper()
-        )
-        df_filtrado = df_filtrado[
-            df_filtrado["operacao_codigo"].isin(operacoes_validas)
-        ].copy()
-        if "operacao_codigo" in df_filtrado.columns:
-            df_filtrado = df_filtrado.drop(columns=["operacao_codigo"])
-        after_ops = len(df_filtrado)
+    if quadro["op_col"] is not None:
+        before_ops = int(filtro.sum())
+        filtro = filtro & quadro["op_valida"]
         print(
-            f"Filtragem por operação aplicada: {before_ops} -> {after_ops} linhas (apenas operações válidas mantidas)."
+            f"Filtragem por operação aplicada: {before_ops} -> {int(filtro.sum())} linhas (apenas operações válidas mantidas)."
         )
     else:
         print("AVISO: coluna 'Operação' não encontrada; pulando filtro por operação.")
 
-    # escolher colunas para conversões (similar ao faturados mas com Data Aceite)
-    base_cols = [
-        "Código Produto",
-        "Descrição Produto",
-        "Qtde Atendida",
-        "Operação",
-        "Processo",
-        "Status Processo",
-        "Data Aceite",
-        "Valor Orçado",
-        "Valor Realizado",
-        "Consultor Interno",
-        "Representante-pedido",
-        "Gerente Comercial-Pedido",
-        "Aplicação Mat./Serv.",
-        "Cliente",
-        "Nome Cliente",
-        "Cidade",
-        "UF",
-        "Tipo de Mercadoria",
-        "Subgrupo",
-        "Grupo",
-        "Negócio",
-    ]
-
-    # ajustar nomes presentes
-    desired = base_cols
-    available = []
-    for want in desired:
-        if want in df_filtrado.columns:
-            available.append(want)
-            continue
-        # try normalized search
-        found = None
-        for c in df_filtrado.columns:
-            if _norm(c) == _norm(want):
-                found = c
-                break
-        if found:
-            df_filtrado = df_filtrado.rename(columns={found: want})
-            available.append(want)
-
-    if not available:
+    df_final = _selecionar_colunas(
+        quadro, filtro, DEFAULT_CONVERSOES_COLS, completar=False
+    )
+    if df_final.columns.empty:
         print(
             "AVISO: nenhuma das colunas desejadas foi encontrada para montar 'Conversões'."
         )
-        return False
+        return None
 
-    df_final = df_filtrado[available].copy()
+    _aplicar_aliases(df_final, alias_map, "Conversões")
+    return df_final
 
-    # Aplicar aliases de colaboradores nas colunas Consultor Interno e Representante-pedido
-    try:
-        if os.path.exists("Regras_Comissoes.xlsx"):
-            import openpyxl
 
-            aliases_df = pd.read_excel("Regras_Comissoes.xlsx", sheet_name="ALIASES")
-            alias_map = (
-                aliases_df[aliases_df["entidade"] == "colaborador"]
-                .set_index("alias")["padrao"]
-                .to_dict()
-            )
+def _montar_faturados_ytd(quadro, mes, ano):
+    """Monta Faturados_YTD (1º de janeiro até o fim do mês, status FATURADO e operações do SQL)."""
+    print(
+        f"\nIniciando a geração do arquivo '{ARQUIVO_SAIDA_FATURADOS_YTD}' (YTD com filtros SQL)..."
+    )
+    df, date_col = quadro["df"], quadro["date_col"]
+    if date_col is None:
+        print(
+            "ERRO: não foi possível encontrar coluna 'Dt Emissão' para gerar Faturados_YTD. Gerando arquivo vazio com cabeçalho."
+        )
+        return pd.DataFrame(columns=DEFAULT_YTD_WANTED)
 
-            if "Consultor Interno" in df_final.columns:
-                df_final["Consultor Interno"] = (
-                    df_final["Consultor Interno"]
-                    .astype(str)
-                    .replace(alias_map)
-                    .str.strip()
-                )
-            if "Representante-pedido" in df_final.columns:
-                df_final["Representante-pedido"] = (
-                    df_final["Representante-pedido"]
-                    .astype(str)
-                    .replace(alias_map)
-                    .str.strip()
-                )
+    # Compute YTD window: from Jan 1 of year to last day of selected month/year
+    start = datetime(ano, 1, 1)
+    last_day = calendar.monthrange(ano, mes)[1]
+    end = datetime(ano, mes, last_day, 23, 59, 59)
 
-            print("[DEBUG Conversões] Aliases aplicados com sucesso.")
-    except Exception as e:
-        print(f"AVISO: Falha ao aplicar aliases em Conversões: {e}")
+    datas = df[date_col]
+    mascara = datas.notna() & (datas >= start) & (datas <= end)
 
-    try:
-        df_final.to_excel(arquivo_saida, index=False)
+    if quadro["status_col"] is None:
         print(
-            f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_final)} linhas."
+            "AVISO: coluna 'Status Processo' não encontrada; nenhum filtro de status será aplicado."
         )
-        return True
-    except Exception as e:
-        print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-        return False
-
+    else:
+        mascara = mascara & quadro["faturado"]
 
-def run_preparador(mes: int, ano: int) -> bool:
-    """Entry point para execução não-interativa: lê o arquivo mestre, normaliza e chama os geradores.
+    if quadro["op_col"] is not None:
+        mascara = mascara & quadro["op_ytd"]
+    else:
+        print("AVISO: coluna 'Operação' não encontrada; pulando filtro por operação.")
 
-    Retorna True em sucesso (mesmo que algum gerador emita avisos), False em erro crítico.
-    """
-    print(f"--- Preparador: gerando arquivos para {mes}/{ano} ---")
+    return _selecionar_colunas(quadro, mascara, DEFAULT_YTD_WANTED)
 
-    # NOVO: Auto-conversão procurando primeiro em dados_entrada/
-    csv_path = _encontrar_arquivo_entrada(ARQUIVO_ANALISE_COMPLETA)
-    if not csv_path:
-        xlsx_path = _encontrar_arquivo_entrada("Analise_Comercial_Completa.xlsx")
-        if xlsx_path:
-            try:
-                print(f"Detectado {xlsx_path} - convertendo para .csv...")
-                df_temp = pd.read_excel(xlsx_path, dtype=str)
-                # Salvar CSV na raiz (onde o código espera)
-                df_temp.to_csv(
-                    ARQUIVO_ANALISE_COMPLETA, index=False, encoding="utf-8-sig"
-                )
-                print(f"[OK] Conversao concluida: {ARQUIVO_ANALISE_COMPLETA} criado.")
-            except Exception as e:
-                print(f"AVISO: Falha ao converter .xlsx para .csv: {e}")
-                print("Tentarei usar o arquivo .xlsx diretamente se possivel.")
-        else:
-            print(
-                f"\nERRO CRÍTICO: O arquivo '{ARQUIVO_ANALISE_COMPLETA}' não foi encontrado em '{PASTA_DADOS_ENTRADA}/' nem na raiz, "
-                f"e 'Analise_Comercial_Completa.xlsx' também não existe em '{PASTA_DADOS_ENTRADA}/' nem na raiz."
-            )
-            return False
 
-    # Determinar qual arquivo usar
-    arquivo_para_ler = None
+def _janelas_retencao(mes, ano):
+    """
+    Janelas de 24 meses terminando no mês anterior e no mês selecionado.
 
-    # Prioridade 1: CSV na raiz (já convertido ou já existia)
-    if os.path.exists(ARQUIVO_ANALISE_COMPLETA):
-        arquivo_para_ler = ARQUIVO_ANALISE_COMPLETA
-    # Prioridade 2: CSV em dados_entrada/
-    elif csv_path:
-        arquivo_para_ler = csv_path
-    # Prioridade 3: .xlsx encontrado (já convertido acima ou usar diretamente)
-    elif xlsx_path:
-        # Se não foi convertido acima, usar .xlsx diretamente
-        if not os.path.exists(ARQUIVO_ANALISE_COMPLETA):
-            arquivo_para_ler = xlsx_path
-        else:
-            arquivo_para_ler = ARQUIVO_ANALISE_COMPLETA
+    Returns:
+        (inicio_anterior, fim_anterior, inicio_atual, fim_atual)
+    """
+    if mes == 1:
+        prev_month, prev_year = 12, ano - 1
     else:
-        print(
-            f"\nERRO CRÍTICO: O arquivo '{ARQUIVO_ANALISE_COMPLETA}' não foi encontrado após tentativa de conversão."
-        )
-        return False
+        prev_month, prev_year = mes - 1, ano
 
-    print(
-        f"\nLendo o arquivo '{arquivo_para_ler}'... (Isso pode levar alguns instantes)"
+    def window_end(year, month):
+        last_day = calendar.monthrange(year, month)[1]
+        return datetime(year, month, last_day, 23, 59, 59)
+
+    def window_start_for_end(year, month):
+        # índice ano-mês: a janela inclui os 24 meses até (year, month)
+        ym_start_index = year * 12 + (month - 1) - 23
+        return datetime(ym_start_index // 12, (ym_start_index % 12) + 1, 1)
+
+    return (
+        window_start_for_end(prev_year, prev_month),
+        window_end(prev_year, prev_month),
+        window_start_for_end(ano, mes),
+        window_end(ano, mes),
     )
-    df_analise = None
-    encodings_to_try = ["utf-8-sig", "utf-8", "latin1"]
-    last_exc = None
 
-    # Ler arquivo (suporta .xlsx e .csv)
-    if arquivo_para_ler.endswith(".xlsx"):
-        try:
-            df_analise = pd.read_excel(arquivo_para_ler, dtype=str)
-            df_analise.columns = [c.strip() for c in df_analise.columns]
-            print(f"Arquivo .xlsx lido com sucesso: {arquivo_para_ler}")
-        except Exception as e:
-            print(f"\nERRO CRÍTICO: Falha ao ler o arquivo '{arquivo_para_ler}': {e}")
-            return False
-    else:
-        # É CSV
-        def _detect_sep(path, encodings=("utf-8-sig", "utf-8", "latin1")):
-            for enc in encodings:
-                try:
-                    with open(path, "r", encoding=enc, errors="replace") as fh:
-                        first = fh.readline()
-                        counts = {
-                            ",": first.count(","),
-                            ";": first.count(";"),
-                            "\t": first.count("\t"),
-                        }
-                        sep = max(
-                            counts, key=lambda k: (counts[k], 1 if k == ";" else 0)
-                        )
-                        if counts[sep] == 0:
-                            sep = ","
-                        return sep, enc
-                except Exception:
-                    continue
-            return ",", encodings[0]
-
-        sep_detected, used_enc_for_sep = _detect_sep(arquivo_para_ler, encodings_to_try)
-        for enc in encodings_to_try:
-            try:
-                df_analise = pd.read_csv(
-                    arquivo_para_ler,
-                    sep=sep_detected,
-                    engine="python",
-                    on_bad_lines="warn",
-                    dtype=str,
-                    encoding=enc,
-                )
-                df_analise.columns = [c.strip() for c in df_analise.columns]
-                print(
-                    f"Arquivo lido com sucesso com encoding={enc} and sep='{sep_detected}'."
-                )
-                break
-            except Exception as e:
-                last_exc = e
-                print(f"Aviso: falha ao ler com encoding={enc}: {e}")
-                df_analise = None
 
-        if df_analise is None:
-            print(
-                f"\nERRO CRÍTICO: Falha ao ler o arquivo '{arquivo_para_ler}' com encodings tentados. Último erro: {last_exc}"
+def indice_retencao_do_quadro(quadro):
+    """
+    Índice de retenção (IndiceRetencaoClientes) do quadro preparado: linhas
+    com Status Processo = 'FATURADO' e operações autorizadas para retenção.
+
+    Construído uma vez e guardado no próprio quadro; None quando faltam as
+    colunas de data, 'Negócio' ou 'Cliente'.
+    """
+    if "indice_retencao" not in quadro:
+        df, date_col = quadro["df"], quadro["date_col"]
+        negocio_col, cliente_col = quadro["negocio_col"], quadro["cliente_col"]
+        indice = None
+        if date_col is not None and negocio_col is not None and cliente_col is not None:
+            base = pd.Series(True, index=df.index)
+            if quadro["status_col"] is not None:
+                base = base & quadro["faturado"]
+            if quadro["op_col"] is not None:
+                base = base & quadro["op_retencao"]
+            indice = IndiceRetencaoClientes(
+                df.loc[base, date_col], df.loc[base, negocio_col], df.loc[base, cliente_col]
             )
-            return False
+        quadro["indice_retencao"] = indice
+    return quadro["indice_retencao"]
 
-    # Tentar normalização de colunas e consolidar
-    df_analise.columns = [c.strip() for c in df_analise.columns]
 
-    # Consolidar colunas duplicadas por normalização
-    def _consolidate_duplicates_local(df_local):
-        cols = list(df_local.columns)
-        norm_map = {}
-        for c in cols:
-            key = _norm(c)
-            norm_map.setdefault(key, []).append(c)
-        for key, group in norm_map.items():
-            if len(group) <= 1:
-                continue
-            first = group[0]
-            s = df_local[group].bfill(axis=1).iloc[:, 0]
-            df_local.drop(columns=group, inplace=True)
-            df_local[first] = s
-        return df_local
+def _montar_retencao(quadro, mes, ano, exibir=True):
+    """
+    Monta Retencao_Clientes: DISTINCT Cliente por 'Negócio' em cada janela de
+    24 meses, com Status Processo = 'FATURADO' e operações autorizadas.
 
-    df_analise = _consolidate_duplicates_local(df_analise)
+    As janelas são consultadas no índice de retenção do quadro
+    (indice_retencao_do_quadro), reaproveitado entre meses no modo lote.
 
-    # Garantir colunas esperadas (não estritas; geradores lidarão com faltantes)
-    # Chamar geradores
-    try:
-        gerar_faturados(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Faturados.xlsx': {e}")
-    try:
-        gerar_conversoes(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Conversões.xlsx': {e}")
-    try:
-        gerar_faturados_ytd(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Faturados_YTD.xlsx': {e}")
-    try:
-        gerar_retencao_clientes(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Retencao_Clientes.xlsx': {e}")
+    Retorna None quando não há coluna de data (nenhum arquivo é gerado).
+    """
 
-    return True
+    def _log(msg):
+        if exibir:
+            print(msg)
 
+    _log(f"\nIniciando a geração do arquivo '{ARQUIVO_SAIDA_RETENCAO}' (retenção por linha)...")
+    if quadro["date_col"] is None:
+        _log("ERRO: coluna 'Dt Emissão' não encontrada para retenção.")
+        return None
 
-def prepare_dataframes_for_month(mes: int, ano: int):
-    """Returna uma tupla de DataFrames (faturados_df, conversoes_df, faturados_ytd_df, retencao_df)
-    para o mês/ano solicitado sem gravar arquivos em disco. Usa a mesma lógica interna
-    dos geradores, mas retorna DataFrames temporários.
+    if quadro["negocio_col"] is None or quadro["cliente_col"] is None:
+        _log(
+            "ERRO: colunas necessárias 'Negócio' ou 'Cliente' não encontradas. Gerando arquivo vazio com cabeçalho."
+        )
+        return pd.DataFrame(columns=COLUNAS_RETENCAO)
+
+    start_prev, end_prev, start_curr, end_curr = _janelas_retencao(mes, ano)
+    _log(f"Janela anterior: {start_prev.date()} -> {end_prev.date()}")
+    _log(f"Janela atual:     {start_curr.date()} -> {end_curr.date()}")
+    if quadro["status_col"] is None:
+        _log("AVISO: Status Processo não encontrado; assumindo todas as linhas possíveis.")
+    if quadro["op_col"] is None:
+        _log("AVISO: coluna Operação não encontrada; pulando filtro por operação.")
+
+    return indice_retencao_do_quadro(quadro).quadro_retencao(mes, ano)
+
+
+def montar_saidas_mensais(df, mes, ano):
     """
-    # NOVO: Procurar arquivo em dados_entrada/ primeiro
-    arquivo_analise = _encontrar_arquivo_entrada(ARQUIVO_ANALISE_COMPLETA)
-    if not arquivo_analise:
-        # Tentar .xlsx também
-        arquivo_analise = _encontrar_arquivo_entrada("Analise_Comercial_Completa.xlsx")
-        if not arquivo_analise:
-            raise FileNotFoundError(
-                f"Arquivo não encontrado em '{PASTA_DADOS_ENTRADA}/' nem na raiz: {ARQUIVO_ANALISE_COMPLETA}"
-            )
+    Deriva Faturados, Conversões, Faturados_YTD e Retenção de um único quadro
+    preparado (colunas detectadas e datas convertidas uma vez).
 
-    # Ler arquivo como em run_preparador
-    # Se for .xlsx, ler diretamente
-    if arquivo_analise.endswith(".xlsx"):
+    Returns:
+        Dicionário {arquivo: DataFrame} na ordem de geração; o valor é None
+        quando o arquivo não deve ser gravado.
+    """
+    return _montar_saidas_do_quadro(
+        preparar_quadro_analise(df), mes, ano, _carregar_aliases()
+    )
+
+
+def _montar_saidas_do_quadro(quadro, mes, ano, alias_map=None):
+    montadores = [
+        (ARQUIVO_SAIDA_FATURADOS, lambda: _montar_faturados(quadro, mes, ano, alias_map)),
+        (ARQUIVO_SAIDA_CONVERSOES, lambda: _montar_conversoes(quadro, mes, ano, alias_map)),
+        (ARQUIVO_SAIDA_FATURADOS_YTD, lambda: _montar_faturados_ytd(quadro, mes, ano)),
+        (ARQUIVO_SAIDA_RETENCAO, lambda: _montar_retencao(quadro, mes, ano)),
+    ]
+    saidas = {}
+    for arquivo, montar in montadores:
         try:
-            df_analise = pd.read_excel(arquivo_analise, dtype=str)
-            df_analise.columns = [c.strip() for c in df_analise.columns]
+            saidas[arquivo] = montar()
         except Exception as e:
-            raise RuntimeError(f"Falha ao ler {arquivo_analise}: {e}")
-    else:
-        # É CSV
-        sep_detected, used_enc_for_sep = _detect_sep(
-            arquivo_analise, ["utf-8-sig", "utf-8", "latin1"]
-        )
-        df_analise = None
-        for enc in ["utf-8-sig", "utf-8", "latin1"]:
-            try:
-                df_analise = pd.read_csv(
-                    arquivo_analise,
-                    sep=sep_detected,
-                    engine="python",
-                    on_bad_lines="warn",
-                    dtype=str,
-                    encoding=enc,
-                )
-                df_analise.columns = [c.strip() for c in df_analise.columns]
-                break
-            except Exception:
-                df_analise = None
-        if df_analise is None:
-            raise RuntimeError(f"Falha ao ler {arquivo_analise}")
+            print(f"AVISO: falha ao gerar '{arquivo}': {e}")
+            saidas[arquivo] = None
+    return saidas
 
-    # Consolidar colunas duplicadas
-    def _consolidate_duplicates_local(df_local):
-        cols = list(df_local.columns)
-        norm_map = {}
-        for c in cols:
-            key = _norm(c)
-            norm_map.setdefault(key, []).append(c)
-        for key, group in norm_map.items():
-            if len(group) <= 1:
-                continue
-            first = group[0]
-            s = df_local[group].bfill(axis=1).iloc[:, 0]
-            df_local.drop(columns=group, inplace=True)
-            df_local[first] = s
-        return df_local
 
-    df_analise = _consolidate_duplicates_local(df_analise)
+def _gravar_excel(arquivo, df):
+    """Grava uma saída (executado também nos processos do pool)."""
+    df.to_excel(arquivo, index=False)
+    return arquivo
 
-    # build DataFrames using existing generators but without writing to disk
-    # For Faturados
-    try:
-        # reuse logic from gerar_faturados but return df
-        # locate date col
-        date_col = None
-        for c in df_analise.columns:
-            if _norm(c) == _norm("Dt Emissão") or (
-                "dt" in _norm(c) and "emiss" in _norm(c)
-            ):
-                date_col = c
-                break
-        faturados_df = pd.DataFrame()
-        if date_col is not None:
-            df_analise[date_col] = _parse_dates_smart(df_analise[date_col])
-            filtro = (df_analise[date_col].dt.month == mes) & (
-                df_analise[date_col].dt.year == ano
-            )
-            faturados_df = df_analise[filtro].copy()
-        # attempt to normalize column names similar to gerar_faturados
-        wanted = [
-            "Código Produto",
-            "Descrição Produto",
-            "Qtde Atendida",
-            "Operação",
-            "Processo",
-            "Status Processo",
-            "Dt Emissão",
-            "Valor Realizado",
-            "Consultor Interno",
-            "Representante-pedido",
-            "Gerente Comercial-Pedido",
-            "Aplicação Mat./Serv.",
-            "Cliente",
-            "Nome Cliente",
-            "Cidade",
-            "UF",
-            "Tipo de Mercadoria",
-            "Subgrupo",
-            "Grupo",
-            "Negócio",
-        ]
-        for want in wanted:
-            if want not in faturados_df.columns:
-                found = None
-                for c in faturados_df.columns:
-                    if _norm(c) == _norm(want):
-                        found = c
-                        break
-                if found:
-                    faturados_df = faturados_df.rename(columns={found: want})
-                else:
-                    faturados_df[want] = pd.NA
-        faturados_df = (
-            faturados_df[wanted].copy()
-            if not faturados_df.empty
-            else pd.DataFrame(columns=wanted)
-        )
 
-        # Aplicar aliases de colaboradores nas colunas Consultor Interno e Representante-pedido
-        try:
-            if os.path.exists("Regras_Comissoes.xlsx") and not faturados_df.empty:
-                import openpyxl
+def _assinatura_arquivo(caminho):
+    st = os.stat(caminho)
+    return st.st_size, st.st_mtime_ns
 
-                aliases_df = pd.read_excel(
-                    "Regras_Comissoes.xlsx", sheet_name="ALIASES"
-                )
-                alias_map = (
-                    aliases_df[aliases_df["entidade"] == "colaborador"]
-                    .set_index("alias")["padrao"]
-                    .to_dict()
-                )
 
-                if "Consultor Interno" in faturados_df.columns:
-                    faturados_df["Consultor Interno"] = (
-                        faturados_df["Consultor Interno"]
-                        .astype(str)
-                        .replace(alias_map)
-                        .str.strip()
-                    )
-                if "Representante-pedido" in faturados_df.columns:
-                    faturados_df["Representante-pedido"] = (
-                        faturados_df["Representante-pedido"]
-                        .astype(str)
-                        .replace(alias_map)
-                        .str.strip()
-                    )
-        except Exception:
-            pass
-    except Exception:
-        faturados_df = pd.DataFrame()
+def gravar_saidas_mensais(saidas, mes=None, ano=None, paralelo=None, indice_retencao=None):
+    """
+    Grava as saídas montadas por montar_saidas_mensais.
 
-    # Conversoes
-    try:
-        # find a 'Data Aceite' column
-        data_aceite_col = None
-        for c in df_analise.columns:
-            if _norm(c) == _norm("Data Aceite") or (
-                "aceite" in _norm(c) and "data" in _norm(c)
-            ):
-                data_aceite_col = c
-                break
-        conversoes_df = pd.DataFrame()
-        if data_aceite_col is not None:
-            df_analise[data_aceite_col] = _parse_dates_smart(
-                df_analise[data_aceite_col]
-            )
-            filtro = (df_analise[data_aceite_col].dt.month == mes) & (
-                df_analise[data_aceite_col].dt.year == ano
-            )
-            conversoes_df = df_analise[filtro].copy()
-        base_cols = [
-            "Código Produto",
-            "Descrição Produto",
-            "Qtde Atendida",
-            "Operação",
-            "Processo",
-            "Status Processo",
-            "Data Aceite",
-            "Valor Orçado",
-            "Valor Realizado",
-            "Consultor Interno",
-            "Representante-pedido",
-            "Gerente Comercial-Pedido",
-            "Aplicação Mat./Serv.",
-            "Cliente",
-            "Nome Cliente",
-            "Cidade",
-            "UF",
-            "Tipo de Mercadoria",
-            "Subgrupo",
-            "Grupo",
-            "Negócio",
-        ]
-        available = []
-        for want in base_cols:
-            if want in conversoes_df.columns:
-                available.append(want)
-                continue
-            found = None
-            for c in conversoes_df.columns:
-                if _norm(c) == _norm(want):
-                    found = c
-                    break
-            if found:
-                conversoes_df = conversoes_df.rename(columns={found: want})
-                available.append(want)
-        conversoes_df = (
-            conversoes_df[available].copy()
-            if available
-            else pd.DataFrame(columns=base_cols)
+    `indice_retencao` (opcional) é o índice que originou Retencao_Clientes;
+    fica disponível para obter_indice_retencao enquanto o arquivo não mudar.
+
+    Com volume acima de LIMIAR_GRAVACAO_PARALELA e mais de uma CPU (ou
+    `paralelo=True`) os arquivos são gravados em um pool de processos
+    (openpyxl é CPU-bound);
+    falhas no pool são regravadas em sequência. Os quadros gravados ficam
+    disponíveis para obter_quadros_preparados neste processo.
+
+    Returns:
+        Dicionário {arquivo: True/False} para os arquivos gravados.
+    """
+    pendentes = [(arquivo, df) for arquivo, df in saidas.items() if df is not None]
+    if paralelo is None:
+        paralelo = (
+            len(pendentes) > 1
+            and (os.cpu_count() or 1) > 1
+            and sum(len(df) for _, df in pendentes) >= LIMIAR_GRAVACAO_PARALELA
         )
 
-        # Aplicar aliases de colaboradores nas colunas Consultor Interno e Representante-pedido
+    gravados = set()
+    if paralelo and len(pendentes) > 1:
         try:
-            if os.path.exists("Regras_Comissoes.xlsx") and not conversoes_df.empty:
-                import openpyxl
-
-                aliases_df = pd.read_excel(
-                    "Regras_Comissoes.xlsx", sheet_name="ALIASES"
-                )
-                alias_map = (
-                    aliases_df[aliases_df["entidade"] == "colaborador"]
-                    .set_index("alias")["padrao"]
-                    .to_dict()
-                )
+            workers = min(len(pendentes), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+                futuros = [
+                    (arquivo, pool.submit(_gravar_excel, arquivo, df))
+                    for arquivo, df in pendentes
+                ]
+                for arquivo, futuro in futuros:
+                    try:
+                        futuro.result()
+                        gravados.add(arquivo)
+                    except Exception:
+                        pass
+        except Exception as e:
+            print(f"AVISO: gravação paralela indisponível ({e}); gravando em sequência.")
 
-                if "Consultor Interno" in conversoes_df.columns:
-                    conversoes_df["Consultor Interno"] = (
-                        conversoes_df["Consultor Interno"]
-                        .astype(str)
-                        .replace(alias_map)
-                        .str.strip()
-                    )
-                if "Representante-pedido" in conversoes_df.columns:
-                    conversoes_df["Representante-pedido"] = (
-                        conversoes_df["Representante-pedido"]
-                        .astype(str)
-                        .replace(alias_map)
-                        .str.strip()
+    resultado = {}
+    for arquivo, df in pendentes:
+        try:
+            if arquivo not in gravados:
+                _gravar_excel(arquivo, df)
+        except Exception as e:
+            print(f"ERRO: falha ao salvar '{arquivo}': {e}")
+            resultado[arquivo] = False
+            continue
+        vazio = " (vazio)" if df.empty else ""
+        print(f"Sucesso! O arquivo '{arquivo}' foi gerado com {len(df)} linhas{vazio}.")
+        resultado[arquivo] = True
+        if mes is not None and ano is not None:
+            try:
+                assinatura = _assinatura_arquivo(arquivo)
+                _QUADROS_PREPARADOS[os.path.abspath(arquivo)] = (mes, ano, assinatura, df)
+                if arquivo == ARQUIVO_SAIDA_RETENCAO and indice_retencao is not None:
+                    _INDICES_RETENCAO[os.path.abspath(arquivo)] = (
+                        mes,
+                        ano,
+                        assinatura,
+                        indice_retencao,
                     )
-        except Exception:
-            pass
-    except Exception:
-        conversoes_df = pd.DataFrame()
+            except OSError:
+                pass
+    return resultado
+
+
+def _valor_celula(v):
+    """Valor como o leitor openpyxl do pandas o devolveria após to_excel."""
+    if v is None or v is pd.NA or v is pd.NaT:
+        return ""
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float):
+        if v != v:
+            return ""
+        return int(v) if v.is_integer() else v
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime()
+    return v
+
+
+def _como_lido_do_excel(df, **kwargs):
+    """
+    Reproduz o DataFrame que pd.read_excel devolveria para `df` gravado com
+    to_excel(index=False): as células passam pela mesma conversão do leitor
+    openpyxl e pelo mesmo TextParser (inferência de tipos incluída).
+    """
+    from pandas.errors import EmptyDataError
+    from pandas.io.parsers import TextParser
 
-    # Faturados_YTD
+    colunas = [
+        [_valor_celula(v) for v in df.iloc[:, i].to_numpy(dtype=object)]
+        for i in range(df.shape[1])
+    ]
+    linhas = [list(linha) for linha in zip(*colunas)] if colunas else []
+    # o leitor descarta linhas vazias no fim da planilha
+    while linhas and all(v == "" for v in linhas[-1]):
+        linhas.pop()
     try:
-        # reuse gerar_faturados_ytd logic to create df
-        date_col = None
-        for c in df_analise.columns:
-            if _norm(c) == _norm("Dt Emissão") or (
-                "dt" in _norm(c) and "emiss" in _norm(c)
-            ):
-                date_col = c
-                break
-        faturados_ytd_df = pd.DataFrame()
-        if date_col is not None:
-            df_analise[date_col] = _parse_dates_smart(df_analise[date_col])
-            from datetime import datetime
-            import calendar
-
-            start = datetime(ano, 1, 1)
-            last_day = calendar.monthrange(ano, mes)[1]
-            end = datetime(ano, mes, last_day, 23, 59, 59)
-            mask_date = (
-                (df_analise[date_col].notna())
-                & (df_analise[date_col] >= start)
-                & (df_analise[date_col] <= end)
-            )
-            df_ytd = df_analise[mask_date].copy()
-            # filter status
-            status_col = None
-            for c in df_ytd.columns:
-                if _norm(c) == _norm("Status Processo"):
-                    status_col = c
-                    break
-            if status_col is not None:
-                df_ytd = df_ytd[
-                    df_ytd[status_col].astype(str).str.strip().str.upper() == "FATURADO"
-                ]
-            wanted = [
-                "Código Produto",
-                "Descrição Produto",
-                "Processo",
-                "Dt Emissão",
-                "Valor Realizado",
-                "Consultor Interno",
-                "Representante-pedido",
-                "Tipo de Mercadoria",
-                "Subgrupo",
-                "Grupo",
-                "Negócio",
-                "Fabricante",
-            ]
-            for want in wanted:
-                if want not in df_ytd.columns:
-                    found = None
-                    for c in df_ytd.columns:
-                        if _norm(c) == _norm(want):
-                            found = c
-                            break
-                    if found:
-                        df_ytd = df_ytd.rename(columns={found: want})
-                    else:
-                        df_ytd[want] = pd.NA
-            faturados_ytd_df = df_ytd[wanted].copy()
-        else:
-            faturados_ytd_df = pd.DataFrame()
-    except Exception:
-        faturados_ytd_df = pd.DataFrame()
+        return TextParser(
+            [[str(c) for c in df.columns]] + linhas,
+            header=0,
+            skip_blank_lines=False,
+            **kwargs,
+        ).read()
+    except EmptyDataError:
+        return pd.DataFrame()
 
-    # Retencao_Clientes - calcular usando a mesma lógica de gerar_retencao_clientes
-    try:
-        retencao_df = _calcular_retencao_para_mes(df_analise, mes, ano)
-    except Exception:
-        retencao_df = pd.DataFrame(
-            columns=["linha", "clientes_mes_anterior", "clientes_mes_atual"]
-        )
 
-    return faturados_df, conversoes_df, faturados_ytd_df, retencao_df
+def obter_quadros_preparados(mes, ano, arquivos, leitura=None):
+    """
+    Devolve os quadros gravados por este processo para o mês/ano, dispensando
+    a releitura dos xlsx (ex.: run_preparador seguido de CalculoComissao).
 
+    Um quadro só é devolvido se o arquivo em disco ainda é o que foi gravado
+    (tamanho e mtime); o resultado é equivalente a pd.read_excel do arquivo.
 
-def gerar_faturados_ytd(df, mes, ano):
-    """Gera Faturados_YTD.xlsx usando os filtros SQL fornecidos pelo usuário e selecionando somente colunas necessárias."""
-    arquivo_saida = "Faturados_YTD.xlsx"
-    print(
-        f"\nIniciando a geração do arquivo '{arquivo_saida}' (YTD com filtros SQL)..."
-    )
+    Args:
+        mes, ano: Período de apuração
+        arquivos: {chave: caminho} (ex.: {"FATURADOS": "Faturados.xlsx"})
+        leitura: {chave: kwargs} repassados como na leitura (ex.: parse_dates)
 
-    # Determine date column (Dt Emissão)
-    date_col = None
-    for c in df.columns:
-        if _norm(c) == _norm("Dt Emissão") or (
-            "dt" in _norm(c) and "emiss" in _norm(c)
-        ):
-            date_col = c
-            break
-    if date_col is None:
-        print(
-            "ERRO: não foi possível encontrar coluna 'Dt Emissão' para gerar Faturados_YTD. Gerando arquivo vazio com cabeçalho."
-        )
-        df_final = pd.DataFrame(columns=DEFAULT_YTD_WANTED)
+    Returns:
+        {chave: DataFrame} apenas para os arquivos disponíveis em memória
+    """
+    leitura = leitura or {}
+    quadros = {}
+    for chave, caminho in arquivos.items():
+        if not caminho:
+            continue
+        registro = _QUADROS_PREPARADOS.get(os.path.abspath(caminho))
+        if registro is None:
+            continue
+        r_mes, r_ano, assinatura, df = registro
         try:
-            df_final.to_excel(arquivo_saida, index=False)
-            print(
-                f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_final)} linhas (vazio)."
-            )
-            return True
+            if (r_mes, r_ano) != (mes, ano) or assinatura != _assinatura_arquivo(caminho):
+                continue
+            quadros[chave] = _como_lido_do_excel(df, **leitura.get(chave, {}))
         except Exception as e:
-            print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-            return False
+            print(f"AVISO: quadro '{caminho}' indisponível em memória: {e}")
+    return quadros
 
-    # Parse dates robustly
-    df[date_col] = _parse_dates_smart(df[date_col])
 
-    # Compute YTD window: from Jan 1 of year to last day of selected month/year
-    from datetime import datetime
-    import calendar
-
-    start = datetime(ano, 1, 1)
-    last_day = calendar.monthrange(ano, mes)[1]
-    end = datetime(ano, mes, last_day, 23, 59, 59)
+def saidas_vigentes(mes, ano, arquivos=None):
+    """
+    True se os arquivos de saída (padrão: os quatro do preparador) foram
+    gravados por este processo para o mês/ano e não mudaram em disco: o
+    preparador não precisa rodar de novo (ex.: pré-scan seguido do cálculo).
+    """
+    arquivos = arquivos or (
+        ARQUIVO_SAIDA_FATURADOS,
+        ARQUIVO_SAIDA_CONVERSOES,
+        ARQUIVO_SAIDA_FATURADOS_YTD,
+        ARQUIVO_SAIDA_RETENCAO,
+    )
+    for caminho in arquivos:
+        registro = _QUADROS_PREPARADOS.get(os.path.abspath(caminho))
+        if registro is None or registro[:2] != (mes, ano):
+            return False
+        try:
+            if registro[2] != _assinatura_arquivo(caminho):
+                return False
+        except OSError:
+            return False
+    return True
 
-    mask_date = (df[date_col].notna()) & (df[date_col] >= start) & (df[date_col] <= end)
-    df_ytd = df[mask_date].copy()
 
-    # Filter Status Processo == 'FATURADO'
-    status_col = None
-    for c in df_ytd.columns:
-        if _norm(c) == _norm("Status Processo"):
-            status_col = c
-            break
-    if status_col is None:
-        print(
-            "AVISO: coluna 'Status Processo' não encontrada; nenhum filtro de status será aplicado."
-        )
-    else:
-        df_ytd = df_ytd[
-            df_ytd[status_col].astype(str).str.strip().str.upper() == "FATURADO"
-        ]
+def obter_indice_retencao(mes, ano, arquivo=ARQUIVO_SAIDA_RETENCAO):
+    """
+    Índice de retenção (IndiceRetencaoClientes) que gerou `arquivo` neste
+    processo para o mês/ano, para o componente de retenção do FC consultar
+    as janelas sem reler Retencao_Clientes.xlsx.
 
-    # Filter operations: allowed full phrases from SQL (also allow fallback by short code)
-    allowed_full = set(
-        [
-            _norm("IMO2 - VENDA IMOBILIZADO"),
-            _norm("OR19 - VENDA A ORDEM POR CONTA DE TERCEIRO"),
-            _norm("P205 - SIMPLES FATURAMENTO"),
-            _norm("PVEN - PEDIDO DE VENDA"),
-            _norm("PVMA - PEDIDO DE VENDA MANUTENÇÃO"),
-        ]
-    )
-    allowed_codes = {"IMO2", "OR19", "P205", "PVEN", "PVMA"}
-    # find operation column
-    op_col = None
-    for c in df_ytd.columns:
-        if _norm(c) == "operacao" or _norm(c) == "operação":
-            op_col = c
-            break
-    if op_col is not None:
+    None se o arquivo não foi gravado aqui para o mês/ano ou foi alterado
+    depois da gravação (tamanho/mtime).
+    """
+    registro = _INDICES_RETENCAO.get(os.path.abspath(arquivo))
+    if registro is None:
+        return None
+    r_mes, r_ano, assinatura, indice = registro
+    try:
+        if (r_mes, r_ano) != (mes, ano) or assinatura != _assinatura_arquivo(arquivo):
+            return None
+    except OSError:
+        return None
+    return indice
 
-        def op_allowed(val):
-            s = str(val)
-            n = _norm(s)
-            # exact normalized phrase match
-            if n in allowed_full:
-                return True
-            # check prefix code
-            code = (
-                s.strip().split(" - ")[0].split()[0].upper() if s.strip() != "" else ""
-            )
-            if code in allowed_codes:
-                return True
-            # last resort: check if any allowed code appears in the normalized string
-            for ac in allowed_codes:
-                if ac.lower() in n:
-                    return True
-            return False
 
-        mask_ops = df_ytd[op_col].apply(op_allowed)
-        df_ytd = df_ytd[mask_ops].copy()
-    else:
-        print("AVISO: coluna 'Operação' não encontrada; pulando filtro por operação.")
+def gerar_faturados(df, mes, ano):
+    """Gera o arquivo Faturados.xlsx filtrando por mês/ano e operações relevantes."""
+    df_out = _montar_faturados(preparar_quadro_analise(df), mes, ano, _carregar_aliases())
+    resultado = gravar_saidas_mensais({ARQUIVO_SAIDA_FATURADOS: df_out}, mes, ano)
+    return resultado.get(ARQUIVO_SAIDA_FATURADOS, False)
 
-    # Only keep the exact columns specified by the SQL in the requested order
-    wanted = [
-        "Código Produto",
-        "Descrição Produto",
-        "Processo",
-        "Dt Emissão",
-        "Valor Realizado",
-        "Consultor Interno",
-        "Representante-pedido",
-        "Tipo de Mercadoria",
-        "Subgrupo",
-        "Grupo",
-        "Negócio",
-        "Fabricante",
-    ]
 
-    # Ensure columns exist (try to locate and rename if needed)
-    for want in wanted:
-        if want not in df_ytd.columns:
-            # try to find a column with matching normalized name
-            found = None
-            for c in df_ytd.columns:
-                if _norm(c) == _norm(want):
-                    found = c
-                    break
-            if found:
-                df_ytd = df_ytd.rename(columns={found: want})
-            else:
-                df_ytd[want] = pd.NA
+def gerar_conversoes(df, mes, ano):
+    """Gera o arquivo Conversões.xlsx filtrando por 'Data Aceite' (quando existir) e por mês/ano."""
+    df_final = _montar_conversoes(preparar_quadro_analise(df), mes, ano, _carregar_aliases())
+    resultado = gravar_saidas_mensais({ARQUIVO_SAIDA_CONVERSOES: df_final}, mes, ano)
+    return resultado.get(ARQUIVO_SAIDA_CONVERSOES, False)
 
-    df_final = df_ytd[wanted].copy()
-    try:
-        # garantir que um arquivo seja sempre gerado mesmo se df_final estiver vazio
-        df_final.to_excel(arquivo_saida, index=False)
-        print(
-            f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_final)} linhas."
-        )
-        return True
-    except Exception as e:
-        print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-        return False
 
+def _ler_analise_comercial(periodo=None):
+    """
+    Localiza, lê e consolida a Análise Comercial Completa (CSV ou .xlsx).
 
-def _calcular_retencao_para_mes(df, mes, ano):
-    """Calcula dados de retenção de clientes por linha (negócio) para um mês específico.
+    Com `periodo` (mes, ano), a leitura do CSV descarta o histórico que
+    nenhuma saída a partir desse mês usa (ver _filtro_periodo_analise).
 
-    Retorna um DataFrame com colunas: linha, clientes_mes_anterior, clientes_mes_atual
-    Usa a mesma lógica de gerar_retencao_clientes mas sem salvar em arquivo.
+    Returns:
+        DataFrame (todas as colunas como texto) ou None em erro crítico.
     """
-    from datetime import datetime
-    import calendar
+    # NOVO: Auto-conversão procurando primeiro em dados_entrada/
+    csv_path = _encontrar_arquivo_entrada(ARQUIVO_ANALISE_COMPLETA)
+    if not csv_path:
+        xlsx_path = _encontrar_arquivo_entrada("Analise_Comercial_Completa.xlsx")
+        if xlsx_path:
+            try:
+                print(f"Detectado {xlsx_path} - convertendo para .csv...")
+                df_temp = ler_excel(xlsx_path, dtype=str)
+                # Salvar CSV na raiz (onde o código espera)
+                df_temp.to_csv(
+                    ARQUIVO_ANALISE_COMPLETA, index=False, encoding="utf-8-sig"
+                )
+                print(f"[OK] Conversao concluida: {ARQUIVO_ANALISE_COMPLETA} criado.")
+            except Exception as e:
+                print(f"AVISO: Falha ao converter .xlsx para .csv: {e}")
+                print("Tentarei usar o arquivo .xlsx diretamente se possivel.")
+        else:
+            print(
+                f"\nERRO CRÍTICO: O arquivo '{ARQUIVO_ANALISE_COMPLETA}' não foi encontrado em '{PASTA_DADOS_ENTRADA}/' nem na raiz, "
+                f"e 'Analise_Comercial_Completa.xlsx' também não existe em '{PASTA_DADOS_ENTRADA}/' nem na raiz."
+            )
+            return None
 
-    # operations allowed
-    allowed_ops = set(
-        [
-            _norm("PSEM - PEDIDO DE VENDA/REV. MANUT. E SERVIÇO"),
-            _norm("PSER - PEDIDO SERVIÇO"),
-            _norm("PVMA - PEDIDO DE VENDA MANUTENÇÃO"),
-            _norm("FLOC - FATURA DE LOCAÇÃO EQUIPAMENTOS"),
-            _norm("IMO2 - VENDA IMOBILIZADO"),
-            _norm("OR19 - VENDA A ORDEM POR CONTA DE TERCEIRO"),
-            _norm("P205 - SIMPLES FATURAMENTO"),
-            _norm("PVEN - PEDIDO DE VENDA"),
-        ]
-    )
+    # Determinar qual arquivo usar
+    arquivo_para_ler = None
 
-    # find date column
-    date_col = None
-    for c in df.columns:
-        if _norm(c) == _norm("Dt Emissão") or (
-            "dt" in _norm(c) and "emiss" in _norm(c)
-        ):
-            date_col = c
-            break
-    if date_col is None:
-        return pd.DataFrame(
-            columns=["linha", "clientes_mes_anterior", "clientes_mes_atual"]
+    # Prioridade 1: CSV na raiz (já convertido ou já existia)
+    if os.path.exists(ARQUIVO_ANALISE_COMPLETA):
+        arquivo_para_ler = ARQUIVO_ANALISE_COMPLETA
+    # Prioridade 2: CSV em dados_entrada/
+    elif csv_path:
+        arquivo_para_ler = csv_path
+    # Prioridade 3: .xlsx encontrado (já convertido acima ou usar diretamente)
+    elif xlsx_path:
+        # Se não foi convertido acima, usar .xlsx diretamente
+        if not os.path.exists(ARQUIVO_ANALISE_COMPLETA):
+            arquivo_para_ler = xlsx_path
+        else:
+            arquivo_para_ler = ARQUIVO_ANALISE_COMPLETA
+    else:
+        print(
+            f"\nERRO CRÍTICO: O arquivo '{ARQUIVO_ANALISE_COMPLETA}' não foi encontrado após tentativa de conversão."
         )
+        return None
 
-    # Parse dates
-    df = df.copy()
-    df[date_col] = _parse_dates_smart(df[date_col])
-
-    # Find columns
-    op_col = None
-    status_col = None
-    negocio_col = None
-    cliente_col = None
-    for c in df.columns:
-        nc = _norm(c)
-        if nc == "operacao":
-            op_col = c
-        if nc == _norm("Status Processo"):
-            status_col = c
-        if nc == _norm("Negócio") or nc == "negocio":
-            negocio_col = c
-        if nc == _norm("Cliente"):
-            cliente_col = c
-
-    if negocio_col is None or cliente_col is None:
-        return pd.DataFrame(
-            columns=["linha", "clientes_mes_anterior", "clientes_mes_atual"]
-        )
+    print(
+        f"\nLendo o arquivo '{arquivo_para_ler}'... (Isso pode levar alguns instantes)"
+    )
+    df_analise = None
 
-    # Compute windows
-    if mes == 1:
-        prev_month = 12
-        prev_year = ano - 1
+    # Ler arquivo (suporta .xlsx e .csv)
+    if arquivo_para_ler.endswith(".xlsx"):
+        try:
+            df_analise = ler_excel(arquivo_para_ler, dtype=str)
+            df_analise.columns = [c.strip() for c in df_analise.columns]
+            print(f"Arquivo .xlsx lido com sucesso: {arquivo_para_ler}")
+        except Exception as e:
+            print(f"\nERRO CRÍTICO: Falha ao ler o arquivo '{arquivo_para_ler}': {e}")
+            return None
     else:
-        prev_month = mes - 1
-        prev_year = ano
+        # É CSV: lido em blocos (colunas e histórico podados quando há período)
+        df_analise, _, _ = _ler_analise_csv(arquivo_para_ler, periodo)
+        if df_analise is None:
+            print(
+                f"\nERRO CRÍTICO: Falha ao ler o arquivo '{arquivo_para_ler}' com encodings tentados."
+            )
+            return None
 
-    def window_end(year, month):
-        last_day = calendar.monthrange(year, month)[1]
-        return datetime(year, month, last_day, 23, 59, 59)
+    # Tentar normalização de colunas e consolidar
+    df_analise.columns = [c.strip() for c in df_analise.columns]
 
-    def window_start_for_end(year, month):
-        ym_end_index = year * 12 + (month - 1)
-        ym_start_index = ym_end_index - 23
-        s_year = ym_start_index // 12
-        s_month = (ym_start_index % 12) + 1
-        return datetime(s_year, s_month, 1)
-
-    end_prev = window_end(prev_year, prev_month)
-    start_prev = window_start_for_end(prev_year, prev_month)
-    end_curr = window_end(ano, mes)
-    start_curr = window_start_for_end(ano, mes)
-
-    cutoff = start_prev
-    df_base = df[df[date_col].notna() & (df[date_col] >= cutoff)].copy()
-
-    # Apply filters
-    if status_col:
-        df_base = df_base[
-            df_base[status_col].astype(str).str.strip().str.upper() == "FATURADO"
-        ]
-
-    if op_col:
-        df_base["_op_norm"] = df_base[op_col].astype(str).apply(_norm)
-        df_base = df_base[
-            df_base["_op_norm"].apply(
-                lambda x: any(x in a or a.startswith(x) for a in allowed_ops if x)
-            )
-        ].copy()
-        df_base.drop(columns=["_op_norm"], inplace=True)
-
-    # Compute distinct clients per negocio
-    mask_prev = (df_base[date_col] >= start_prev) & (df_base[date_col] <= end_prev)
-    mask_curr = (df_base[date_col] >= start_curr) & (df_base[date_col] <= end_curr)
-
-    prev = df_base[mask_prev].groupby(negocio_col)[cliente_col].nunique()
-    curr = df_base[mask_curr].groupby(negocio_col)[cliente_col].nunique()
-
-    negocios = sorted(set(prev.index.tolist()) | set(curr.index.tolist()))
-    rows = []
-    for n in negocios:
-        rows.append(
-            {
-                "linha": n,
-                "clientes_mes_anterior": int(prev.get(n, 0)),
-                "clientes_mes_atual": int(curr.get(n, 0)),
-            }
-        )
+    return _consolidar_colunas_duplicadas(df_analise)
 
-    if rows:
-        return pd.DataFrame(rows).sort_values("linha")
-    else:
-        return pd.DataFrame(
-            columns=["linha", "clientes_mes_anterior", "clientes_mes_atual"]
-        )
 
+def _consolidar_colunas_duplicadas(df):
+    """Une colunas com o mesmo nome normalizado (primeiro valor não nulo, nome da primeira)."""
+    grupos = {}
+    for c in df.columns:
+        grupos.setdefault(_norm(c), []).append(c)
+    for grupo in grupos.values():
+        if len(grupo) <= 1:
+            continue
+        serie = df[grupo].bfill(axis=1).iloc[:, 0]
+        df.drop(columns=grupo, inplace=True)
+        df[grupo[0]] = serie
+    return df
 
-def gerar_retencao_clientes(df, mes, ano):
-    """Gera Retencao_Clientes.xlsx usando a lógica ajustada do SQL.
 
-    Usa o mês/ano fornecido pelo usuário e o mês anterior a ele para construir
-    duas janelas de 24 meses:
-      - janela anterior: [mês_anterior - 24 meses + 1 dia .. mês_anterior end]
-      - janela atual: [mês_selecionado - 24 meses + 1 dia .. mês_selecionado end]
+def run_preparador(mes: int, ano: int) -> bool:
+    """Entry point para execução não-interativa: lê o arquivo mestre, normaliza e chama os geradores.
 
-    Conta DISTINCT Cliente por 'Negócio' em cada janela, aplicando filtros de
-    Status Processo = 'FATURADO' e Operação está na lista autorizada.
+    Retorna True em sucesso (mesmo que algum gerador emita avisos), False em erro crítico.
     """
-    arquivo_saida = "Retencao_Clientes.xlsx"
-    print(f"\nIniciando a geração do arquivo '{arquivo_saida}' (retenção por linha)...")
+    print(f"--- Preparador: gerando arquivos para {mes}/{ano} ---")
 
-    # operations allowed (use full phrases as in SQL)
-    allowed_ops = set(
-        [
-            _norm("PSEM - PEDIDO DE VENDA/REV. MANUT. E SERVIÇO"),
-            _norm("PSER - PEDIDO SERVIÇO"),
-            _norm("PVMA - PEDIDO DE VENDA MANUTENÇÃO"),
-            _norm("FLOC - FATURA DE LOCAÇÃO EQUIPAMENTOS"),
-            _norm("IMO2 - VENDA IMOBILIZADO"),
-            _norm("OR19 - VENDA A ORDEM POR CONTA DE TERCEIRO"),
-            _norm("P205 - SIMPLES FATURAMENTO"),
-            _norm("PVEN - PEDIDO DE VENDA"),
-        ]
+    df_analise = _ler_analise_comercial((mes, ano))
+    if df_analise is None:
+        return False
+
+    # Montar as quatro saídas a partir de um único quadro preparado e gravá-las
+    try:
+        quadro = preparar_quadro_analise(df_analise)
+        saidas = _montar_saidas_do_quadro(quadro, mes, ano, _carregar_aliases())
+    except Exception as e:
+        print(f"AVISO: falha ao preparar a Análise Comercial para {mes}/{ano}: {e}")
+        return True
+    gravar_saidas_mensais(
+        saidas, mes, ano, indice_retencao=quadro.get("indice_retencao")
     )
 
-    # find date column and ensure parsed (Dt Emissão)
-    date_col = None
-    for c in df.columns:
-        if _norm(c) == _norm("Dt Emissão") or (
-            "dt" in _norm(c) and "emiss" in _norm(c)
-        ):
-            date_col = c
-            break
-    if date_col is None:
-        print("ERRO: coluna 'Dt Emissão' não encontrada para retenção.")
-        return False
-    df[date_col] = _parse_dates_smart(df[date_col])
+    return True
 
-    # find operation column and status column and negocio and cliente
-    op_col = None
-    status_col = None
-    negocio_col = None
-    cliente_col = None
-    for c in df.columns:
-        nc = _norm(c)
-        if nc == "operacao" or nc == "operacao":
-            op_col = c
-        if nc == _norm("Status Processo"):
-            status_col = c
-        if nc == _norm("Negócio") or nc == "negocio":
-            negocio_col = c
-        if nc == _norm("Cliente"):
-            cliente_col = c
-
-    if negocio_col is None or cliente_col is None:
-        print(
-            "ERRO: colunas necessárias 'Negócio' ou 'Cliente' não encontradas. Gerando arquivo vazio com cabeçalho."
-        )
-        arquivo_saida = "Retencao_Clientes.xlsx"
-        df_out = pd.DataFrame(
-            columns=["linha", "clientes_mes_anterior", "clientes_mes_atual"]
-        )
-        try:
-            df_out.to_excel(arquivo_saida, index=False)
-            print(
-                f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_out)} linhas (vazio)."
-            )
-            return True
-        except Exception as e:
-            print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-            return False
 
-    # Build the two windows based on user-selected month/year and previous month
-    from datetime import datetime
-    import calendar
+class PreparadorLote:
+    """
+    Preparação de vários meses com uma única leitura da Análise Comercial.
 
-    # compute month_prev (month and year)
-    if mes == 1:
-        prev_month = 12
-        prev_year = ano - 1
-    else:
-        prev_month = mes - 1
-        prev_year = ano
+    O quadro preparado (datas convertidas, máscaras de status/operação), os
+    aliases e o índice de retenção (clientes por linha e mês) são
+    reaproveitados por todos os meses.
 
-    # windows: for each window we want the 24-month period ending at end of target month
-    def window_end(year, month):
-        last_day = calendar.monthrange(year, month)[1]
-        return datetime(year, month, last_day, 23, 59, 59)
+    Uso:
+        lote = PreparadorLote()
+        if lote.carregar():
+            for mes, ano in periodos:
+                lote.gerar(mes, ano)
+    """
 
-    def window_start_for_end(year, month):
-        # start is 24 months before the month (inclusive first day)
-        start_year = year - 2 if month >= 1 else year - 2
-        start_month = month
-        # for a 24-month trailing window ending at (year,month), the start is month+1 two years before?
-        # Simpler: compute year-month index
-        ym_end_index = year * 12 + (month - 1)
-        ym_start_index = ym_end_index - 23  # inclusive of 24 months
-        s_year = ym_start_index // 12
-        s_month = (ym_start_index % 12) + 1
-        return datetime(s_year, s_month, 1)
-
-    end_prev = window_end(prev_year, prev_month)
-    start_prev = window_start_for_end(prev_year, prev_month)
-
-    end_curr = window_end(ano, mes)
-    start_curr = window_start_for_end(ano, mes)
-
-    print(f"Janela anterior: {start_prev.date()} -> {end_prev.date()}")
-    print(f"Janela atual:     {start_curr.date()} -> {end_curr.date()}")
-
-    # Apply base filters: only rows with Dt Emissão within the last 25 months (optimization in SQL)
-    cutoff = start_prev  # since start_prev is 24 months before prev_end inclusive; SQL used 25 months but we follow the windows logic
-    df_base = df[df[date_col].notna() & (df[date_col] >= cutoff)].copy()
-
-    # Apply Status Processo == 'FATURADO' and operation in allowed_ops
-    if status_col:
-        df_base = df_base[
-            df_base[status_col].astype(str).str.strip().str.upper() == "FATURADO"
-        ]
-    else:
-        print(
-            "AVISO: Status Processo não encontrado; assumindo todas as linhas possíveis."
-        )
+    def __init__(self):
+        self.quadro = None
+        self.alias_map = None
+        self.periodo = None
 
-    if op_col:
-        # normalize op text and check membership
-        # Valores no arquivo podem ser siglas curtas (ex: "PVEN") enquanto allowed_ops contém
-        # descrições completas (ex: "pven - pedido de venda"). Verificar se o valor está contido
-        # em alguma operação permitida OU se alguma operação permitida começa com o valor
-        df_base["_op_norm"] = df_base[op_col].astype(str).apply(_norm)
-        df_base = df_base[
-            df_base["_op_norm"].apply(
-                lambda x: any(x in a or a.startswith(x) for a in allowed_ops if x)
-            )
-        ].copy()
-        df_base.drop(columns=["_op_norm"], inplace=True)
-    else:
-        print("AVISO: coluna Operação não encontrada; pulando filtro por operação.")
-
-    # For each negocio, compute distinct clients in previous and current windows
-    # prepare masks
-    mask_prev = (df_base[date_col] >= start_prev) & (df_base[date_col] <= end_prev)
-    mask_curr = (df_base[date_col] >= start_curr) & (df_base[date_col] <= end_curr)
-
-    prev = df_base[mask_prev].groupby(negocio_col)[cliente_col].nunique()
-    curr = df_base[mask_curr].groupby(negocio_col)[cliente_col].nunique()
-
-    # combine into DataFrame
-    negocios = sorted(set(prev.index.tolist()) | set(curr.index.tolist()))
-    rows = []
-    for n in negocios:
-        rows.append(
-            {
-                "linha": n,
-                "clientes_mes_anterior": int(prev.get(n, 0)),
-                "clientes_mes_atual": int(curr.get(n, 0)),
-            }
-        )
+    def carregar(self, periodo=None) -> bool:
+        """
+        Lê e prepara a Análise Comercial; False em erro crítico.
 
-    # Criar DataFrame garantindo que sempre tenha as colunas corretas
-    if rows:
-        df_out = pd.DataFrame(rows).sort_values("linha")
-    else:
-        # Se não houver dados, criar DataFrame vazio com colunas corretas
-        df_out = pd.DataFrame(
-            columns=["linha", "clientes_mes_anterior", "clientes_mes_atual"]
-        )
+        `periodo` (mes, ano) é o primeiro mês do lote: o histórico anterior
+        ao necessário para ele é descartado na leitura do CSV.
+        """
+        df_analise = _ler_analise_comercial(periodo)
+        if df_analise is None:
+            return False
+        self.quadro = preparar_quadro_analise(df_analise)
+        self.alias_map = _carregar_aliases()
+        self.periodo = tuple(periodo) if periodo else None
+        return True
 
-    try:
-        # garantir que sempre geramos o arquivo mesmo que vazio
-        df_out.to_excel(arquivo_saida, index=False)
-        print(
-            f"Sucesso! O arquivo '{arquivo_saida}' foi gerado com {len(df_out)} linhas."
+    @property
+    def indice_retencao(self):
+        """Índice de retenção do quadro carregado (None antes de carregar)."""
+        if self.quadro is None:
+            return None
+        return indice_retencao_do_quadro(self.quadro)
+
+    def gerar(self, mes: int, ano: int) -> bool:
+        """Monta e grava as saídas do mês (equivalente a run_preparador)."""
+        # Mês anterior ao carregado: o histórico podado pode não cobri-lo
+        anterior = self.periodo is not None and (ano, mes) < (self.periodo[1], self.periodo[0])
+        if (self.quadro is None or anterior) and not self.carregar((mes, ano)):
+            return False
+        print(f"--- Preparador: gerando arquivos para {mes}/{ano} ---")
+        saidas = _montar_saidas_do_quadro(self.quadro, mes, ano, self.alias_map)
+        gravar_saidas_mensais(
+            saidas, mes, ano, indice_retencao=self.quadro.get("indice_retencao")
         )
         return True
-    except Exception as e:
-        print(f"ERRO: falha ao salvar '{arquivo_saida}': {e}")
-        return False
 
 
-def main():
-    """Função principal do script."""
-    print("--- Preparador de Dados Mensais para Cálculo de Comissões ---")
-
-    # 1. Obter mês e ano do usuário
-    mes, ano = obter_mes_ano()
-
-    # 2. Ler o arquivo de análise completa
-    # NOVO: Procurar primeiro em dados_entrada/
+def prepare_dataframes_for_month(mes: int, ano: int):
+    """Retorna uma tupla de DataFrames (faturados_df, conversoes_df, faturados_ytd_df, retencao_df)
+    para o mês/ano solicitado sem gravar arquivos em disco. As saídas são as mesmas
+    de run_preparador (um único quadro preparado); saídas não geradas voltam vazias.
+    """
+    # NOVO: Procurar arquivo em dados_entrada/ primeiro
     arquivo_analise = _encontrar_arquivo_entrada(ARQUIVO_ANALISE_COMPLETA)
     if not arquivo_analise:
         # Tentar .xlsx também
         arquivo_analise = _encontrar_arquivo_entrada("Analise_Comercial_Completa.xlsx")
         if not arquivo_analise:
-            print(
-                f"\nERRO CRÍTICO: O arquivo '{ARQUIVO_ANALISE_COMPLETA}' não foi encontrado em '{PASTA_DADOS_ENTRADA}/' nem na raiz, "
-                f"e 'Analise_Comercial_Completa.xlsx' também não existe em '{PASTA_DADOS_ENTRADA}/' nem na raiz."
+            raise FileNotFoundError(
+                f"Arquivo não encontrado em '{PASTA_DADOS_ENTRADA}/' nem na raiz: {ARQUIVO_ANALISE_COMPLETA}"
             )
-            sys.exit(1)  # Termina o script se o arquivo principal não existe
 
-    # Se encontrou .xlsx e não existe CSV, converter
-    if arquivo_analise.endswith(".xlsx") and not os.path.exists(
-        ARQUIVO_ANALISE_COMPLETA
-    ):
-        try:
-            print(f"Detectado {arquivo_analise} - convertendo para .csv...")
-            df_temp = pd.read_excel(arquivo_analise, dtype=str)
-            df_temp.to_csv(ARQUIVO_ANALISE_COMPLETA, index=False, encoding="utf-8-sig")
-            print(f"[OK] Conversao concluida: {ARQUIVO_ANALISE_COMPLETA} criado.")
-            arquivo_analise = ARQUIVO_ANALISE_COMPLETA
-        except Exception as e:
-            print(f"AVISO: Falha ao converter .xlsx para .csv: {e}")
-            print("Tentarei usar o arquivo .xlsx diretamente.")
-
-    print(
-        f"\nLendo o arquivo '{arquivo_analise}'... (Isso pode levar alguns instantes)"
-    )
-    df_analise = None
-    encodings_to_try = ["utf-8-sig", "utf-8", "latin1"]
-    last_exc = None
-
-    # detect delimiter by sniffing the first line
-    def _detect_sep(path, encodings=("utf-8-sig", "utf-8", "latin1")):
-        for enc in encodings:
-            try:
-                with open(path, "r", encoding=enc, errors="replace") as fh:
-                    first = fh.readline()
-                    # count common delimiters
-                    counts = {
-                        ",": first.count(","),
-                        ";": first.count(";"),
-                        "\t": first.count("\t"),
-                    }
-                    # pick the delimiter with highest count (prefer ; over , if equal and ; present)
-                    sep = max(counts, key=lambda k: (counts[k], 1 if k == ";" else 0))
-                    if counts[sep] == 0:
-                        # fallback to comma
-                        sep = ","
-                    return sep, enc
-            except Exception:
-                continue
-        return ",", encodings[0]
-
-    # Ler arquivo (suporta .xlsx e .csv)
+    # Se for .xlsx, ler diretamente
     if arquivo_analise.endswith(".xlsx"):
         try:
-            df_analise = pd.read_excel(arquivo_analise, dtype=str)
+            df_analise = ler_excel(arquivo_analise, dtype=str)
             df_analise.columns = [c.strip() for c in df_analise.columns]
-            print(f"Arquivo .xlsx lido com sucesso: {arquivo_analise}")
         except Exception as e:
-            print(f"\nERRO CRÍTICO: Falha ao ler o arquivo '{arquivo_analise}': {e}")
-            sys.exit(1)
+            raise RuntimeError(f"Falha ao ler {arquivo_analise}: {e}")
     else:
         # É CSV
-        sep_detected, used_enc_for_sep = _detect_sep(arquivo_analise, encodings_to_try)
-        for enc in encodings_to_try:
-            try:
-                df_analise = pd.read_csv(
-                    arquivo_analise,
-                    sep=sep_detected,
-                    engine="python",
-                    on_bad_lines="warn",
-                    dtype=str,
-                    encoding=enc,
-                )
-                # strip column names
-                df_analise.columns = [c.strip() for c in df_analise.columns]
-                print(
-                    f"Arquivo lido com sucesso com encoding={enc} and sep='{sep_detected}'."
-                )
-                break
-            except Exception as e:
-                last_exc = e
-                print(f"Aviso: falha ao ler com encoding={enc}: {e}")
-                df_analise = None
-
+        df_analise, _, _ = _ler_analise_csv(arquivo_analise, (mes, ano))
         if df_analise is None:
-            print(
-                f"\nERRO CRÍTICO: Falha ao ler o arquivo '{arquivo_analise}' com encodings tentados. Último erro: {last_exc}"
-            )
-            sys.exit(1)
+            raise RuntimeError(f"Falha ao ler {arquivo_analise}")
+    df_analise = _consolidar_colunas_duplicadas(df_analise)
 
-    # Normalizar/renomear colunas para os nomes canônicos esperados pelo gerador
-    import unicodedata
+    saidas = _montar_saidas_do_quadro(
+        preparar_quadro_analise(df_analise), mes, ano, _carregar_aliases()
+    )
+    vazias = {ARQUIVO_SAIDA_RETENCAO: lambda: pd.DataFrame(columns=COLUNAS_RETENCAO)}
+    return tuple(
+        saidas[arquivo]
+        if saidas.get(arquivo) is not None
+        else vazias.get(arquivo, pd.DataFrame)()
+        for arquivo in (
+            ARQUIVO_SAIDA_FATURADOS,
+            ARQUIVO_SAIDA_CONVERSOES,
+            ARQUIVO_SAIDA_FATURADOS_YTD,
+            ARQUIVO_SAIDA_RETENCAO,
+        )
+    )
 
-    def _norm(s: str) -> str:
-        try:
-            s2 = str(s)
-            s2 = unicodedata.normalize("NFKD", s2)
-            s2 = s2.encode("ASCII", "ignore").decode()
-            s2 = s2.strip().lower()
-            s2 = " ".join(s2.split())
-            return s2
-        except Exception:
-            return str(s).strip().lower()
-
-    canonical_cols = [
-        "Código Produto",
-        "Descrição Produto",
-        "Qtde Atendida",
-        "Operação",
-        "Processo",
-        "Status Processo",
-        "Dt Emissão",
-        "Valor Realizado",
-        "Consultor Interno",
-        "Representante-pedido",
-        "Gerente Comercial-Pedido",
-        "Aplicação Mat./Serv.",
-        "Cliente",
-        "Nome Cliente",
-        "Cidade",
-        "UF",
-        "Tipo de Mercadoria",
-        "Subgrupo",
-        "Grupo",
-        "Negócio",
-    ]
 
-    # construir mapeamento: procurar correspondência por tokens (mais tolerante)
-    mapping = {}
-    existing = list(df_analise.columns)
-    norm_existing = {col: _norm(col) for col in existing}
-    norm_canon = {can: _norm(can) for can in canonical_cols}
-
-    # We'll map each canonical name to the best existing column (one-to-one)
-    used_existing = set()
-    for can, nc in norm_canon.items():
-        tokens = [t for t in nc.split() if len(t) > 2]
-        best_col = None
-        best_score = -1
-        for col, ne in norm_existing.items():
-            if col in used_existing:
-                continue
-            score = 0
-            # exact match highest
-            if ne == nc:
-                score = 100
-            # all tokens present
-            elif all(tok in ne for tok in tokens):
-                score = 50 + sum(ne.count(tok) for tok in tokens)
-            else:
-                # partial token matches
-                score = sum(5 for tok in tokens if tok in ne)
+def gerar_faturados_ytd(df, mes, ano):
+    """Gera Faturados_YTD.xlsx usando os filtros SQL fornecidos pelo usuário e selecionando somente colunas necessárias."""
+    df_final = _montar_faturados_ytd(preparar_quadro_analise(df), mes, ano)
+    resultado = gravar_saidas_mensais({ARQUIVO_SAIDA_FATURADOS_YTD: df_final}, mes, ano)
+    return resultado.get(ARQUIVO_SAIDA_FATURADOS_YTD, False)
 
-            # prefer shorter distance (less extra words)
-            if score > best_score:
-                best_score = score
-                best_col = col
 
-        if best_col and best_score > 0:
-            mapping[best_col] = can
-            used_existing.add(best_col)
+def _calcular_retencao_para_mes(df, mes, ano):
+    """Calcula dados de retenção de clientes por linha (negócio) para um mês específico.
 
-    # aplicar mapeamento (um-para-um)
-    if mapping:
-        df_analise = df_analise.rename(columns=mapping)
-    df_analise.columns = [c.strip() for c in df_analise.columns]
+    Retorna um DataFrame com colunas: linha, clientes_mes_anterior, clientes_mes_atual
+    Usa a mesma lógica de gerar_retencao_clientes mas sem salvar em arquivo.
+    """
+    df_out = _montar_retencao(preparar_quadro_analise(df), mes, ano, exibir=False)
+    if df_out is None:
+        return pd.DataFrame(columns=COLUNAS_RETENCAO)
+    return df_out
 
-    # Consolidar colunas que tornaram-se duplicadas após rename (ex: Nome Cliente, Nome Cliente.1...)
-    def _consolidate_duplicates(df):
-        cols = list(df.columns)
-        norm_map = {}
-        for c in cols:
-            key = _norm(c)
-            norm_map.setdefault(key, []).append(c)
 
-        for key, group in norm_map.items():
-            if len(group) <= 1:
-                continue
-            # coalescer valores: prefer left-most non-null
-            first = group[0]
-            # create a Series by bfill across the group
-            s = df[group].bfill(axis=1).iloc[:, 0]
-            df.drop(columns=group, inplace=True)
-            df[first] = s
-        return df
-
-    df_analise = _consolidate_duplicates(df_analise)
-
-    # Garantir que todas as colunas canônicas estão presentes (criar em branco quando ausentes)
-    for can in canonical_cols:
-        if can not in df_analise.columns:
-            df_analise[can] = pd.NA
-
-    # --- DETECÇÃO ROBUSTA DA COLUNA DE DATA ---
-    # preferir colunas que contenham 'dt' e 'emiss'/'emissao', mas aceitar alternativas
-    date_candidates = [c for c in df_analise.columns]
-    date_col = None
-    for c in date_candidates:
-        nc = _norm(c)
-        if (
-            ("dt" in nc and ("emiss" in nc or "emissao" in nc))
-            or "data" in nc
-            and "emiss" in nc
-        ):
-            date_col = c
-            break
-
-    # se não encontrou, tentar algumas outras colunas candidatas comuns
-    if date_col is None:
-        for alt in [
-            "Data Aceite",
-            "Dt Entrada",
-            "Dt Encerramento",
-            "Dt Emissao",
-            "Dt Emissao",
-        ]:
-            for c in df_analise.columns:
-                if _norm(c) == _norm(alt):
-                    date_col = c
-                    break
-            if date_col:
-                break
+def gerar_retencao_clientes(df, mes, ano):
+    """Gera Retencao_Clientes.xlsx usando a lógica ajustada do SQL.
 
-    if date_col is None:
-        print(
-            f"ERRO: Não foi possível localizar coluna de data 'Dt Emissão' no arquivo '{ARQUIVO_ANALISE_COMPLETA}'. Colunas encontradas: {list(df_analise.columns)}"
-        )
-        sys.exit(1)
+    Usa o mês/ano fornecido pelo usuário e o mês anterior a ele para construir
+    duas janelas de 24 meses:
+      - janela anterior: [mês_anterior - 24 meses + 1 dia .. mês_anterior end]
+      - janela atual: [mês_selecionado - 24 meses + 1 dia .. mês_selecionado end]
 
-    # Tentar parse em várias heurísticas e escolher a coluna/parse com menos nulos
-    df_analise[date_col] = _parse_dates_smart(df_analise[date_col])
-    n_invalid = df_analise[date_col].isna().sum()
-    if n_invalid > 0:
-        print(
-            f"AVISO: {n_invalid} linhas com data inválida na coluna detectada '{date_col}' após tentativas de parse."
-        )
+    Conta DISTINCT Cliente por 'Negócio' em cada janela, aplicando filtros de
+    Status Processo = 'FATURADO' e Operação está na lista autorizada.
+    """
+    df_out = _montar_retencao(preparar_quadro_analise(df), mes, ano)
+    resultado = gravar_saidas_mensais({ARQUIVO_SAIDA_RETENCAO: df_out}, mes, ano)
+    return resultado.get(ARQUIVO_SAIDA_RETENCAO, False)
 
-    # 3. Gerar o arquivo de faturados
-    gerar_faturados(df_analise, mes, ano)
-    # 4. Gerar o arquivo de conversões (filtrando por Data Aceite)
-    try:
-        gerar_conversoes(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Conversões.xlsx': {e}")
-    # 5. Gerar o Faturados_YTD (do começo do ano até o mês/ano informado)
-    try:
-        gerar_faturados_ytd(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Faturados_YTD.xlsx': {e}")
-    # 6. Gerar Retencao_Clientes.xlsx
-    try:
-        gerar_retencao_clientes(df_analise, mes, ano)
-    except Exception as e:
-        print(f"AVISO: falha ao gerar 'Retencao_Clientes.xlsx': {e}")
+
+def main():
+    """Função principal do script."""
+    print("--- Preparador de Dados Mensais para Cálculo de Comissões ---")
+
+    # 1. Obter mês e ano do usuário
+    mes, ano = obter_mes_ano()
+
+    # 2. Ler a Análise Comercial e gerar Faturados, Conversões, Faturados_YTD e Retenção
+    if not run_preparador(mes, ano):
+        sys.exit(1)  # Termina o script se o arquivo principal não pôde ser lido
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+"""
+Cache limitado (LRU) do Fator de Correção (FC) por item.
+
+O FC de um item depende apenas de:
+    - colaborador e cargo
+    - contexto do item (linha, grupo, subgrupo, tipo_mercadoria)
+    - período de apuração (mês/ano, usado nas metas de fornecedor)
+    - realizados vigentes (self.realizado)
+
+Itens distintos com a mesma chave produzem exatamente o mesmo FC, então o
+resultado é reaproveitado entre o loop de faturamento, o MetricasCalculator,
+a reconciliação do mês e o coletor da auditoria (todos compartilham a mesma
+instância de CalculoComissao).
+
+A invalidação é explícita: sempre que os realizados forem trocados (ex.:
+_calcular_fc_historico_wrapper), o cache deve ser limpo via `invalidar()`.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+
+def normalizar_valor_chave(valor: Any) -> Any:
+    """Converte NaN/NaT/None em None para que a chave seja estável no hash."""
+    try:
+        if valor is None or pd.isna(valor):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return valor
+
+
+def copiar_detalhes_fc(detalhes: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia em dois níveis dos detalhes do FC (componente → dict de valores)."""
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in detalhes.items()}
+
+
+class FatorCorrecaoCache:
+    """
+    Mapa LRU chave → (fc, detalhes, entradas_debug) com contadores de acerto.
+
+    `max_entradas <= 0` desativa o cache (todas as consultas são falhas).
+    """
+
+    def __init__(self, max_entradas: int = 50000) -> None:
+        self.max_entradas = int(max_entradas)
+        self._dados: "OrderedDict[Hashable, Tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        self.descartes = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.max_entradas > 0
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def obter(self, chave: Hashable) -> Optional[Tuple]:
+        """Retorna o valor memorizado (ou None) e atualiza os contadores."""
+        valor = self._dados.get(chave) if self.ativo else None
+        if valor is None:
+            self.misses += 1
+            return None
+        self._dados.move_to_end(chave)
+        self.hits += 1
+        return valor
+
+    def guardar(self, chave: Hashable, valor: Tuple) -> None:
+        if not self.ativo:
+            return
+        self._dados[chave] = valor
+        self._dados.move_to_end(chave)
+        while len(self._dados) > self.max_entradas:
+            self._dados.popitem(last=False)
+            self.descartes += 1
+
+    def invalidar(self) -> None:
+        """Descarta todas as entradas (os contadores de acerto são mantidos)."""
+        if self._dados:
+            self._dados.clear()
+        self.invalidacoes += 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entradas": len(self._dados),
+            "max_entradas": self.max_entradas,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": (self.hits / total) if total else 0.0,
+            "invalidacoes": self.invalidacoes,
+            "descartes": self.descartes,
+        }
@@ -0,0 +1,127 @@
+"""
+Cache de faturamento por fornecedor (Fabricante) para os componentes
+meta_fornecedor_1/2 do Fator de Correção.
+
+Construído uma única vez por execução a partir de FATURADOS_YTD:
+    - matriz Fabricante × mês com o faturamento em BRL
+    - totais YTD convertidos por (fornecedor, moeda, ano, mês final),
+      memorizados após o primeiro cálculo
+
+Substitui a releitura de FATURADOS_YTD (em disco) que era feita para
+cada item/colaborador/fornecedor durante a verificação de anomalias.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.normalization import normalize_text
+
+
+class FaturamentoFornecedoresCache:
+    """
+    Matriz de faturamento mensal (BRL) por fabricante e totais convertidos.
+    """
+
+    def __init__(self, faturados_ytd: Optional[pd.DataFrame], rate_calculator) -> None:
+        self.rate_calculator = rate_calculator
+        # {fabricante: {mes: valor_brl}} (chave exata, como no filtro original)
+        self._mensal: Dict[object, Dict[int, float]] = {}
+        # Mesma matriz agregada por nome normalizado (verificação cruzada)
+        self._mensal_normalizado: Dict[str, Dict[int, float]] = {}
+        # Faturamento sem coluna de data: atribuído ao mês de apuração
+        self._sem_data: Dict[object, float] = {}
+        self._sem_data_normalizado: Dict[str, float] = {}
+        self._tem_data = True
+        self._convertidos: Dict[Tuple, float] = {}
+        self._taxas: Dict[Tuple, Dict[int, float]] = {}
+        self._construir(faturados_ytd if faturados_ytd is not None else pd.DataFrame())
+
+    def _construir(self, df: pd.DataFrame) -> None:
+        if df.empty or "Fabricante" not in df.columns or "Valor Realizado" not in df.columns:
+            return
+
+        valores = pd.to_numeric(df["Valor Realizado"], errors="coerce").fillna(0.0)
+        fabricantes = df["Fabricante"]
+        normalizados = fabricantes.map(normalize_text)
+
+        if "Dt Emissão" not in df.columns:
+            self._tem_data = False
+            self._sem_data = valores.groupby(fabricantes).sum().to_dict()
+            self._sem_data_normalizado = valores.groupby(normalizados).sum().to_dict()
+            return
+
+        meses = pd.to_datetime(df["Dt Emissão"], errors="coerce").dt.month
+        base = pd.DataFrame(
+            {"fab": fabricantes, "fab_norm": normalizados, "mes": meses, "valor": valores}
+        ).dropna(subset=["mes"])
+        base["mes"] = base["mes"].astype(int)
+
+        for (fab, mes), soma in base.groupby(["fab", "mes"])["valor"].sum().items():
+            self._mensal.setdefault(fab, {})[int(mes)] = float(soma)
+        for (fab, mes), soma in base.groupby(["fab_norm", "mes"])["valor"].sum().items():
+            self._mensal_normalizado.setdefault(fab, {})[int(mes)] = float(soma)
+
+    @staticmethod
+    def _serie_ytd(
+        por_mes: Dict[int, float], sem_data: float, tem_data: bool, mes_final: int
+    ) -> Dict[int, float]:
+        serie = {m: float(por_mes.get(m, 0.0)) for m in range(1, int(mes_final) + 1)}
+        if not tem_data and mes_final in serie:
+            serie[mes_final] += float(sem_data)
+        return serie
+
+    def faturamento_mensal_brl(self, fornecedor, mes_final: int) -> Dict[int, float]:
+        """Mapa {mes: valor_brl} de janeiro até `mes_final` para o fabricante (igualdade exata)."""
+        return self._serie_ytd(
+            self._mensal.get(fornecedor, {}),
+            self._sem_data.get(fornecedor, 0.0),
+            self._tem_data,
+            mes_final,
+        )
+
+    def taxas_ytd(self, moeda, ano: int, mes_final: int) -> Dict[int, float]:
+        """Taxas {mes: taxa} usadas na conversão (memorizadas por moeda/ano/mês)."""
+        chave = (str(moeda).upper(), ano, mes_final)
+        if chave not in self._taxas:
+            self._taxas[chave] = self.rate_calculator.obter_taxas_ytd(moeda, ano, mes_final)
+        return self._taxas[chave]
+
+    def faturamento_convertido_ytd(self, fornecedor, moeda, ano: int, mes_final: int) -> float:
+        """Faturamento YTD do fabricante convertido para a moeda da meta."""
+        chave = ("exato", fornecedor, str(moeda).upper(), ano, mes_final)
+        if chave not in self._convertidos:
+            self._convertidos[chave] = self.rate_calculator.calcular_faturamento_convertido_ytd(
+                faturamento_mensal_brl=self.faturamento_mensal_brl(fornecedor, mes_final),
+                moeda=moeda,
+                ano=ano,
+                mes_final=mes_final,
+            )
+        return self._convertidos[chave]
+
+    def faturamento_convertido_verificacao(
+        self, fornecedor, moeda, ano: int, mes_final: int
+    ) -> float:
+        """
+        Total de referência para a verificação de anomalias: mesmo cálculo,
+        mas agregando os fabricantes pelo nome normalizado (sem acentos,
+        maiúsculas e espaços), a partir da matriz construída na carga.
+        """
+        nome = normalize_text(fornecedor)
+        chave = ("normalizado", nome, str(moeda).upper(), ano, mes_final)
+        if chave not in self._convertidos:
+            serie = self._serie_ytd(
+                self._mensal_normalizado.get(nome, {}),
+                self._sem_data_normalizado.get(nome, 0.0),
+                self._tem_data,
+                mes_final,
+            )
+            self._convertidos[chave] = self.rate_calculator.calcular_faturamento_convertido_ytd(
+                faturamento_mensal_brl=serie,
+                moeda=moeda,
+                ano=ano,
+                mes_final=mes_final,
+            )
+        return self._convertidos[chave]
@@ -0,0 +1,212 @@
+"""
+Índice de metas (METAS_APLICACAO, METAS_INDIVIDUAIS, META_RENTABILIDADE).
+
+Construído uma única vez após o carregamento das configurações, substitui
+as máscaras booleanas de `_get_meta` (executadas várias vezes por item e
+por colaborador) por consultas em dicionários:
+    - faturamento/conversao por linha: (tipo_meta, linha, tipo_mercadoria)
+    - faturamento/conversao individual: (tipo_meta, colaborador)
+    - rentabilidade: (linha, grupo, subgrupo, tipo_mercadoria), primeiro com
+      os valores normalizados (str + strip) e depois com os valores originais
+
+Assim como no filtro original, vale a primeira linha encontrada e células
+vazias (NaN) nunca correspondem. As metas não encontradas são acumuladas em
+um relatório de faltas (tipo_meta, chave → ocorrências), para que o log de
+validação registre cada chave uma única vez.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+TIPOS_META_LINHA = ("faturamento_linha", "conversao_linha")
+TIPOS_META_INDIVIDUAL = ("faturamento_individual", "conversao_individual")
+COLUNAS_RENTABILIDADE = ("linha", "grupo", "subgrupo", "tipo_mercadoria")
+# Tabelas de self.data indexadas, na ordem dos argumentos de GoalIndex
+TABELAS_METAS = ("METAS_APLICACAO", "METAS_INDIVIDUAIS", "META_RENTABILIDADE")
+
+
+class MetaNaoEncontrada(KeyError):
+    """Meta ausente no índice."""
+
+
+class TabelaMetasIndisponivel(MetaNaoEncontrada):
+    """Tabela de metas (ou colunas obrigatórias) não carregada."""
+
+
+def _normalizar(valor: Any) -> str:
+    """Mesma normalização aplicada à chave de rentabilidade em `_get_meta`."""
+    if valor is None or pd.isna(valor):
+        return ""
+    return str(valor).strip()
+
+
+def _indexar(
+    df: Optional[pd.DataFrame],
+    colunas: Iterable[str],
+    coluna_valor: str,
+    normalizar: bool = False,
+) -> Tuple[Optional[Dict[Tuple, Tuple[Any, int]]], Optional[str]]:
+    """
+    Mapa chave → (valor da primeira linha, total de linhas com a chave).
+
+    Retorna (None, motivo) quando a tabela ou alguma coluna não existe.
+    """
+    colunas = list(colunas)
+    if df is None:
+        return None, "tabela não carregada"
+    faltantes = [c for c in colunas + [coluna_valor] if c not in df.columns]
+    if faltantes:
+        return None, f"colunas ausentes: {faltantes}"
+
+    mapa: Dict[Tuple, Tuple[Any, int]] = {}
+    valores = df[coluna_valor].tolist()
+    for chave, valor in zip(zip(*(df[c].tolist() for c in colunas)), valores):
+        if any(v is None or pd.isna(v) for v in chave):
+            continue
+        if normalizar:
+            chave = tuple(str(v).strip() for v in chave)
+        existente = mapa.get(chave)
+        if existente is None:
+            mapa[chave] = (valor, 1)
+        else:
+            mapa[chave] = (existente[0], existente[1] + 1)
+    return mapa, None
+
+
+class GoalIndex:
+    """
+    Consultas O(1) às metas por tipo, com relatório de faltas.
+    """
+
+    def __init__(
+        self,
+        metas_aplicacao: Optional[pd.DataFrame],
+        metas_individuais: Optional[pd.DataFrame],
+        meta_rentabilidade: Optional[pd.DataFrame],
+    ) -> None:
+        self._linha, self._motivo_linha = _indexar(
+            metas_aplicacao, ("tipo_meta", "linha", "tipo_mercadoria"), "valor_meta"
+        )
+        self._individual, self._motivo_individual = _indexar(
+            metas_individuais, ("tipo_meta", "colaborador"), "valor_meta"
+        )
+        self._rent_normalizada, self._motivo_rent = _indexar(
+            meta_rentabilidade,
+            COLUNAS_RENTABILIDADE,
+            "meta_rentabilidade_alvo_pct",
+            normalizar=True,
+        )
+        self._rent_original, _ = _indexar(
+            meta_rentabilidade, COLUNAS_RENTABILIDADE, "meta_rentabilidade_alvo_pct"
+        )
+        self.total_rentabilidade = (
+            len(meta_rentabilidade) if meta_rentabilidade is not None else 0
+        )
+        # (tipo_meta, chave) -> [ocorrências, motivo]
+        self._faltas: Dict[Tuple[str, Hashable], list] = {}
+
+    # ------------------------------------------------------------------ busca
+    def buscar(self, tipo_meta: str, chave) -> Any:
+        """
+        Valor da meta para `tipo_meta`/`chave`.
+
+        Levanta MetaNaoEncontrada quando não houver meta,
+        TabelaMetasIndisponivel quando a tabela de origem não estiver
+        carregada e ValueError para tipos desconhecidos.
+        """
+        if tipo_meta in TIPOS_META_LINHA:
+            linha, tipo_mercadoria = chave
+            return self._consultar(
+                self._linha,
+                self._motivo_linha,
+                (tipo_meta.replace("_linha", ""), linha, tipo_mercadoria),
+            )
+        if tipo_meta in TIPOS_META_INDIVIDUAL:
+            return self._consultar(
+                self._individual,
+                self._motivo_individual,
+                (tipo_meta.replace("_individual", ""), chave),
+            )
+        if tipo_meta == "rentabilidade":
+            valor, _ = self.buscar_rentabilidade(chave)
+            return valor
+        raise ValueError(f"Tipo de meta desconhecido: {tipo_meta}")
+
+    def buscar_rentabilidade(self, chave) -> Tuple[Any, str]:
+        """
+        Meta de rentabilidade para (linha, grupo, subgrupo, tipo_mercadoria).
+
+        Retorna (valor, origem) com origem 'normalizada' ou 'original'
+        (fallback sem normalização); levanta MetaNaoEncontrada se nenhuma
+        das buscas encontrar a meta.
+        """
+        if self._rent_normalizada is None:
+            raise TabelaMetasIndisponivel(self._motivo_rent)
+        chave_norm = tuple(_normalizar(v) for v in chave)
+        encontrado = self._rent_normalizada.get(chave_norm)
+        if encontrado is not None:
+            return encontrado[0], "normalizada"
+        encontrado = self._get_seguro(self._rent_original, tuple(chave))
+        if encontrado is not None:
+            return encontrado[0], "original"
+        raise MetaNaoEncontrada("meta ausente")
+
+    def chave_rentabilidade_normalizada(self, chave) -> Tuple[str, ...]:
+        return tuple(_normalizar(v) for v in chave)
+
+    @staticmethod
+    def _get_seguro(mapa, chave):
+        try:
+            return mapa.get(chave)
+        except TypeError:
+            return None
+
+    def _consultar(self, mapa, motivo, chave):
+        if mapa is None:
+            raise TabelaMetasIndisponivel(motivo)
+        encontrado = mapa.get(chave)
+        if encontrado is None:
+            raise MetaNaoEncontrada("meta ausente")
+        return encontrado[0]
+
+    # ------------------------------------------------------ relatório de faltas
+    def registrar_falta(self, tipo_meta: str, chave, motivo: str = "") -> bool:
+        """Conta uma falta; retorna True apenas na primeira ocorrência da chave."""
+        try:
+            hash(chave)
+            chave_falta = (tipo_meta, chave)
+        except TypeError:
+            chave_falta = (tipo_meta, repr(chave))
+        registro = self._faltas.get(chave_falta)
+        if registro is None:
+            self._faltas[chave_falta] = [1, motivo]
+            return True
+        registro[0] += 1
+        return False
+
+    @property
+    def total_faltas(self) -> int:
+        return sum(r[0] for r in self._faltas.values())
+
+    def relatorio_faltas(self) -> pd.DataFrame:
+        """DataFrame (tipo_meta, chave, ocorrencias, motivo), mais frequentes primeiro."""
+        linhas = [
+            {
+                "tipo_meta": tipo_meta,
+                "chave": str(chave),
+                "ocorrencias": ocorrencias,
+                "motivo": motivo,
+            }
+            for (tipo_meta, chave), (ocorrencias, motivo) in self._faltas.items()
+        ]
+        colunas = ["tipo_meta", "chave", "ocorrencias", "motivo"]
+        if not linhas:
+            return pd.DataFrame(columns=colunas)
+        return (
+            pd.DataFrame(linhas, columns=colunas)
+            .sort_values("ocorrencias", ascending=False, kind="stable")
+            .reset_index(drop=True)
+        )
@@ -0,0 +1,599 @@
+"""
+Motor em lote para o cálculo de comissões por faturamento (COMISSOES_CALCULADAS).
+
+Alternativa ao laço ``iterrows`` de ``CalculoComissao._calcular_comissoes``:
+    1. expande itens × colaboradores elegíveis com merges: gestão (ATRIBUICOES
+       pelo contexto linha/grupo/subgrupo/tipo) e operacional (COLABORADORES
+       pelo Consultor Interno/Representante do item)
+    2. resolve a regra de comissão uma vez por chave distinta (contexto, cargo)
+       e o FC uma vez por chave distinta do cache de FC (colaborador, cargo,
+       contexto, período), mapeando os resultados de volta para as linhas
+    3. calcula taxa, comissão potencial e comissão final em uma única
+       passada NumPy
+
+O resultado é idêntico ao do motor legado (mesmas linhas, ordem, colunas,
+entradas de validação e DEBUG_FORNECEDORES): as entradas de validação geradas
+pelas regras e pelo FC são reemitidas na ordem em que o laço por item as
+geraria. Como no motor legado com o cache de FC ativo, o FC de uma chave é
+calculado uma vez; com o cache desativado (cache_fc_max_entradas = 0) ele é
+calculado por linha. Ativado por ``modo_calculo_faturamento`` = "vetorizado"
+(ver CalculoComissao._modo_calculo_faturamento).
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Colunas comuns às linhas normais e às linhas de cross-selling (ordem de saída)
+COLUNAS_BASE = [
+    "id_colaborador",
+    "nome_colaborador",
+    "cargo",
+    "cod_produto",
+    "descricao_produto",
+    "processo",
+    "linha",
+    "grupo",
+    "subgrupo",
+    "tipo_mercadoria",
+    "faturamento_item",
+    "taxa_rateio_aplicada",
+    "fator_correcao_fc",
+    "percentual_elegibilidade_pe",
+    "comissao_potencial_maxima",
+    "comissao_calculada",
+]
+
+# Componentes do FC detalhados em colunas (componente -> sufixo)
+COMPONENTES_FC = {
+    "faturamento_linha": "fat_linha",
+    "conversao_linha": "conv_linha",
+    "faturamento_individual": "fat_ind",
+    "conversao_individual": "conv_ind",
+    "rentabilidade": "rentab",
+}
+_SUBCAMPOS_FC = (
+    ("peso", "peso"),
+    ("realizado", "realizado"),
+    ("meta", "meta"),
+    ("ating", "atingimento"),
+    ("ating_cap", "atingimento_cap"),
+    ("comp_fc", "componente_fc"),
+)
+COLUNAS_FC = [
+    f"{prefixo}_{short}"
+    for short in COMPONENTES_FC.values()
+    for prefixo, _ in _SUBCAMPOS_FC
+]
+
+
+def _objetos(valores) -> np.ndarray:
+    """Array object 1-D com os valores como estão (sem inferência de tipo)."""
+    return pd.Series(list(valores), dtype=object).to_numpy(copy=True)
+
+
+def _decisao_cross_selling(decisoes: Dict[Any, Any], processo: Any) -> Any:
+    try:
+        return decisoes.get(processo, None)
+    except TypeError:
+        return None
+
+
+def _tem_nan(*valores: Any) -> bool:
+    for valor in valores:
+        try:
+            if pd.isna(valor):
+                return True
+        except (TypeError, ValueError):
+            pass
+    return False
+
+
+def _detalhe(detalhes: Any, componente: str, campo: str) -> Any:
+    try:
+        v = detalhes.get(componente)
+        if v is None:
+            return None
+        return v.get(campo, None)
+    except Exception:
+        return None
+
+
+def _normalizar_rentabilidade(valor: Any) -> Any:
+    """Realizado de rentabilidade em decimal (ex.: 12 -> 0.12), como no motor legado."""
+    if valor is None:
+        return valor
+    try:
+        rv = float(valor)
+        if rv > 1 and rv <= 100:
+            rv = rv / 100.0
+        return rv
+    except Exception:
+        return valor
+
+
+class MotorComissoesLote:
+    """
+    Calcula COMISSOES_CALCULADAS em lote reutilizando as regras da instância
+    de CalculoComissao (regras, FC, cross-selling e log de validação).
+    """
+
+    def __init__(self, calc_comissao_instance):
+        self.calc = calc_comissao_instance
+
+    # ------------------------------------------------------------------
+    # Expansão itens × colaboradores
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _tabela_gestao(df_atribuicoes_gestao: pd.DataFrame) -> pd.DataFrame:
+        """ATRIBUICOES com contexto válido: linha, grupo, subgrupo, tipo_mercadoria, nome, cargo, ordem."""
+        colunas = ["linha", "grupo", "subgrupo", "tipo_mercadoria"]
+        if df_atribuicoes_gestao.empty:
+            return pd.DataFrame(columns=colunas + ["nome", "cargo", "ordem"], dtype=object)
+        tabela = pd.DataFrame(
+            {c: _objetos(df_atribuicoes_gestao[c].tolist()) for c in colunas + ["cargo"]}
+        )
+        tabela["nome"] = _objetos(
+            df_atribuicoes_gestao["colaborador"].astype(str).str.strip().tolist()
+        )
+        tabela["ordem"] = np.arange(len(tabela))
+        # NaN nunca casa em comparações de igualdade
+        return tabela[~tabela[colunas].isna().any(axis=1)]
+
+    @staticmethod
+    def _ids_colaboradores(df_colabs: pd.DataFrame) -> Dict[Any, Any]:
+        """nome -> primeiro id_colaborador."""
+        if "id_colaborador" not in df_colabs.columns:
+            return {}
+        ids: Dict[Any, Any] = {}
+        for nome, id_colab in zip(
+            df_colabs["nome_colaborador"].tolist(), df_colabs["id_colaborador"].tolist()
+        ):
+            if _tem_nan(nome):
+                continue
+            try:
+                ids.setdefault(nome, id_colab)
+            except TypeError:
+                continue
+        return ids
+
+    @classmethod
+    def _expandir(
+        cls,
+        col: Dict[str, np.ndarray],
+        df_atribuicoes_gestao: pd.DataFrame,
+        df_colabs_com_cargos: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """
+        Linhas (pos do item, nome, cargo) na ordem do motor legado: gestão na
+        ordem de ATRIBUICOES, depois operacional na ordem de COLABORADORES,
+        sem repetir (nome, cargo) normalizados no mesmo item.
+        """
+        n_itens = len(col["Negócio"])
+        contexto = ["linha", "grupo", "subgrupo", "tipo_mercadoria"]
+        itens = pd.DataFrame(
+            {
+                "pos": np.arange(n_itens),
+                "linha": col["Negócio"],
+                "grupo": col["Grupo"],
+                "subgrupo": col["Subgrupo"],
+                "tipo_mercadoria": col["Tipo de Mercadoria"],
+            }
+        )
+        itens = itens[~itens[contexto].isna().any(axis=1)]
+        gestao = itens.merge(cls._tabela_gestao(df_atribuicoes_gestao), on=contexto, how="inner")
+        gestao = gestao[["pos", "ordem", "nome", "cargo"]].assign(fonte=0)
+
+        nomes = pd.DataFrame(
+            {
+                "pos": np.tile(np.arange(n_itens), 2),
+                "campo": np.repeat([0, 1], n_itens),
+                "nome_colaborador": np.concatenate(
+                    [col["Consultor Interno"], col["Representante-pedido"]]
+                ),
+            }
+        )
+        colabs = pd.DataFrame(
+            {
+                "nome_colaborador": _objetos(df_colabs_com_cargos["nome_colaborador"].tolist()),
+                "cargo": _objetos(df_colabs_com_cargos["cargo"].tolist()),
+                "ordem": np.arange(len(df_colabs_com_cargos)),
+            }
+        )
+        operacional = nomes[nomes["nome_colaborador"].notna()].merge(
+            colabs[colabs["nome_colaborador"].notna()], on="nome_colaborador", how="inner"
+        )
+        # Uma linha por colaborador da tabela; o Representante prevalece sobre o Consultor
+        operacional = operacional.sort_values(["pos", "ordem", "campo"], kind="stable")
+        operacional = operacional.drop_duplicates(["pos", "ordem"], keep="last")
+        operacional = operacional.assign(
+            nome=_objetos(operacional["nome_colaborador"].astype(str).str.strip().tolist()),
+            fonte=1,
+        )[["pos", "ordem", "nome", "cargo", "fonte"]]
+
+        linhas = pd.concat([gestao, operacional], ignore_index=True)
+        linhas = linhas.sort_values(["pos", "fonte", "ordem"], kind="stable")
+        chave_nome = linhas["nome"].astype(str).str.strip().str.lower()
+        chave_cargo = linhas["cargo"].astype(str).str.strip().str.lower()
+        repetidas = pd.DataFrame(
+            {"pos": linhas["pos"].to_numpy(), "nome": chave_nome.to_numpy(), "cargo": chave_cargo.to_numpy()}
+        ).duplicated()
+        linhas = linhas[~repetidas.to_numpy()]
+        return pd.DataFrame(
+            {
+                "pos": linhas["pos"].to_numpy(dtype=np.int64),
+                "nome": _objetos(linhas["nome"].tolist()),
+                "cargo": _objetos(linhas["cargo"].tolist()),
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    def calcular(
+        self,
+        df_faturados: pd.DataFrame,
+        df_atribuicoes_gestao: pd.DataFrame,
+        df_colabs_com_cargos: pd.DataFrame,
+        info=print,
+    ) -> pd.DataFrame:
+        """
+        Executa o cálculo em lote e retorna o DataFrame de COMISSOES_CALCULADAS.
+        """
+        calc = self.calc
+        # Entradas de validação geradas durante o lote, com a posição (item,
+        # linha, etapa) em que o motor legado as geraria; reemitidas ao final
+        registros: List[Tuple[Tuple[int, int, int], int, Any, Any, Any]] = []
+        posicao = [(0, 0, 0)]
+        log_instancia = calc.__dict__.get("_log_validacao")
+
+        def registrar(nivel, mensagem, contexto={}):
+            registros.append((posicao[0], len(registros), nivel, mensagem, contexto))
+
+        calc._log_validacao = registrar
+        try:
+            return self._calcular(
+                df_faturados, df_atribuicoes_gestao, df_colabs_com_cargos, info, posicao
+            )
+        finally:
+            if log_instancia is None:
+                del calc._log_validacao
+            else:
+                calc._log_validacao = log_instancia
+            for _, _, nivel, mensagem, contexto in sorted(registros, key=lambda r: (r[0], r[1])):
+                calc._log_validacao(nivel, mensagem, contexto)
+
+    def _calcular(self, df_faturados, df_atribuicoes_gestao, df_colabs_com_cargos, info, posicao):
+        calc = self.calc
+        decisoes_cs = getattr(calc, "cross_selling_decisions", {}) or {}
+        n_itens = len(df_faturados)
+        col = {
+            c: _objetos(df_faturados[c].tolist() if c in df_faturados.columns else [None] * n_itens)
+            for c in (
+                "Negócio",
+                "Grupo",
+                "Subgrupo",
+                "Tipo de Mercadoria",
+                "Consultor Interno",
+                "Representante-pedido",
+                "Processo",
+                "Código Produto",
+                "Descrição Produto",
+                "Valor Realizado",
+                "Dt Emissão",
+            )
+        }
+        matriz_itens = None
+
+        def _item(pos: int) -> pd.Series:
+            # Mesma construção do DataFrame.iterrows (valores nativos), para que o
+            # FC e o log de validação recebam exatamente o mesmo item do motor legado
+            nonlocal matriz_itens
+            if matriz_itens is None:
+                matriz_itens = df_faturados.values
+            return pd.Series(
+                matriz_itens[pos], index=df_faturados.columns, name=df_faturados.index[pos]
+            )
+
+        # 1. Expansão itens × colaboradores elegíveis
+        inicio = time.time()
+        ids_por_nome = self._ids_colaboradores(df_colabs_com_cargos)
+        exp = self._expandir(col, df_atribuicoes_gestao, df_colabs_com_cargos)
+
+        for pos in np.setdiff1d(np.arange(n_itens), exp["pos"].to_numpy()):
+            posicao[0] = (int(pos), -1, 0)
+            calc._log_validacao(
+                "AVISO",
+                "Nenhum colaborador (gestão ou operacional) encontrado para o item.",
+                dict(_item(int(pos))),
+            )
+
+        # Cross-selling por item (decisão do processo)
+        processos = col["Processo"] if "Processo" in df_faturados.columns else _objetos([None] * n_itens)
+        cs_por_item = pd.Series(processos, dtype=object).map(
+            lambda processo: _decisao_cross_selling(decisoes_cs, processo)
+        )
+        itens_cross = [
+            (pos, cs) for pos, cs in enumerate(cs_por_item.tolist()) if cs and cs.get("is_cross")
+        ]
+        eh_cross = np.zeros(n_itens, dtype=bool)
+        consultor_cs = _objetos([None] * n_itens)
+        reducao_item = np.zeros(n_itens, dtype=float)
+        com_reducao_item = np.zeros(n_itens, dtype=bool)
+        linhas_cs: List[Dict[str, Any]] = []
+        for pos, cs in itens_cross:
+            eh_cross[pos] = True
+            consultor_cs[pos] = cs.get("consultor")
+            if cs.get("decision") == "A":
+                com_reducao_item[pos] = True
+                reducao_item[pos] = float(cs.get("taxa", 0.0)) / 100.0
+            taxa_cs = float(cs.get("taxa", 0.0)) / 100.0
+            try:
+                if taxa_cs and taxa_cs > 0:
+                    linhas_cs.append(
+                        {
+                            "pos": pos,
+                            "id_colaborador": ids_por_nome.get(cs.get("consultor")),
+                            "nome_colaborador": cs.get("consultor"),
+                            "cargo": "Consultor Externo",
+                            "cod_produto": col["Código Produto"][pos],
+                            "descricao_produto": col["Descrição Produto"][pos],
+                            "processo": processos[pos],
+                            "linha": col["Negócio"][pos],
+                            "grupo": col["Grupo"][pos],
+                            "subgrupo": col["Subgrupo"][pos],
+                            "tipo_mercadoria": col["Tipo de Mercadoria"][pos],
+                            "faturamento_item": col["Valor Realizado"][pos],
+                            "taxa_rateio_aplicada": None,
+                            "fator_correcao_fc": 1.0,
+                            "percentual_elegibilidade_pe": None,
+                            "comissao_potencial_maxima": None,
+                            "comissao_calculada": col["Valor Realizado"][pos] * taxa_cs,
+                            "observacao": "CROSS_SELLING",
+                        }
+                    )
+            except Exception:
+                pass
+
+        # O consultor externo do cross-selling não entra no cálculo normal do processo
+        pos_exp = exp["pos"].to_numpy()
+        externo = eh_cross[pos_exp] & (exp["nome"].to_numpy() == consultor_cs[pos_exp])
+        exp = exp[~externo].reset_index(drop=True)
+        for chave, origem in (
+            ("linha", "Negócio"),
+            ("grupo", "Grupo"),
+            ("subgrupo", "Subgrupo"),
+            ("tipo_mercadoria", "Tipo de Mercadoria"),
+            ("dt_emissao", "Dt Emissão"),
+        ):
+            exp[chave] = col[origem][exp["pos"].to_numpy()]
+        info(
+            f"[Etapa 5.5] Expansão concluída: {n_itens} itens -> {len(exp)} linhas "
+            f"colaborador×item em {time.time() - inicio:.2f}s"
+        )
+
+        # 2. Regra de comissão uma vez por (contexto, cargo)
+        inicio = time.time()
+        chaves_regra = ["linha", "grupo", "subgrupo", "tipo_mercadoria", "cargo"]
+        regras: List[Any] = []
+        if len(exp):
+            grupo_regra = exp.groupby(chaves_regra, sort=False, dropna=False).ngroup().to_numpy()
+            _, primeiras = np.unique(grupo_regra, return_index=True)
+            regras = [None] * len(primeiras)
+            for r in np.sort(primeiras):
+                posicao[0] = (int(exp.at[r, "pos"]), int(r), 0)
+                regras[grupo_regra[r]] = calc._get_regra_comissao(
+                    linha=exp.at[r, "linha"],
+                    grupo=exp.at[r, "grupo"],
+                    subgrupo=exp.at[r, "subgrupo"],
+                    tipo_mercadoria=exp.at[r, "tipo_mercadoria"],
+                    cargo=exp.at[r, "cargo"],
+                )
+            com_regra = np.array([regra is not None for regra in regras], dtype=bool)[grupo_regra]
+            pct_rateio = np.array(
+                [regra["taxa_rateio_maximo_pct"] if regra is not None else np.nan for regra in regras],
+                dtype=object,
+            )[grupo_regra]
+            pct_fatia = np.array(
+                [regra["fatia_cargo_pct"] if regra is not None else np.nan for regra in regras],
+                dtype=object,
+            )[grupo_regra]
+            linhas_exp = np.flatnonzero(com_regra)
+            exp = exp.iloc[linhas_exp].reset_index(drop=True)
+            pct_rateio = pct_rateio[linhas_exp]
+            pct_fatia = pct_fatia[linhas_exp]
+        else:
+            linhas_exp = np.zeros(0, dtype=np.int64)
+            pct_rateio = pct_fatia = _objetos([])
+        n_exp = len(exp)
+        pos_exp = exp["pos"].to_numpy()
+
+        # 3. FC uma vez por chave do cache de FC (colaborador, cargo, contexto, período)
+        chave_fc = np.full(n_exp, -1, dtype=np.int64)
+        fcs: List[Any] = []
+        detalhes: List[Any] = []
+        debug_chave: List[List[Dict[str, Any]]] = []
+        primeira_linha: List[int] = []
+        if n_exp:
+            cache_ativo = calc._obter_cache_fc().ativo
+            colunas_fc = ["nome", "cargo", "linha", "grupo", "subgrupo", "tipo_mercadoria", "dt_emissao"]
+            grupo_fc = exp.groupby(colunas_fc, sort=False, dropna=False).ngroup().to_numpy()
+            _, primeiras = np.unique(grupo_fc, return_index=True)
+            indice_por_chave: Dict[Any, int] = {}
+            indice_por_grupo: Dict[int, int] = {}
+            for r in np.sort(primeiras):
+                chave = None
+                if cache_ativo:
+                    try:
+                        chave = calc._chave_cache_fc(
+                            exp.at[r, "nome"],
+                            exp.at[r, "cargo"],
+                            {
+                                "Negócio": exp.at[r, "linha"],
+                                "Grupo": exp.at[r, "grupo"],
+                                "Subgrupo": exp.at[r, "subgrupo"],
+                                "Tipo de Mercadoria": exp.at[r, "tipo_mercadoria"],
+                                "Dt Emissão": exp.at[r, "dt_emissao"],
+                            },
+                            None,
+                            None,
+                        )
+                        hash(chave)
+                    except Exception:
+                        chave = None
+                if chave is None:
+                    continue  # FC calculado por linha, como o motor legado sem cache
+                indice_por_grupo[grupo_fc[r]] = indice_por_chave.setdefault(chave, len(indice_por_chave))
+            por_linha = len(indice_por_chave)
+            for r in range(n_exp):
+                indice = indice_por_grupo.get(grupo_fc[r])
+                if indice is None:
+                    indice = por_linha
+                    por_linha += 1
+                chave_fc[r] = indice
+
+            _, primeiras = np.unique(chave_fc, return_index=True)
+            fcs = [None] * len(primeiras)
+            detalhes = [None] * len(primeiras)
+            debug_chave = [[] for _ in primeiras]
+            primeira_linha = [0] * len(primeiras)
+            debug = getattr(calc, "debug_fornecedores", None)
+            for r in np.sort(primeiras):
+                indice = chave_fc[r]
+                posicao[0] = (int(pos_exp[r]), int(linhas_exp[r]), 1)
+                inicio_debug = len(debug) if debug is not None else 0
+                fcs[indice], detalhes[indice] = calc._calcular_fc_para_item(
+                    exp.at[r, "nome"], exp.at[r, "cargo"], _item(int(pos_exp[r]))
+                )
+                if debug is not None:
+                    debug_chave[indice] = debug[inicio_debug:]
+                    del debug[inicio_debug:]
+                primeira_linha[indice] = r
+
+            # DEBUG_FORNECEDORES por linha, como as reproduções do cache de FC
+            if debug is not None and any(debug_chave):
+                codigos = col["Código Produto"]
+                for r in range(n_exp):
+                    indice = chave_fc[r]
+                    entradas = debug_chave[indice]
+                    if not entradas:
+                        continue
+                    if primeira_linha[indice] == r:
+                        debug.extend(entradas)
+                    else:
+                        cod_produto = codigos[pos_exp[r]]
+                        debug.extend(dict(e, cod_produto=cod_produto) for e in entradas)
+
+        # Redução de cross-selling (opção A) acima da taxa de rateio
+        com_reducao = com_reducao_item[pos_exp]
+        reducao = np.where(com_reducao, reducao_item[pos_exp], 0.0)
+        for r in np.flatnonzero(com_reducao):
+            processo_atual = processos[pos_exp[r]]
+            try:
+                if reducao[r] > pct_rateio[r] / 100.0:
+                    posicao[0] = (int(pos_exp[r]), int(linhas_exp[r]), 2)
+                    calc._log_validacao(
+                        "AVISO",
+                        f"taxa_cross_selling_pct ({reducao[r]:.4f}) maior que taxa_rateio_maximo_pct ({pct_rateio[r]/100.0:.4f}) para processo {processo_atual}",
+                        {
+                            "processo": processo_atual,
+                            "consultor": consultor_cs[pos_exp[r]],
+                            "taxa_cs": float(reducao[r]),
+                            "taxa_rateio": pct_rateio[r] / 100.0,
+                        },
+                    )
+            except Exception:
+                pass
+        info(
+            f"[Etapa 5.5] Regras e FC resolvidos: {len(regras)} regra(s) e {len(fcs)} FC(s) distintos "
+            f"para {n_exp} linhas em {time.time() - inicio:.2f}s"
+        )
+
+        # 4. Passada única NumPy: taxa, comissão potencial e comissão final
+        inicio = time.time()
+        faturamento_raw = col["Valor Realizado"][pos_exp]
+        faturamento = np.asarray(faturamento_raw.tolist(), dtype=float)
+        taxa_base = np.asarray(pct_rateio.tolist(), dtype=float) / 100.0
+        pe = np.asarray(pct_fatia.tolist(), dtype=float) / 100.0
+        taxa_reduzida = taxa_base - reducao
+        # max(0.0, x) do motor legado: NaN ou valores <= 0 viram 0.0
+        taxa_reduzida = np.where(taxa_reduzida > 0.0, taxa_reduzida, 0.0)
+        taxa = np.where(com_reducao, taxa_reduzida, taxa_base)
+        fc_linha = _objetos(fcs)[chave_fc] if n_exp else _objetos([])
+        fc = np.asarray(fc_linha.tolist(), dtype=float)
+        potencial = faturamento * taxa * pe
+        comissao = potencial * fc
+
+        nomes_exp = exp["nome"].to_numpy()
+        nomes_unicos = pd.unique(nomes_exp)
+        colunas_exp: Dict[str, np.ndarray] = {
+            # um lookup por nome distinto, mapeado de volta para as linhas
+            "id_colaborador": _objetos(ids_por_nome.get(n) for n in nomes_unicos)[
+                pd.Index(nomes_unicos).get_indexer(nomes_exp)
+            ],
+            "nome_colaborador": nomes_exp,
+            "cargo": exp["cargo"].to_numpy(),
+            "cod_produto": col["Código Produto"][pos_exp],
+            "descricao_produto": col["Descrição Produto"][pos_exp],
+            "processo": processos[pos_exp],
+            "linha": exp["linha"].to_numpy(),
+            "grupo": exp["grupo"].to_numpy(),
+            "subgrupo": exp["subgrupo"].to_numpy(),
+            "tipo_mercadoria": exp["tipo_mercadoria"].to_numpy(),
+            "faturamento_item": faturamento_raw,
+            "taxa_rateio_aplicada": _objetos(taxa.tolist()),
+            "fator_correcao_fc": fc_linha,
+            "percentual_elegibilidade_pe": _objetos(pe.tolist()),
+            "comissao_potencial_maxima": _objetos(potencial.tolist()),
+            "comissao_calculada": _objetos(comissao.tolist()),
+        }
+        for comp, short in COMPONENTES_FC.items():
+            for prefixo, campo in _SUBCAMPOS_FC:
+                valores = [_detalhe(d, comp, campo) for d in detalhes]
+                if campo == "realizado" and comp == "rentabilidade":
+                    valores = [_normalizar_rentabilidade(v) for v in valores]
+                colunas_exp[f"{prefixo}_{short}"] = (
+                    _objetos(valores)[chave_fc] if n_exp else _objetos([])
+                )
+
+        # 5. Montagem final: por item, a linha de cross-selling antes das linhas dos colaboradores
+        n_cs = len(linhas_cs)
+        if not n_cs and not n_exp:
+            info(f"[Etapa 5.6] Cálculo vetorizado concluído em {time.time() - inicio:.2f}s")
+            return pd.DataFrame()
+        ordem = np.lexsort(
+            (
+                np.concatenate([np.zeros(n_cs, dtype=np.int64), np.arange(n_exp)]),
+                np.concatenate([np.zeros(n_cs, dtype=np.int64), np.ones(n_exp, dtype=np.int64)]),
+                np.concatenate([np.array([c["pos"] for c in linhas_cs], dtype=np.int64), pos_exp]),
+            )
+        )
+
+        colunas_saida = list(COLUNAS_BASE)
+        extras_cs = ["observacao"]
+        if n_exp and n_cs:
+            primeira_cs = ordem[0] < n_cs
+            colunas_saida += (extras_cs + COLUNAS_FC) if primeira_cs else (COLUNAS_FC + extras_cs)
+        elif n_exp:
+            colunas_saida += COLUNAS_FC
+        else:
+            colunas_saida += extras_cs
+
+        vazio_exp = np.full(n_exp, np.nan, dtype=object)
+        dados: Dict[str, List[Any]] = {}
+        for c in colunas_saida:
+            valores_cs = _objetos(linha.get(c, np.nan) for linha in linhas_cs)
+            valores = np.concatenate([valores_cs, colunas_exp.get(c, vazio_exp)])
+            dados[c] = valores[ordem].tolist()
+
+        resultado = pd.DataFrame(dados, columns=colunas_saida)
+        info(
+            f"[Etapa 5.6] Cálculo vetorizado concluído: {len(resultado)} linhas "
+            f"({n_exp} colaborador×item) em {time.time() - inicio:.2f}s"
+        )
+        return resultado
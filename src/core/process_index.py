@@ -0,0 +1,178 @@
+"""
+Índice por processo sobre a ANALISE_COMERCIAL_COMPLETA.
+
+Construído uma única vez após o carregamento dos dados e compartilhado por
+todos os consumidores que antes filtravam a Análise Comercial inteira com
+`astype(str).str.strip() == processo` a cada processo (O(P×N)):
+    - CalculoComissao._get_valor_total_processo
+    - MetricasCalculator.calcular_metricas_processo
+    - IdentificadorColaboradores.identificar_colaboradores
+    - RecebimentoOrchestrator._calcular_metricas_processos_faturados
+    - AuditoriaDataCollector._coletar_dados_processo
+
+Para cada processo (id normalizado com str + strip, como no filtro original)
+guarda as posições das linhas e um resumo pré-calculado: valor total
+realizado e status, número da NF e data de emissão da primeira linha.
+Células de processo vazias (NaN) nunca correspondem, assim como no filtro.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_PROCESSO = ("processo",)
+COLUNAS_STATUS = ("status processo", "status_processo")
+COLUNAS_NF = ("numero nf", "número nf", "num nf")
+COLUNAS_DT_EMISSAO = ("dt emissão", "dt_emissao", "data emissão")
+# Mesmas variações aceitas por CalculoComissao._get_valor_total_processo
+COLUNAS_VALOR_REALIZADO = (
+    "valor realizado",
+    "valor_realizado",
+    "valorrealizado",
+    "valor realizado total",
+    "valor realizado (brl)",
+)
+
+
+def _normalizar_nome_coluna(coluna) -> str:
+    return str(coluna).replace("\ufeff", "").strip().lower()
+
+
+def encontrar_coluna(df: pd.DataFrame, nomes_possiveis: Iterable[str]) -> Optional[str]:
+    """Primeira coluna cujo nome (sem BOM, case-insensitive) está na lista."""
+    colunas = {}
+    for coluna in df.columns:
+        colunas.setdefault(_normalizar_nome_coluna(coluna), coluna)
+    for nome in nomes_possiveis:
+        encontrada = colunas.get(nome.strip().lower())
+        if encontrada is not None:
+            return encontrada
+    return None
+
+
+def _colunas_valor(df: pd.DataFrame) -> List[str]:
+    colunas = [
+        c for c in df.columns if _normalizar_nome_coluna(c) in COLUNAS_VALOR_REALIZADO
+    ]
+    if not colunas:
+        # tentar nomes com acentos/alternativas
+        colunas = [
+            c
+            for c in df.columns
+            if "valor" in _normalizar_nome_coluna(c)
+            and "real" in _normalizar_nome_coluna(c)
+        ]
+    return colunas
+
+
+def normalizar_processo(valor: Any) -> Optional[str]:
+    """Id do processo como no filtro original (str + strip); None para vazio."""
+    if valor is None:
+        return None
+    try:
+        if pd.isna(valor):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(valor).strip()
+
+
+class ProcessIndex:
+    """
+    Consultas O(1) aos itens e ao resumo de cada processo.
+    """
+
+    def __init__(self, df_analise_comercial: Optional[pd.DataFrame]) -> None:
+        self.df = (
+            df_analise_comercial if df_analise_comercial is not None else pd.DataFrame()
+        )
+        self.coluna_processo = encontrar_coluna(self.df, COLUNAS_PROCESSO)
+        self.coluna_status = encontrar_coluna(self.df, COLUNAS_STATUS)
+        self.coluna_nf = encontrar_coluna(self.df, COLUNAS_NF)
+        self.coluna_dt_emissao = encontrar_coluna(self.df, COLUNAS_DT_EMISSAO)
+        self.colunas_valor = _colunas_valor(self.df)
+        self._posicoes: Dict[str, np.ndarray] = {}
+        self._resumos: Dict[str, Dict[str, Any]] = {}
+        if not self.df.empty and self.coluna_processo is not None:
+            self._construir()
+
+    def _construir(self) -> None:
+        agrupadas: Dict[str, List[int]] = {}
+        for pos, valor in enumerate(self.df[self.coluna_processo].tolist()):
+            chave = normalizar_processo(valor)
+            if chave is not None:
+                agrupadas.setdefault(chave, []).append(pos)
+        self._posicoes = {
+            chave: np.asarray(pos, dtype=np.intp) for chave, pos in agrupadas.items()
+        }
+
+        valores = []
+        for coluna in self.colunas_valor:
+            try:
+                valores.append(
+                    pd.to_numeric(self.df[coluna], errors="coerce")
+                    .fillna(0.0)
+                    .to_numpy(dtype=float)
+                )
+            except Exception:
+                continue
+
+        def _coluna_lista(coluna):
+            return self.df[coluna].tolist() if coluna is not None else None
+
+        status = _coluna_lista(self.coluna_status)
+        nfs = _coluna_lista(self.coluna_nf)
+        datas = _coluna_lista(self.coluna_dt_emissao)
+
+        for chave, posicoes in self._posicoes.items():
+            primeira = int(posicoes[0])
+            # Soma por coluna e depois entre colunas, como no cálculo original
+            total = 0.0
+            for coluna_valores in valores:
+                total += float(coluna_valores[posicoes].sum())
+            dt_emissao = datas[primeira] if datas is not None else None
+            try:
+                dt_convertida = pd.to_datetime(dt_emissao, errors="coerce")
+            except Exception:
+                dt_convertida = pd.NaT
+            self._resumos[chave] = {
+                "processo": chave,
+                "itens": len(posicoes),
+                "valor_total": total,
+                "status": str(status[primeira]).strip() if status is not None else "",
+                "numero_nf": str(nfs[primeira]).strip() if nfs is not None else "",
+                "dt_emissao": dt_emissao,
+                "dt_emissao_convertida": dt_convertida,
+            }
+
+    # ------------------------------------------------------------------ busca
+    def __contains__(self, processo) -> bool:
+        return normalizar_processo(processo) in self._posicoes
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
+
+    def processos(self) -> List[str]:
+        return list(self._posicoes.keys())
+
+    def posicoes(self, processo) -> np.ndarray:
+        """Posições (iloc) das linhas do processo; vazio se não encontrado."""
+        return self._posicoes.get(
+            normalizar_processo(processo), np.empty(0, dtype=np.intp)
+        )
+
+    def itens(self, processo) -> pd.DataFrame:
+        """Linhas do processo (mesmo resultado do filtro por máscara)."""
+        return self.df.iloc[self.posicoes(processo)]
+
+    def resumo(self, processo) -> Optional[Dict[str, Any]]:
+        """Resumo pré-calculado do processo ou None se não encontrado."""
+        return self._resumos.get(normalizar_processo(processo))
+
+    def valor_total(self, processo) -> float:
+        """Soma de 'Valor Realizado' dos itens do processo (0.0 se ausente)."""
+        resumo = self.resumo(processo)
+        return float(resumo["valor_total"]) if resumo is not None else 0.0
@@ -0,0 +1,202 @@
+"""
+Índice pré-compilado das regras de comissão (aba CONFIG_COMISSAO).
+
+A busca original montava quatro máscaras booleanas sobre toda a tabela
+CONFIG_COMISSAO a cada consulta. Aqui a tabela é percorrida uma única vez
+por execução e cada nível de especificidade vira um dicionário:
+
+    1. chave exata (linha, grupo, subgrupo, tipo_mercadoria, cargo)
+    2. fallback de grupo (linha, grupo, tipo_mercadoria, cargo) para regras
+       com subgrupo vazio ou igual ao token legado
+    3. fallback de linha (linha, tipo_mercadoria, cargo) para regras com
+       grupo e subgrupo vazios ou iguais ao token legado
+    4. regra legada (cargo) para linhas com linha == tipo_mercadoria == token
+
+Em cada nível vale a primeira linha da tabela (mesma semântica do antigo
+``iloc[0]``). Valores vazios (NaN) nunca casam por igualdade, exatamente
+como nas comparações do pandas.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import pandas as pd
+
+
+_CAMPOS_CHAVE = ("linha", "grupo", "subgrupo", "tipo_mercadoria", "cargo")
+_CAMPOS_TAXA = ("taxa_rateio_maximo_pct", "fatia_cargo_pct")
+
+
+@dataclass(frozen=True, slots=True)
+class RegraComissao:
+    """
+    Registro imutável de uma regra de CONFIG_COMISSAO.
+
+    Mantém compatibilidade com o acesso antigo via ``pd.Series``
+    (``regra["taxa_rateio_maximo_pct"]`` e ``regra.get(...)``).
+    """
+
+    linha: Any
+    grupo: Any
+    subgrupo: Any
+    tipo_mercadoria: Any
+    cargo: Any
+    taxa_rateio_maximo_pct: float
+    fatia_cargo_pct: float
+    nivel: int = 1
+    extras: Mapping[str, Any] = field(
+        default_factory=lambda: MappingProxyType({}), compare=False
+    )
+
+    @property
+    def taxa_efetiva(self) -> float:
+        """Taxa final do cargo (rateio máximo × fatia do cargo), em fração."""
+        rateio = float(self.taxa_rateio_maximo_pct or 0.0) / 100.0
+        fatia = float(self.fatia_cargo_pct or 0.0) / 100.0
+        return rateio * fatia
+
+    def __getitem__(self, chave: str) -> Any:
+        if chave in _CAMPOS_CHAVE or chave in _CAMPOS_TAXA:
+            return getattr(self, chave)
+        return self.extras[chave]
+
+    def get(self, chave: str, default: Any = None) -> Any:
+        try:
+            return self[chave]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Retorna a regra como dicionário (colunas originais da tabela)."""
+        dados = {c: getattr(self, c) for c in _CAMPOS_CHAVE + _CAMPOS_TAXA}
+        dados.update(self.extras)
+        return dados
+
+
+def _vazio_ou_legado(valor: Any, legacy_token: str) -> bool:
+    try:
+        if pd.isna(valor):
+            return True
+    except (TypeError, ValueError):
+        pass
+    return valor == legacy_token
+
+
+def _definido(*valores: Any) -> bool:
+    """True se nenhum valor é NaN (NaN nunca casa em comparações de igualdade)."""
+    for valor in valores:
+        try:
+            if pd.isna(valor):
+                return False
+        except (TypeError, ValueError):
+            pass
+    return True
+
+
+class RegraComissaoIndex:
+    """
+    Índice hash de CONFIG_COMISSAO com a hierarquia de especificidade.
+
+    Deve ser construído uma vez por execução (após o carregamento das
+    configurações) e compartilhado por todos os consumidores.
+    """
+
+    def __init__(self, df_regras: Optional[pd.DataFrame], legacy_token: str = "__legacy__"):
+        self.legacy_token = legacy_token
+        self._exato: Dict[Tuple, RegraComissao] = {}
+        self._por_grupo: Dict[Tuple, RegraComissao] = {}
+        self._por_linha: Dict[Tuple, RegraComissao] = {}
+        self._legado: Dict[Any, RegraComissao] = {}
+        self.total_regras = 0
+        self._compilar(df_regras if df_regras is not None else pd.DataFrame())
+
+    @property
+    def vazio(self) -> bool:
+        return self.total_regras == 0
+
+    def _compilar(self, df: pd.DataFrame) -> None:
+        if df.empty or not all(c in df.columns for c in _CAMPOS_CHAVE):
+            return
+
+        colunas = list(df.columns)
+        extras_cols = [
+            c for c in colunas if c not in _CAMPOS_CHAVE and c not in _CAMPOS_TAXA
+        ]
+        taxas = {
+            c: (
+                pd.to_numeric(df[c], errors="coerce").tolist()
+                if c in df.columns
+                else [float("nan")] * len(df)
+            )
+            for c in _CAMPOS_TAXA
+        }
+        chaves = {c: df[c].tolist() for c in _CAMPOS_CHAVE}
+        extras = {c: df[c].tolist() for c in extras_cols}
+        token = self.legacy_token
+
+        for i in range(len(df)):
+            linha = chaves["linha"][i]
+            grupo = chaves["grupo"][i]
+            subgrupo = chaves["subgrupo"][i]
+            tipo = chaves["tipo_mercadoria"][i]
+            cargo = chaves["cargo"][i]
+            if not _definido(cargo):
+                continue
+
+            def _regra(nivel: int) -> RegraComissao:
+                return RegraComissao(
+                    linha=linha,
+                    grupo=grupo,
+                    subgrupo=subgrupo,
+                    tipo_mercadoria=tipo,
+                    cargo=cargo,
+                    taxa_rateio_maximo_pct=taxas["taxa_rateio_maximo_pct"][i],
+                    fatia_cargo_pct=taxas["fatia_cargo_pct"][i],
+                    nivel=nivel,
+                    extras=MappingProxyType({c: extras[c][i] for c in extras_cols}),
+                )
+
+            try:
+                if _definido(linha, grupo, subgrupo, tipo):
+                    chave = (linha, grupo, subgrupo, tipo, cargo)
+                    if chave not in self._exato:
+                        self._exato[chave] = _regra(1)
+                sub_livre = _vazio_ou_legado(subgrupo, token)
+                if sub_livre and _definido(linha, grupo, tipo):
+                    chave = (linha, grupo, tipo, cargo)
+                    if chave not in self._por_grupo:
+                        self._por_grupo[chave] = _regra(2)
+                if (
+                    sub_livre
+                    and _vazio_ou_legado(grupo, token)
+                    and _definido(linha, tipo)
+                ):
+                    chave = (linha, tipo, cargo)
+                    if chave not in self._por_linha:
+                        self._por_linha[chave] = _regra(3)
+                if linha == token and tipo == token:
+                    if cargo not in self._legado:
+                        self._legado[cargo] = _regra(4)
+            except TypeError:
+                # Valor não-hashable na tabela: a linha não participa do índice
+                continue
+            self.total_regras += 1
+
+    def buscar(
+        self, linha, grupo, subgrupo, tipo_mercadoria, cargo
+    ) -> Optional[RegraComissao]:
+        """
+        Retorna a regra mais específica para o contexto informado ou None.
+        """
+        try:
+            return (
+                self._exato.get((linha, grupo, subgrupo, tipo_mercadoria, cargo))
+                or self._por_grupo.get((linha, grupo, tipo_mercadoria, cargo))
+                or self._por_linha.get((linha, tipo_mercadoria, cargo))
+                or self._legado.get(cargo)
+            )
+        except TypeError:
+            return None
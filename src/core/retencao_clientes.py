@@ -0,0 +1,173 @@
+"""
+Índice de retenção de clientes por linha (janelas móveis de meses).
+
+Construído uma única vez sobre a Análise Comercial já filtrada (processos
+faturados, operações autorizadas), guarda para cada linha um bitmap de
+clientes por mês (inteiro Python: bit i ligado = i-ésimo cliente da linha).
+Qualquer janela [mês inicial .. mês final] é a união (OR) dos bitmaps dos
+meses; para não percorrer a janela a cada consulta, cada linha mantém uma
+tabela de uniões por blocos de 2^k meses (sparse table): a janela é a união
+de dois blocos sobrepostos e a contagem de clientes distintos é o número de
+bits ligados.
+
+Substitui o filtro da base inteira a cada janela em `_montar_retencao` e a
+ida e volta por Retencao_Clientes.xlsx no componente de retenção do FC.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Janela da retenção: 24 meses terminando no mês de referência (inclusive)
+JANELA_RETENCAO_MESES = 24
+COLUNAS_RETENCAO = ["linha", "clientes_mes_anterior", "clientes_mes_atual"]
+
+
+def indice_mes(mes: int, ano: int) -> int:
+    """Índice contínuo do mês (ano * 12 + mês - 1)."""
+    return int(ano) * 12 + int(mes) - 1
+
+
+def _bitmap(codigos: np.ndarray, largura: int) -> int:
+    """Inteiro com os bits `codigos` ligados."""
+    bits = np.zeros(largura, dtype=bool)
+    bits[codigos] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+class IndiceRetencaoClientes:
+    """
+    Clientes distintos por (linha, mês), com consulta de qualquer janela.
+
+    Uso:
+        indice = IndiceRetencaoClientes(df["Dt Emissão"], df["Negócio"], df["Cliente"])
+        indice.contar("SSO", (9, 2023), (8, 2025))   # clientes distintos na janela
+        indice.retencao("SSO", 8, 2025)              # (mês anterior, mês atual)
+        indice.quadro_retencao(8, 2025)              # mesmo formato de Retencao_Clientes.xlsx
+
+    Linhas, clientes ou datas vazios (NaN) são ignorados, como no
+    groupby(...).nunique() original.
+    """
+
+    def __init__(self, datas: pd.Series, linhas: pd.Series, clientes: pd.Series):
+        datas = pd.to_datetime(pd.Series(datas), errors="coerce")
+        linhas = pd.Series(linhas, index=datas.index)
+        clientes = pd.Series(clientes, index=datas.index)
+        validos = datas.notna() & linhas.notna() & clientes.notna()
+        datas, linhas, clientes = datas[validos], linhas[validos], clientes[validos]
+
+        self.registros = int(validos.sum())
+        # linha -> (mês inicial, tabela de uniões por nível)
+        self._tabelas: Dict[Any, Tuple[int, List[List[int]]]] = {}
+        # str(linha).strip() -> linha, para linhas lidas de planilhas como número
+        self._linhas_texto: Dict[str, Any] = {}
+        if not self.registros:
+            return
+
+        meses = (datas.dt.year * 12 + datas.dt.month - 1).to_numpy(dtype=np.int64)
+        codigos_linha, valores_linha = pd.factorize(linhas)
+        for codigo, linha in enumerate(valores_linha):
+            selecao = codigos_linha == codigo
+            codigos_cliente, valores_cliente = pd.factorize(clientes[selecao])
+            self._tabelas[linha] = self._montar_tabela(
+                meses[selecao], codigos_cliente, len(valores_cliente)
+            )
+            self._linhas_texto.setdefault(str(linha).strip(), linha)
+
+    @staticmethod
+    def _montar_tabela(meses: np.ndarray, codigos: np.ndarray, largura: int):
+        """Bitmaps mensais contíguos da linha e uniões por blocos de 2^k meses."""
+        inicio = int(meses.min())
+        posicoes = meses - inicio
+        ordem = np.argsort(posicoes, kind="stable")
+        posicoes, codigos = posicoes[ordem], codigos[ordem]
+        nivel = [0] * (int(posicoes[-1]) + 1)
+        cortes = np.flatnonzero(np.diff(posicoes)) + 1
+        for bloco_pos, bloco_cod in zip(np.split(posicoes, cortes), np.split(codigos, cortes)):
+            nivel[int(bloco_pos[0])] = _bitmap(bloco_cod, largura)
+
+        niveis = [nivel]
+        passo = 1
+        while passo * 2 <= len(nivel):
+            anterior = niveis[-1]
+            niveis.append(
+                [anterior[i] | anterior[i + passo] for i in range(len(anterior) - passo)]
+            )
+            passo *= 2
+        return inicio, niveis
+
+    @property
+    def linhas(self) -> List[Any]:
+        """Linhas com pelo menos um cliente em algum mês."""
+        return list(self._tabelas)
+
+    def _tabela(self, linha: Any):
+        tabela = self._tabelas.get(linha)
+        if tabela is None and linha is not None:
+            original = self._linhas_texto.get(str(linha).strip())
+            if original is not None:
+                tabela = self._tabelas[original]
+        return tabela
+
+    def contar(self, linha: Any, inicio: Tuple[int, int], fim: Tuple[int, int]) -> int:
+        """
+        Clientes distintos da linha entre os meses `inicio` e `fim` (inclusive).
+
+        Args:
+            linha: Valor de 'Negócio'
+            inicio, fim: (mes, ano)
+        """
+        tabela = self._tabela(linha)
+        if tabela is None:
+            return 0
+        mes_inicial, niveis = tabela
+        a = max(indice_mes(*inicio) - mes_inicial, 0)
+        b = min(indice_mes(*fim) - mes_inicial, len(niveis[0]) - 1)
+        if a > b:
+            return 0
+        k = (b - a + 1).bit_length() - 1
+        nivel = niveis[k]
+        return (nivel[a] | nivel[b - (1 << k) + 1]).bit_count()
+
+    def clientes_janela(
+        self, linha: Any, mes: int, ano: int, meses: int = JANELA_RETENCAO_MESES
+    ) -> int:
+        """Clientes distintos da linha nos `meses` meses terminando em mes/ano."""
+        fim = indice_mes(mes, ano)
+        inicio = fim - meses + 1
+        return self.contar(linha, (inicio % 12 + 1, inicio // 12), (mes, ano))
+
+    def retencao(self, linha: Any, mes: int, ano: int) -> Optional[Tuple[int, int]]:
+        """
+        (clientes_mes_anterior, clientes_mes_atual) da linha: janelas de 24
+        meses terminando no mês anterior e em mes/ano.
+
+        None quando a linha não tem clientes em nenhuma das janelas (a linha
+        não aparece em Retencao_Clientes.xlsx).
+        """
+        anterior = indice_mes(mes, ano) - 1
+        clientes_ant = self.clientes_janela(linha, anterior % 12 + 1, anterior // 12)
+        clientes_atual = self.clientes_janela(linha, mes, ano)
+        if not clientes_ant and not clientes_atual:
+            return None
+        return clientes_ant, clientes_atual
+
+    def quadro_retencao(self, mes: int, ano: int) -> pd.DataFrame:
+        """DataFrame no formato de Retencao_Clientes.xlsx para mes/ano."""
+        linhas = []
+        for linha in sorted(self._tabelas):
+            valores = self.retencao(linha, mes, ano)
+            if valores is not None:
+                linhas.append(
+                    {
+                        "linha": linha,
+                        "clientes_mes_anterior": valores[0],
+                        "clientes_mes_atual": valores[1],
+                    }
+                )
+        if linhas:
+            return pd.DataFrame(linhas).sort_values("linha")
+        return pd.DataFrame(columns=COLUNAS_RETENCAO)
@@ -6,13 +6,32 @@ Responsável por:
 - Armazenar taxas em JSON persistente
 - Validar lacunas de dados
 - Fornecer utilitários de cálculo usando as taxas armazenadas
+
+Os submódulos são importados no primeiro acesso (a busca nas APIs traz
+`requests` e só é usada na atualização de taxas).
 """
 
-from .rate_fetcher import RateFetcher
-from .rate_storage import RateStorage
-from .rate_validator import RateValidator
-from .rate_calculator import RateCalculator
+import importlib
+
+_SUBMODULOS = {
+    "RateFetcher": ".rate_fetcher",
+    "RateStorage": ".rate_storage",
+    "RateValidator": ".rate_validator",
+    "RateCalculator": ".rate_calculator",
+}
 
 __all__ = ["RateFetcher", "RateStorage", "RateValidator", "RateCalculator"]
 
 
+def __getattr__(nome):
+    if nome in _SUBMODULOS:
+        valor = getattr(importlib.import_module(_SUBMODULOS[nome], __name__), nome)
+        globals()[nome] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
+
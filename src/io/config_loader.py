@@ -7,6 +7,8 @@ import pandas as pd
 import os
 import logging
 from typing import Dict, Set, Any, Optional
+from src.io.input_cache import ler_csv, ler_excel
+from src.utils.normalization import normalize_dataframes
 
 
 class ConfigLoader:
@@ -42,7 +44,7 @@ class ConfigLoader:
         # Tentar carregar do arquivo Excel unificado
         if os.path.exists(config_path):
             try:
-                regras_data = pd.read_excel(config_path, sheet_name=None)
+                regras_data = ler_excel(config_path, sheet_name=None)
                 data.update(regras_data)
             except Exception as e:
                 if self.validation_logger:
@@ -65,11 +67,11 @@ class ConfigLoader:
         if "CROSS_SELLING" not in data:
             try:
                 if os.path.exists(config_path):
-                    data["CROSS_SELLING"] = pd.read_excel(config_path, sheet_name="CROSS_SELLING")
+                    data["CROSS_SELLING"] = ler_excel(config_path, sheet_name="CROSS_SELLING")
                 else:
                     csv_path = os.path.join("config", "CROSS_SELLING.csv")
                     if os.path.exists(csv_path):
-                        data["CROSS_SELLING"] = pd.read_csv(csv_path)
+                        data["CROSS_SELLING"] = ler_csv(csv_path)
                     else:
                         data["CROSS_SELLING"] = pd.DataFrame(
                             columns=["colaborador", "taxa_cross_selling_pct"]
@@ -119,7 +121,7 @@ class ConfigLoader:
             sheet_name = csv_file.replace(".csv", "")
             try:
                 if os.path.exists(csv_path):
-                    data[sheet_name] = pd.read_csv(csv_path)
+                    data[sheet_name] = ler_csv(csv_path)
             except Exception as e:
                 if self.validation_logger:
                     self.validation_logger.aviso(
@@ -141,32 +143,7 @@ class ConfigLoader:
         Returns:
             Dicionário com DataFrames normalizados
         """
-        for df_name, df_any in list(data.items()):
-            try:
-                if not isinstance(df_any, pd.DataFrame):
-                    continue
-                try:
-                    df_any.columns = df_any.columns.astype(str).str.strip()
-                except Exception:
-                    pass
-                for col in df_any.columns:
-                    s = df_any[col]
-                    if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
-                        try:
-                            df_any[col] = s.apply(
-                                lambda v: v.strip() if isinstance(v, str) else v
-                            )
-                        except Exception:
-                            pass
-                data[df_name] = df_any
-            except Exception as e:
-                if self.validation_logger:
-                    self.validation_logger.aviso(
-                        f"Falha ao normalizar strings para {df_name}: {e}",
-                        {}
-                    )
-        
-        return data
+        return normalize_dataframes(data, self.validation_logger)
     
     def _normalize_special_columns(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """
@@ -5,10 +5,42 @@ Responsável por ler arquivos mensais (Faturados, Conversões, etc.) e arquivos
 
 import pandas as pd
 import os
+import io
+import sys
 import glob
-from typing import Dict, List, Optional
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List, Optional, Tuple
+from src.io.input_cache import ler_csv, ler_excel
+from src.utils.normalization import normalize_dataframes
 from src.utils.logging import ValidationLogger
 
+# Entradas lidas sem depender do mês de apuração (podem ser compartilhadas
+# entre meses de uma execução em lote)
+ENTRADAS_INDEPENDENTES_DO_MES = (
+    "RECEBIMENTOS",
+    "PAGAMENTOS_REGULARES",
+    "ANALISE_COMERCIAL_COMPLETA",
+    "STATUS_PAGAMENTOS",
+)
+
+
+def _executar_carga(metodo: str, args: tuple) -> Tuple[pd.DataFrame, float, List[Dict], str]:
+    """
+    Executa um método de carga do DataLoader em um processo do pool.
+
+    Retorna (DataFrame, segundos, logs de validação, saída impressa) para que o
+    processo principal reproduza logs e prints na ordem original de carga.
+    """
+    logger = ValidationLogger()
+    loader = DataLoader(validation_logger=logger)
+    saida = io.StringIO()
+    inicio = time.perf_counter()
+    with redirect_stdout(saida):
+        df = getattr(loader, metodo)(*args)
+    return df, time.perf_counter() - inicio, logger.get_logs(), saida.getvalue()
+
 
 class DataLoader:
     """
@@ -33,10 +65,19 @@ class DataLoader:
         arquivo_conversoes: Optional[str] = None,
         arquivo_faturados_ytd: Optional[str] = None,
         arquivo_rentabilidade: Optional[str] = None,
+        paralelo: bool = False,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[str, float, int], None]] = None,
+        quadros_preparados: Optional[Dict[str, pd.DataFrame]] = None,
     ) -> Dict[str, pd.DataFrame]:
         """
         Carrega todos os arquivos de dados de entrada.
         
+        Com `paralelo=True` os arquivos (independentes entre si) são lidos em um
+        pool de processos; em caso de falha do pool, volta à carga sequencial.
+        Entradas presentes em `quadros_preparados` (ex.: geradas pelo preparador
+        no mesmo processo) não são lidas do disco.
+        
         Args:
             mes: Mês de apuração
             ano: Ano de apuração
@@ -45,65 +86,130 @@ class DataLoader:
             arquivo_conversoes: Caminho opcional para arquivo de conversões
             arquivo_faturados_ytd: Caminho opcional para arquivo de faturados YTD
             arquivo_rentabilidade: Caminho opcional para arquivo de rentabilidade
+            paralelo: Carregar os arquivos em paralelo (pool de processos)
+            max_workers: Número máximo de processos (padrão: nº de CPUs)
+            progress_callback: Função opcional (nome, segundos, linhas) chamada
+                               com o tempo de carga de cada arquivo
+            quadros_preparados: DataFrames já em memória por chave de entrada
+                                (FATURADOS, CONVERSOES, FATURADOS_YTD, ...)
         
         Returns:
             Dicionário com todos os DataFrames de dados de entrada
         """
-        data = {}
-        
-        # Carregar FATURADOS (com fallback)
-        data["FATURADOS"] = self._try_read_file(
-            arquivo_faturados,
-            [
-                "Faturados.xlsx",
-                "Faturados.xls",
-                "Faturados.csv",
-            ],
-            pattern_start="faturados",
-        )
-        
-        # Carregar CONVERSOES (com fallback)
-        data["CONVERSOES"] = self._try_read_file(
-            arquivo_conversoes,
-            [
-                "Conversões.xlsx",
-                "Conversoes.xlsx",
-                "Conversões.csv",
-                "Conversoes.csv",
-            ],
-            pattern_start="convers",
-        )
-        
-        # Carregar RENTABILIDADE_REALIZADA
-        data["RENTABILIDADE_REALIZADA"] = self.load_rentabilidade(
-            mes, ano, base_path, arquivo_rentabilidade
-        )
-        
-        # Carregar RETENCAO_CLIENTES
-        data["RETENCAO_CLIENTES"] = self._load_retencao_clientes(base_path)
-        
-        # Carregar FATURADOS_YTD
-        data["FATURADOS_YTD"] = self._load_faturados_ytd(
-            base_path, arquivo_faturados_ytd
-        )
-        
-        # Carregar RECEBIMENTOS (opcional)
-        data["RECEBIMENTOS"] = self._load_recebimentos(base_path)
-        
-        # Carregar PAGAMENTOS_REGULARES (opcional)
-        data["PAGAMENTOS_REGULARES"] = self._load_pagamentos_regulares(base_path)
-        
-        # Carregar ANALISE_COMERCIAL_COMPLETA (opcional, suporta .csv)
-        data["ANALISE_COMERCIAL_COMPLETA"] = self._load_analise_comercial(base_path)
-        
-        # Carregar STATUS_PAGAMENTOS (opcional)
-        data["STATUS_PAGAMENTOS"] = self._load_status_pagamentos(base_path)
+        tarefas = [
+            # FATURADOS (com fallback)
+            (
+                "FATURADOS",
+                "_try_read_file",
+                (
+                    arquivo_faturados,
+                    ["Faturados.xlsx", "Faturados.xls", "Faturados.csv"],
+                    "faturados",
+                ),
+            ),
+            # CONVERSOES (com fallback)
+            (
+                "CONVERSOES",
+                "_try_read_file",
+                (
+                    arquivo_conversoes,
+                    [
+                        "Conversões.xlsx",
+                        "Conversoes.xlsx",
+                        "Conversões.csv",
+                        "Conversoes.csv",
+                    ],
+                    "convers",
+                ),
+            ),
+            (
+                "RENTABILIDADE_REALIZADA",
+                "load_rentabilidade",
+                (mes, ano, base_path, arquivo_rentabilidade),
+            ),
+            ("RETENCAO_CLIENTES", "_load_retencao_clientes", (base_path,)),
+            ("FATURADOS_YTD", "_load_faturados_ytd", (base_path, arquivo_faturados_ytd)),
+            # Opcionais
+            ("RECEBIMENTOS", "_load_recebimentos", (base_path,)),
+            ("PAGAMENTOS_REGULARES", "_load_pagamentos_regulares", (base_path,)),
+            # ANALISE_COMERCIAL_COMPLETA (suporta .csv)
+            ("ANALISE_COMERCIAL_COMPLETA", "_load_analise_comercial", (base_path,)),
+            ("STATUS_PAGAMENTOS", "_load_status_pagamentos", (base_path,)),
+        ]
+
+        quadros_preparados = quadros_preparados or {}
+        ordem = [nome for nome, _, _ in tarefas]
+        tarefas = [t for t in tarefas if t[0] not in quadros_preparados]
+
+        data = None
+        if paralelo:
+            try:
+                data = self._carregar_em_paralelo(tarefas, max_workers, progress_callback)
+            except Exception as e:
+                print(f"[CARGA] AVISO: carga paralela indisponível ({e}); carregando em sequência")
+                data = None
+        if data is None:
+            data = {}
+            for nome, metodo, args in tarefas:
+                inicio = time.perf_counter()
+                data[nome] = getattr(self, metodo)(*args)
+                self._reportar_tempo(
+                    progress_callback, nome, data[nome], time.perf_counter() - inicio
+                )
+        for nome, df in quadros_preparados.items():
+            data[nome] = df
+            self._reportar_tempo(progress_callback, nome, df, 0.0)
+        data = {nome: data[nome] for nome in ordem if nome in data}
         
         # Normalizar colunas e strings
         data = self.normalize_input_dataframes(data)
         
         return data
     
+    @staticmethod
+    def _reportar_tempo(
+        progress_callback: Optional[Callable[[str, float, int], None]],
+        nome: str,
+        df: pd.DataFrame,
+        segundos: float,
+    ):
+        if progress_callback is None:
+            return
+        try:
+            progress_callback(nome, segundos, len(df) if isinstance(df, pd.DataFrame) else 0)
+        except Exception:
+            pass
+    
+    def _carregar_em_paralelo(
+        self,
+        tarefas: List[Tuple[str, str, tuple]],
+        max_workers: Optional[int],
+        progress_callback: Optional[Callable[[str, float, int], None]],
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Carrega os arquivos independentes em um pool de processos (a leitura
+        com openpyxl é CPU-bound e não escala com threads).
+        
+        Logs de validação e prints de cada carga são reproduzidos na ordem
+        original das tarefas, independentemente da ordem de conclusão.
+        """
+        workers = max_workers or min(len(tarefas), os.cpu_count() or 1)
+        data = {}
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futuros = [
+                (nome, pool.submit(_executar_carga, metodo, args))
+                for nome, metodo, args in tarefas
+            ]
+            for nome, futuro in futuros:
+                df, segundos, logs, saida = futuro.result()
+                if saida:
+                    sys.stdout.write(saida)
+                if self.validation_logger is not None:
+                    self.validation_logger.validation_log.extend(logs)
+                data[nome] = df
+                self._reportar_tempo(progress_callback, nome, df, segundos)
+        return data
+    
     def _try_read_file(
         self,
         primary_path: Optional[str],
@@ -124,7 +230,7 @@ class DataLoader:
         # Tentar caminho principal primeiro
         if primary_path and os.path.exists(primary_path):
             try:
-                return pd.read_excel(primary_path)
+                return ler_excel(primary_path)
             except Exception:
                 pass
         
@@ -132,7 +238,7 @@ class DataLoader:
         for candidate in fallback_candidates:
             try:
                 if os.path.exists(candidate):
-                    return pd.read_excel(candidate)
+                    return ler_excel(candidate)
             except Exception:
                 continue
         
@@ -145,7 +251,7 @@ class DataLoader:
                         and fname.lower().endswith((".xls", ".xlsx", ".csv"))
                     ):
                         try:
-                            return pd.read_excel(fname)
+                            return ler_excel(fname)
                         except Exception:
                             continue
             except Exception:
@@ -181,7 +287,7 @@ class DataLoader:
         if arquivo_rentabilidade and os.path.exists(arquivo_rentabilidade):
             print(f"[DEBUG RENTABILIDADE] Usando arquivo direto: {arquivo_rentabilidade}")
             try:
-                df = pd.read_excel(arquivo_rentabilidade)
+                df = ler_excel(arquivo_rentabilidade)
                 print(f"[DEBUG RENTABILIDADE] Arquivo carregado: {len(df)} linhas")
                 return df
             except Exception as e:
@@ -204,7 +310,7 @@ class DataLoader:
             print(f"[DEBUG RENTABILIDADE] Encontrados em dados_entrada/rentabilidades: {encontrados}")
             if encontrados:
                 try:
-                    df = pd.read_excel(encontrados[0])
+                    df = ler_excel(encontrados[0])
                     print(f"[DEBUG RENTABILIDADE] Arquivo carregado de dados_entrada/rentabilidades: {len(df)} linhas")
                     return df
                 except Exception as e:
@@ -219,7 +325,7 @@ class DataLoader:
             print(f"[DEBUG RENTABILIDADE] Encontrados em rentabilidades/: {encontrados}")
             if encontrados:
                 try:
-                    df = pd.read_excel(encontrados[0])
+                    df = ler_excel(encontrados[0])
                     print(f"[DEBUG RENTABILIDADE] Arquivo carregado de rentabilidades/: {len(df)} linhas")
                     return df
                 except Exception as e:
@@ -243,7 +349,7 @@ class DataLoader:
         arquivo_retencao = os.path.join(base_path, "Retencao_Clientes.xlsx")
         try:
             if os.path.exists(arquivo_retencao):
-                return pd.read_excel(arquivo_retencao)
+                return ler_excel(arquivo_retencao)
         except FileNotFoundError:
             pass
         except Exception:
@@ -263,7 +369,7 @@ class DataLoader:
         """Carrega arquivo de faturados YTD."""
         if arquivo_faturados_ytd and os.path.exists(arquivo_faturados_ytd):
             try:
-                return pd.read_excel(arquivo_faturados_ytd, parse_dates=["Dt Emissão"])
+                return ler_excel(arquivo_faturados_ytd, parse_dates=["Dt Emissão"])
             except Exception:
                 pass
         
@@ -271,7 +377,7 @@ class DataLoader:
         arquivo_padrao = os.path.join(base_path, "Faturados_YTD.xlsx")
         try:
             if os.path.exists(arquivo_padrao):
-                return pd.read_excel(arquivo_padrao, parse_dates=["Dt Emissão"])
+                return ler_excel(arquivo_padrao, parse_dates=["Dt Emissão"])
         except Exception:
             pass
         
@@ -286,7 +392,7 @@ class DataLoader:
         )
         try:
             if os.path.exists(arquivo_recebimentos):
-                return pd.read_excel(arquivo_recebimentos)
+                return ler_excel(arquivo_recebimentos)
         except Exception:
             pass
         
@@ -308,7 +414,7 @@ class DataLoader:
         )
         try:
             if os.path.exists(arquivo_pagamentos):
-                return pd.read_excel(arquivo_pagamentos)
+                return ler_excel(arquivo_pagamentos)
         except Exception:
             pass
         
@@ -357,27 +463,27 @@ class DataLoader:
         try:
             if analise_path.lower().endswith(".csv"):
                 # Tentar detectar delimitador automaticamente
-                df_anal = pd.read_csv(
+                df_anal = ler_csv(
                     analise_path, sep=None, engine="python", dtype=str
                 )
             else:
                 # Excel: inferir se existe coluna 'Dt Emissão' para parse_dates
                 try:
-                    hdrs = pd.read_excel(analise_path, nrows=0).columns.tolist()
+                    hdrs = ler_excel(analise_path, nrows=0).columns.tolist()
                 except Exception:
                     hdrs = []
                 parse_dates = (
                     ["Dt Emissão"] if "Dt Emissão" in hdrs else False
                 )
-                df_anal = pd.read_excel(
+                df_anal = ler_excel(
                     analise_path, parse_dates=parse_dates, dtype=str
                 )
             
-            # Normalizar colunas e strings (trim)
+            # Colunas de texto como str (NaN -> "nan"); o trim de colunas e
+            # valores é feito uma única vez em normalize_input_dataframes
             if not df_anal.empty:
-                df_anal.columns = df_anal.columns.str.strip()
                 for c in df_anal.select_dtypes(include=["object"]):
-                    df_anal[c] = df_anal[c].astype(str).str.strip()
+                    df_anal[c] = df_anal[c].astype(str)
             
             return df_anal
         except Exception as e_read:
@@ -395,7 +501,7 @@ class DataLoader:
         )
         try:
             if os.path.exists(arquivo_status):
-                return pd.read_excel(arquivo_status)
+                return ler_excel(arquivo_status)
         except Exception:
             pass
         
@@ -415,30 +521,5 @@ class DataLoader:
         Returns:
             Dicionário com DataFrames normalizados
         """
-        for df_name, df_any in list(data.items()):
-            try:
-                if not isinstance(df_any, pd.DataFrame):
-                    continue
-                try:
-                    df_any.columns = df_any.columns.astype(str).str.strip()
-                except Exception:
-                    pass
-                for col in df_any.columns:
-                    s = df_any[col]
-                    if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
-                        try:
-                            df_any[col] = s.apply(
-                                lambda v: v.strip() if isinstance(v, str) else v
-                            )
-                        except Exception:
-                            pass
-                data[df_name] = df_any
-            except Exception as e:
-                if self.validation_logger:
-                    self.validation_logger.aviso(
-                        f"Falha ao normalizar strings para {df_name}: {e}",
-                        {},
-                    )
-        
-        return data
+        return normalize_dataframes(data, self.validation_logger)
 
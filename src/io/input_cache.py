@@ -0,0 +1,368 @@
+"""
+Cache de leitura das planilhas de entrada (Excel/CSV).
+
+As mesmas planilhas (Regras_Comissoes.xlsx, Faturados.xlsx, Análise Comercial,
+Análise Financeira...) são lidas a cada execução do robô, do pré-scan e do
+frontend. Este módulo guarda o resultado do parse em disco e o reutiliza
+enquanto o arquivo de origem não mudar:
+
+    - chave = hash SHA-256 do conteúdo + leitor/argumentos da leitura
+      (ex.: sheet_name, dtype, converters);
+    - o hash de cada arquivo (caminho absoluto) é reaproveitado enquanto
+      tamanho e mtime não mudarem;
+    - os DataFrames são gravados em Parquet (pyarrow/fastparquet) quando
+      possível; dicts de abas, colunas com tipos mistos ou ambientes sem
+      engine Parquet usam pickle do pandas;
+    - qualquer falha do cache cai na leitura normal do arquivo.
+
+Configuração pela variável de ambiente COMISSOES_CACHE_ENTRADAS:
+    (ausente)          cache ativo em <raiz do projeto>/.cache/entradas
+    0 | off | false    cache desativado
+    <diretório>        cache ativo no diretório informado
+
+Inspeção e limpeza:
+
+    python -m src.io.input_cache listar
+    python -m src.io.input_cache limpar [--dias 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+VERSAO_CACHE = 1
+DIRETORIO_PADRAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".cache",
+    "entradas",
+)
+_DESATIVADO = ("0", "off", "false", "nao", "não", "desativado")
+
+
+def _sha256_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _engine_parquet_disponivel() -> bool:
+    return any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+
+
+def _gravar_atomico(destino: str, gravar: Callable[[str], None]) -> None:
+    """Grava em arquivo temporário e renomeia (seguro com processos concorrentes)."""
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    try:
+        gravar(tmp)
+        os.replace(tmp, destino)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _gravar_json(destino: str, dados: Dict[str, Any]) -> None:
+    def gravar(tmp: str) -> None:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+
+    _gravar_atomico(destino, gravar)
+
+
+class CacheEntradas:
+    """Cache em disco do resultado de pd.read_excel/pd.read_csv por arquivo."""
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO, formato: str = "auto"):
+        self.diretorio = diretorio
+        self.formato = formato
+        self.acertos = 0
+        self.falhas = 0
+
+    # ------------------------------------------------------------------ chaves
+    def _hash_conteudo(self, caminho: str, st: os.stat_result) -> str:
+        """Hash do conteúdo, reaproveitado enquanto tamanho e mtime não mudarem."""
+        marcador = os.path.join(
+            self.diretorio,
+            "hashes",
+            hashlib.sha1(caminho.encode("utf-8")).hexdigest() + ".json",
+        )
+        try:
+            with open(marcador, encoding="utf-8") as f:
+                info = json.load(f)
+            if info["tamanho"] == st.st_size and info["mtime_ns"] == st.st_mtime_ns:
+                return info["sha256"]
+        except (OSError, ValueError, KeyError):
+            pass
+        sha = _sha256_arquivo(caminho)
+        os.makedirs(os.path.dirname(marcador), exist_ok=True)
+        info = {"caminho": caminho, "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+        _gravar_json(marcador, info)
+        return sha
+
+    @staticmethod
+    def _variante(leitor: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Identifica a forma da leitura; None se os argumentos não forem estáveis."""
+        descricao = repr((VERSAO_CACHE, leitor, sorted(kwargs.items(), key=lambda kv: kv[0])))
+        if " at 0x" in descricao:  # lambdas/objetos sem repr estável
+            return None
+        return hashlib.sha1(descricao.encode("utf-8")).hexdigest()[:16]
+
+    # ----------------------------------------------------------- armazenamento
+    def _salvar(self, base: str, obj: Any, meta: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        formato = "pickle"
+        if (
+            self.formato in ("auto", "parquet")
+            and isinstance(obj, pd.DataFrame)
+            and _engine_parquet_disponivel()
+            and all(isinstance(c, str) for c in obj.columns)
+        ):
+            try:
+                _gravar_atomico(base + ".parquet", lambda tmp: obj.to_parquet(tmp, index=True))
+                formato = "parquet"
+            except Exception:
+                formato = "pickle"
+        if formato == "pickle":
+            _gravar_atomico(base + ".pkl", lambda tmp: pd.to_pickle(obj, tmp))
+        meta = dict(meta, formato=formato, criado_em=datetime.now().isoformat(timespec="seconds"))
+        _gravar_json(base + ".json", meta)
+
+    @staticmethod
+    def _carregar(base: str) -> Any:
+        if os.path.exists(base + ".parquet"):
+            return pd.read_parquet(base + ".parquet")
+        if os.path.exists(base + ".pkl"):
+            return pd.read_pickle(base + ".pkl")
+        raise FileNotFoundError(base)
+
+    # ------------------------------------------------------------------ leitura
+    def ler(self, caminho: str, leitor: str, funcao: Callable[..., Any], **kwargs) -> Any:
+        """
+        Lê `caminho` com `funcao(caminho, **kwargs)`, usando o cache quando possível.
+
+        Args:
+            caminho: Arquivo de origem
+            leitor: Nome do leitor (ex.: "excel", "csv"), parte da chave
+            funcao: Função de leitura real (pd.read_excel, pd.read_csv...)
+        """
+        try:
+            origem = os.path.abspath(os.fspath(caminho))
+            st = os.stat(origem)
+            variante = self._variante(leitor, kwargs)
+        except (OSError, TypeError):
+            return funcao(caminho, **kwargs)
+        if variante is None:
+            return funcao(caminho, **kwargs)
+
+        try:
+            sha = self._hash_conteudo(origem, st)
+            base = os.path.join(self.diretorio, "dados", f"{sha[:32]}_{variante}")
+            if os.path.exists(base + ".json"):
+                obj = self._carregar(base)
+                self.acertos += 1
+                return obj
+        except Exception:
+            return funcao(caminho, **kwargs)
+
+        obj = funcao(caminho, **kwargs)
+        self.falhas += 1
+        try:
+            self._salvar(
+                base,
+                obj,
+                {
+                    "origem": origem,
+                    "tamanho": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "sha256": sha,
+                    "leitor": leitor,
+                    "argumentos": repr(kwargs),
+                },
+            )
+            self._remover_substituidas(origem, repr(kwargs), os.path.basename(base))
+        except Exception as e:
+            print(f"[CACHE] AVISO: não foi possível gravar o cache de {origem}: {e}")
+        return obj
+
+    def _remover_substituidas(self, origem: str, argumentos: str, chave_atual: str) -> None:
+        """Remove entradas anteriores da mesma origem/leitura (arquivo regravado)."""
+        pasta = os.path.join(self.diretorio, "dados")
+        for nome in os.listdir(pasta):
+            base = os.path.join(pasta, nome[: -len(".json")])
+            if not nome.endswith(".json") or os.path.basename(base) == chave_atual:
+                continue
+            try:
+                with open(base + ".json", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get("origem") == origem and meta.get("argumentos") == argumentos:
+                self._remover_entrada(base)
+
+    @staticmethod
+    def _remover_entrada(base: str) -> None:
+        for ext in (".json", ".parquet", ".pkl"):
+            try:
+                os.remove(base + ext)
+            except FileNotFoundError:
+                pass
+
+    # --------------------------------------------------------------- inspeção
+    def listar(self) -> pd.DataFrame:
+        """Entradas do cache (origem, leitor, formato, tamanho em disco, data)."""
+        pasta = os.path.join(self.diretorio, "dados")
+        linhas = []
+        if os.path.isdir(pasta):
+            for nome in sorted(os.listdir(pasta)):
+                if not nome.endswith(".json"):
+                    continue
+                base = os.path.join(pasta, nome[: -len(".json")])
+                try:
+                    with open(base + ".json", encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                dados = base + (".parquet" if meta.get("formato") == "parquet" else ".pkl")
+                linhas.append(
+                    {
+                        "origem": meta.get("origem"),
+                        "leitor": meta.get("leitor"),
+                        "argumentos": meta.get("argumentos"),
+                        "formato": meta.get("formato"),
+                        "bytes": os.path.getsize(dados) if os.path.exists(dados) else 0,
+                        "criado_em": meta.get("criado_em"),
+                        "atual": self._entrada_atual(meta),
+                        "chave": os.path.basename(base),
+                    }
+                )
+        return pd.DataFrame(
+            linhas,
+            columns=["origem", "leitor", "argumentos", "formato", "bytes", "criado_em", "atual", "chave"],
+        )
+
+    @staticmethod
+    def _entrada_atual(meta: Dict[str, Any]) -> bool:
+        """True se a origem ainda existe com o mesmo tamanho/mtime."""
+        try:
+            st = os.stat(meta["origem"])
+        except (OSError, KeyError, TypeError):
+            return False
+        return st.st_size == meta.get("tamanho") and st.st_mtime_ns == meta.get("mtime_ns")
+
+    def limpar(self, dias: Optional[float] = None, apenas_obsoletas: bool = False) -> int:
+        """
+        Remove entradas do cache.
+
+        Args:
+            dias: Remove apenas entradas criadas há mais de `dias` dias
+            apenas_obsoletas: Remove apenas entradas cuja origem mudou ou sumiu
+
+        Returns:
+            Quantidade de entradas removidas
+        """
+        pasta = os.path.join(self.diretorio, "dados")
+        if not os.path.isdir(pasta):
+            return 0
+        limite = time.time() - dias * 86400 if dias is not None else None
+        removidas = 0
+        for nome in os.listdir(pasta):
+            if not nome.endswith(".json"):
+                continue
+            base = os.path.join(pasta, nome[: -len(".json")])
+            if limite is not None and os.path.getmtime(base + ".json") > limite:
+                continue
+            if apenas_obsoletas:
+                try:
+                    with open(base + ".json", encoding="utf-8") as f:
+                        if self._entrada_atual(json.load(f)):
+                            continue
+                except (OSError, ValueError):
+                    pass
+            self._remover_entrada(base)
+            removidas += 1
+        if dias is None and not apenas_obsoletas:
+            pasta_hashes = os.path.join(self.diretorio, "hashes")
+            if os.path.isdir(pasta_hashes):
+                for nome in os.listdir(pasta_hashes):
+                    os.remove(os.path.join(pasta_hashes, nome))
+        return removidas
+
+
+_CACHE: Optional[CacheEntradas] = None
+_CACHE_CONFIG: Optional[str] = None
+
+
+def obter_cache_entradas() -> Optional[CacheEntradas]:
+    """Cache configurado por COMISSOES_CACHE_ENTRADAS (None se desativado)."""
+    global _CACHE, _CACHE_CONFIG
+    config = os.getenv("COMISSOES_CACHE_ENTRADAS", "").strip()
+    if config.lower() in _DESATIVADO:
+        return None
+    if _CACHE is None or config != _CACHE_CONFIG:
+        _CACHE = CacheEntradas(config or DIRETORIO_PADRAO)
+        _CACHE_CONFIG = config
+    return _CACHE
+
+
+def ler_excel(caminho, **kwargs) -> Any:
+    """pd.read_excel com cache (mesma assinatura)."""
+    cache = obter_cache_entradas()
+    if cache is None:
+        return pd.read_excel(caminho, **kwargs)
+    return cache.ler(caminho, "excel", pd.read_excel, **kwargs)
+
+
+def ler_csv(caminho, **kwargs) -> Any:
+    """pd.read_csv com cache (mesma assinatura)."""
+    cache = obter_cache_entradas()
+    if cache is None:
+        return pd.read_csv(caminho, **kwargs)
+    return cache.ler(caminho, "csv", pd.read_csv, **kwargs)
+
+
+def ler_com_cache(caminho, leitor: str, funcao: Callable[..., Any], **kwargs) -> Any:
+    """
+    funcao(caminho, **kwargs) com cache, para leitores próprios (ex.: leitura
+    em blocos com filtros). `leitor` identifica a função na chave do cache.
+    """
+    cache = obter_cache_entradas()
+    if cache is None:
+        return funcao(caminho, **kwargs)
+    return cache.ler(caminho, leitor, funcao, **kwargs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspeciona/limpa o cache de planilhas de entrada")
+    parser.add_argument("acao", choices=("listar", "limpar"))
+    parser.add_argument("--diretorio", default=None, help="Diretório do cache")
+    parser.add_argument("--dias", type=float, default=None, help="Limpar entradas mais antigas que N dias")
+    parser.add_argument("--obsoletas", action="store_true", help="Limpar apenas entradas cuja origem mudou")
+    args = parser.parse_args(argv)
+
+    cache = CacheEntradas(args.diretorio) if args.diretorio else (obter_cache_entradas() or CacheEntradas())
+    if args.acao == "listar":
+        df = cache.listar()
+        if df.empty:
+            print(f"[CACHE] Nenhuma entrada em {cache.diretorio}")
+        else:
+            with pd.option_context("display.max_colwidth", 60, "display.width", 200):
+                print(df.drop(columns=["argumentos"]).to_string(index=False))
+            print(f"[CACHE] {len(df)} entrada(s), {int(df['bytes'].sum())} bytes em {cache.diretorio}")
+    else:
+        total = cache.limpar(dias=args.dias, apenas_obsoletas=args.obsoletas)
+        print(f"[CACHE] {total} entrada(s) removida(s) de {cache.diretorio}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,417 @@
+"""
+Gravação das planilhas de saída (Comissoes_Calculadas, Comissoes_Recebimento)
+em uma única passada, com os estilos aplicados durante a escrita.
+
+A gravação anterior usava pd.ExcelWriter(engine="openpyxl"), que monta o
+workbook inteiro em memória, e depois reabria o arquivo com load_workbook
+para pintar as células uma a uma e salvar de novo. Aqui cada aba é escrita
+linha a linha, em blocos de LINHAS_POR_BLOCO linhas convertidos um de cada
+vez, e o arquivo é salvo uma vez:
+
+    - xlsxwriter (constant_memory) quando instalado: larguras e cores de
+      grupo viram formatos de coluna;
+    - openpyxl em modo write-only (streaming) caso contrário: larguras por
+      coluna e estilos nas células escritas;
+    - "pandas": o ExcelWriter anterior, sem estilos (o chamador aplica o
+      pós-processamento antigo). Mantido como alternativa.
+
+Os valores gravados são os mesmos do DataFrame.to_excel(index=False): ausentes
+viram células vazias, ±inf vira "inf"/"-inf", datas usam os formatos do pandas
+e tipos não suportados pelo Excel são gravados como texto.
+
+Uso:
+    with PlanilhaSaida("saida.xlsx") as planilha:
+        planilha.escrever(df, "COMISSOES_CALCULADAS", cores_colunas={3: "E3F2FD"})
+        planilha.escrever(df_resumo, "RESUMO_COLABORADOR")
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import importlib.util
+import itertools
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+MOTORES = ("xlsxwriter", "openpyxl", "pandas")
+LARGURA_MAXIMA = 50
+# Linhas convertidas por vez em escrever(): a memória extra fica em O(bloco × colunas)
+LINHAS_POR_BLOCO = 10_000
+# Formatos de data do DataFrame.to_excel
+FORMATO_DATA_HORA = "YYYY-MM-DD HH:MM:SS"
+FORMATO_DATA = "YYYY-MM-DD"
+# Cabeçalho padrão do DataFrame.to_excel (pandas >= 3: sem estilo)
+CABECALHO_PADRAO = {"negrito": False, "borda": False, "horizontal": None, "vertical": None}
+
+
+def motor_padrao() -> str:
+    """xlsxwriter se instalado; senão openpyxl (write-only)."""
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        return "xlsxwriter"
+    return "openpyxl"
+
+
+def resolver_motor(nome: Optional[str]) -> str:
+    """Normaliza o motor pedido ('auto', 'legado'...) para um de MOTORES disponível."""
+    nome = str(nome or "auto").strip().lower()
+    if nome in ("legado", "excelwriter"):
+        nome = "pandas"
+    if nome == "xlsxwriter" and importlib.util.find_spec("xlsxwriter") is None:
+        print("[SAIDA] AVISO: xlsxwriter não instalado; usando openpyxl (streaming)")
+        return "openpyxl"
+    if nome not in MOTORES:
+        return motor_padrao()
+    return nome
+
+
+def _textos_coluna(serie: pd.Series) -> pd.Series:
+    """Texto de cada valor como aparece na planilha (floats com 16 dígitos, como o openpyxl grava)."""
+    if pd.api.types.is_float_dtype(serie.dtype):
+        valores = serie.to_numpy(dtype=float, na_value=np.nan)
+        return pd.Series(np.char.mod("%.16g", valores), index=serie.index)
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie.dt.strftime("%Y-%m-%d %H:%M:%S")
+    return serie.astype(str)
+
+
+def larguras_colunas(df: pd.DataFrame, maximo: int = LARGURA_MAXIMA) -> Dict[int, int]:
+    """{índice: largura} pelo maior texto da coluna (cabeçalho incluído) + 2, limitado a `maximo`."""
+    larguras = {}
+    for c in range(df.shape[1]):
+        serie = df.iloc[:, c]
+        tamanho = len(str(df.columns[c]))
+        if len(serie):
+            comprimentos = _textos_coluna(serie).where(serie.notna(), "").str.len()
+            tamanho = max(tamanho, int(comprimentos.max()))
+        larguras[c] = min(tamanho + 2, maximo)
+    return larguras
+
+
+def _valor_celula(valor):
+    """Conversão de ExcelWriter._value_with_fmt para valores de colunas object."""
+    if valor is None:
+        return None
+    if pd.api.types.is_scalar(valor) and pd.isna(valor):
+        return None
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)):
+        valor = float(valor)
+        if np.isinf(valor):
+            return "inf" if valor > 0 else "-inf"
+        return valor
+    if isinstance(valor, (str, _dt.datetime, _dt.date)):
+        return valor
+    if isinstance(valor, _dt.timedelta):
+        return valor.total_seconds() / 86400
+    return str(valor)
+
+
+def _valores_coluna(serie: pd.Series) -> List[Any]:
+    """Valores da coluna prontos para a célula (None = célula vazia)."""
+    tipo = serie.dtype
+    if pd.api.types.is_bool_dtype(tipo) and not pd.api.types.is_object_dtype(tipo):
+        return [None if pd.isna(v) else bool(v) for v in serie.tolist()]
+    if pd.api.types.is_integer_dtype(tipo) and not serie.isna().any():
+        return serie.tolist()
+    if pd.api.types.is_float_dtype(tipo):
+        valores = serie.to_numpy(dtype=float, na_value=np.nan)
+        saida = valores.astype(object)
+        saida[np.isnan(valores)] = None
+        saida[np.isposinf(valores)] = "inf"
+        saida[np.isneginf(valores)] = "-inf"
+        return saida.tolist()
+    if pd.api.types.is_datetime64_any_dtype(tipo):
+        return [None if pd.isna(v) else v for v in serie.astype(object).tolist()]
+    return [_valor_celula(v) for v in serie.astype(object).tolist()]
+
+
+def _blocos_valores(df: pd.DataFrame, tamanho: int) -> Iterator[List[List[Any]]]:
+    """Valores convertidos (uma lista por coluna) de `tamanho` linhas por vez."""
+    for inicio in range(0, len(df), tamanho):
+        bloco = df.iloc[inicio:inicio + tamanho]
+        yield [_valores_coluna(bloco.iloc[:, c]) for c in range(bloco.shape[1])]
+
+
+class PlanilhaSaida:
+    """
+    Workbook de saída gravado aba a aba, em uma passada.
+
+    Args:
+        caminho: Arquivo .xlsx de saída
+        motor: 'xlsxwriter' | 'openpyxl' | 'pandas' | 'auto' (padrão)
+    """
+
+    def __init__(self, caminho: str, motor: Optional[str] = None):
+        self.caminho = caminho
+        self.motor = resolver_motor(motor)
+        self.abas: List[str] = []
+        # nome da aba -> {"ws", "linha" (próxima linha livre), "cores", "cor_linhas"}
+        self._estado: Dict[str, Dict[str, Any]] = {}
+        self._formatos: Dict[Any, Any] = {}
+        if self.motor == "xlsxwriter":
+            import xlsxwriter
+
+            self._wb = xlsxwriter.Workbook(
+                caminho,
+                {
+                    "constant_memory": True,
+                    "strings_to_urls": False,
+                    "default_date_format": FORMATO_DATA_HORA,
+                },
+            )
+        elif self.motor == "openpyxl":
+            from openpyxl import Workbook
+
+            self._wb = Workbook(write_only=True)
+        else:
+            self._wb = pd.ExcelWriter(caminho, engine="openpyxl")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        """Salva o arquivo (uma única vez)."""
+        if self._wb is None:
+            return
+        wb, self._wb = self._wb, None
+        if self.motor == "openpyxl":
+            if not self.abas:
+                wb.create_sheet("Sheet")
+            wb.save(self.caminho)
+        else:
+            wb.close()
+
+    def escrever(
+        self,
+        df: pd.DataFrame,
+        nome: str,
+        cabecalho: Optional[Dict[str, Any]] = None,
+        cores_colunas: Optional[Dict[int, str]] = None,
+        cor_linhas: Optional[str] = None,
+        larguras: Any = True,
+        linha_inicial: Optional[int] = None,
+    ):
+        """
+        Grava `df` (sem índice) na aba `nome`.
+
+        Args:
+            cabecalho: Estilo do cabeçalho (chaves de CABECALHO_PADRAO, cor_fonte,
+                cor_fundo); padrão: o cabeçalho do DataFrame.to_excel
+            cores_colunas: {índice da coluna: 'RRGGBB'} pintando cabeçalho e dados
+            cor_linhas: 'RRGGBB' das linhas de dados
+            larguras: True (pelo conteúdo), False (padrão do Excel) ou {índice: largura}
+            linha_inicial: Linha (base 0) do cabeçalho, como startrow do to_excel.
+                Em aba já gravada continua abaixo do conteúdo existente (as
+                cores de coluna da primeira gravação são mantidas); as linhas
+                são escritas em ordem, então não pode voltar para cima.
+
+        Os dados são convertidos e gravados em blocos de LINHAS_POR_BLOCO linhas;
+        cada bloco é convertido por inteiro antes de ser gravado. Uma falha de
+        conversão no primeiro bloco não cria a aba; em um bloco seguinte a
+        exceção é propagada com a aba gravada até o bloco anterior.
+        """
+        estado = self._estado.get(nome)
+        linha = linha_inicial or 0
+        if estado is not None and linha_inicial is None:
+            raise ValueError(f"aba '{nome}' já gravada em {self.caminho}")
+        if estado is not None and linha < estado["linha"]:
+            raise ValueError(
+                f"aba '{nome}': linha {linha} já escrita (próxima livre: {estado['linha']})"
+            )
+        if self.motor == "pandas":
+            df.to_excel(self._wb, sheet_name=nome, index=False, startrow=linha)
+            self._registrar(nome, None, linha + len(df) + 1, None, None)
+            return
+
+        # Primeiro bloco convertido antes de criar a aba: uma falha aqui não deixa aba pela metade
+        blocos = _blocos_valores(df, LINHAS_POR_BLOCO)
+        primeiro = next(blocos, None)
+        blocos = blocos if primeiro is None else itertools.chain([primeiro], blocos)
+        cabecalhos = [_valor_celula(c) for c in df.columns]
+        cabecalho = {**CABECALHO_PADRAO, **(cabecalho or {})}
+        if estado is None:
+            if larguras is True:
+                larguras = larguras_colunas(df)
+            ws = self._nova_aba(nome, larguras or {}, cores_colunas or {})
+            estado = self._registrar(nome, ws, 0, cores_colunas or {}, cor_linhas)
+        elif cores_colunas is None and cor_linhas is None:
+            cores_colunas, cor_linhas = estado["cores"], estado["cor_linhas"]
+        cores_colunas = cores_colunas or {}
+
+        escrever_linhas = (
+            self._linhas_xlsxwriter if self.motor == "xlsxwriter" else self._linhas_openpyxl
+        )
+        escrever_linhas(estado, linha, cabecalhos, blocos, cabecalho, cores_colunas, cor_linhas)
+        estado["linha"] = linha + len(df) + 1
+
+    def _registrar(self, nome, ws, linha, cores, cor_linhas):
+        if nome not in self._estado:
+            self.abas.append(nome)
+            self._estado[nome] = {"ws": ws, "linha": linha, "cores": cores, "cor_linhas": cor_linhas}
+        self._estado[nome]["linha"] = linha
+        return self._estado[nome]
+
+    def _nova_aba(self, nome, larguras, cores_colunas):
+        if self.motor == "xlsxwriter":
+            ws = self._wb.add_worksheet(nome)
+            # Cor de grupo e largura como formato da coluna
+            for c in sorted(set(larguras) | set(cores_colunas)):
+                cor = cores_colunas.get(c)
+                formato = self._formato(bg_color="#" + cor, pattern=1) if cor else None
+                ws.set_column(c, c, larguras.get(c, 8.43), formato)
+            return ws
+
+        from openpyxl.utils import get_column_letter
+
+        ws = self._wb.create_sheet(nome)
+        # Write-only: larguras antes da primeira linha
+        for c, largura in larguras.items():
+            ws.column_dimensions[get_column_letter(c + 1)].width = largura
+        return ws
+
+    # ------------------------------------------------------------------ xlsxwriter
+    def _formato(self, **propriedades):
+        chave = tuple(sorted(propriedades.items()))
+        if chave not in self._formatos:
+            self._formatos[chave] = self._wb.add_format(propriedades)
+        return self._formatos[chave]
+
+    def _formato_cabecalho(self, estilo: Dict[str, Any], fundo: Optional[str]):
+        propriedades = {"bold": True} if estilo.get("negrito") else {}
+        if estilo.get("borda"):
+            propriedades["border"] = 1
+        if estilo.get("horizontal"):
+            propriedades["align"] = estilo["horizontal"]
+        if estilo.get("vertical"):
+            propriedades["valign"] = "vcenter" if estilo["vertical"] == "center" else estilo["vertical"]
+        if estilo.get("cor_fonte"):
+            propriedades["font_color"] = "#" + estilo["cor_fonte"]
+        fundo = fundo or estilo.get("cor_fundo")
+        if fundo:
+            propriedades.update({"bg_color": "#" + fundo, "pattern": 1})
+        return self._formato(**propriedades) if propriedades else None
+
+    def _linhas_xlsxwriter(self, estado, inicio, cabecalhos, blocos, cabecalho, cores_colunas, cor_linhas):
+        ws = estado["ws"]
+        formatos = []
+        formatos_data = []
+        for c in range(len(cabecalhos)):
+            fundo = cor_linhas or cores_colunas.get(c)
+            cor = {"bg_color": "#" + fundo, "pattern": 1} if fundo else {}
+            formatos.append(self._formato(**cor) if cor else None)
+            formatos_data.append(
+                (
+                    self._formato(num_format=FORMATO_DATA_HORA, **cor),
+                    self._formato(num_format=FORMATO_DATA, **cor),
+                )
+            )
+
+        for c, valor in enumerate(cabecalhos):
+            ws.write(inicio, c, valor, self._formato_cabecalho(cabecalho, cores_colunas.get(c)))
+        linhas = (linha for colunas in blocos for linha in zip(*colunas))
+        for r, linha in enumerate(linhas, start=inicio + 1):
+            for c, valor in enumerate(linha):
+                if isinstance(valor, _dt.date):
+                    datahora, data = formatos_data[c]
+                    ws.write_datetime(r, c, valor, datahora if isinstance(valor, _dt.datetime) else data)
+                elif valor is not None or formatos[c] is not None:
+                    ws.write(r, c, valor, formatos[c])
+
+    # ------------------------------------------------------------------ openpyxl
+    def _estilo_openpyxl(self, ws, fundo: Optional[str], formato: Optional[str]):
+        """Estilo (StyleArray) de célula com fundo/formato, registrado uma vez por combinação."""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import PatternFill
+
+        chave = (fundo, formato)
+        if chave not in self._formatos:
+            modelo = WriteOnlyCell(ws)
+            if fundo:
+                modelo.fill = PatternFill(start_color=fundo, end_color=fundo, fill_type="solid")
+            if formato:
+                modelo.number_format = formato
+            self._formatos[chave] = modelo._style
+        return self._formatos[chave]
+
+    def _linhas_openpyxl(self, estado, inicio, cabecalhos, blocos, cabecalho, cores_colunas, cor_linhas):
+        from copy import copy
+
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+        def celula(valor, estilo):
+            # Atribuir fill/number_format célula a célula registra o estilo de novo a cada vez
+            nova = WriteOnlyCell(ws, value=valor)
+            nova._style = copy(estilo)
+            return nova
+
+        ws = estado["ws"]
+        # Colunas pintadas além da tabela (ex.: resumo mais estreito abaixo do detalhe)
+        total = max([len(cabecalhos)] + [c + 1 for c in cores_colunas])
+        fundos = [cor_linhas or cores_colunas.get(c) for c in range(total)]
+        estilos = [
+            {
+                None: self._estilo_openpyxl(ws, fundo, None) if fundo else None,
+                _dt.datetime: self._estilo_openpyxl(ws, fundo, FORMATO_DATA_HORA),
+                _dt.date: self._estilo_openpyxl(ws, fundo, FORMATO_DATA),
+            }
+            for fundo in fundos
+        ]
+        estilizadas = [c for c, f in enumerate(fundos) if f]
+        extras = [None] * (total - len(cabecalhos))
+
+        # Linhas entre o conteúdo anterior e o novo cabeçalho (startrow)
+        for _ in range(estado["linha"], inicio):
+            vazia = [None] * total if total else [None]
+            for c in estilizadas:
+                vazia[c] = celula(None, estilos[c][None])
+            ws.append(vazia)
+
+        fina = Side(style="thin")
+        fonte = None
+        if cabecalho.get("negrito") or cabecalho.get("cor_fonte"):
+            fonte = Font(bold=bool(cabecalho.get("negrito")), color=cabecalho.get("cor_fonte"))
+        borda = Border(left=fina, right=fina, top=fina, bottom=fina) if cabecalho.get("borda") else None
+        alinhamento = None
+        if cabecalho.get("horizontal") or cabecalho.get("vertical"):
+            alinhamento = Alignment(horizontal=cabecalho.get("horizontal"), vertical=cabecalho.get("vertical"))
+        linha_cabecalho = []
+        for c, valor in enumerate(cabecalhos + extras):
+            if c >= len(cabecalhos):
+                linha_cabecalho.append(celula(None, estilos[c][None]))
+                continue
+            nova = WriteOnlyCell(ws, value=valor)
+            if fonte is not None:
+                nova.font = fonte
+            if alinhamento is not None:
+                nova.alignment = alinhamento
+            if borda is not None:
+                nova.border = borda
+            fundo = cores_colunas.get(c) or cabecalho.get("cor_fundo")
+            if fundo:
+                nova.fill = PatternFill(start_color=fundo, end_color=fundo, fill_type="solid")
+            linha_cabecalho.append(nova)
+        ws.append(linha_cabecalho)
+
+        for linha in (linha for colunas in blocos for linha in zip(*colunas)):
+            if not estilizadas and not any(isinstance(v, _dt.date) for v in linha):
+                ws.append(linha)
+                continue
+            linha = linha + tuple(extras)
+            celulas = list(linha)
+            for c, valor in enumerate(linha):
+                if isinstance(valor, _dt.date):
+                    tipo = _dt.datetime if isinstance(valor, _dt.datetime) else _dt.date
+                    celulas[c] = celula(valor, estilos[c][tipo])
+                elif fundos[c]:
+                    celulas[c] = celula(valor, estilos[c][None])
+            ws.append(celulas)
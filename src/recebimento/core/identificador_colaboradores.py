@@ -3,7 +3,9 @@ Identifica colaboradores envolvidos em um processo que recebem por recebimento.
 """
 
 import pandas as pd
-from typing import List, Dict, Set
+from typing import List, Dict, Optional, Set
+
+from ...core.process_index import ProcessIndex
 
 
 class IdentificadorColaboradores:
@@ -17,7 +19,8 @@ class IdentificadorColaboradores:
         df_analise_comercial: pd.DataFrame,
         colaboradores_df: pd.DataFrame,
         atribuicoes_df: pd.DataFrame,
-        recebe_por_recebimento_ids: Set[str]
+        recebe_por_recebimento_ids: Set[str],
+        indice_processos: Optional[ProcessIndex] = None,
     ):
         """
         Inicializa o identificador.
@@ -27,11 +30,22 @@ class IdentificadorColaboradores:
             colaboradores_df: DataFrame de colaboradores (com cargo)
             atribuicoes_df: DataFrame de atribuições (gestão)
             recebe_por_recebimento_ids: Set com nomes de colaboradores que recebem por recebimento
+            indice_processos: Índice por processo já construído sobre a mesma
+                              Análise Comercial (opcional; construído sob demanda)
         """
         self.df_comercial = df_analise_comercial
         self.colaboradores_df = colaboradores_df
         self.atribuicoes_df = atribuicoes_df
         self.recebe_por_recebimento_ids = recebe_por_recebimento_ids
+        if indice_processos is not None and indice_processos.df is not df_analise_comercial:
+            indice_processos = None
+        self._indice_processos = indice_processos
+
+    def _obter_indice_processos(self) -> ProcessIndex:
+        """Índice por processo da Análise Comercial (construído uma única vez)."""
+        if self._indice_processos is None:
+            self._indice_processos = ProcessIndex(self.df_comercial)
+        return self._indice_processos
     
     def identificar_colaboradores(self, processo: str) -> List[Dict[str, str]]:
         """
@@ -49,14 +63,12 @@ class IdentificadorColaboradores:
         if self.df_comercial.empty:
             return []
         
-        # Encontrar coluna de processo
-        proc_col = self._encontrar_coluna(["processo", "Processo", "PROCESSO"])
-        if not proc_col:
+        # Itens do processo via índice (coluna de processo ausente => sem itens)
+        indice = self._obter_indice_processos()
+        if not indice.coluna_processo:
             return []
         
-        itens = self.df_comercial[
-            self.df_comercial[proc_col].astype(str).str.strip() == processo
-        ]
+        itens = indice.itens(processo)
         
         if itens.empty:
             return []
@@ -8,6 +8,8 @@ import numpy as np
 from typing import Dict, Optional
 from datetime import datetime
 
+from ...utils import diagnostics
+
 from .identificador_colaboradores import IdentificadorColaboradores
 
 
@@ -29,12 +31,13 @@ class MetricasCalculator:
         """
         self.calc_comissao = calculo_comissao_instance
         
-        # Inicializar identificador de colaboradores
+        # Inicializar identificador de colaboradores (compartilha o índice por processo)
         self.identificador = IdentificadorColaboradores(
             df_analise_comercial=calculo_comissao_instance.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame()),
             colaboradores_df=calculo_comissao_instance.data.get("COLABORADORES", pd.DataFrame()),
             atribuicoes_df=calculo_comissao_instance.data.get("ATRIBUICOES", pd.DataFrame()),
-            recebe_por_recebimento_ids=calculo_comissao_instance.recebe_por_recebimento
+            recebe_por_recebimento_ids=calculo_comissao_instance.recebe_por_recebimento,
+            indice_processos=calculo_comissao_instance._obter_indice_processos(),
         )
     
     def calcular_metricas_processo(
@@ -57,41 +60,43 @@ class MetricasCalculator:
             - 'FCMP': Dict {nome_colaborador: fcmp}
             - 'colaboradores': Lista de nomes
         """
-        print(f"[RECEBIMENTO] [MÉTRICAS] Iniciando cálculo de métricas para processo={processo}, mes={mes_apuracao}, ano={ano_apuracao}")
+        diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] Iniciando cálculo de métricas para processo=%s, mes=%s, ano=%s", processo, mes_apuracao, ano_apuracao)
         processo = str(processo).strip()
         
         # 1. Buscar TODOS os itens do processo no Analise_Comercial_Completa
         df_comercial = self.calc_comissao.data.get("ANALISE_COMERCIAL_COMPLETA", pd.DataFrame())
         
         if df_comercial.empty:
-            print(f"[RECEBIMENTO] [MÉTRICAS] AVISO: Análise Comercial vazia")
+            diagnostics.registrar_falta("metricas", "ANALISE_COMERCIAL_COMPLETA", "Análise Comercial vazia")
+            diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] AVISO: Análise Comercial vazia")
             return {"TCMP": {}, "FCMP": {}, "colaboradores": []}
         
-        # Encontrar coluna de processo
-        proc_col = self._encontrar_coluna(df_comercial, ["processo", "Processo", "PROCESSO"])
-        if not proc_col:
-            print(f"[RECEBIMENTO] [MÉTRICAS] AVISO: Coluna 'Processo' não encontrada")
+        # Itens do processo via índice por processo (construído no carregamento)
+        indice = self.calc_comissao._obter_indice_processos()
+        if not indice.coluna_processo:
+            diagnostics.registrar_falta("metricas", "coluna Processo", "Coluna 'Processo' não encontrada na Análise Comercial")
+            diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] AVISO: Coluna 'Processo' não encontrada")
             return {"TCMP": {}, "FCMP": {}, "colaboradores": []}
         
-        itens = df_comercial[
-            df_comercial[proc_col].astype(str).str.strip() == processo
-        ]
+        itens = indice.itens(processo)
         
         if itens.empty:
-            print(f"[RECEBIMENTO] [MÉTRICAS] AVISO: Nenhum item encontrado para o processo {processo}")
+            diagnostics.registrar_falta("metricas", processo, "nenhum item na Análise Comercial")
+            diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] AVISO: Nenhum item encontrado para o processo %s", processo)
             return {"TCMP": {}, "FCMP": {}, "colaboradores": []}
         else:
-            print(f"[RECEBIMENTO] [MÉTRICAS] Itens encontrados para processo {processo}: {len(itens)}")
+            diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] Itens encontrados para processo %s: %s", processo, len(itens))
         
         # 2. Identificar colaboradores que recebem por recebimento
         colaboradores = self.identificador.identificar_colaboradores(processo)
         
         if not colaboradores:
-            print(f"[RECEBIMENTO] [MÉTRICAS] AVISO: Nenhum colaborador elegível por recebimento encontrado para o processo {processo}")
+            diagnostics.registrar_falta("metricas", processo, "nenhum colaborador elegível por recebimento")
+            diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] AVISO: Nenhum colaborador elegível por recebimento encontrado para o processo %s", processo)
             return {"TCMP": {}, "FCMP": {}, "colaboradores": []}
-        else:
+        elif diagnostics.ativo("metricas"):
             nomes = [c['nome'] for c in colaboradores]
-            print(f"[RECEBIMENTO] [MÉTRICAS] Colaboradores identificados ({len(nomes)}): {nomes}")
+            diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] Colaboradores identificados ({len(nomes)}): {nomes}")
         
         # 3. Estruturas para acumular dados por colaborador
         dados_por_colaborador = {}
@@ -107,12 +112,20 @@ class MetricasCalculator:
             }
         
         # 4. Para cada item do processo
+        debug_metricas = diagnostics.ativo("metricas")
         for _, item in itens.iterrows():
             valor_item = self._obter_valor_item(item)
             
             if valor_item <= 0:
                 continue
             
+            contexto_item = {
+                "linha": str(item.get("Negócio", "")).strip(),
+                "grupo": str(item.get("Grupo", "")).strip(),
+                "subgrupo": str(item.get("Subgrupo", "")).strip(),
+                "tipo_mercadoria": str(item.get("Tipo de Mercadoria", "")).strip(),
+            }
+            
             # Para cada colaborador
             for colab in colaboradores:
                 nome = colab["nome"]
@@ -130,32 +143,30 @@ class MetricasCalculator:
                 except Exception:
                     fc = 0.0
                 
-                # Obter regra de comissão
+                # Obter regra de comissão (índice pré-compilado de CONFIG_COMISSAO)
                 try:
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA] Buscando regra para:")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Colaborador: {nome}, Cargo: {cargo}")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Linha: {str(item.get('Negócio', '')).strip()}")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Grupo: {str(item.get('Grupo', '')).strip()}")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Subgrupo: {str(item.get('Subgrupo', '')).strip()}")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Tipo de Mercadoria: {str(item.get('Tipo de Mercadoria', '')).strip()}")
+                    if debug_metricas:
+                        diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] [TAXA] Buscando regra para:")
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Colaborador: {nome}, Cargo: {cargo}")
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Linha: {contexto_item['linha']}")
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Grupo: {contexto_item['grupo']}")
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Subgrupo: {contexto_item['subgrupo']}")
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - Tipo de Mercadoria: {contexto_item['tipo_mercadoria']}")
                     
                     regra = self.calc_comissao._get_regra_comissao(
-                        linha=str(item.get("Negócio", "")).strip(),
-                        grupo=str(item.get("Grupo", "")).strip(),
-                        subgrupo=str(item.get("Subgrupo", "")).strip(),
-                        tipo_mercadoria=str(item.get("Tipo de Mercadoria", "")).strip(),
-                        cargo=cargo
+                        **contexto_item, cargo=cargo
                     )
                     
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA] Regra obtida: {regra}")
-                    
-                    taxa_rateio = float(regra.get("taxa_rateio_maximo_pct", 0.0) or 0.0) / 100.0
-                    fatia_cargo = float(regra.get("fatia_cargo_pct", 0.0) or 0.0) / 100.0
-                    taxa = taxa_rateio * fatia_cargo
-                    
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - taxa_rateio: {taxa_rateio}")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - fatia_cargo: {fatia_cargo}")
-                    print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - taxa final: {taxa}")
+                    if regra is None:
+                        taxa = 0.0
+                    else:
+                        taxa = regra.taxa_efetiva
+                    if debug_metricas:
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA] Regra obtida: {regra}")
+                        if regra is not None:
+                            diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - taxa_rateio: {float(regra.taxa_rateio_maximo_pct or 0.0) / 100.0}")
+                            diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - fatia_cargo: {float(regra.fatia_cargo_pct or 0.0) / 100.0}")
+                        diagnostics.debug("metricas", f"[RECEBIMENTO] [MÉTRICAS] [TAXA]   - taxa final: {taxa}")
                 except Exception as e:
                     print(f"[RECEBIMENTO] [MÉTRICAS] [TAXA] ERRO ao buscar regra: {e}")
                     import traceback
@@ -187,7 +198,7 @@ class MetricasCalculator:
             # FCMP = média ponderada dos FCs
             fcmp_dict[nome] = float((fcs * valores).sum() / valores.sum())
         
-        print(f"[RECEBIMENTO] [MÉTRICAS] Resultado: TCMP({len(tcmp_dict)}), FCMP({len(fcmp_dict)})")
+        diagnostics.debug("metricas", "[RECEBIMENTO] [MÉTRICAS] Resultado: TCMP(%s), FCMP(%s)", len(tcmp_dict), len(fcmp_dict))
         
         return {
             "TCMP": tcmp_dict,
@@ -4,7 +4,8 @@ Mapeia documentos da Análise Financeira para processos comerciais.
 
 import pandas as pd
 from typing import Dict, Optional, List
-import re
+
+from ...utils import diagnostics
 
 
 class ProcessMapper:
@@ -25,17 +26,75 @@ class ProcessMapper:
         """
         self.df_comercial = df_analise_comercial
         self.documentos_nao_mapeados = []
+        # Cache por documento normalizado: resultados positivos e negativos
         self.cache_mapeamento = {}
+        self._registros_nao_mapeados = {}
         
-        print(f"[RECEBIMENTO] [MAPPER] __init__: DataFrame recebido com {len(df_analise_comercial)} linhas")
-        print(f"[RECEBIMENTO] [MAPPER] __init__: Colunas disponíveis: {list(df_analise_comercial.columns)}")
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] __init__: DataFrame recebido com %s linhas", len(df_analise_comercial))
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] __init__: Colunas disponíveis: %s", list(df_analise_comercial.columns))
         
         # Encontrar colunas relevantes
         self.col_nf = self._encontrar_coluna(["numero nf", "número nf", "num nf", "Numero NF"])
         self.col_processo = self._encontrar_coluna(["processo", "id processo", "Processo"])
         
-        print(f"[RECEBIMENTO] [MAPPER] __init__: Coluna NF encontrada: '{self.col_nf}'")
-        print(f"[RECEBIMENTO] [MAPPER] __init__: Coluna Processo encontrada: '{self.col_processo}'")
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] __init__: Coluna NF encontrada: '%s'", self.col_nf)
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] __init__: Coluna Processo encontrada: '%s'", self.col_processo)
+        
+        # Índice NF normalizada → processo (primeira linha), construído uma única vez
+        self.indice_nf: Dict[str, str] = {}
+        self.colisoes_nf: Dict[str, List[str]] = {}
+        self._construir_indice_nf()
+    
+    def _construir_indice_nf(self):
+        """
+        Normaliza a coluna "Numero NF" uma única vez e monta o dicionário
+        NF → processo. Assim como na busca linha a linha, vale o processo da
+        primeira linha com a NF; NFs associadas a mais de um processo são
+        guardadas em `colisoes_nf`. Linhas sem NF (vazia, NaN ou só zeros)
+        não são indexadas.
+        """
+        if self.df_comercial.empty or not self.col_nf or not self.col_processo:
+            return
+        
+        try:
+            # Normalizar coluna NF:
+            # 1) Converter para string e trim
+            # 2) Extrair somente a primeira sequência de dígitos (antes de qualquer decimal, ex: "48341.0" -> "48341")
+            # 3) Remover zeros à esquerda para comparação consistente
+            nfs_raw = self.df_comercial[self.col_nf].astype(str).str.strip()
+            nfs_digits = nfs_raw.str.extract(r"(\d+)")[0].fillna("")
+            nfs = nfs_digits.str.lstrip('0').replace("", "0")
+            processos = [str(p).strip() for p in self.df_comercial[self.col_processo].tolist()]
+        except Exception as e:
+            print(f"[RECEBIMENTO] [MAPPER] ERRO ao indexar NFs: {e}")
+            import traceback
+            traceback.print_exc()
+            return
+        
+        processos_por_nf: Dict[str, List[str]] = {}
+        for nf, processo in zip(nfs.tolist(), processos):
+            if nf == "0":
+                continue  # processo ainda sem NF
+            if nf not in self.indice_nf:
+                self.indice_nf[nf] = processo
+            if processo and processo != "nan":
+                distintos = processos_por_nf.setdefault(nf, [])
+                if processo not in distintos:
+                    distintos.append(processo)
+        self.colisoes_nf = {
+            nf: lista for nf, lista in processos_por_nf.items() if len(lista) > 1
+        }
+        
+        if self.colisoes_nf:
+            print(
+                f"[RECEBIMENTO] [MAPPER] AVISO: {len(self.colisoes_nf)} NF(s) associada(s) a mais de um processo "
+                f"(usado o processo da primeira linha)"
+            )
+            for nf, lista in self.colisoes_nf.items():
+                diagnostics.registrar_falta(
+                    "mapper", f"NF {nf}", f"NF associada a {len(lista)} processos: {lista}"
+                )
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] Índice de NFs: %s NF(s) distintas", len(self.indice_nf))
     
     def mapear_documento(self, documento: str) -> Dict:
         """
@@ -60,13 +119,16 @@ class ProcessMapper:
         
         documento = str(documento).strip().upper()
         
-        print(f"[RECEBIMENTO] [MAPPER] mapear_documento chamado com: '{documento}' (len={len(documento)})")
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] mapear_documento chamado com: '%s' (len=%s)", documento, len(documento))
         
-        # Verificar cache
-        if documento in self.cache_mapeamento:
-            return self.cache_mapeamento[documento]
+        # Verificar cache (inclui resultados negativos, que continuam sendo registrados como não mapeados)
+        resultado = self.cache_mapeamento.get(documento)
+        if resultado is not None:
+            if not resultado['mapeado']:
+                self._registrar_nao_mapeado(dict(self._registros_nao_mapeados[documento]))
+            return resultado
         
-        # REGRA 1: COT → Adiantamento
+        # REGRA 1: COT → Adiantamento (caminho rápido, sem consultar NFs)
         if documento.startswith("COT"):
             processo = documento.replace("COT", "").strip()
             # Validar que o sufixo é numérico
@@ -79,49 +141,34 @@ class ProcessMapper:
                 self.cache_mapeamento[documento] = resultado
                 return resultado
             else:
-                resultado = {
-                    'mapeado': False,
-                    'motivo': f'COT sem sufixo numérico válido: {documento}'
-                }
-                self.documentos_nao_mapeados.append({
+                return self._nao_mapeado(documento, {
                     'documento': documento,
-                    'motivo': resultado['motivo']
+                    'motivo': f'COT sem sufixo numérico válido: {documento}'
                 })
-                return resultado
         
         # REGRA 2: Pagamento Regular via NF
         # Extrair apenas dígitos do documento (pode ter 5 ou 6 dígitos)
         doc_digits = ''.join(filter(str.isdigit, documento))
         
         if len(doc_digits) < 5:
-            resultado = {
-                'mapeado': False,
-                'motivo': f'Documento muito curto (menos de 5 dígitos): {documento}'
-            }
-            self.documentos_nao_mapeados.append({
+            return self._nao_mapeado(documento, {
                 'documento': documento,
-                'motivo': resultado['motivo']
+                'motivo': f'Documento muito curto (menos de 5 dígitos): {documento}'
             })
-            return resultado
         
         # Usar os primeiros 6 dígitos (ou todos se tiver menos)
         doc_6dig = doc_digits[:6] if len(doc_digits) >= 6 else doc_digits
         
         # Validar que os 6 dígitos são numéricos
         if not doc_6dig.isdigit():
-            resultado = {
-                'mapeado': False,
-                'motivo': f'6 primeiros caracteres não são numéricos: {documento}'
-            }
-            self.documentos_nao_mapeados.append({
+            return self._nao_mapeado(documento, {
                 'documento': documento,
                 'documento_6dig': doc_6dig,
-                'motivo': resultado['motivo']
+                'motivo': f'6 primeiros caracteres não são numéricos: {documento}'
             })
-            return resultado
         
-        # Buscar na coluna "Numero NF" do Analise_Comercial_Completa
-        print(f"[RECEBIMENTO] [MAPPER] Chamando _buscar_por_nf com doc_6dig='{doc_6dig}'")
+        # Buscar no índice de NFs do Analise_Comercial_Completa
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] Chamando _buscar_por_nf com doc_6dig='%s'", doc_6dig)
         processo = self._buscar_por_nf(doc_6dig)
         
         if processo:
@@ -134,20 +181,26 @@ class ProcessMapper:
             self.cache_mapeamento[documento] = resultado
             return resultado
         else:
-            resultado = {
-                'mapeado': False,
-                'motivo': f'NF não encontrada na Análise Comercial: {doc_6dig}'
-            }
-            self.documentos_nao_mapeados.append({
+            return self._nao_mapeado(documento, {
                 'documento': documento,
                 'documento_6dig': doc_6dig,
-                'motivo': resultado['motivo']
+                'motivo': f'NF não encontrada na Análise Comercial: {doc_6dig}'
             })
-            return resultado
+    
+    def _nao_mapeado(self, documento: str, registro: Dict) -> Dict:
+        """Registra e memoriza um resultado negativo para o documento."""
+        resultado = {
+            'mapeado': False,
+            'motivo': registro['motivo']
+        }
+        self.cache_mapeamento[documento] = resultado
+        self._registros_nao_mapeados[documento] = registro
+        self._registrar_nao_mapeado(dict(registro))
+        return resultado
     
     def _buscar_por_nf(self, doc_6dig: str) -> Optional[str]:
         """
-        Busca processo pela NF (6 primeiros dígitos).
+        Busca processo pela NF (6 primeiros dígitos) no índice NF → processo.
         
         Args:
             doc_6dig: 6 primeiros dígitos do documento
@@ -155,55 +208,43 @@ class ProcessMapper:
         Returns:
             ID do processo ou None se não encontrado
         """
-        print(f"[RECEBIMENTO] [MAPPER] _buscar_por_nf: verificando condições iniciais...")
-        print(f"[RECEBIMENTO] [MAPPER]   - df_comercial vazio? {self.df_comercial.empty}")
-        print(f"[RECEBIMENTO] [MAPPER]   - col_nf encontrada? {self.col_nf}")
-        print(f"[RECEBIMENTO] [MAPPER]   - col_processo encontrada? {self.col_processo}")
-        
         if self.df_comercial.empty or not self.col_nf or not self.col_processo:
-            print(f"[RECEBIMENTO] [MAPPER] ATENÇÃO: Retornando None - condições iniciais não atendidas!")
+            diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] ATENÇÃO: Retornando None - condições iniciais não atendidas!")
             return None
         
-        try:
-            print(f"[RECEBIMENTO] [MAPPER] Buscando NF: doc_6dig='{doc_6dig}'")
-            
-            # Normalizar doc_6dig: remover zeros à esquerda para comparação
-            # Se após remover zeros ficar vazio, manter pelo menos um zero
-            doc_6dig_limpo = doc_6dig.lstrip('0') if doc_6dig else ""
-            if not doc_6dig_limpo and doc_6dig:
-                doc_6dig_limpo = "0"  # Caso especial: todos zeros
-            print(f"[RECEBIMENTO] [MAPPER] Documento normalizado (sem zeros à esquerda): '{doc_6dig_limpo}'")
-            
-            # Normalizar coluna NF:
-            # 1) Converter para string e trim
-            # 2) Extrair somente a primeira sequência de dígitos (antes de qualquer decimal, ex: "48341.0" -> "48341")
-            # 3) Remover zeros à esquerda para comparação consistente
-            nfs_raw = self.df_comercial[self.col_nf].astype(str).str.strip()
-            nfs_digits = nfs_raw.str.extract(r"(\d+)")[0].fillna("")
-            nfs = nfs_digits.str.lstrip('0').replace("", "0")
-            
-            print(f"[RECEBIMENTO] [MAPPER] Total de linhas na Análise Comercial: {len(nfs)}")
-            print(f"[RECEBIMENTO] [MAPPER] Primeiros valores normalizados de NF: {nfs.head(10).tolist()}")
-            
-            # Buscar matches: comparar valores normalizados (sem zeros à esquerda)
-            mask = nfs == doc_6dig_limpo
-            candidatos = self.df_comercial[mask]
-            
-            print(f"[RECEBIMENTO] [MAPPER] Matches encontrados: {len(candidatos)}")
-            
-            if not candidatos.empty:
-                # Retornar o primeiro processo encontrado
-                processo = str(candidatos.iloc[0][self.col_processo]).strip()
-                print(f"[RECEBIMENTO] [MAPPER] Processo encontrado: '{processo}'")
-                return processo if processo and processo != "nan" else None
-            else:
-                print(f"[RECEBIMENTO] [MAPPER] Nenhum processo encontrado para NF '{doc_6dig}' (normalizado: '{doc_6dig_limpo}')")
-        except Exception as e:
-            print(f"[RECEBIMENTO] [MAPPER] ERRO ao buscar NF: {e}")
-            import traceback
-            traceback.print_exc()
+        # Normalizar doc_6dig: remover zeros à esquerda para comparação
+        # Se após remover zeros ficar vazio, manter pelo menos um zero
+        doc_6dig_limpo = doc_6dig.lstrip('0') if doc_6dig else ""
+        if not doc_6dig_limpo and doc_6dig:
+            doc_6dig_limpo = "0"  # Caso especial: todos zeros
         
-        return None
+        processo = self.indice_nf.get(doc_6dig_limpo) if doc_6dig_limpo != "0" else None
+        if processo is None:
+            diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] Nenhum processo encontrado para NF '%s' (normalizado: '%s')", doc_6dig, doc_6dig_limpo)
+            return None
+        
+        diagnostics.debug("mapper", "[RECEBIMENTO] [MAPPER] Processo encontrado: '%s'", processo)
+        return processo if processo and processo != "nan" else None
+    
+    def obter_colisoes_nf(self) -> pd.DataFrame:
+        """
+        Retorna DataFrame com NFs associadas a mais de um processo.
+        
+        Returns:
+            DataFrame com colunas: numero_nf, processos, processo_utilizado
+        """
+        return pd.DataFrame(
+            [
+                {"numero_nf": nf, "processos": ", ".join(lista), "processo_utilizado": self.indice_nf.get(nf)}
+                for nf, lista in self.colisoes_nf.items()
+            ],
+            columns=["numero_nf", "processos", "processo_utilizado"],
+        )
+    
+    def _registrar_nao_mapeado(self, registro: Dict) -> None:
+        """Guarda o documento não mapeado e conta a falta no resumo de diagnósticos."""
+        self.documentos_nao_mapeados.append(registro)
+        diagnostics.registrar_falta("mapper", registro.get('documento'), registro.get('motivo', ''))
     
     def _encontrar_coluna(self, nomes_possiveis: List[str]) -> Optional[str]:
         """
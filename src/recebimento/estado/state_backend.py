@@ -0,0 +1,449 @@
+"""
+Backends de persistência do estado dos processos (alternativas à aba ESTADO).
+
+A aba ESTADO do Excel continua sendo gerada para auditoria, mas a fonte de
+verdade pode passar a ser um arquivo local colunar/indexado, cujo tempo de
+leitura e escrita não cresce com o custo do openpyxl:
+    - SQLiteEstadoBackend: tabela com PROCESSO como chave primária (busca
+      indexada) e gravação incremental (upsert só dos processos alterados);
+    - ParquetEstadoBackend: arquivo Parquet reescrito a cada gravação
+      (requer pyarrow ou fastparquet).
+
+Seleção via PARAMS (ver CalculoComissao._criar_backend_estado):
+    estado_backend         = excel (padrão) | sqlite | parquet
+    estado_backend_caminho = caminho do arquivo (opcional)
+
+O backend guarda um único estado (o mais recente) e o período (mês/ano) da
+última execução que o gravou; reexecutar um mês anterior a esse período não
+usa o backend (ver StateManager.carregar_estado_anterior).
+
+Importação de estados históricos em Excel (ordem cronológica, o mais recente
+prevalece) e exportação de volta para a aba ESTADO:
+
+    python -m src.recebimento.estado.state_backend importar --backend sqlite \\
+        --destino estado/estado_processos.sqlite Comissoes_Recebimento_*.xlsx
+    python -m src.recebimento.estado.state_backend exportar --backend sqlite \\
+        --destino estado/estado_processos.sqlite --saida ESTADO.xlsx
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+from abc import ABC, abstractmethod
+import json
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+COLUNA_CHAVE = "PROCESSO"
+TABELA_PADRAO = "estado_recebimento"
+TIPOS_BACKEND = ("excel", "sqlite", "parquet")
+
+
+def _eh_coluna_data(coluna: str) -> bool:
+    return coluna.startswith("DATA_") or coluna == "ULTIMA_ATUALIZACAO"
+
+
+def _normalizar_chave(valor: Any) -> Optional[str]:
+    if valor is None:
+        return None
+    try:
+        if pd.isna(valor):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(valor).strip()
+
+
+def _converter_datas(df: pd.DataFrame) -> pd.DataFrame:
+    """Reconverte as colunas de data (gravadas como texto ISO)."""
+    for coluna in df.columns:
+        if _eh_coluna_data(str(coluna)):
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce")
+    return df
+
+
+def _valor_sql(valor: Any) -> Any:
+    """Converte um valor do estado para um tipo aceito pelo sqlite3."""
+    if valor is None:
+        return None
+    if isinstance(valor, (pd.Timestamp, datetime, date)):
+        return None if pd.isna(valor) else valor.isoformat()
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    if isinstance(valor, (str, int, float, bytes)):
+        return valor
+    try:
+        if pd.isna(valor):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(valor)
+
+
+class EstadoBackend(ABC):
+    """
+    Interface dos backends de estado.
+
+    Os registros são dicts coluna → valor (mesmas colunas da aba ESTADO),
+    identificados pela coluna PROCESSO. Um backend que não implementa todos
+    os métodos abstratos falha já ao ser instanciado.
+    """
+
+    caminho: str
+
+    @abstractmethod
+    def existe(self) -> bool:
+        """True se já há estado persistido."""
+
+    @abstractmethod
+    def carregar(self) -> pd.DataFrame:
+        """Estado completo (uma linha por processo)."""
+
+    @abstractmethod
+    def buscar(self, processo: str) -> Optional[Dict[str, Any]]:
+        """Registro de um processo (consulta pela chave) ou None."""
+
+    @abstractmethod
+    def salvar(self, df: pd.DataFrame) -> None:
+        """Substitui todo o estado (primeira linha por PROCESSO prevalece)."""
+
+    @abstractmethod
+    def salvar_registros(self, registros: Iterable[Dict[str, Any]]) -> int:
+        """Insere/atualiza apenas os registros informados; retorna a quantidade."""
+
+    def ultimo_periodo(self) -> Optional[Tuple[int, int]]:
+        """(ano, mês) da última execução que gravou o estado; None se desconhecido."""
+        try:
+            with open(self._arquivo_periodo(), encoding="utf-8") as f:
+                info = json.load(f)
+            return int(info["ano"]), int(info["mes"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def registrar_periodo(self, mes: int, ano: int) -> None:
+        """Registra o período da execução que gravou o estado."""
+        self._preparar_diretorio()
+        with open(self._arquivo_periodo(), "w", encoding="utf-8") as f:
+            json.dump({"mes": int(mes), "ano": int(ano)}, f)
+
+    def _arquivo_periodo(self) -> str:
+        return f"{self.caminho}.periodo.json"
+
+    def _preparar_diretorio(self) -> None:
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+
+class SQLiteEstadoBackend(EstadoBackend):
+    """Estado em uma tabela SQLite com PROCESSO como chave primária."""
+
+    def __init__(self, caminho: str, tabela: str = TABELA_PADRAO):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", tabela):
+            raise ValueError(f"Nome de tabela inválido: {tabela}")
+        self.caminho = caminho
+        self.tabela = tabela
+
+    def _arquivo_periodo(self) -> str:
+        # Um arquivo SQLite guarda mais de uma tabela de estado
+        return f"{self.caminho}.{self.tabela}.periodo.json"
+
+    def _conectar(self) -> sqlite3.Connection:
+        self._preparar_diretorio()
+        return sqlite3.connect(self.caminho)
+
+    def _colunas_tabela(self, conn: sqlite3.Connection) -> List[str]:
+        cursor = conn.execute(f'PRAGMA table_info("{self.tabela}")')
+        return [linha[1] for linha in cursor.fetchall()]
+
+    def _garantir_tabela(self, conn: sqlite3.Connection, colunas: List[str]) -> None:
+        existentes = self._colunas_tabela(conn)
+        if not existentes:
+            demais = "".join(f', "{c}"' for c in colunas if c != COLUNA_CHAVE)
+            conn.execute(
+                f'CREATE TABLE "{self.tabela}" ("{COLUNA_CHAVE}" TEXT PRIMARY KEY{demais})'
+            )
+            return
+        # Colunas novas (ex.: colunas de debug) são adicionadas sem recriar a tabela
+        for coluna in colunas:
+            if coluna not in existentes:
+                conn.execute(f'ALTER TABLE "{self.tabela}" ADD COLUMN "{coluna}"')
+
+    def _inserir(
+        self,
+        conn: sqlite3.Connection,
+        registros: List[Dict[str, Any]],
+        colunas: List[str],
+        conflito: str,
+    ) -> int:
+        linhas = []
+        for registro in registros:
+            chave = _normalizar_chave(registro.get(COLUNA_CHAVE))
+            if chave is None:
+                continue
+            linhas.append(
+                [chave]
+                + [_valor_sql(registro.get(c)) for c in colunas if c != COLUNA_CHAVE]
+            )
+        if not linhas:
+            return 0
+        ordem = [COLUNA_CHAVE] + [c for c in colunas if c != COLUNA_CHAVE]
+        nomes = ", ".join(f'"{c}"' for c in ordem)
+        marcadores = ", ".join("?" for _ in ordem)
+        conn.executemany(
+            f'INSERT OR {conflito} INTO "{self.tabela}" ({nomes}) VALUES ({marcadores})',
+            linhas,
+        )
+        return len(linhas)
+
+    def existe(self) -> bool:
+        if not os.path.exists(self.caminho):
+            return False
+        with sqlite3.connect(self.caminho) as conn:
+            return bool(self._colunas_tabela(conn))
+
+    def carregar(self) -> pd.DataFrame:
+        if not self.existe():
+            return pd.DataFrame()
+        conn = sqlite3.connect(self.caminho)
+        try:
+            df = pd.read_sql_query(f'SELECT * FROM "{self.tabela}" ORDER BY rowid', conn)
+        finally:
+            conn.close()
+        return _converter_datas(df)
+
+    def buscar(self, processo: str) -> Optional[Dict[str, Any]]:
+        if not self.existe():
+            return None
+        conn = sqlite3.connect(self.caminho)
+        try:
+            df = pd.read_sql_query(
+                f'SELECT * FROM "{self.tabela}" WHERE "{COLUNA_CHAVE}" = ?',
+                conn,
+                params=(str(processo).strip(),),
+            )
+        finally:
+            conn.close()
+        if df.empty:
+            return None
+        return _converter_datas(df).iloc[0].to_dict()
+
+    def salvar(self, df: pd.DataFrame) -> None:
+        colunas = [str(c) for c in df.columns]
+        conn = self._conectar()
+        try:
+            with conn:
+                conn.execute(f'DROP TABLE IF EXISTS "{self.tabela}"')
+                self._garantir_tabela(conn, colunas)
+                self._inserir(conn, df.to_dict("records"), colunas, "IGNORE")
+        finally:
+            conn.close()
+
+    def salvar_registros(self, registros: Iterable[Dict[str, Any]]) -> int:
+        registros = list(registros)
+        if not registros:
+            return 0
+        colunas: List[str] = []
+        for registro in registros:
+            colunas.extend(c for c in registro if c not in colunas)
+        conn = self._conectar()
+        try:
+            with conn:
+                self._garantir_tabela(conn, colunas)
+                return self._inserir(conn, registros, colunas, "REPLACE")
+        finally:
+            conn.close()
+
+
+class ParquetEstadoBackend(EstadoBackend):
+    """Estado em um arquivo Parquet (reescrito por completo a cada gravação)."""
+
+    def __init__(self, caminho: str):
+        if not any(
+            importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet")
+        ):
+            raise ImportError("Backend Parquet requer 'pyarrow' ou 'fastparquet'")
+        self.caminho = caminho
+        self._cache: Optional[pd.DataFrame] = None
+
+    @staticmethod
+    def _preparar(df: pd.DataFrame) -> pd.DataFrame:
+        """Tipos homogêneos por coluna (exigência do formato colunar)."""
+        df = df.copy()
+        if COLUNA_CHAVE in df.columns:
+            df[COLUNA_CHAVE] = df[COLUNA_CHAVE].map(_normalizar_chave)
+        for coluna in df.columns:
+            if _eh_coluna_data(str(coluna)):
+                df[coluna] = pd.to_datetime(df[coluna], errors="coerce")
+            elif df[coluna].dtype == object and coluna != COLUNA_CHAVE:
+                numerico = pd.to_numeric(df[coluna], errors="coerce")
+                if numerico.notna().sum() == df[coluna].notna().sum():
+                    df[coluna] = numerico
+                else:
+                    df[coluna] = df[coluna].map(
+                        lambda v: None if _valor_sql(v) is None else str(v)
+                    )
+        return df
+
+    def existe(self) -> bool:
+        return os.path.exists(self.caminho)
+
+    def carregar(self) -> pd.DataFrame:
+        if self._cache is None:
+            self._cache = pd.read_parquet(self.caminho) if self.existe() else pd.DataFrame()
+        return self._cache.copy()
+
+    def buscar(self, processo: str) -> Optional[Dict[str, Any]]:
+        df = self.carregar()
+        if df.empty:
+            return None
+        linhas = df[df[COLUNA_CHAVE] == str(processo).strip()]
+        return None if linhas.empty else linhas.iloc[0].to_dict()
+
+    def salvar(self, df: pd.DataFrame) -> None:
+        df = df[df[COLUNA_CHAVE].map(_normalizar_chave).notna()]
+        df = self._preparar(df).drop_duplicates(COLUNA_CHAVE, keep="first")
+        self._preparar_diretorio()
+        df.reset_index(drop=True).to_parquet(self.caminho, index=False)
+        self._cache = df.reset_index(drop=True)
+
+    def salvar_registros(self, registros: Iterable[Dict[str, Any]]) -> int:
+        novos = pd.DataFrame(list(registros))
+        if novos.empty:
+            return 0
+        novos = self._preparar(novos)
+        quantidade = len(novos)
+        atual = self.carregar()
+        if not atual.empty:
+            atual = atual[~atual[COLUNA_CHAVE].isin(set(novos[COLUNA_CHAVE]))]
+            novos = pd.concat([atual, novos], ignore_index=True)
+        self.salvar(novos)
+        return quantidade
+
+
+def criar_backend_estado(
+    tipo: Optional[str],
+    base_path: str = ".",
+    tabela: str = TABELA_PADRAO,
+    caminho: Optional[str] = None,
+) -> Optional[EstadoBackend]:
+    """
+    Cria o backend configurado; None para 'excel' (comportamento original).
+
+    Caminhos padrão: <base_path>/estado/estado_processos.sqlite (uma tabela por
+    tipo de estado) ou <base_path>/estado/<tabela>.parquet.
+    """
+    tipo = str(tipo or "excel").strip().lower()
+    if tipo == "excel":
+        return None
+    if tipo == "sqlite":
+        return SQLiteEstadoBackend(
+            caminho or os.path.join(base_path, "estado", "estado_processos.sqlite"), tabela
+        )
+    if tipo == "parquet":
+        if caminho and tabela != TABELA_PADRAO:
+            raiz, ext = os.path.splitext(caminho)
+            caminho = f"{raiz}_{tabela}{ext or '.parquet'}"
+        return ParquetEstadoBackend(
+            caminho or os.path.join(base_path, "estado", f"{tabela}.parquet")
+        )
+    raise ValueError(f"Backend de estado desconhecido: {tipo} (use {', '.join(TIPOS_BACKEND)})")
+
+
+def _ordem_cronologica(arquivo: str):
+    """Ordena Comissoes_Recebimento_MM_AAAA.xlsx por (ano, mês); demais mantêm a ordem."""
+    encontrado = re.search(r"_(\d{1,2})_(\d{4})\.xlsx$", os.path.basename(arquivo))
+    if encontrado:
+        return (0, int(encontrado.group(2)), int(encontrado.group(1)))
+    return (1, 0, 0)
+
+
+def ler_aba_estado(arquivo: str, aba: str = "ESTADO") -> pd.DataFrame:
+    """Lê a aba ESTADO de um arquivo Excel (colunas com trim, PROCESSO como texto)."""
+    df = pd.read_excel(arquivo, sheet_name=aba)
+    df.columns = [str(c).strip() for c in df.columns]
+    if COLUNA_CHAVE in df.columns:
+        df[COLUNA_CHAVE] = df[COLUNA_CHAVE].map(_normalizar_chave)
+        df = df[df[COLUNA_CHAVE].notna()]
+    return df
+
+
+def importar_estados_excel(
+    arquivos: Iterable[str], backend: EstadoBackend, aba: str = "ESTADO"
+) -> int:
+    """
+    Importa estados históricos em Excel para o backend.
+
+    Os arquivos são aplicados em ordem cronológica: o estado mais recente de
+    cada processo prevalece. Retorna a quantidade de processos gravados.
+    """
+    arquivos = sorted(arquivos, key=_ordem_cronologica)
+    consolidado: Dict[str, Dict[str, Any]] = {}
+    for arquivo in arquivos:
+        df = ler_aba_estado(arquivo, aba)
+        if COLUNA_CHAVE not in df.columns:
+            print(f"[ESTADO] AVISO: {arquivo} sem coluna {COLUNA_CHAVE}; ignorado")
+            continue
+        # Dentro de um arquivo vale a primeira linha do processo (como na leitura original)
+        for registro in df.drop_duplicates(COLUNA_CHAVE, keep="first").to_dict("records"):
+            consolidado[registro[COLUNA_CHAVE]] = registro
+        print(f"[ESTADO] {arquivo}: {len(df)} linha(s)")
+    gravados = backend.salvar_registros(consolidado.values())
+    # Período do estado = mês mais recente importado (quando identificável pelo nome)
+    periodos = [_ordem_cronologica(a)[1:] for a in arquivos if _ordem_cronologica(a)[0] == 0]
+    if periodos:
+        ultimo = max(periodos + [backend.ultimo_periodo() or (0, 0)])
+        backend.registrar_periodo(ultimo[1], ultimo[0])
+    return gravados
+
+
+def exportar_aba_estado(
+    backend: EstadoBackend, arquivo: str, colunas: Optional[List[str]] = None
+) -> int:
+    """Exporta o estado do backend para uma aba ESTADO (auditoria)."""
+    df = backend.carregar()
+    if colunas:
+        for coluna in colunas:
+            if coluna not in df.columns:
+                df[coluna] = None
+        df = df[colunas]
+    if not df.empty:
+        df = df.sort_values(COLUNA_CHAVE)
+    with pd.ExcelWriter(arquivo, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="ESTADO", index=False)
+    return len(df)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa/exporta o estado dos processos")
+    parser.add_argument("acao", choices=("importar", "exportar"))
+    parser.add_argument("arquivos", nargs="*", help="Arquivos Excel com a aba ESTADO")
+    parser.add_argument("--backend", choices=("sqlite", "parquet"), default="sqlite")
+    parser.add_argument("--destino", default=None, help="Arquivo do backend")
+    parser.add_argument("--tabela", default=TABELA_PADRAO)
+    parser.add_argument("--saida", default="ESTADO.xlsx", help="Arquivo Excel (exportar)")
+    args = parser.parse_args(argv)
+
+    backend = criar_backend_estado(args.backend, tabela=args.tabela, caminho=args.destino)
+    if args.acao == "importar":
+        if not args.arquivos:
+            parser.error("informe ao menos um arquivo Excel para importar")
+        total = importar_estados_excel(args.arquivos, backend)
+        print(f"[ESTADO] {total} processo(s) importado(s) para {backend.caminho}")
+    else:
+        total = exportar_aba_estado(backend, args.saida)
+        print(f"[ESTADO] {total} processo(s) exportado(s) para {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,84 +5,225 @@ Gerenciador de estado dos processos de recebimento.
 import os
 import json
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from .state_backend import EstadoBackend
 from .state_schema import COLUNAS_ESTADO, VALORES_PADRAO_ESTADO
 
 
+class RegistroEstado:
+    """
+    Estado de um processo (uma linha da aba ESTADO).
+
+    Usa __slots__ com os nomes de COLUNAS_ESTADO: cada processo ocupa um
+    objeto compacto atualizado no lugar, sem passar por um DataFrame.
+    """
+
+    __slots__ = tuple(COLUNAS_ESTADO)
+
+    def __init__(self, valores: Optional[Dict[str, Any]] = None):
+        valores = valores or {}
+        for col in COLUNAS_ESTADO:
+            setattr(self, col, valores.get(col, VALORES_PADRAO_ESTADO.get(col, None)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Cópia do registro como dict (mesmas chaves da aba ESTADO)."""
+        return {col: getattr(self, col) for col in COLUNAS_ESTADO}
+
+
 class StateManager:
     """
     Gerencia o estado persistente dos processos de recebimento.
-    
-    Mantém um DataFrame interno com o estado de cada processo e fornece
-    métodos para atualizar valores, métricas e status.
+
+    Mantém um registro (RegistroEstado) por PROCESSO em um dict, com acesso
+    O(1) e atualizações no lugar. O DataFrame do estado só é materializado
+    quando solicitado (obter_dataframe_estado / estado_df).
+
+    Com um backend (SQLite/Parquet, ver state_backend) o estado é lido dele e
+    gravado de volta apenas para os processos alterados (salvar_estado); sem
+    backend, vale o fluxo original pela aba ESTADO do Excel.
     """
-    
-    def __init__(self):
-        """Inicializa o gerenciador de estado."""
-        self.estado_df = pd.DataFrame(columns=COLUNAS_ESTADO)
-    
-    def carregar_estado_anterior(self, filepath: str) -> bool:
+
+    def __init__(self, backend: Optional[EstadoBackend] = None):
+        """
+        Inicializa o gerenciador de estado.
+
+        Args:
+            backend: Backend persistente do estado (None = aba ESTADO do Excel)
+        """
+        self.backend = backend
+        # Processos alterados desde a carga (gravação incremental no backend)
+        self._alterados: set = set()
+        self._processos: Dict[str, RegistroEstado] = {}
+        # Linhas lidas do estado anterior sem PROCESSO ou com PROCESSO repetido:
+        # preservadas na aba ESTADO, mas nunca consultadas (como no filtro original)
+        self._registros_extras: List[RegistroEstado] = []
+        self._df_cache: Optional[pd.DataFrame] = None
+
+    @property
+    def estado_df(self) -> pd.DataFrame:
+        """DataFrame do estado (materializado sob demanda, na ordem de inserção)."""
+        if self._df_cache is None:
+            registros = list(self._processos.values()) + self._registros_extras
+            self._df_cache = pd.DataFrame(
+                [r.to_dict() for r in registros], columns=COLUNAS_ESTADO
+            )
+        return self._df_cache
+
+    @estado_df.setter
+    def estado_df(self, df: pd.DataFrame):
+        self._carregar_registros(df)
+
+    def _carregar_registros(self, df: pd.DataFrame):
+        """Substitui o estado pelas linhas do DataFrame (primeira linha por PROCESSO vence)."""
+        self._processos = {}
+        self._registros_extras = []
+        self._df_cache = None
+        self._alterados = set()
+        if df is None or df.empty:
+            return
+        for valores in df.to_dict("records"):
+            registro = RegistroEstado(valores)
+            processo = registro.PROCESSO
+            if processo is None or pd.isna(processo) or processo in self._processos:
+                self._registros_extras.append(registro)
+            else:
+                self._processos[processo] = registro
+
+    def _obter_registro(self, processo_id: str, criar: bool = True) -> Optional[RegistroEstado]:
+        """Registro do processo; cria (se `criar`) quando não existir."""
+        processo_id = str(processo_id).strip()
+        registro = self._processos.get(processo_id)
+        if registro is None and criar:
+            self.criar_processo(processo_id)
+            registro = self._processos[processo_id]
+        if registro is not None:
+            # Qualquer acesso para escrita invalida o DataFrame materializado
+            self._df_cache = None
+            self._alterados.add(processo_id)
+        return registro
+
+    def carregar_estado_anterior(
+        self, filepath: str, mes: Optional[int] = None, ano: Optional[int] = None
+    ) -> bool:
         """
         Carrega estado de execução anterior.
-        
+
+        Com backend configurado e já populado, o estado vem dele (filepath é
+        ignorado). Caso contrário lê a aba ESTADO do Excel; havendo backend,
+        os processos lidos do Excel são gravados nele no próximo salvar_estado
+        (importação automática do estado legado).
+
+        O backend guarda só o estado mais recente: se ele foi gravado por um
+        período posterior a mes/ano (reexecução de um mês anterior), o backend
+        é desativado nesta execução — o estado vem do Excel do mês, como sem
+        backend, e o estado dos meses posteriores não é sobrescrito.
+
         Args:
             filepath: Caminho para o arquivo Excel com a aba ESTADO
-        
+            mes: Mês de apuração (opcional; habilita a verificação do período)
+            ano: Ano de apuração (opcional)
+
         Returns:
             True se carregou com sucesso, False caso contrário
         """
+        if self.backend is not None and mes and ano:
+            ultimo = None
+            try:
+                ultimo = self.backend.ultimo_periodo()
+            except Exception:
+                pass
+            if ultimo is not None and ultimo > (int(ano), int(mes)):
+                print(
+                    f"[RECEBIMENTO] [ESTADO] AVISO: o backend {self.backend.caminho} contém o estado "
+                    f"de {ultimo[1]:02d}/{ultimo[0]}, posterior a {int(mes):02d}/{ano}; "
+                    f"usando o estado do Excel do mês e sem gravar no backend."
+                )
+                self.backend = None
+
+        if self.backend is not None:
+            try:
+                if self.backend.existe():
+                    self._carregar_registros(self._normalizar_estado(self.backend.carregar()))
+                    return True
+            except Exception as e:
+                print(f"[RECEBIMENTO] [ESTADO] AVISO: falha ao ler backend {self.backend.caminho}: {e}")
+
         try:
             if os.path.exists(filepath):
                 # Tentar ler a aba ESTADO
-                self.estado_df = pd.read_excel(filepath, sheet_name="ESTADO")
-                
-                # Normalizar colunas (case-insensitive, trim)
-                self.estado_df.columns = self.estado_df.columns.str.strip()
-                
-                # Garantir que todas as colunas esperadas existam
-                for col in COLUNAS_ESTADO:
-                    if col not in self.estado_df.columns:
-                        self.estado_df[col] = VALORES_PADRAO_ESTADO.get(col, None)
-                
-                # Selecionar apenas colunas esperadas
-                self.estado_df = self.estado_df[COLUNAS_ESTADO]
-                
-                # Converter PROCESSO para string
-                if "PROCESSO" in self.estado_df.columns:
-                    self.estado_df["PROCESSO"] = self.estado_df["PROCESSO"].astype(str).str.strip()
-                
+                estado_df = pd.read_excel(filepath, sheet_name="ESTADO")
+                self._carregar_registros(self._normalizar_estado(estado_df))
+                if self.backend is not None:
+                    self._alterados = set(self._processos)
                 return True
         except Exception:
-            # Em caso de erro, criar DataFrame vazio
-            self.estado_df = pd.DataFrame(columns=COLUNAS_ESTADO)
-        
+            # Em caso de erro, começar com estado vazio
+            self._carregar_registros(None)
+
         return False
-    
+
+    @staticmethod
+    def _normalizar_estado(estado_df: pd.DataFrame) -> pd.DataFrame:
+        """Colunas com trim, todas as colunas esperadas e PROCESSO como texto."""
+        # Normalizar colunas (case-insensitive, trim)
+        estado_df.columns = estado_df.columns.str.strip()
+
+        # Garantir que todas as colunas esperadas existam
+        for col in COLUNAS_ESTADO:
+            if col not in estado_df.columns:
+                estado_df[col] = VALORES_PADRAO_ESTADO.get(col, None)
+
+        # Selecionar apenas colunas esperadas
+        estado_df = estado_df[COLUNAS_ESTADO]
+
+        # Converter PROCESSO para string
+        return estado_df.assign(PROCESSO=estado_df["PROCESSO"].astype(str).str.strip())
+
+    def salvar_estado(self, mes: Optional[int] = None, ano: Optional[int] = None) -> int:
+        """
+        Grava no backend os processos alterados desde a carga.
+
+        Args:
+            mes: Mês de apuração (opcional; registrado como período do estado)
+            ano: Ano de apuração (opcional)
+
+        Returns:
+            Quantidade de processos gravados (0 sem backend ou sem alterações)
+        """
+        if self.backend is None:
+            return 0
+        gravados = 0
+        if self._alterados:
+            # Ordem de cadastro (determinística, independente do hash do set)
+            registros = [
+                registro.to_dict()
+                for p, registro in self._processos.items()
+                if p in self._alterados
+            ]
+            gravados = self.backend.salvar_registros(registros)
+            self._alterados = set()
+        if mes and ano:
+            self.backend.registrar_periodo(mes, ano)
+        return gravados
+
     def obter_processo(self, processo_id: str) -> Optional[Dict]:
         """
         Retorna dados do processo ou None se não existir.
-        
+
         Args:
             processo_id: ID do processo
-        
+
         Returns:
             Dict com dados do processo ou None
         """
-        if self.estado_df.empty:
+        registro = self._processos.get(str(processo_id).strip())
+        if registro is None:
             return None
-        
-        processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-        
-        if mask.any():
-            row = self.estado_df[mask].iloc[0]
-            return row.to_dict()
-        
-        return None
-    
+        return registro.to_dict()
+
     def criar_processo(
         self,
         processo_id: str,
@@ -91,22 +232,22 @@ class StateManager:
     ) -> Dict:
         """
         Cria novo processo no estado.
-        
+
         Args:
             processo_id: ID do processo
             valor_total: Valor total do processo (da Análise Comercial)
             status_processo: Status inicial do processo
-        
+
         Returns:
             Dict com dados do processo criado
         """
         processo_id = str(processo_id).strip()
-        
+
         # Verificar se já existe
         processo_existente = self.obter_processo(processo_id)
         if processo_existente:
             return processo_existente
-        
+
         # Criar novo registro
         novo_registro = VALORES_PADRAO_ESTADO.copy()
         novo_registro["PROCESSO"] = processo_id
@@ -114,13 +255,44 @@ class StateManager:
         novo_registro["SALDO_A_RECEBER"] = valor_total
         novo_registro["STATUS_PROCESSO"] = status_processo
         novo_registro["ULTIMA_ATUALIZACAO"] = datetime.now()
-        
-        # Adicionar ao DataFrame
-        novo_df = pd.DataFrame([novo_registro])
-        self.estado_df = pd.concat([self.estado_df, novo_df], ignore_index=True)
-        
+
+        # Adicionar ao estado
+        self._processos[processo_id] = RegistroEstado(novo_registro)
+        self._df_cache = None
+        self._alterados.add(processo_id)
+
         return novo_registro
-    
+
+    @staticmethod
+    def _registrar_pagamento(
+        registro: RegistroEstado, data_pagamento: Optional[datetime]
+    ):
+        """Recalcula totais, saldo, datas e status após um pagamento."""
+        registro.TOTAL_PAGO_ACUMULADO = (
+            registro.TOTAL_ANTECIPACOES + registro.TOTAL_PAGAMENTOS_REGULARES
+        )
+        registro.TOTAL_COMISSAO_ACUMULADA = (
+            registro.TOTAL_COMISSAO_ANTECIPACOES + registro.TOTAL_COMISSAO_REGULARES
+        )
+        registro.SALDO_A_RECEBER = (
+            registro.VALOR_TOTAL_PROCESSO - registro.TOTAL_PAGO_ACUMULADO
+        )
+        registro.QUANTIDADE_PAGAMENTOS += 1
+
+        # Atualizar datas
+        if data_pagamento:
+            if pd.isna(registro.DATA_PRIMEIRO_PAGAMENTO):
+                registro.DATA_PRIMEIRO_PAGAMENTO = data_pagamento
+            registro.DATA_ULTIMO_PAGAMENTO = data_pagamento
+
+        # Atualizar status de pagamento
+        if registro.TOTAL_PAGO_ACUMULADO >= registro.VALOR_TOTAL_PROCESSO:
+            registro.STATUS_PAGAMENTO = "COMPLETO"
+        elif registro.TOTAL_PAGO_ACUMULADO > 0:
+            registro.STATUS_PAGAMENTO = "PARCIAL"
+
+        registro.ULTIMA_ATUALIZACAO = datetime.now()
+
     def atualizar_pagamento_adiantamento(
         self,
         processo_id: str,
@@ -130,54 +302,20 @@ class StateManager:
     ):
         """
         Atualiza estado com novo adiantamento.
-        
+
         Args:
             processo_id: ID do processo
             valor: Valor do adiantamento
             comissao_total: Total de comissões pagas no adiantamento
             data_pagamento: Data do pagamento
         """
-        processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-        
-        if not mask.any():
-            # Criar processo se não existir
-            self.criar_processo(processo_id)
-            mask = self.estado_df["PROCESSO"] == processo_id
-        
-        # Atualizar valores
-        idx = self.estado_df[mask].index[0]
-        
-        self.estado_df.at[idx, "TOTAL_ANTECIPACOES"] += valor
-        self.estado_df.at[idx, "TOTAL_COMISSAO_ANTECIPACOES"] += comissao_total
-        self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"] = (
-            self.estado_df.at[idx, "TOTAL_ANTECIPACOES"] +
-            self.estado_df.at[idx, "TOTAL_PAGAMENTOS_REGULARES"]
-        )
-        self.estado_df.at[idx, "TOTAL_COMISSAO_ACUMULADA"] = (
-            self.estado_df.at[idx, "TOTAL_COMISSAO_ANTECIPACOES"] +
-            self.estado_df.at[idx, "TOTAL_COMISSAO_REGULARES"]
-        )
-        self.estado_df.at[idx, "SALDO_A_RECEBER"] = (
-            self.estado_df.at[idx, "VALOR_TOTAL_PROCESSO"] -
-            self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"]
-        )
-        self.estado_df.at[idx, "QUANTIDADE_PAGAMENTOS"] += 1
-        
-        # Atualizar datas
-        if data_pagamento:
-            if pd.isna(self.estado_df.at[idx, "DATA_PRIMEIRO_PAGAMENTO"]):
-                self.estado_df.at[idx, "DATA_PRIMEIRO_PAGAMENTO"] = data_pagamento
-            self.estado_df.at[idx, "DATA_ULTIMO_PAGAMENTO"] = data_pagamento
-        
-        # Atualizar status de pagamento
-        if self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"] >= self.estado_df.at[idx, "VALOR_TOTAL_PROCESSO"]:
-            self.estado_df.at[idx, "STATUS_PAGAMENTO"] = "COMPLETO"
-        elif self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"] > 0:
-            self.estado_df.at[idx, "STATUS_PAGAMENTO"] = "PARCIAL"
-        
-        self.estado_df.at[idx, "ULTIMA_ATUALIZACAO"] = datetime.now()
-    
+        # Criar processo se não existir
+        registro = self._obter_registro(processo_id)
+
+        registro.TOTAL_ANTECIPACOES += valor
+        registro.TOTAL_COMISSAO_ANTECIPACOES += comissao_total
+        self._registrar_pagamento(registro, data_pagamento)
+
     def atualizar_pagamento_regular(
         self,
         processo_id: str,
@@ -187,54 +325,20 @@ class StateManager:
     ):
         """
         Atualiza estado com novo pagamento regular.
-        
+
         Args:
             processo_id: ID do processo
             valor: Valor do pagamento regular
             comissao_total: Total de comissões pagas no pagamento
             data_pagamento: Data do pagamento
         """
-        processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-        
-        if not mask.any():
-            # Criar processo se não existir
-            self.criar_processo(processo_id)
-            mask = self.estado_df["PROCESSO"] == processo_id
-        
-        # Atualizar valores
-        idx = self.estado_df[mask].index[0]
-        
-        self.estado_df.at[idx, "TOTAL_PAGAMENTOS_REGULARES"] += valor
-        self.estado_df.at[idx, "TOTAL_COMISSAO_REGULARES"] += comissao_total
-        self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"] = (
-            self.estado_df.at[idx, "TOTAL_ANTECIPACOES"] +
-            self.estado_df.at[idx, "TOTAL_PAGAMENTOS_REGULARES"]
-        )
-        self.estado_df.at[idx, "TOTAL_COMISSAO_ACUMULADA"] = (
-            self.estado_df.at[idx, "TOTAL_COMISSAO_ANTECIPACOES"] +
-            self.estado_df.at[idx, "TOTAL_COMISSAO_REGULARES"]
-        )
-        self.estado_df.at[idx, "SALDO_A_RECEBER"] = (
-            self.estado_df.at[idx, "VALOR_TOTAL_PROCESSO"] -
-            self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"]
-        )
-        self.estado_df.at[idx, "QUANTIDADE_PAGAMENTOS"] += 1
-        
-        # Atualizar datas
-        if data_pagamento:
-            if pd.isna(self.estado_df.at[idx, "DATA_PRIMEIRO_PAGAMENTO"]):
-                self.estado_df.at[idx, "DATA_PRIMEIRO_PAGAMENTO"] = data_pagamento
-            self.estado_df.at[idx, "DATA_ULTIMO_PAGAMENTO"] = data_pagamento
-        
-        # Atualizar status de pagamento
-        if self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"] >= self.estado_df.at[idx, "VALOR_TOTAL_PROCESSO"]:
-            self.estado_df.at[idx, "STATUS_PAGAMENTO"] = "COMPLETO"
-        elif self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"] > 0:
-            self.estado_df.at[idx, "STATUS_PAGAMENTO"] = "PARCIAL"
-        
-        self.estado_df.at[idx, "ULTIMA_ATUALIZACAO"] = datetime.now()
-    
+        # Criar processo se não existir
+        registro = self._obter_registro(processo_id)
+
+        registro.TOTAL_PAGAMENTOS_REGULARES += valor
+        registro.TOTAL_COMISSAO_REGULARES += comissao_total
+        self._registrar_pagamento(registro, data_pagamento)
+
     def definir_metricas(
         self,
         processo_id: str,
@@ -244,45 +348,38 @@ class StateManager:
     ):
         """
         Define TCMP e FCMP para um processo (quando faturado).
-        
+
         Args:
             processo_id: ID do processo
             tcmp_dict: Dict {nome_colaborador: tcmp}
             fcmp_dict: Dict {nome_colaborador: fcmp}
             mes_faturamento: Mês/ano do faturamento (ex: "09/2025")
         """
-        processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-        
-        if not mask.any():
-            # Criar processo se não existir
-            self.criar_processo(processo_id)
-            mask = self.estado_df["PROCESSO"] == processo_id
-        
-        idx = self.estado_df[mask].index[0]
-        
+        # Criar processo se não existir
+        registro = self._obter_registro(processo_id)
+
         # Converter dicts para JSON
-        self.estado_df.at[idx, "TCMP_JSON"] = json.dumps(tcmp_dict, ensure_ascii=False)
-        self.estado_df.at[idx, "FCMP_JSON"] = json.dumps(fcmp_dict, ensure_ascii=False)
-        
+        registro.TCMP_JSON = json.dumps(tcmp_dict, ensure_ascii=False)
+        registro.FCMP_JSON = json.dumps(fcmp_dict, ensure_ascii=False)
+
         # Lista de colaboradores envolvidos
         colaboradores = list(tcmp_dict.keys())
-        self.estado_df.at[idx, "COLABORADORES_ENVOLVIDOS"] = ", ".join(colaboradores)
-        
+        registro.COLABORADORES_ENVOLVIDOS = ", ".join(colaboradores)
+
         # Atualizar status e mês de faturamento
-        self.estado_df.at[idx, "STATUS_CALCULO_MEDIAS"] = "CALCULADO"
-        self.estado_df.at[idx, "MES_ANO_FATURAMENTO"] = mes_faturamento
-        self.estado_df.at[idx, "STATUS_PROCESSO"] = "FATURADO"
-        
-        self.estado_df.at[idx, "ULTIMA_ATUALIZACAO"] = datetime.now()
-    
+        registro.STATUS_CALCULO_MEDIAS = "CALCULADO"
+        registro.MES_ANO_FATURAMENTO = mes_faturamento
+        registro.STATUS_PROCESSO = "FATURADO"
+
+        registro.ULTIMA_ATUALIZACAO = datetime.now()
+
     def obter_metricas(self, processo_id: str) -> Optional[Dict[str, Dict[str, float]]]:
         """
         Retorna TCMP e FCMP salvos para um processo.
-        
+
         Args:
             processo_id: ID do processo
-        
+
         Returns:
             Dict com 'TCMP' e 'FCMP' (cada um é um dict {nome: valor})
             ou None se não encontrado ou não calculado
@@ -290,46 +387,41 @@ class StateManager:
         processo = self.obter_processo(processo_id)
         if not processo:
             return None
-        
+
         if processo.get("STATUS_CALCULO_MEDIAS") != "CALCULADO":
             return None
-        
+
         try:
             tcmp_json = processo.get("TCMP_JSON", "{}")
             fcmp_json = processo.get("FCMP_JSON", "{}")
-            
+
             tcmp_dict = json.loads(tcmp_json) if tcmp_json else {}
             fcmp_dict = json.loads(fcmp_json) if fcmp_json else {}
-            
+
             return {
                 "TCMP": tcmp_dict,
                 "FCMP": fcmp_dict
             }
         except Exception:
             return None
-    
+
     def atualizar_valor_total_processo(self, processo_id: str, valor_total: float):
         """
         Atualiza o valor total do processo.
-        
+
         Args:
             processo_id: ID do processo
             valor_total: Valor total do processo
         """
         processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-        
-        if not mask.any():
+        if processo_id not in self._processos:
             self.criar_processo(processo_id, valor_total)
-            mask = self.estado_df["PROCESSO"] == processo_id
-        
-        idx = self.estado_df[mask].index[0]
-        self.estado_df.at[idx, "VALOR_TOTAL_PROCESSO"] = valor_total
-        self.estado_df.at[idx, "SALDO_A_RECEBER"] = (
-            valor_total - self.estado_df.at[idx, "TOTAL_PAGO_ACUMULADO"]
-        )
-        self.estado_df.at[idx, "ULTIMA_ATUALIZACAO"] = datetime.now()
-    
+
+        registro = self._obter_registro(processo_id)
+        registro.VALOR_TOTAL_PROCESSO = valor_total
+        registro.SALDO_A_RECEBER = valor_total - registro.TOTAL_PAGO_ACUMULADO
+        registro.ULTIMA_ATUALIZACAO = datetime.now()
+
     def armazenar_comissoes_adiantadas(
         self, processo_id: str, comissoes_por_colaborador: Dict[str, float]
     ):
@@ -340,18 +432,11 @@ class StateManager:
             processo_id: ID do processo
             comissoes_por_colaborador: Dict {nome_colaborador: comissao}
         """
-        processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-
-        if not mask.any():
-            # Criar processo se não existir
-            self.criar_processo(processo_id)
-            mask = self.estado_df["PROCESSO"] == processo_id
-
-        idx = self.estado_df[mask].index[0]
+        # Criar processo se não existir
+        registro = self._obter_registro(processo_id)
 
         # Carregar comissões existentes
-        comissoes_json = self.estado_df.at[idx, "COMISSOES_ADIANTADAS_JSON"]
+        comissoes_json = registro.COMISSOES_ADIANTADAS_JSON
         try:
             comissoes_existentes = json.loads(comissoes_json) if comissoes_json else {}
         except Exception:
@@ -365,10 +450,10 @@ class StateManager:
                 comissoes_existentes[colaborador] = float(comissao or 0.0)
 
         # Salvar de volta
-        self.estado_df.at[idx, "COMISSOES_ADIANTADAS_JSON"] = json.dumps(
+        registro.COMISSOES_ADIANTADAS_JSON = json.dumps(
             comissoes_existentes, ensure_ascii=False
         )
-        self.estado_df.at[idx, "ULTIMA_ATUALIZACAO"] = datetime.now()
+        registro.ULTIMA_ATUALIZACAO = datetime.now()
 
     def obter_comissoes_adiantadas(self, processo_id: str) -> Dict[str, float]:
         """
@@ -402,47 +487,33 @@ class StateManager:
         Args:
             processo_id: ID do processo
         """
-        processo_id = str(processo_id).strip()
-        mask = self.estado_df["PROCESSO"] == processo_id
-
-        if not mask.any():
+        registro = self._obter_registro(processo_id, criar=False)
+        if registro is None:
             return
 
-        idx = self.estado_df[mask].index[0]
-        if "STATUS_RECONCILIACAO" in self.estado_df.columns:
-            self.estado_df.at[idx, "STATUS_RECONCILIACAO"] = "CALCULADO"
-        self.estado_df.at[idx, "ULTIMA_ATUALIZACAO"] = datetime.now()
-    
+        registro.STATUS_RECONCILIACAO = "CALCULADO"
+        registro.ULTIMA_ATUALIZACAO = datetime.now()
+
     def obter_processos_cadastrados(self) -> list:
         """
         Retorna lista de IDs de processos cadastrados no estado.
-        
+
         Returns:
             Lista de IDs de processos (strings)
         """
-        if self.estado_df.empty or "PROCESSO" not in self.estado_df.columns:
-            return []
-        
-        processos = self.estado_df["PROCESSO"].dropna().astype(str).str.strip().unique().tolist()
-        return processos
-    
+        return list(self._processos.keys())
+
     def obter_dataframe_estado(self) -> pd.DataFrame:
         """
         Retorna DataFrame do estado completo para salvar em Excel.
-        
+
         Returns:
             DataFrame com todas as colunas do estado
         """
-        # Garantir que todas as colunas existam
-        for col in COLUNAS_ESTADO:
-            if col not in self.estado_df.columns:
-                self.estado_df[col] = VALORES_PADRAO_ESTADO.get(col, None)
-        
         # Selecionar apenas colunas esperadas e ordenar por PROCESSO
         df_retorno = self.estado_df[COLUNAS_ESTADO].copy()
-        
+
         if not df_retorno.empty and "PROCESSO" in df_retorno.columns:
             df_retorno = df_retorno.sort_values("PROCESSO")
-        
-        return df_retorno
 
+        return df_retorno
@@ -7,6 +7,8 @@ import os
 from typing import Optional
 from datetime import datetime
 
+from ...io.input_cache import ler_excel
+
 
 class AnaliseFinanceiraLoader:
     """
@@ -72,7 +74,7 @@ class AnaliseFinanceiraLoader:
         print(f"[RECEBIMENTO] [LOADER] Carregando arquivo Excel: {path}")
         try:
             # Primeiro, ler apenas o cabeçalho para identificar a coluna Documento
-            df_temp = pd.read_excel(path, nrows=0)
+            df_temp = ler_excel(path, nrows=0)
             col_doc_temp = self._encontrar_coluna(df_temp, ["Documento", "documento", "DOCUMENTO"])
             
             # Usar converters para forçar leitura como string e preservar zeros à esquerda
@@ -80,7 +82,7 @@ class AnaliseFinanceiraLoader:
             if col_doc_temp:
                 converters[col_doc_temp] = str
             
-            df = pd.read_excel(path, converters=converters)
+            df = ler_excel(path, converters=converters)
             print(f"[RECEBIMENTO] [LOADER] Arquivo carregado: {len(df)} linha(s), {len(df.columns)} coluna(s)")
             print(f"[RECEBIMENTO] [LOADER] Colunas encontradas: {list(df.columns)[:10]}...")  # Primeiras 10 colunas
         except Exception as e:
@@ -6,9 +6,22 @@ import pandas as pd
 import os
 from typing import Dict, Optional
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
+
+from ...io.saida_excel import PlanilhaSaida
+
+# Cabeçalho de todas as abas e cor das linhas por tipo de lançamento
+ESTILO_CABECALHO = {
+    "negrito": True,
+    "cor_fonte": "FFFFFF",
+    "cor_fundo": "37474F",
+    "horizontal": "center",
+    "vertical": "center",
+}
+CORES_ABAS = {
+    "COMISSOES_ADIANTAMENTOS": "E3F2FD",
+    "COMISSOES_REGULARES": "F1F8E9",
+    "RECONCILIACOES": "FFF3E0",
+}
 
 
 class RecebimentoOutputGenerator:
@@ -16,9 +29,15 @@ class RecebimentoOutputGenerator:
     Gera arquivo Excel com todas as abas de comissões por recebimento.
     """
     
-    def __init__(self):
-        """Inicializa o gerador de saída."""
-        pass
+    def __init__(self, motor: Optional[str] = None):
+        """
+        Inicializa o gerador de saída.
+        
+        Args:
+            motor: Motor de gravação (ver src/io/saida_excel.py); padrão: variável
+                   de ambiente COMISSOES_MOTOR_SAIDA ou 'auto'
+        """
+        self.motor = motor or os.getenv("COMISSOES_MOTOR_SAIDA", "auto")
     
     def gerar(
         self,
@@ -52,21 +71,17 @@ class RecebimentoOutputGenerator:
         print(f"[RECEBIMENTO] [OUTPUT] Caminho completo: {filepath}")
         print(f"[RECEBIMENTO] [OUTPUT] Base path: {base_path}")
         
-        # Criar ExcelWriter
-        print(f"[RECEBIMENTO] [OUTPUT] Criando ExcelWriter...")
+        # Gravação em uma passada: estilos aplicados durante a escrita
+        print(f"[RECEBIMENTO] [OUTPUT] Criando planilha de saída...")
         try:
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+            with PlanilhaSaida(filepath, self.motor) as writer:
                 # Aba 1: COMISSOES_ADIANTAMENTOS
                 print(f"[RECEBIMENTO] [OUTPUT] Criando aba COMISSOES_ADIANTAMENTOS...")
                 if not dados.get('adiantamentos', pd.DataFrame()).empty:
                     df_adiant = dados['adiantamentos'].copy()
                     print(f"[RECEBIMENTO] [OUTPUT] Adiantamentos: {len(df_adiant)} linha(s)")
                     self._preparar_dataframe_adiantamentos(df_adiant)
-                    df_adiant.to_excel(
-                        writer,
-                        sheet_name='COMISSOES_ADIANTAMENTOS',
-                        index=False
-                    )
+                    self._escrever(writer, df_adiant, 'COMISSOES_ADIANTAMENTOS')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba COMISSOES_ADIANTAMENTOS criada com sucesso")
                 else:
                     print(f"[RECEBIMENTO] [OUTPUT] Nenhum adiantamento. Criando aba vazia...")
@@ -76,11 +91,7 @@ class RecebimentoOutputGenerator:
                         'nome_colaborador', 'cargo', 'tcmp', 'fc', 'comissao_calculada',
                         'mes_calculo', 'observacao'
                     ])
-                    df_vazio.to_excel(
-                        writer,
-                        sheet_name='COMISSOES_ADIANTAMENTOS',
-                        index=False
-                    )
+                    self._escrever(writer, df_vazio, 'COMISSOES_ADIANTAMENTOS')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba COMISSOES_ADIANTAMENTOS vazia criada")
                 
                 # Aba 2: COMISSOES_REGULARES
@@ -89,11 +100,7 @@ class RecebimentoOutputGenerator:
                     df_reg = dados['regulares'].copy()
                     print(f"[RECEBIMENTO] [OUTPUT] Regulares: {len(df_reg)} linha(s)")
                     self._preparar_dataframe_regulares(df_reg)
-                    df_reg.to_excel(
-                        writer,
-                        sheet_name='COMISSOES_REGULARES',
-                        index=False
-                    )
+                    self._escrever(writer, df_reg, 'COMISSOES_REGULARES')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba COMISSOES_REGULARES criada com sucesso")
                 else:
                     print(f"[RECEBIMENTO] [OUTPUT] Nenhum pagamento regular. Criando aba vazia...")
@@ -103,21 +110,13 @@ class RecebimentoOutputGenerator:
                         'nome_colaborador', 'cargo', 'tcmp', 'fcmp', 'comissao_calculada',
                         'mes_faturamento', 'mes_calculo', 'observacao'
                     ])
-                    df_vazio.to_excel(
-                        writer,
-                        sheet_name='COMISSOES_REGULARES',
-                        index=False
-                    )
+                    self._escrever(writer, df_vazio, 'COMISSOES_REGULARES')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba COMISSOES_REGULARES vazia criada")
                 
                 # Aba 3: RECONCILIACOES
                 print(f"[RECEBIMENTO] [OUTPUT] Criando aba RECONCILIACOES...")
                 if not dados.get('reconciliacoes', pd.DataFrame()).empty:
-                    dados['reconciliacoes'].to_excel(
-                        writer,
-                        sheet_name='RECONCILIACOES',
-                        index=False
-                    )
+                    self._escrever(writer, dados['reconciliacoes'], 'RECONCILIACOES')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba RECONCILIACOES criada")
                 else:
                     print(f"[RECEBIMENTO] [OUTPUT] Nenhuma reconciliação. Criando aba vazia...")
@@ -133,44 +132,28 @@ class RecebimentoOutputGenerator:
                         'ajuste_reconciliacao',
                         'mes_faturamento',
                     ])
-                    df_vazio.to_excel(
-                        writer,
-                        sheet_name='RECONCILIACOES',
-                        index=False
-                    )
+                    self._escrever(writer, df_vazio, 'RECONCILIACOES')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba RECONCILIACOES vazia criada")
                 
                 # Aba 4: ESTADO
                 print(f"[RECEBIMENTO] [OUTPUT] Criando aba ESTADO...")
                 if not dados.get('estado', pd.DataFrame()).empty:
                     print(f"[RECEBIMENTO] [OUTPUT] Estado: {len(dados['estado'])} linha(s)")
-                    dados['estado'].to_excel(
-                        writer,
-                        sheet_name='ESTADO',
-                        index=False
-                    )
+                    self._escrever(writer, dados['estado'], 'ESTADO')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba ESTADO criada com sucesso")
                 else:
                     print(f"[RECEBIMENTO] [OUTPUT] Estado vazio. Criando aba vazia...")
                     # Criar DataFrame vazio com colunas do schema
                     from ..estado.state_schema import COLUNAS_ESTADO
                     df_vazio = pd.DataFrame(columns=COLUNAS_ESTADO)
-                    df_vazio.to_excel(
-                        writer,
-                        sheet_name='ESTADO',
-                        index=False
-                    )
+                    self._escrever(writer, df_vazio, 'ESTADO')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba ESTADO vazia criada")
                 
                 # Aba 5: AVISOS
                 print(f"[RECEBIMENTO] [OUTPUT] Criando aba AVISOS...")
                 if not dados.get('avisos', pd.DataFrame()).empty:
                     print(f"[RECEBIMENTO] [OUTPUT] Avisos: {len(dados['avisos'])} linha(s)")
-                    dados['avisos'].to_excel(
-                        writer,
-                        sheet_name='AVISOS',
-                        index=False
-                    )
+                    self._escrever(writer, dados['avisos'], 'AVISOS')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba AVISOS criada com sucesso")
                 else:
                     print(f"[RECEBIMENTO] [OUTPUT] Nenhum aviso. Criando aba vazia...")
@@ -178,11 +161,7 @@ class RecebimentoOutputGenerator:
                     df_vazio = pd.DataFrame(columns=[
                         'documento', 'documento_6dig', 'motivo', 'valor', 'data_pagamento'
                     ])
-                    df_vazio.to_excel(
-                        writer,
-                        sheet_name='AVISOS',
-                        index=False
-                    )
+                    self._escrever(writer, df_vazio, 'AVISOS')
                     print(f"[RECEBIMENTO] [OUTPUT] Aba AVISOS vazia criada")
         
         except Exception as e:
@@ -191,16 +170,21 @@ class RecebimentoOutputGenerator:
             traceback.print_exc()
             raise
         
-        print(f"[RECEBIMENTO] [OUTPUT] ExcelWriter fechado. Arquivo salvo.")
+        print(f"[RECEBIMENTO] [OUTPUT] Arquivo salvo (motor {writer.motor}).")
         
-        # Aplicar formatação
-        print(f"[RECEBIMENTO] [OUTPUT] Aplicando formatação...")
-        self._aplicar_formatacao(filepath)
-        print(f"[RECEBIMENTO] [OUTPUT] Formatação aplicada")
+        # Motor legado (pd.ExcelWriter): formatação aplicada reabrindo o arquivo
+        if writer.motor == "pandas":
+            print(f"[RECEBIMENTO] [OUTPUT] Aplicando formatação...")
+            self._aplicar_formatacao(filepath)
+            print(f"[RECEBIMENTO] [OUTPUT] Formatação aplicada")
         
         print(f"[RECEBIMENTO] [OUTPUT] Arquivo gerado com sucesso: {filepath}")
         return filepath
     
+    def _escrever(self, writer: PlanilhaSaida, df: pd.DataFrame, aba: str):
+        """Grava a aba com cabeçalho, cor das linhas e larguras (maior texto + 2, até 50)."""
+        writer.escrever(df, aba, cabecalho=ESTILO_CABECALHO, cor_linhas=CORES_ABAS.get(aba))
+    
     def _preparar_dataframe_adiantamentos(self, df: pd.DataFrame):
         """Prepara DataFrame de adiantamentos para exibição."""
         # Ordenar por processo e colaborador
@@ -243,12 +227,15 @@ class RecebimentoOutputGenerator:
     
     def _aplicar_formatacao(self, filepath: str):
         """
-        Aplica formatação básica ao arquivo Excel.
+        Aplica formatação básica ao arquivo Excel já salvo (motor 'pandas').
         
         Args:
             filepath: Caminho do arquivo Excel
         """
         try:
+            from openpyxl import load_workbook
+            from openpyxl.styles import PatternFill, Font, Alignment
+
             wb = load_workbook(filepath)
 
             # Cores para destacar tipos
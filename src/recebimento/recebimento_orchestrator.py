@@ -8,6 +8,8 @@ import os
 from datetime import datetime
 from typing import Optional
 
+from ..utils import diagnostics
+
 from .core.comissao_calculator import ComissaoCalculator
 from .core.metricas_calculator import MetricasCalculator
 from .core.process_mapper import ProcessMapper
@@ -28,7 +30,12 @@ class RecebimentoOrchestrator:
     """
 
     def __init__(
-        self, calculo_comissao_instance, mes: int, ano: int, base_path: str = "."
+        self,
+        calculo_comissao_instance,
+        mes: int,
+        ano: int,
+        base_path: str = ".",
+        state_manager: Optional[StateManager] = None,
     ):
         """
         Inicializa o orquestrador.
@@ -38,6 +45,8 @@ class RecebimentoOrchestrator:
             mes: Mês de apuração (1-12)
             ano: Ano de apuração (ex: 2025)
             base_path: Caminho base para arquivos
+            state_manager: Estado já em memória (execução em lote: estado do
+                           mês anterior); quando informado, não é recarregado
         """
         self.calc_comissao = calculo_comissao_instance
         self.mes = mes
@@ -46,10 +55,18 @@ class RecebimentoOrchestrator:
 
         # Inicializar componentes
         self.loader = AnaliseFinanceiraLoader()
-        self.state_manager = StateManager()
+        self.estado_em_memoria = state_manager is not None
+        if state_manager is None:
+            state_manager = StateManager(
+                backend=calculo_comissao_instance._criar_backend_estado("estado_recebimento")
+            )
+        self.state_manager = state_manager
         self.metricas_calc = MetricasCalculator(calculo_comissao_instance)
         self.comissao_calc = ComissaoCalculator()
-        self.output_gen = RecebimentoOutputGenerator()
+        motor_saida = getattr(calculo_comissao_instance, "_motor_saida_excel", None)
+        self.output_gen = RecebimentoOutputGenerator(
+            motor=motor_saida() if callable(motor_saida) else None
+        )
 
         # Componentes de reconciliação
         self.reconciliacao_detector = ReconciliacaoDetector(self.state_manager, mes, ano)
@@ -86,6 +103,10 @@ class RecebimentoOrchestrator:
             f"[RECEBIMENTO] [ETAPA 2.1/6] Análise Financeira carregada: {len(df_financeira)} linha(s)"
         )
 
+        # 2. Carregar estado anterior (também sem pagamentos: no lote o estado
+        # deste mês é repassado ao seguinte, que não o recarrega)
+        self._carregar_estado()
+
         if df_financeira.empty:
             print(
                 "[RECEBIMENTO] [ETAPA 2.1/6] AVISO: DataFrame vazio! Gerando arquivo vazio..."
@@ -99,25 +120,6 @@ class RecebimentoOrchestrator:
             self._gerar_pdf_auditoria()
             return arquivo_gerado
 
-        # 2. Carregar estado anterior
-        print("[RECEBIMENTO] [ETAPA 2.2/6] Carregando estado anterior...")
-        arquivo_estado_anterior = (
-            f"Comissoes_Recebimento_{self.mes:02d}_{self.ano}.xlsx"
-        )
-        caminho_estado = os.path.join(self.base_path, arquivo_estado_anterior)
-        print(
-            f"[RECEBIMENTO] [ETAPA 2.2/6] Caminho do estado anterior: {caminho_estado}"
-        )
-        print(
-            f"[RECEBIMENTO] [ETAPA 2.2/6] Arquivo existe? {os.path.exists(caminho_estado)}"
-        )
-
-        carregou = self.state_manager.carregar_estado_anterior(caminho_estado)
-        print(f"[RECEBIMENTO] [ETAPA 2.2/6] Estado carregado: {carregou}")
-        print(
-            f"[RECEBIMENTO] [ETAPA 2.2/6] Processos no estado: {len(self.state_manager.estado_df)}"
-        )
-
         # 3. Inicializar mapper
         print("[RECEBIMENTO] [ETAPA 2.3/6] Inicializando ProcessMapper...")
         df_comercial = self.calc_comissao.data.get(
@@ -241,6 +243,7 @@ class RecebimentoOrchestrator:
         print("[RECEBIMENTO] [ETAPA 2.7/6] Gerando arquivo de saída...")
         arquivo_gerado = self._gerar_arquivo_saida()
         print(f"[RECEBIMENTO] [ETAPA 2.7/6] Arquivo gerado: {arquivo_gerado}")
+        self._salvar_estado_backend()
 
         # 8. Gerar PDF de auditoria (opcional)
         print(
@@ -254,33 +257,41 @@ class RecebimentoOrchestrator:
         self, processo: str, valor: float, documento: str, data_pagamento: datetime
     ):
         """Processa um adiantamento."""
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] Processando adiantamento: processo={processo}, valor={valor}, documento={documento}"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] Processando adiantamento: processo={processo}, valor={valor}, documento={documento}",
         )
 
         # Calcular TCMP temporária (sem FC, pois ainda não foi faturado)
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] Calculando TCMP para processo {processo}..."
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] Calculando TCMP para processo {processo}...",
         )
         metricas = self.metricas_calc.calcular_metricas_processo(
             processo, self.mes, self.ano
         )
 
         tcmp_dict = metricas.get("TCMP", {})
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] TCMP calculado: {len(tcmp_dict)} colaborador(es)"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] TCMP calculado: {len(tcmp_dict)} colaborador(es)",
         )
 
         if not tcmp_dict:
-            print(
-                f"[RECEBIMENTO] [ADIANTAMENTO] AVISO: TCMP vazio para processo {processo}. Pulando..."
+            diagnostics.debug(
+                "recebimento",
+                f"[RECEBIMENTO] [ADIANTAMENTO] AVISO: TCMP vazio para processo {processo}. Pulando...",
+            )
+            diagnostics.registrar_falta(
+                "recebimento", processo, "TCMP vazio (adiantamento)"
             )
             # Se não conseguir calcular TCMP, pular
             return
 
         # Calcular comissões
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] Calculando comissões para {len(tcmp_dict)} colaborador(es)..."
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] Calculando comissões para {len(tcmp_dict)} colaborador(es)...",
         )
         comissoes = self.comissao_calc.calcular_adiantamento(
             processo=processo,
@@ -290,8 +301,9 @@ class RecebimentoOrchestrator:
             data_pagamento=data_pagamento,
         )
 
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] {len(comissoes)} comissão(ões) calculada(s)"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] {len(comissoes)} comissão(ões) calculada(s)",
         )
 
         # Adicionar mês de cálculo
@@ -303,8 +315,9 @@ class RecebimentoOrchestrator:
 
         # Atualizar estado
         total_comissao = sum(c["comissao_calculada"] for c in comissoes)
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] Total de comissão: R$ {total_comissao:.2f}"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] Total de comissão: R$ {total_comissao:.2f}",
         )
         # Armazenar comissões adiantadas por colaborador (para futuras reconciliações)
         comissoes_por_colaborador = {
@@ -313,44 +326,50 @@ class RecebimentoOrchestrator:
         self.state_manager.armazenar_comissoes_adiantadas(
             processo, comissoes_por_colaborador
         )
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] Comissões adiantadas armazenadas por colaborador: {comissoes_por_colaborador}"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] Comissões adiantadas armazenadas por colaborador: {comissoes_por_colaborador}",
         )
 
         self.state_manager.atualizar_pagamento_adiantamento(
             processo, valor, total_comissao, data_pagamento
         )
-        print(
-            f"[RECEBIMENTO] [ADIANTAMENTO] Estado atualizado para processo {processo}"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [ADIANTAMENTO] Estado atualizado para processo {processo}",
         )
 
     def _processar_pagamento_regular(
         self, processo: str, valor: float, documento: str, data_pagamento: datetime
     ):
         """Processa um pagamento regular."""
-        print(
-            f"[RECEBIMENTO] [REGULAR] Processando pagamento regular: processo={processo}, valor={valor}, documento={documento}"
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [REGULAR] Processando pagamento regular: processo={processo}, valor={valor}, documento={documento}",
         )
 
         # Verificar se métricas já foram calculadas
-        print(
-            f"[RECEBIMENTO] [REGULAR] Verificando métricas salvas para processo {processo}..."
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [REGULAR] Verificando métricas salvas para processo {processo}...",
         )
         metricas_salvas = self.state_manager.obter_metricas(processo)
 
         if metricas_salvas:
-            print(f"[RECEBIMENTO] [REGULAR] Métricas encontradas no estado")
+            diagnostics.debug("recebimento", f"[RECEBIMENTO] [REGULAR] Métricas encontradas no estado")
             tcmp_dict = metricas_salvas["TCMP"]
             fcmp_dict = metricas_salvas["FCMP"]
             mes_faturamento = self.state_manager.obter_processo(processo).get(
                 "MES_ANO_FATURAMENTO"
             )
-            print(
-                f"[RECEBIMENTO] [REGULAR] TCMP: {len(tcmp_dict)} colaborador(es), FCMP: {len(fcmp_dict)} colaborador(es)"
+            diagnostics.debug(
+                "recebimento",
+                f"[RECEBIMENTO] [REGULAR] TCMP: {len(tcmp_dict)} colaborador(es), FCMP: {len(fcmp_dict)} colaborador(es)",
             )
         else:
-            print(
-                f"[RECEBIMENTO] [REGULAR] Métricas não encontradas. Calculando agora..."
+            diagnostics.debug(
+                "recebimento",
+                f"[RECEBIMENTO] [REGULAR] Métricas não encontradas. Calculando agora...",
             )
             # Calcular métricas agora (processo foi faturado)
             metricas = self.metricas_calc.calcular_metricas_processo(
@@ -360,30 +379,37 @@ class RecebimentoOrchestrator:
             tcmp_dict = metricas.get("TCMP", {})
             fcmp_dict = metricas.get("FCMP", {})
 
-            print(
-                f"[RECEBIMENTO] [REGULAR] Métricas calculadas: TCMP={len(tcmp_dict)}, FCMP={len(fcmp_dict)}"
+            diagnostics.debug(
+                "recebimento",
+                f"[RECEBIMENTO] [REGULAR] Métricas calculadas: TCMP={len(tcmp_dict)}, FCMP={len(fcmp_dict)}",
             )
 
             if not tcmp_dict:
-                print(
-                    f"[RECEBIMENTO] [REGULAR] AVISO: TCMP vazio para processo {processo}. Pulando..."
+                diagnostics.debug(
+                    "recebimento",
+                    f"[RECEBIMENTO] [REGULAR] AVISO: TCMP vazio para processo {processo}. Pulando...",
+                )
+                diagnostics.registrar_falta(
+                    "recebimento", processo, "TCMP vazio (regular)"
                 )
                 # Se não conseguir calcular métricas, pular
                 return
 
             # Salvar no estado
             mes_faturamento = f"{self.mes:02d}/{self.ano}"
-            print(
-                f"[RECEBIMENTO] [REGULAR] Salvando métricas no estado (mês faturamento: {mes_faturamento})..."
+            diagnostics.debug(
+                "recebimento",
+                f"[RECEBIMENTO] [REGULAR] Salvando métricas no estado (mês faturamento: {mes_faturamento})...",
             )
             self.state_manager.definir_metricas(
                 processo, tcmp_dict, fcmp_dict, mes_faturamento
             )
-            print(f"[RECEBIMENTO] [REGULAR] Métricas salvas no estado")
+            diagnostics.debug("recebimento", f"[RECEBIMENTO] [REGULAR] Métricas salvas no estado")
 
         # Calcular comissões
-        print(
-            f"[RECEBIMENTO] [REGULAR] Calculando comissões para {len(tcmp_dict)} colaborador(es)..."
+        diagnostics.debug(
+            "recebimento",
+            f"[RECEBIMENTO] [REGULAR] Calculando comissões para {len(tcmp_dict)} colaborador(es)...",
         )
         comissoes = self.comissao_calc.calcular_regular(
             processo=processo,
@@ -395,7 +421,7 @@ class RecebimentoOrchestrator:
             mes_faturamento=mes_faturamento,
         )
 
-        print(f"[RECEBIMENTO] [REGULAR] {len(comissoes)} comissão(ões) calculada(s)")
+        diagnostics.debug("recebimento", f"[RECEBIMENTO] [REGULAR] {len(comissoes)} comissão(ões) calculada(s)")
 
         # Adicionar mês de cálculo
         mes_calc = f"{self.mes:02d}/{self.ano}"
@@ -406,11 +432,11 @@ class RecebimentoOrchestrator:
 
         # Atualizar estado
         total_comissao = sum(c["comissao_calculada"] for c in comissoes)
-        print(f"[RECEBIMENTO] [REGULAR] Total de comissão: R$ {total_comissao:.2f}")
+        diagnostics.debug("recebimento", f"[RECEBIMENTO] [REGULAR] Total de comissão: R$ {total_comissao:.2f}")
         self.state_manager.atualizar_pagamento_regular(
             processo, valor, total_comissao, data_pagamento
         )
-        print(f"[RECEBIMENTO] [REGULAR] Estado atualizado para processo {processo}")
+        diagnostics.debug("recebimento", f"[RECEBIMENTO] [REGULAR] Estado atualizado para processo {processo}")
 
     def _calcular_metricas_processos_faturados(self):
         """
@@ -444,15 +470,12 @@ class RecebimentoOrchestrator:
             )
             return
 
-        # Encontrar colunas
-        proc_col = self._encontrar_coluna(df_comercial, ["processo", "Processo"])
-        status_col = self._encontrar_coluna(
-            df_comercial, ["Status Processo", "status processo"]
-        )
-        nf_col = self._encontrar_coluna(
-            df_comercial, ["Numero NF", "numero nf", "número nf", "num nf"]
-        )
-        data_col = self._encontrar_coluna(df_comercial, ["Dt Emissão", "dt emissão"])
+        # Índice por processo (itens, status, NF e data de emissão pré-calculados)
+        indice = self.calc_comissao._obter_indice_processos()
+        proc_col = indice.coluna_processo
+        status_col = indice.coluna_status
+        nf_col = indice.coluna_nf
+        data_col = indice.coluna_dt_emissao
 
         print(
             f"[RECEBIMENTO] [MÉTRICAS] Colunas encontradas: proc_col={proc_col}, status_col={status_col}, nf_col={nf_col}, data_col={data_col}"
@@ -476,20 +499,17 @@ class RecebimentoOrchestrator:
                 continue
 
             # Buscar processo na análise comercial
-            itens_processo = df_comercial[
-                df_comercial[proc_col].astype(str).str.strip() == str(processo).strip()
-            ]
+            resumo = indice.resumo(processo)
 
-            if itens_processo.empty:
+            if resumo is None:
                 print(
                     f"[RECEBIMENTO] [MÉTRICAS] Processo {processo}: não encontrado na Análise Comercial. Pulando..."
                 )
                 continue
 
-            # Verificar se foi faturado
-            primeiro_item = itens_processo.iloc[0]
-            status = str(primeiro_item.get(status_col, "")).strip().upper()
-            numero_nf = str(primeiro_item.get(nf_col, "")).strip()
+            # Verificar se foi faturado (dados da primeira linha do processo)
+            status = resumo["status"].upper()
+            numero_nf = resumo["numero_nf"]
 
             print(
                 f"[RECEBIMENTO] [MÉTRICAS] Processo {processo}: status={status}, numero_nf={numero_nf}"
@@ -503,9 +523,7 @@ class RecebimentoOrchestrator:
             # Verificar data de emissão (se disponível)
             if eh_faturado and data_col:
                 try:
-                    dt_emissao = pd.to_datetime(
-                        primeiro_item.get(data_col), errors="coerce"
-                    )
+                    dt_emissao = resumo["dt_emissao_convertida"]
                     if pd.notna(dt_emissao):
                         # Verificar se é do mês/ano de apuração
                         if dt_emissao.month != self.mes or dt_emissao.year != self.ano:
@@ -652,6 +670,19 @@ class RecebimentoOrchestrator:
             f"[RECEBIMENTO] [RECONCILIACAO] Reconciliações concluídas: {total_reconciliacoes} ajuste(s) calculado(s)"
         )
 
+    def _salvar_estado_backend(self):
+        """Grava o estado no backend persistente (quando configurado)."""
+        backend = self.state_manager.backend
+        if backend is None:
+            return
+        try:
+            gravados = self.state_manager.salvar_estado(self.mes, self.ano)
+            print(
+                f"[RECEBIMENTO] [ESTADO] {gravados} processo(s) gravado(s) em {backend.caminho}"
+            )
+        except Exception as e:
+            print(f"[RECEBIMENTO] [ESTADO] AVISO: falha ao gravar estado no backend: {e}")
+
     def _gerar_arquivo_saida(self) -> str:
         """Gera arquivo de saída com todas as abas."""
         print(
@@ -709,6 +740,38 @@ class RecebimentoOrchestrator:
 
         return arquivo_gerado
 
+    def _carregar_estado(self) -> bool:
+        """
+        Carrega o estado anterior (ou usa o recebido em memória no lote).
+
+        Returns:
+            True se há estado carregado
+        """
+        print("[RECEBIMENTO] [ETAPA 2.2/6] Carregando estado anterior...")
+        arquivo_estado_anterior = (
+            f"Comissoes_Recebimento_{self.mes:02d}_{self.ano}.xlsx"
+        )
+        caminho_estado = os.path.join(self.base_path, arquivo_estado_anterior)
+        print(
+            f"[RECEBIMENTO] [ETAPA 2.2/6] Caminho do estado anterior: {caminho_estado}"
+        )
+        print(
+            f"[RECEBIMENTO] [ETAPA 2.2/6] Arquivo existe? {os.path.exists(caminho_estado)}"
+        )
+
+        if self.estado_em_memoria:
+            print("[RECEBIMENTO] [ETAPA 2.2/6] Estado recebido em memória do mês anterior (lote)")
+            carregou = True
+        else:
+            carregou = self.state_manager.carregar_estado_anterior(
+                caminho_estado, self.mes, self.ano
+            )
+        print(f"[RECEBIMENTO] [ETAPA 2.2/6] Estado carregado: {carregou}")
+        print(
+            f"[RECEBIMENTO] [ETAPA 2.2/6] Processos no estado: {len(self.state_manager.estado_df)}"
+        )
+        return carregou
+
     def _gerar_arquivo_vazio(self) -> str:
         """Gera arquivo vazio quando não há pagamentos."""
         print("[RECEBIMENTO] [GERAÇÃO] Gerando arquivo vazio (sem pagamentos)...")
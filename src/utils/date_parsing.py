@@ -0,0 +1,139 @@
+"""
+Conversão de colunas de data em texto (Dt Emissão, Data Aceite...).
+
+Mesmas regras de `_parse_dates_smart` do preparador, com menos trabalho:
+    - a coluna é convertida por valor distinto (datas repetem muito: um
+      histórico de 200 mil linhas tem poucos milhares de dias distintos);
+    - ISO (AAAA-MM-DD) quando >= 50% das linhas seguem o padrão; senão, o
+      formato é inferido da primeira data (dia primeiro) e a leitura com o
+      mês primeiro só é feita se sobrarem valores não convertidos — vence a
+      leitura com menos datas inválidas (empate: dia primeiro);
+    - o resultado fica memorizado por (origem, coluna, conteúdo): a mesma
+      coluna convertida de novo (outro gerador, retenção, modo lote) não é
+      reprocessada.
+
+O formato escolhido de cada coluna fica em `formatos_detectados()` e é
+registrado no log ("[DATAS] ...").
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    guess_datetime_format = None
+
+PADRAO_ISO = r"^\d{4}-\d{2}-\d{2}"
+# Colunas convertidas mantidas em memória
+MAX_MEMORIZADAS = 16
+
+_MEMO: "OrderedDict[Tuple, Tuple[np.ndarray, str]]" = OrderedDict()
+_FORMATOS: Dict[Tuple[str, str], str] = {}
+
+
+def _limpar_texto(serie: pd.Series) -> pd.Series:
+    raw = serie.astype(str).str.strip().replace({"nan": ""})
+    return raw.str.replace("\u00a0", " ", regex=False).str.replace("T", " ", regex=False)
+
+
+def _descrever_formato(primeiro: Optional[str], dayfirst: bool, iso: bool) -> str:
+    rotulo = "ISO/ano primeiro" if iso else ("dia primeiro" if dayfirst else "mês primeiro")
+    formato = None
+    if primeiro and guess_datetime_format is not None:
+        try:
+            formato = guess_datetime_format(primeiro, dayfirst=dayfirst)
+        except Exception:
+            formato = None
+    if formato is None:
+        return f"sem formato único ({rotulo})"
+    return f"'{formato}' ({rotulo})"
+
+
+def _chave(serie: pd.Series, coluna: Optional[str], origem: Optional[str]) -> Tuple:
+    hashes = pd.util.hash_pandas_object(serie, index=False).to_numpy()
+    digest = hashlib.sha1(hashes.tobytes()).hexdigest()
+    return (origem or "", coluna or str(serie.name), len(serie), str(serie.dtype), digest)
+
+
+def parse_datas(
+    serie: pd.Series,
+    coluna: Optional[str] = None,
+    origem: Optional[str] = None,
+    relatar: bool = False,
+) -> pd.Series:
+    """
+    Converte `serie` (texto) em datetime; valores inválidos viram NaT.
+
+    Args:
+        serie: Coluna a converter (o índice é preservado)
+        coluna: Nome da coluna (padrão: serie.name), para memória e relatório
+        origem: Arquivo de origem, para memória e relatório
+        relatar: Imprime o formato escolhido ("[DATAS] ...")
+    """
+    try:
+        chave = _chave(serie, coluna, origem)
+    except Exception:
+        chave = None
+    if chave is not None and chave in _MEMO:
+        _MEMO.move_to_end(chave)
+        valores, formato = _MEMO[chave]
+        if relatar:
+            print(f"[DATAS] '{coluna or serie.name}': formato {formato} (já convertida).")
+        return pd.Series(valores.copy(), index=serie.index, name=serie.name)
+
+    raw_clean = _limpar_texto(serie)
+    codigos, distintos = pd.factorize(raw_clean, use_na_sentinel=False)
+    contagens = np.bincount(codigos, minlength=len(distintos))
+    distintos = pd.Series(distintos, dtype=raw_clean.dtype)
+    primeiro = next((v for v in distintos if isinstance(v, str) and v), None)
+
+    iso_count = int((distintos.str.match(PADRAO_ISO, na=False).to_numpy() * contagens).sum())
+    if iso_count >= max(1, int(0.5 * len(raw_clean))):
+        convertidos = pd.to_datetime(distintos, yearfirst=True, errors="coerce")
+        formato = _descrever_formato(primeiro, dayfirst=False, iso=True)
+    else:
+        convertidos = pd.to_datetime(distintos, dayfirst=True, errors="coerce")
+        formato = _descrever_formato(primeiro, dayfirst=True, iso=False)
+        falhas = convertidos.isna().to_numpy()
+        vazios = (distintos.fillna("") == "").to_numpy()
+        # Só vazios falharam: a leitura com o mês primeiro não teria menos NaT
+        if (falhas & ~vazios).any():
+            alternativa = pd.to_datetime(distintos, dayfirst=False, errors="coerce")
+            if (alternativa.isna().to_numpy() * contagens).sum() < (falhas * contagens).sum():
+                convertidos = alternativa
+                formato = _descrever_formato(primeiro, dayfirst=False, iso=False)
+
+    valores = convertidos.to_numpy()[codigos]
+    resultado = pd.Series(valores, index=serie.index, name=serie.name, dtype=convertidos.dtype)
+
+    nome = coluna or str(serie.name)
+    _FORMATOS[(origem or "", nome)] = formato
+    if relatar:
+        invalidas = int(resultado.isna().sum())
+        print(
+            f"[DATAS] '{nome}': formato {formato}; {len(distintos)} valor(es) distinto(s) "
+            f"em {len(serie)} linha(s); {invalidas} inválida(s)/vazia(s)."
+        )
+    if chave is not None:
+        _MEMO[chave] = (resultado.to_numpy(), formato)
+        while len(_MEMO) > MAX_MEMORIZADAS:
+            _MEMO.popitem(last=False)
+    return resultado
+
+
+def formatos_detectados() -> Dict[Tuple[str, str], str]:
+    """{(origem, coluna): formato escolhido} das colunas convertidas neste processo."""
+    return dict(_FORMATOS)
+
+
+def limpar_memoria_datas() -> None:
+    """Descarta as colunas memorizadas e os formatos registrados."""
+    _MEMO.clear()
+    _FORMATOS.clear()
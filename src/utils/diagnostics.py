@@ -0,0 +1,158 @@
+"""
+Diagnósticos estruturados por categoria (rentabilidade, mapper, métricas,
+recebimento).
+
+Substitui os blocos de `print` incondicionais dos caminhos quentes (FC,
+busca de metas, mapeamento de documentos, métricas TCMP/FCMP):
+    - mensagens de depuração só são formatadas/emitidas quando a categoria
+      está ativa (COMISSOES_VERBOSE=1 ativa todas; DEBUG_RENTABILIDADE=1
+      ativa apenas 'rentabilidade');
+    - faltas (chaves não encontradas) são sempre contadas por
+      (categoria, chave) e consolidadas em um único resumo ao final da
+      execução (aba DIAGNOSTICO_FALTAS), em vez de uma linha por chamada.
+
+Uso nos caminhos quentes:
+
+    if diagnostics.ativo("mapper"):
+        diagnostics.debug("mapper", f"... {valor_caro} ...")
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+CATEGORIAS = ("rentabilidade", "mapper", "metricas", "recebimento")
+
+_PREFIXO_LOGGER = "comissoes.diag"
+
+_ativas: Dict[str, bool] = {}
+# (categoria, chave) -> [ocorrências, motivo]
+_faltas: Dict[Tuple[str, Hashable], list] = {}
+
+
+def _flag_env(nome: str) -> bool:
+    return os.getenv(nome, "0") == "1"
+
+
+def configurar(
+    verbose: Optional[bool] = None,
+    rentabilidade: Optional[bool] = None,
+    categorias: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Define as categorias ativas.
+
+    Sem argumentos, usa as variáveis de ambiente COMISSOES_VERBOSE e
+    DEBUG_RENTABILIDADE. `categorias` ativa explicitamente as informadas.
+    """
+    verbose = _flag_env("COMISSOES_VERBOSE") if verbose is None else bool(verbose)
+    rentabilidade = (
+        _flag_env("DEBUG_RENTABILIDADE") if rentabilidade is None else bool(rentabilidade)
+    )
+    explicitas = set(categorias or ())
+    for categoria in CATEGORIAS:
+        _ativas[categoria] = verbose or categoria in explicitas
+    _ativas["rentabilidade"] = _ativas["rentabilidade"] or rentabilidade
+
+
+def ativo(categoria: str) -> bool:
+    """True se as mensagens de depuração da categoria devem ser emitidas."""
+    return _ativas.get(categoria, False)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Escreve no sys.stdout corrente (mesmo destino dos prints que substitui)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _valor):
+        pass
+
+
+def _logger(categoria: str) -> logging.Logger:
+    logger = logging.getLogger(f"{_PREFIXO_LOGGER}.{categoria}")
+    raiz = logging.getLogger(_PREFIXO_LOGGER)
+    if not raiz.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        raiz.addHandler(handler)
+        raiz.propagate = False
+        raiz.setLevel(logging.DEBUG)
+    return logger
+
+
+def debug(categoria: str, mensagem: str, *args) -> None:
+    """
+    Emite uma mensagem de depuração da categoria (se ativa).
+
+    Argumentos extras seguem o estilo do logging (`%s`) e só são
+    formatados quando a categoria está ativa.
+    """
+    if not _ativas.get(categoria, False):
+        return
+    _logger(categoria).debug(mensagem, *args)
+
+
+def registrar_falta(categoria: str, chave, motivo: str = "") -> bool:
+    """Conta uma falta; retorna True apenas na primeira ocorrência da chave."""
+    try:
+        hash(chave)
+        chave_falta = (categoria, chave)
+    except TypeError:
+        chave_falta = (categoria, repr(chave))
+    registro = _faltas.get(chave_falta)
+    if registro is None:
+        _faltas[chave_falta] = [1, motivo]
+        return True
+    registro[0] += 1
+    return False
+
+
+def total_faltas(categoria: Optional[str] = None) -> int:
+    return sum(
+        r[0] for (cat, _), r in _faltas.items() if categoria is None or cat == categoria
+    )
+
+
+def resumo_faltas(extras: Optional[List[pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    DataFrame (categoria, chave, ocorrencias, motivo), mais frequentes primeiro.
+
+    `extras` permite anexar relatórios já agregados em outro lugar (ex.: o
+    relatório de faltas do GoalIndex), com as mesmas colunas.
+    """
+    colunas = ["categoria", "chave", "ocorrencias", "motivo"]
+    partes = [
+        pd.DataFrame(
+            [
+                {"categoria": cat, "chave": str(chave), "ocorrencias": n, "motivo": motivo}
+                for (cat, chave), (n, motivo) in _faltas.items()
+            ],
+            columns=colunas,
+        )
+    ]
+    partes.extend(df[colunas] for df in (extras or []) if df is not None and not df.empty)
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=colunas)
+    return (
+        pd.concat(partes, ignore_index=True)
+        .sort_values("ocorrencias", ascending=False, kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def limpar() -> None:
+    """Zera os contadores de faltas (início de uma nova execução)."""
+    _faltas.clear()
+
+
+configurar()
@@ -1,10 +1,24 @@
 """
 Módulo de normalização de dados.
-Contém funções para normalização de texto e cálculos de atingimento de metas.
+Contém funções para normalização de texto, normalização vetorizada de
+DataFrames (trim de strings, colunas categóricas) e cálculos de atingimento
+de metas.
 """
 
 import pandas as pd
 import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Domínios de texto de baixa cardinalidade compartilhados entre tabelas:
+# domínio -> colunas (entrada ERP e configuração) que usam os mesmos valores
+DOMINIOS_CATEGORICOS: Dict[str, Tuple[str, ...]] = {
+    "linha": ("Negócio", "linha"),
+    "grupo": ("Grupo", "grupo"),
+    "subgrupo": ("Subgrupo", "subgrupo"),
+    "tipo_mercadoria": ("Tipo de Mercadoria", "tipo_mercadoria"),
+    "cargo": ("cargo", "nome_cargo"),
+    "colaborador": ("colaborador", "nome_colaborador"),
+}
 
 
 def normalize_text(s):
@@ -75,3 +89,131 @@ def calcular_atingimento(realizado, meta):
     except Exception:
         return 0.0
 
+
+
+def strip_series(s: pd.Series) -> pd.Series:
+    """
+    Remove espaços das strings de uma Series sem laço Python por elemento.
+
+    Valores não-string (números, datas, NaN) são preservados como estão,
+    equivalente a `s.apply(lambda v: v.strip() if isinstance(v, str) else v)`.
+    """
+    if isinstance(s.dtype, pd.StringDtype):
+        return s.str.strip()
+    if not pd.api.types.is_object_dtype(s):
+        return s
+    tipo = pd.api.types.infer_dtype(s, skipna=True)
+    if tipo == "empty":
+        return s
+    if tipo == "string":
+        return s.str.strip()
+    if "string" not in tipo and "mixed" not in tipo:
+        return s
+    # Tipos mistos: strings recebem o trim; demais valores (NaN no .str) voltam ao original
+    stripped = s.str.strip()
+    return stripped.where(stripped.notna(), s)
+
+
+def normalize_dataframes(
+    data: Dict[str, pd.DataFrame], validation_logger=None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Normaliza nomes de colunas (trim) e strings (trim) de todos os DataFrames.
+
+    Etapa única de normalização usada pelo ConfigLoader e pelo DataLoader.
+
+    Args:
+        data: Dicionário com DataFrames a normalizar
+        validation_logger: ValidationLogger opcional para registrar falhas
+
+    Returns:
+        Dicionário com DataFrames normalizados
+    """
+    for df_name, df_any in list(data.items()):
+        try:
+            if not isinstance(df_any, pd.DataFrame):
+                continue
+            try:
+                df_any.columns = df_any.columns.astype(str).str.strip()
+            except Exception:
+                pass
+            for col in df_any.columns:
+                s = df_any[col]
+                if not isinstance(s, pd.Series):
+                    continue  # colunas duplicadas
+                try:
+                    normalizada = strip_series(s)
+                    if normalizada is not s:
+                        df_any[col] = normalizada
+                except Exception:
+                    pass
+            data[df_name] = df_any
+        except Exception as e:
+            if validation_logger:
+                validation_logger.aviso(
+                    f"Falha ao normalizar strings para {df_name}: {e}",
+                    {},
+                )
+    return data
+
+
+def _colunas_texto(df: pd.DataFrame, nomes: Iterable[str]) -> List[str]:
+    """Colunas de `nomes` presentes em df que contêm apenas strings/NaN."""
+    colunas = []
+    for nome in nomes:
+        if nome not in df.columns or not isinstance(df[nome], pd.Series):
+            continue
+        s = df[nome]
+        if isinstance(s.dtype, (pd.StringDtype, pd.CategoricalDtype)) or (
+            pd.api.types.is_object_dtype(s)
+            and pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty")
+        ):
+            colunas.append(nome)
+    return colunas
+
+
+def categorize_shared_columns(
+    data: Dict[str, pd.DataFrame],
+    dominios: Optional[Dict[str, Tuple[str, ...]]] = None,
+    max_proporcao_unicos: float = 0.5,
+) -> Dict[str, int]:
+    """
+    Converte colunas de texto de baixa cardinalidade em pandas Categorical,
+    com as MESMAS categorias em todas as tabelas de um domínio (ex.: 'Negócio'
+    dos Faturados e 'linha' de CONFIG_COMISSAO), o que torna merges, groupby
+    e máscaras de igualdade comparações de códigos inteiros.
+
+    Colunas com valores não-string ou com proporção de valores únicos acima
+    de `max_proporcao_unicos` são mantidas como texto.
+
+    Args:
+        data: Dicionário com DataFrames (alterado no lugar)
+        dominios: domínio -> nomes de colunas (padrão: DOMINIOS_CATEGORICOS)
+        max_proporcao_unicos: Limite de cardinalidade (únicos / linhas)
+
+    Returns:
+        Dicionário domínio -> quantidade de categorias aplicadas
+    """
+    dominios = dominios or DOMINIOS_CATEGORICOS
+    resultado = {}
+    for dominio, nomes in dominios.items():
+        alvos = [
+            (df_name, col)
+            for df_name, df in data.items()
+            if isinstance(df, pd.DataFrame) and not df.empty
+            for col in _colunas_texto(df, nomes)
+        ]
+        if not alvos:
+            continue
+        valores = set()
+        linhas = 0
+        for df_name, col in alvos:
+            valores.update(data[df_name][col].dropna().unique().tolist())
+            linhas += len(data[df_name])
+        if not valores or len(valores) > max_proporcao_unicos * linhas:
+            continue
+        tipo = pd.CategoricalDtype(categories=sorted(valores, key=str))
+        for df_name, col in alvos:
+            data[df_name][col] = data[df_name][col].astype(object).astype(tipo)
+        resultado[dominio] = len(valores)
+    return resultado
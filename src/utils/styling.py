@@ -3,11 +3,14 @@ Módulo de estilização de planilhas Excel.
 Contém funções para aplicar cores e formatação nas abas de saída.
 """
 
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from typing import TYPE_CHECKING, Dict
 
+# openpyxl é importado só quando a planilha é estilizada (início mais rápido da CLI)
+if TYPE_CHECKING:
+    from openpyxl.styles import PatternFill
 
-def light_fill(rgb_hex: str) -> PatternFill:
+
+def light_fill(rgb_hex: str) -> "PatternFill":
     """
     Cria um PatternFill com cor clara (pastel).
     
@@ -17,6 +20,8 @@ def light_fill(rgb_hex: str) -> PatternFill:
     Returns:
         PatternFill configurado com a cor especificada.
     """
+    from openpyxl.styles import PatternFill
+
     return PatternFill(start_color=rgb_hex, end_color=rgb_hex, fill_type="solid")
 
 
@@ -184,6 +189,31 @@ def match_group(header: str):
     return None
 
 
+# Abas com colunas pintadas por grupo
+ABAS_COM_GRUPOS = ("COMISSOES_CALCULADAS", "RECONCILIACOES", "RECONCILIACAO")
+
+
+def cores_por_coluna(headers) -> Dict[int, str]:
+    """
+    Cor de cada coluna pertencente a um grupo, na ordem dos cabeçalhos.
+    
+    Args:
+        headers: Cabeçalhos das colunas (lista ou df.columns)
+    
+    Returns:
+        {índice da coluna (base 0): cor RGB}; colunas sem grupo ficam de fora.
+    """
+    col_group = {}
+    for i, h in enumerate(headers):
+        group = match_group(str(h) if h is not None else "")
+        if group:
+            col_group[i] = group
+
+    group_keys = sorted(set(col_group.values()))
+    color_for_group = {g: PALETTE[idx % len(PALETTE)] for idx, g in enumerate(group_keys)}
+    return {i: color_for_group[g] for i, g in col_group.items()}
+
+
 def apply_group_fills_to_sheet(ws):
     """
     Pinta colunas inteiras do mesmo grupo (componente FC/meta/realizado/peso/atingimento)
@@ -192,29 +222,15 @@ def apply_group_fills_to_sheet(ws):
     Args:
         ws: Worksheet do openpyxl a ser estilizada
     """
-    header_row = 1
-    col_group = {}
-    max_col = ws.max_column
     max_row = ws.max_row
+    headers = [cell.value for cell in ws[1]] if max_row else []
+    cores = cores_por_coluna(headers)
+    fills = {}
 
-    for c in range(1, max_col + 1):
-        cell = ws.cell(row=header_row, column=c)
-        group = match_group(str(cell.value) if cell.value is not None else "")
-        if group:
-            col_group[c] = group
-
-    if not col_group:
-        return
-
-    group_keys = sorted(set(col_group.values()))
-    color_for_group = {}
-    for idx, g in enumerate(group_keys):
-        color_for_group[g] = light_fill(PALETTE[idx % len(PALETTE)])
-
-    for c, g in col_group.items():
-        fill = color_for_group[g]
+    for i, rgb in cores.items():
+        fill = fills.setdefault(rgb, light_fill(rgb))
         for r in range(1, max_row + 1):
-            ws.cell(row=r, column=c).fill = fill
+            ws.cell(row=r, column=i + 1).fill = fill
 
 
 def style_output_workbook(xlsx_path: str):
@@ -226,12 +242,14 @@ def style_output_workbook(xlsx_path: str):
         xlsx_path: Caminho completo para o arquivo Excel a ser estilizado
     """
     try:
+        from openpyxl import load_workbook
+
         wb = load_workbook(xlsx_path)
     except Exception:
         return
 
     targets = []
-    for name in ("COMISSOES_CALCULADAS", "RECONCILIACOES", "RECONCILIACAO"):
+    for name in ABAS_COM_GRUPOS:
         if name in wb.sheetnames:
             targets.append(name)
 
@@ -0,0 +1,347 @@
+"""
+Testes da geração do PDF de auditoria (auditoria_pdf/).
+
+A renderização requer reportlab e a mesclagem dos fragmentos requer também
+pypdf (requirements-opcional.txt); sem eles esses testes são ignorados. A
+impressão digital e o cache de fragmentos não dependem de nenhum dos dois.
+"""
+
+import os
+import re
+import sys
+from importlib.util import find_spec
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auditoria_pdf.core.audit_data_builder import AuditDataBuilder
+from auditoria_pdf.core.fragment_cache import CacheFragmentosPDF, _canonico, impressao_digital
+
+requer_reportlab = pytest.mark.skipif(find_spec("reportlab") is None, reason="reportlab não instalado")
+requer_pypdf = pytest.mark.skipif(
+    find_spec("reportlab") is None or find_spec("pypdf") is None, reason="reportlab e pypdf não instalados"
+)
+
+
+def _processo_bruto(processo_id: str, n_itens: int = 1) -> dict:
+    item = {
+        "codigo_produto": "PROD001",
+        "descricao": "Produto de Teste",
+        "linha": "SSO",
+        "grupo": "Analisador Fixo",
+        "subgrupo": "Falco",
+        "tipo_mercadoria": "Produto",
+        "valor": 25000.0,
+        "fabricante": "-",
+        "consultor_interno": "Ana",
+        "representante": "nan",
+    }
+    detalhe_tcmp = {
+        "linha": "SSO",
+        "grupo": "Analisador Fixo",
+        "subgrupo": "Falco",
+        "tipo_mercadoria": "Produto",
+        "valor": 25000.0,
+        "taxas_colaboradores": [
+            {"nome": "Ana", "cargo": "Gerente Linha", "taxa_rateio_pct": 5.0, "fatia_cargo_pct": 20.0, "taxa_final_pct": 1.0}
+        ],
+    }
+    detalhe_fcmp = {
+        "linha": "SSO",
+        "grupo": "Analisador Fixo",
+        "subgrupo": "Falco",
+        "tipo_mercadoria": "Produto",
+        "valor": 25000.0,
+        "fcs_colaboradores": [
+            {
+                "nome": "Ana",
+                "cargo": "Gerente Linha",
+                "fc_final": 0.45,
+                "componentes": [
+                    {"nome": "faturamento_linha", "peso": 0.15, "realizado": 85000, "meta": 100, "atingimento": 850.0, "comp_fc": 0.15}
+                ],
+            }
+        ],
+    }
+    return {
+        "dados_gerais": {
+            "processo_id": processo_id,
+            "status": "FATURADO",
+            "dt_emissao": "2025-09-15",
+            "numero_nf": "048003",
+            "cliente": "Cliente Teste",
+            "operacao": "PVEN - Pedido de venda",
+            "valor_total": 25000.0,
+        },
+        "itens": [dict(item) for _ in range(n_itens)],
+        "pagamentos": [{"data": pd.Timestamp("2025-08-08"), "documento": "COT*", "tipo": "Adiantamento", "valor": 24000.0}],
+        "colaboradores": [{"nome": "Ana", "cargo": "Gerente Linha", "tipo": "operacional"}],
+        "calculos_tcmp": {"detalhes_itens": [detalhe_tcmp] * n_itens, "tcmp_final": {}, "mes_faturamento": "-"},
+        "calculos_fcmp": {"detalhes_itens": [detalhe_fcmp] * n_itens, "fcmp_final": {}},
+        "comissoes": [
+            {"colaborador": "Ana", "cargo": "Gerente Linha", "tipo": "Adiantamento", "valor_pago": 24000.0,
+             "tcmp": 0.01, "fcmp": 1.0, "comissao": 240.0, "mes_calculo": "08/2025"}
+        ],
+    }
+
+
+def _dados_auditoria(n_processos: int, brutos: list = None) -> dict:
+    builder = AuditDataBuilder()
+    if brutos is None:
+        brutos = [_processo_bruto(str(100000 + i), 1 + i % 4) for i in range(n_processos)]
+    processos = [builder.preparar_dados_processo(p) for p in brutos]
+    return {
+        "mes": 8,
+        "ano": 2025,
+        "data_geracao": datetime(2025, 9, 1, 8, 0, 0),
+        "processos": processos,
+        "total_processos": len(processos),
+    }
+
+
+def _textos(caminho) -> list:
+    import pypdf
+
+    return [pagina.extract_text() for pagina in pypdf.PdfReader(str(caminho)).pages]
+
+
+def _contar_paginas(caminho) -> int:
+    """Conta as páginas sem pypdf (o reportlab grava os objetos /Page sem compressão)."""
+    with open(caminho, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b(?!s)", f.read()))
+
+
+@requer_reportlab
+def test_paginas_iniciais():
+    """Cada processo começa após a capa/índice e os fragmentos anteriores."""
+    from auditoria_pdf.generators import pdf_generator
+
+    assert pdf_generator.paginas_iniciais(2, [3, 1, 4]) == [3, 6, 7]
+    assert pdf_generator.paginas_iniciais(5, []) == []
+    print("[OK] Páginas iniciais")
+
+
+@requer_reportlab
+def test_renderizar_processo(tmp_path):
+    """O fragmento de um processo é um PDF com o número de páginas retornado e sem página em branco inicial."""
+    from auditoria_pdf.generators import pdf_generator
+    from auditoria_pdf.generators.pdf_generator import AuditoriaPDFGenerator
+
+    dados = _dados_auditoria(4)
+    paginas = []
+    for idx, processo in enumerate(dados["processos"], 1):
+        caminho = tmp_path / f"processo_{idx}.pdf"
+        paginas.append(pdf_generator.renderizar_processo(processo, idx, str(caminho)))
+        assert caminho.read_bytes().startswith(b"%PDF")
+        assert paginas[-1] >= 1 and _contar_paginas(caminho) == paginas[-1]
+
+    # No PDF em série cada processo começa com PageBreak (uma página em branco após o índice)
+    serial = AuditoriaPDFGenerator().gerar_pdf(dados, str(tmp_path / "serial.pdf"))
+    paginas_capa = AuditoriaPDFGenerator()._renderizar_capa_indice(dados, str(tmp_path / "capa.pdf"), paginas)
+    assert _contar_paginas(serial) == paginas_capa + 1 + sum(paginas)
+    print("[OK] Renderizar processo")
+
+
+@requer_reportlab
+def test_renderizar_capa_indice(tmp_path, monkeypatch):
+    """Com índice de várias páginas, as páginas do índice são recalculadas até estabilizar."""
+    from auditoria_pdf.generators import pdf_generator, section_header
+    from auditoria_pdf.generators.pdf_generator import AuditoriaPDFGenerator
+
+    indices = []
+    gerar_indice = section_header.gerar_indice
+
+    def capturar(story, processos, paginas=None):
+        indices.append(list(paginas))
+        gerar_indice(story, processos, paginas)
+
+    monkeypatch.setattr(section_header, "gerar_indice", capturar)
+    dados = _dados_auditoria(120)
+    caminho = tmp_path / "capa.pdf"
+    paginas_capa = AuditoriaPDFGenerator()._renderizar_capa_indice(dados, str(caminho), [2] * 120)
+
+    assert paginas_capa > 2 and len(indices) >= 2
+    assert _contar_paginas(caminho) == paginas_capa
+    assert indices[-1] == pdf_generator.paginas_iniciais(paginas_capa, [2] * 120)
+    assert indices[-1][0] == paginas_capa + 1
+    print("[OK] Capa e índice paginado")
+
+
+@requer_pypdf
+def test_pdf_paralelo_igual_ao_serial(tmp_path):
+    """Fragmentos mesclados têm as mesmas seções do PDF em série, com índice paginado e marcadores."""
+    from auditoria_pdf.generators.pdf_generator import AuditoriaPDFGenerator
+
+    dados = _dados_auditoria(6)
+    serial = AuditoriaPDFGenerator().gerar_pdf(dados, str(tmp_path / "serial.pdf"))
+    paralelo = AuditoriaPDFGenerator(workers=2).gerar_pdf(dados, str(tmp_path / "paralelo.pdf"))
+
+    def secoes(textos):
+        corpo = [t for t in textos if t.strip()]
+        inicio = next(i for i, t in enumerate(corpo) if t.lstrip().startswith("PROCESSO 1:"))
+        return corpo[inicio:]
+
+    textos = _textos(paralelo)
+    assert secoes(textos) == secoes(_textos(serial))
+
+    import pypdf
+
+    leitor = pypdf.PdfReader(paralelo)
+    marcadores = {m.title: leitor.get_destination_page_number(m) for m in leitor.outline}
+    assert len(marcadores) == 7
+    for idx in range(1, 7):
+        processo_id = str(100000 + idx - 1)
+        pagina = marcadores[f"Processo {idx}: {processo_id}"]
+        assert textos[pagina].lstrip().startswith(f"PROCESSO {idx}: {processo_id}")
+        assert f"{idx}. Processo {processo_id} - Cliente Teste - 25000.0 - pág. {pagina + 1}" in textos[1]
+    print("[OK] PDF paralelo igual ao serial")
+
+
+def test_impressao_digital():
+    """Mesmos dados (inclusive numpy/Timestamp) geram a mesma impressão; dados ou número diferentes, não."""
+    import numpy as np
+
+    a = _processo_bruto("100000")
+    b = _processo_bruto("100000")
+    b["calculos_fcmp"]["detalhes_itens"][0]["fcs_colaboradores"][0]["componentes"][0]["realizado"] = np.int64(85000)
+    b["calculos_tcmp"]["tcmp_final"] = {}
+    assert impressao_digital(a, 1) == impressao_digital(b, 1)
+    assert impressao_digital(a, 1) != impressao_digital(a, 2)
+    b["pagamentos"][0]["valor"] = 32000.0
+    assert impressao_digital(a, 1) != impressao_digital(b, 1)
+    a["calculos_tcmp"]["tcmp_final"] = {1: np.float64("nan"), "Ana": 0.01}
+    assert len(impressao_digital(a, 1)) == 32
+    print("[OK] Impressão digital")
+
+
+def test_canonico():
+    """Chaves ordenadas, escalares numpy/Timestamp convertidos e NaN representável em JSON."""
+    import json
+
+    import numpy as np
+
+    assert _canonico({"b": 1, "a": (np.int64(2), np.float64(0.5))}) == [["a", [2, 0.5]], ["b", 1]]
+    assert _canonico({2: "x", "10": None}) == [["10", None], ["2", "x"]]
+    assert _canonico(pd.Timestamp("2025-08-08")) == "2025-08-08T00:00:00"
+    assert _canonico(datetime(2025, 8, 8).date()) == "2025-08-08"
+    assert _canonico(float("nan")) == "nan" and _canonico(np.float64("inf")) == "inf"
+    assert _canonico(np.bool_(True)) is True
+    json.dumps(_canonico(_processo_bruto("100000")), allow_nan=False)
+    print("[OK] Forma canônica")
+
+
+def test_cache_fragmentos(tmp_path):
+    """obter/guardar/limpar do cache sem renderizar PDFs."""
+    cache = CacheFragmentosPDF(str(tmp_path / "cache"))
+    assert cache.obter("a" * 32) is None and cache.falhas == 1
+    assert cache.limpar([]) == 0  # diretório ainda não existe
+
+    origem = tmp_path / "fragmento.pdf"
+    origem.write_bytes(b"%PDF-1.4 fragmento")
+    caminho = cache.guardar("a" * 32, str(origem), 3, "100000")
+    assert caminho == str(tmp_path / "cache" / ("a" * 32 + ".pdf"))
+    assert cache.obter("a" * 32) == (caminho, 3) and cache.acertos == 1
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["a" * 32 + ".json", "a" * 32 + ".pdf"]
+
+    # Metadados ausentes ou inválidos contam como falha
+    cache.guardar("b" * 32, str(origem), 2)
+    (tmp_path / "cache" / ("b" * 32 + ".json")).write_text("{", encoding="utf-8")
+    assert cache.obter("b" * 32) is None
+    cache.guardar("c" * 32, str(origem), 1)
+    (tmp_path / "cache" / ("c" * 32 + ".json")).unlink()
+    assert cache.obter("c" * 32) is None and cache.falhas == 3
+
+    assert cache.limpar(["a" * 32]) == 2
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["a" * 32 + ".json", "a" * 32 + ".pdf"]
+    print("[OK] Cache de fragmentos")
+
+
+def test_obter_cache_fragmentos(tmp_path, monkeypatch):
+    """Subpasta por mês; COMISSOES_CACHE_AUDITORIA_PDF desativa ou muda o diretório."""
+    from auditoria_pdf.core import fragment_cache
+
+    monkeypatch.delenv("COMISSOES_CACHE_AUDITORIA_PDF", raising=False)
+    cache = fragment_cache.obter_cache_fragmentos(8, 2025)
+    assert cache.diretorio == os.path.join(fragment_cache.DIRETORIO_PADRAO, "08_2025")
+    monkeypatch.setenv("COMISSOES_CACHE_AUDITORIA_PDF", "off")
+    assert fragment_cache.obter_cache_fragmentos(8, 2025) is None
+    monkeypatch.setenv("COMISSOES_CACHE_AUDITORIA_PDF", str(tmp_path))
+    assert fragment_cache.obter_cache_fragmentos(1, 2026).diretorio == os.path.join(str(tmp_path), "01_2026")
+    print("[OK] Configuração do cache")
+
+
+@requer_reportlab
+def test_incremental_sem_pypdf(monkeypatch, capsys):
+    """Sem pypdf o PDF incremental é desativado com um único INFO."""
+    from types import SimpleNamespace
+
+    from auditoria_pdf import auditoria_orchestrator
+    from auditoria_pdf.utils import pdf_utils
+
+    monkeypatch.setattr(pdf_utils, "mesclagem_disponivel", lambda: False)
+    monkeypatch.setattr(auditoria_orchestrator, "_AVISO_INCREMENTAL_EMITIDO", False)
+    monkeypatch.delenv("COMISSOES_CACHE_AUDITORIA_PDF", raising=False)
+    orq = object.__new__(auditoria_orchestrator.AuditoriaOrchestrator)
+    orq.calc_comissao = SimpleNamespace(params={})
+    orq.mes, orq.ano = 8, 2025
+
+    assert orq._cache_fragmentos() is None
+    assert orq._cache_fragmentos() is None
+    assert capsys.readouterr().out.count("INFO: PDF incremental indisponível") == 1
+
+    orq.calc_comissao.params["auditoria_pdf_incremental"] = "nao"
+    monkeypatch.setattr(auditoria_orchestrator, "_AVISO_INCREMENTAL_EMITIDO", False)
+    assert orq._cache_fragmentos() is None
+    assert "INFO" not in capsys.readouterr().out
+    print("[OK] Incremental sem pypdf")
+
+
+@requer_pypdf
+def test_pdf_incremental(tmp_path, capsys):
+    """Na reexecução só os processos alterados são renderizados; o resultado é o mesmo da geração completa."""
+    from auditoria_pdf.generators.pdf_generator import AuditoriaPDFGenerator
+
+    cache = CacheFragmentosPDF(str(tmp_path / "cache"))
+
+    def gerar(brutos, nome):
+        dados = _dados_auditoria(len(brutos), brutos)
+        impressoes = [impressao_digital(p, idx) for idx, p in enumerate(brutos, 1)]
+        AuditoriaPDFGenerator().gerar_pdf(dados, str(tmp_path / nome), cache=cache, impressoes=impressoes)
+        return capsys.readouterr().out
+
+    brutos = [_processo_bruto(str(100000 + i), 1 + i % 3) for i in range(4)]
+    assert "reaproveitados do cache: 0/4" in gerar(brutos, "primeira.pdf")
+    saida = gerar(brutos, "segunda.pdf")
+    assert "reaproveitados do cache: 4/4" in saida and "Renderizando" not in saida
+
+    brutos[2]["comissoes"][0]["comissao"] = 999.0
+    saida = gerar(brutos, "terceira.pdf")
+    assert "reaproveitados do cache: 3/4" in saida and "Renderizando 1 processo(s)" in saida
+    assert "1 fragmento(s) obsoleto(s) removido(s)" in saida
+    assert len(list((tmp_path / "cache").glob("*.pdf"))) == 4
+
+    cache = CacheFragmentosPDF(str(tmp_path / "cache_novo"))
+    assert "reaproveitados do cache: 0/4" in gerar(brutos, "completo.pdf")
+    assert _textos(tmp_path / "terceira.pdf") == _textos(tmp_path / "completo.pdf")
+    print("[OK] PDF incremental")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_impressao_digital()
+    test_canonico()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_fragmentos(Path(tmp))
+    if find_spec("reportlab") is not None:
+        test_paginas_iniciais()
+        with tempfile.TemporaryDirectory() as tmp:
+            test_renderizar_processo(Path(tmp))
+    if find_spec("reportlab") is not None and find_spec("pypdf") is not None:
+        with tempfile.TemporaryDirectory() as tmp:
+            test_pdf_paralelo_igual_ao_serial(Path(tmp))
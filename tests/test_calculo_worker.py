@@ -0,0 +1,99 @@
+"""
+Testes do pool de workers do adapter (frontend/adapter/calculo_worker.py).
+"""
+
+import os
+import sys
+import time
+
+# Adicionar o diretório raiz e o do adapter ao path para importar os módulos
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "frontend", "adapter"))
+
+from calculo_worker import CalculoWorkerPool, ContextoAquecido
+
+
+# Tarefas de teste: funções de módulo, enviadas aos processos workers
+def _tarefa_eco(contexto, valor):
+    contexto.entradas.setdefault("chamadas", 0)
+    contexto.entradas["chamadas"] += 1
+    return {"valor": valor, "pid": os.getpid(), "cwd": os.getcwd(), **contexto.entradas}
+
+
+def _tarefa_lenta(contexto, segundos):
+    time.sleep(segundos)
+    return "fim"
+
+
+def _tarefa_erro(contexto):
+    raise ValueError("falhou")
+
+
+TAREFAS_TESTE = {"eco": _tarefa_eco, "lenta": _tarefa_lenta, "erro": _tarefa_erro}
+
+
+def test_pool_fila_e_cancelamento(tmp_path):
+    """Jobs com job_id, contexto mantido entre jobs, cancelamento na fila e em execução."""
+    pool = CalculoWorkerPool(str(tmp_path), tarefas=TAREFAS_TESTE).iniciar()
+    try:
+        primeiro = pool.executar("eco", valor=1)
+        assert primeiro["valor"] == 1 and os.path.samefile(primeiro["cwd"], tmp_path)
+        # Mesmo processo e mesmo contexto no job seguinte
+        segundo = pool.executar("eco", valor=2)
+        assert segundo["pid"] == primeiro["pid"] and segundo["chamadas"] == 2
+
+        lenta = pool.submeter("lenta", segundos=60)
+        na_fila = pool.submeter("eco", valor=3)
+        assert pool.status(lenta)["status"] == "executando"
+        assert pool.status(na_fila)["status"] == "na_fila"
+        assert pool.cancelar(na_fila)
+        assert pool.status(na_fila)["status"] == "cancelado"
+        assert not pool.cancelar(na_fila)
+
+        # Em execução: o worker é recriado, sem os dados aquecidos
+        assert pool.cancelar(lenta)
+        assert pool.aguardar(lenta, 5)["status"] == "cancelado"
+        terceiro = pool.executar("eco", valor=4)
+        assert terceiro["pid"] != primeiro["pid"] and terceiro["chamadas"] == 1
+
+        erro = pool.aguardar(pool.submeter("erro"), 30)
+        assert erro["status"] == "erro" and "ValueError: falhou" in erro["erro"]
+        assert pool.status("inexistente") is None
+    finally:
+        pool.encerrar()
+    print("[OK] Fila, contexto e cancelamento do pool")
+
+
+def test_contexto_invalidado_por_arquivos(tmp_path):
+    """Dados aquecidos descartados quando uma entrada monitorada muda."""
+    (tmp_path / "config").mkdir()
+    params = tmp_path / "config" / "PARAMS.csv"
+    params.write_text("chave;valor\n", encoding="utf-8")
+    contexto = ContextoAquecido(str(tmp_path))
+    assert not contexto.validar()
+
+    contexto.entradas["RECEBIMENTOS"] = "df"
+    contexto.configuracoes["PARAMS"] = "df"
+    contexto.periodo = (8, 2025)
+    assert contexto.validar() and contexto.entradas
+
+    (tmp_path / "Analise_Comercial_Completa.csv").write_text("Processo\n1\n", encoding="utf-8")
+    assert not contexto.validar()
+    assert contexto.entradas == {} and contexto.configuracoes == {}
+    assert contexto.periodo is None
+
+    contexto.entradas["RECEBIMENTOS"] = "df"
+    params.write_text("chave;valor\nmes;8\n", encoding="utf-8")
+    assert not contexto.validar() and contexto.entradas == {}
+    print("[OK] Contexto invalidado pela impressão digital dos arquivos")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_pool_fila_e_cancelamento(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_contexto_invalidado_por_arquivos(Path(tmp))
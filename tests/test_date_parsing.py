@@ -0,0 +1,72 @@
+"""
+Testes da conversão de datas por valor distinto (src/utils/date_parsing.py).
+"""
+
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import date_parsing
+from src.utils.date_parsing import formatos_detectados, parse_datas
+
+
+def _referencia(series):
+    """Conversão original de _parse_dates_smart (duas leituras completas)."""
+    raw = series.astype(str).str.strip().replace({"nan": ""})
+    raw_clean = raw.str.replace("\u00a0", " ", regex=False).str.replace("T", " ", regex=False)
+    iso_count = raw_clean.str.match(r"^\d{4}-\d{2}-\d{2}", na=False).sum()
+    if iso_count >= max(1, int(0.5 * len(raw_clean))):
+        return pd.to_datetime(raw_clean, yearfirst=True, errors="coerce")
+    parsed1 = pd.to_datetime(raw_clean, dayfirst=True, errors="coerce")
+    parsed2 = pd.to_datetime(raw_clean, dayfirst=False, errors="coerce")
+    return parsed1 if parsed1.isna().sum() <= parsed2.isna().sum() else parsed2
+
+
+def test_equivale_a_conversao_original():
+    """Mesmo resultado da conversão original em formatos e misturas variados."""
+    rng = np.random.default_rng(3)
+    dias = pd.date_range("2021-01-01", "2025-12-31", freq="D")
+    casos = []
+    for formato in ["%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%d-%m-%Y"]:
+        valores = np.array(dias[rng.integers(0, len(dias), 800)].strftime(formato), dtype=object)
+        valores[rng.random(800) < 0.05] = None
+        valores[rng.random(800) < 0.02] = "invalida"
+        casos.append(pd.Series(valores, name="Dt Emissão", index=np.arange(800) * 2))
+    # Primeira data ambígua seguida de datas só legíveis com o mês primeiro
+    casos.append(pd.Series(["01/02/2025", "12/31/2024", "11/30/2024", None]))
+    casos.append(pd.Series([None, None], dtype=object))
+    casos.append(pd.Series(pd.to_datetime(["2025-01-02", None])))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for serie in casos:
+            date_parsing.limpar_memoria_datas()
+            pd.testing.assert_series_equal(parse_datas(serie), _referencia(serie))
+    print("[OK] Conversão por valor distinto equivale à original")
+
+
+def test_memoria_e_formato(monkeypatch):
+    """A mesma coluna não é reconvertida e o formato escolhido fica registrado."""
+    date_parsing.limpar_memoria_datas()
+    serie = pd.Series(["25/08/2025", "", "01/08/2025"] * 10, name="Dt Emissão")
+    primeira = parse_datas(serie, origem="analise.csv", relatar=True)
+    assert formatos_detectados()[("analise.csv", "Dt Emissão")] == "'%d/%m/%Y' (dia primeiro)"
+
+    chamadas = []
+    monkeypatch.setattr(date_parsing.pd, "to_datetime", lambda *a, **k: chamadas.append(1))
+    segunda = parse_datas(serie, origem="analise.csv")
+    assert not chamadas
+    pd.testing.assert_series_equal(primeira, segunda)
+    segunda.iloc[0] = pd.NaT  # cópia: a memória não é alterada
+    assert parse_datas(serie, origem="analise.csv").iloc[0] == pd.Timestamp("2025-08-25")
+    print("[OK] Memória e formato das datas")
+
+
+if __name__ == "__main__":
+    test_equivale_a_conversao_original()
@@ -0,0 +1,76 @@
+"""
+Testes do subsistema de diagnósticos (src/utils/diagnostics.py).
+"""
+
+import os
+import sys
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import diagnostics
+from src.recebimento.core.process_mapper import ProcessMapper
+
+
+class _Caro:
+    """Objeto cuja formatação é contada (para verificar formatação preguiçosa)."""
+
+    def __init__(self):
+        self.formatacoes = 0
+
+    def __str__(self):
+        self.formatacoes += 1
+        return "caro"
+
+
+def test_gating_por_categoria(capsys):
+    """Mensagens só são formatadas/emitidas para categorias ativas."""
+    try:
+        diagnostics.configurar(verbose=False, rentabilidade=True)
+        assert diagnostics.ativo("rentabilidade") and not diagnostics.ativo("mapper")
+
+        caro = _Caro()
+        diagnostics.debug("mapper", "valor=%s", caro)
+        assert caro.formatacoes == 0
+        assert capsys.readouterr().out == ""
+
+        diagnostics.debug("rentabilidade", "valor=%s", caro)
+        assert caro.formatacoes == 1
+        assert "valor=caro" in capsys.readouterr().out
+
+        diagnostics.configurar(verbose=True, rentabilidade=False)
+        assert all(diagnostics.ativo(c) for c in diagnostics.CATEGORIAS)
+    finally:
+        diagnostics.configurar()
+    print("[OK] Gating de diagnósticos por categoria")
+
+
+def test_resumo_de_faltas():
+    """Faltas são agregadas por (categoria, chave) em um único resumo."""
+    diagnostics.limpar()
+    assert diagnostics.registrar_falta("metricas", "100", "sem itens") is True
+    assert diagnostics.registrar_falta("metricas", "100", "sem itens") is False
+    diagnostics.registrar_falta("rentabilidade", ("realizado", ("L1", "G1")), "x")
+
+    mapper = ProcessMapper(pd.DataFrame({"Numero NF": ["048003"], "Processo": ["100004"]}))
+    assert mapper.mapear_documento("COTABC")["mapeado"] is False
+    assert mapper.mapear_documento("048003")["processo"] == "100004"
+    assert mapper.mapear_documento("999999")["mapeado"] is False
+
+    extra = pd.DataFrame(
+        {"categoria": ["metas"], "chave": ["Ana"], "ocorrencias": [5], "motivo": ["meta ausente"]}
+    )
+    resumo = diagnostics.resumo_faltas(extras=[extra])
+    assert list(resumo.columns) == ["categoria", "chave", "ocorrencias", "motivo"]
+    assert resumo.iloc[0]["ocorrencias"] == 5
+    assert (resumo["categoria"] == "mapper").sum() == 2
+    assert diagnostics.total_faltas("metricas") == 2
+
+    diagnostics.limpar()
+    assert diagnostics.resumo_faltas().empty
+    print("[OK] Resumo de faltas")
+
+
+if __name__ == "__main__":
+    test_resumo_de_faltas()
@@ -0,0 +1,114 @@
+"""
+Testes do cache LRU do Fator de Correção (FC) e da sua integração com
+CalculoComissao._calcular_fc_para_item.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculo_comissoes import CalculoComissao
+from src.core.fator_correcao_cache import FatorCorrecaoCache
+
+
+def test_lru_e_contadores():
+    """Testa limite de entradas, ordem LRU, contadores e invalidação."""
+    cache = FatorCorrecaoCache(max_entradas=2)
+    assert cache.obter("a") is None
+    cache.guardar("a", (1.0, {}, ()))
+    cache.guardar("b", (0.5, {}, ()))
+    assert cache.obter("a") == (1.0, {}, ())  # "a" passa a ser o mais recente
+    cache.guardar("c", (0.2, {}, ()))  # descarta "b"
+    assert cache.obter("b") is None
+    assert cache.obter("c") is not None
+
+    est = cache.estatisticas()
+    assert (est["hits"], est["misses"], est["descartes"], est["entradas"]) == (2, 2, 1, 2)
+
+    cache.invalidar()
+    assert len(cache) == 0 and cache.estatisticas()["invalidacoes"] == 1
+
+    desativado = FatorCorrecaoCache(max_entradas=0)
+    desativado.guardar("a", (1.0, {}, ()))
+    assert desativado.obter("a") is None
+    print("[OK] LRU e contadores do cache de FC")
+
+
+def _item(codigo, grupo="G1", data="2025-08-10"):
+    return pd.Series(
+        {
+            "Código Produto": codigo,
+            "Negócio": "L1",
+            "Grupo": grupo,
+            "Subgrupo": "S1",
+            "Tipo de Mercadoria": "Produto",
+            "Dt Emissão": pd.Timestamp(data) if data else pd.NaT,
+        }
+    )
+
+
+def _calc_com_fc_contado():
+    calc = CalculoComissao()
+    calc.realizado = {"faturamento_linha": pd.Series({"L1": 500.0})}
+    chamadas = []
+
+    def _fc_sem_cache(nome, cargo, item, mes=None, ano=None):
+        chamadas.append(item["Código Produto"])
+        valor = calc.realizado["faturamento_linha"].get(item["Negócio"], 0) / 1000.0
+        calc.debug_fornecedores.append(
+            {"colaborador": nome, "cod_produto": item["Código Produto"], "componente_fc": valor}
+        )
+        return valor, {"faturamento_linha": {"realizado": valor}}
+
+    calc._calcular_fc_para_item_sem_cache = _fc_sem_cache
+    return calc, chamadas
+
+
+def test_memorizacao_por_contexto_e_periodo():
+    """Mesmo colaborador/cargo/contexto/período reaproveita o FC calculado."""
+    calc, chamadas = _calc_com_fc_contado()
+
+    fc1, det1 = calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P1"))
+    fc2, det2 = calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P2"))
+    assert fc1 == fc2 == 0.5 and chamadas == ["P1"]
+    det2["faturamento_linha"]["realizado"] = -1  # cópia: não altera o cache
+    assert calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P3"))[1] == det1
+
+    # DEBUG_FORNECEDORES reproduzido com o código do item atual
+    assert [d["cod_produto"] for d in calc.debug_fornecedores] == ["P1", "P2", "P3"]
+
+    # Grupo NaN gera chave estável; período e colaborador distintos não colidem
+    calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P4", grupo=np.nan))
+    calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P5", grupo=float("nan")))
+    calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P6", data="2025-07-01"))
+    calc._calcular_fc_para_item("Bia", "Gerente Linha", _item("P7"))
+    calc._calcular_fc_para_item("Ana", "Gerente Linha", _item("P8"), 7, 2025)
+    assert chamadas == ["P1", "P4", "P6", "P7"]
+    print(f"[OK] Memorização do FC: {calc._obter_cache_fc().estatisticas()}")
+
+
+def test_wrapper_historico_invalida_cache():
+    """A troca de self.realizado no wrapper histórico nunca lê FCs obsoletos."""
+    calc, chamadas = _calc_com_fc_contado()
+    assert calc._calcular_fc_para_item("Ana", "Diretor", _item("P1"))[0] == 0.5
+
+    historico = {"faturamento_linha": pd.Series({"L1": 900.0})}
+    resultado = calc._calcular_fc_historico_wrapper(
+        "Ana", "Diretor", _item("P2"), historico, 8, 2025
+    )
+    assert resultado["fc_final"] == 0.9
+
+    # Após restaurar os realizados, o FC volta a refletir os valores correntes
+    assert calc._calcular_fc_para_item("Ana", "Diretor", _item("P3"))[0] == 0.5
+    assert chamadas == ["P1", "P2", "P3"]
+    print("[OK] Wrapper histórico invalida o cache de FC")
+
+
+if __name__ == "__main__":
+    test_lru_e_contadores()
+    test_memorizacao_por_contexto_e_periodo()
+    test_wrapper_historico_invalida_cache()
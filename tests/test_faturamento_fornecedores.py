@@ -0,0 +1,68 @@
+"""
+Testes do cache de faturamento por fornecedor (FATURADOS_YTD × mês).
+"""
+
+import os
+import sys
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.faturamento_fornecedores import FaturamentoFornecedoresCache
+
+
+class _RateCalculatorFake:
+    """Taxa fixa de 0.2 para todos os meses; conta as chamadas de conversão."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def obter_taxas_ytd(self, moeda, ano, mes_final):
+        return {m: 0.2 for m in range(1, mes_final + 1)}
+
+    def calcular_faturamento_convertido_ytd(self, faturamento_mensal_brl, moeda, ano, mes_final):
+        self.chamadas += 1
+        taxas = self.obter_taxas_ytd(moeda, ano, mes_final)
+        return sum(v * taxas[m] for m, v in faturamento_mensal_brl.items() if m <= mes_final)
+
+
+def test_matriz_e_totais_convertidos():
+    """Testa a matriz mensal em BRL, a conversão YTD e a memorização."""
+    df = pd.DataFrame(
+        {
+            "Dt Emissão": pd.to_datetime(
+                ["2025-01-10", "2025-02-05", "2025-02-20", "2025-03-01", "2025-01-15", None]
+            ),
+            "Fabricante": ["YSI", "YSI", "YSI", "YSI", "ysi ", "YSI"],
+            "Valor Realizado": [100.0, 50.0, 25.0, 1000.0, 10.0, 999.0],
+        }
+    )
+    rates = _RateCalculatorFake()
+    cache = FaturamentoFornecedoresCache(df, rates)
+
+    assert cache.faturamento_mensal_brl("YSI", 2) == {1: 100.0, 2: 75.0}
+    total = cache.faturamento_convertido_ytd("YSI", "USD", 2025, 2)
+    assert abs(total - 175.0 * 0.2) < 1e-9
+    cache.faturamento_convertido_ytd("YSI", "USD", 2025, 2)
+    assert rates.chamadas == 1, "Total convertido deve ser memorizado"
+
+    # Verificação agrega variações de caixa/espaços do nome do fabricante
+    verif = cache.faturamento_convertido_verificacao("YSI", "USD", 2025, 2)
+    assert abs(verif - 185.0 * 0.2) < 1e-9
+
+    assert cache.faturamento_convertido_ytd("ISCO", "USD", 2025, 2) == 0.0
+    print("[OK] Cache de faturamento por fornecedor")
+
+
+def test_sem_coluna_de_data():
+    """Sem 'Dt Emissão', todo o faturamento vai para o mês de apuração."""
+    df = pd.DataFrame({"Fabricante": ["QED", "QED"], "Valor Realizado": [10.0, 5.0]})
+    cache = FaturamentoFornecedoresCache(df, _RateCalculatorFake())
+    assert cache.faturamento_mensal_brl("QED", 3) == {1: 0.0, 2: 0.0, 3: 15.0}
+    print("[OK] Cache sem coluna de data")
+
+
+if __name__ == "__main__":
+    test_matriz_e_totais_convertidos()
+    test_sem_coluna_de_data()
@@ -0,0 +1,96 @@
+"""
+Testes do índice de metas (GoalIndex) usado por CalculoComissao._get_meta.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculo_comissoes import CalculoComissao
+from src.core.goal_index import GoalIndex, MetaNaoEncontrada
+
+
+def _metas():
+    aplicacao = pd.DataFrame(
+        {
+            "linha": ["L1", "L1", "L1", np.nan, "L2"],
+            "tipo_mercadoria": ["Produto", "Produto", "Produto", "Produto", "Serviço"],
+            "tipo_meta": ["faturamento", "conversao", "faturamento", "faturamento", "faturamento"],
+            "valor_meta": [100.0, 50.0, 999.0, 7.0, 30.0],
+        }
+    )
+    individuais = pd.DataFrame(
+        {
+            "colaborador": ["Ana", "Ana", "Bruno"],
+            "tipo_meta": ["faturamento", "conversao", "faturamento"],
+            "valor_meta": [10.0, 20.0, 30.0],
+        }
+    )
+    rentabilidade = pd.DataFrame(
+        {
+            "linha": [" L1 ", "L1", "L2", "L3"],
+            "grupo": ["G1", "G1", 5, np.nan],
+            "subgrupo": ["S1", "S1", "S2", "S3"],
+            "tipo_mercadoria": ["Produto", "Produto", "Produto", "Produto"],
+            "meta_rentabilidade_alvo_pct": [12.0, 99.0, 8.0, 4.0],
+        }
+    )
+    return aplicacao, individuais, rentabilidade
+
+
+def test_buscas_por_tipo():
+    """Primeira linha vence, NaN não corresponde e a rentabilidade é normalizada."""
+    indice = GoalIndex(*_metas())
+    assert indice.buscar("faturamento_linha", ("L1", "Produto")) == 100.0
+    assert indice.buscar("conversao_linha", ("L1", "Produto")) == 50.0
+    assert indice.buscar("faturamento_individual", "Bruno") == 30.0
+    assert indice.buscar("rentabilidade", ("L1", "G1", "S1", "Produto")) == 12.0
+    assert indice.buscar_rentabilidade(("L2", "5", " S2", "Produto")) == (8.0, "normalizada")
+
+    for tipo, chave in (
+        ("faturamento_linha", (np.nan, "Produto")),
+        ("conversao_individual", "Bruno"),
+        ("rentabilidade", ("L3", np.nan, "S3", "Produto")),
+    ):
+        try:
+            indice.buscar(tipo, chave)
+            raise AssertionError(f"{tipo} {chave} não deveria ter meta")
+        except MetaNaoEncontrada:
+            pass
+    print("[OK] Buscas do GoalIndex")
+
+
+def test_get_meta_registra_falta_uma_vez():
+    """_get_meta usa o índice e registra cada chave ausente uma única vez no log."""
+    aplicacao, individuais, rentabilidade = _metas()
+    calc = CalculoComissao()
+    calc.data = {
+        "METAS_APLICACAO": aplicacao,
+        "METAS_INDIVIDUAIS": individuais,
+        "META_RENTABILIDADE": rentabilidade,
+    }
+    assert calc._get_meta("faturamento_individual", "Ana") == 10.0
+    for _ in range(3):
+        assert calc._get_meta("conversao_individual", "Bruno") is None
+    assert calc._get_meta("rentabilidade", ("LX", "G", "S", "Produto")) is None
+
+    avisos = [log for log in calc.validation_log if log["Nível"] == "AVISO"]
+    assert len(avisos) == 1, calc.validation_log
+
+    relatorio = calc._obter_indice_metas().relatorio_faltas()
+    assert relatorio.iloc[0]["ocorrencias"] == 3
+    assert set(relatorio["tipo_meta"]) == {"conversao_individual", "rentabilidade"}
+
+    # Trocar a tabela reconstrói o índice
+    calc.data["METAS_INDIVIDUAIS"] = individuais.assign(valor_meta=[1.0, 2.0, 3.0])
+    assert calc._get_meta("faturamento_individual", "Ana") == 1.0
+    print("[OK] _get_meta com GoalIndex e relatório de faltas")
+
+
+if __name__ == "__main__":
+    test_buscas_por_tipo()
+    test_get_meta_registra_falta_uma_vez()
@@ -0,0 +1,72 @@
+"""
+Testes da inicialização da CLI (imports sob demanda e --profile-startup).
+"""
+
+import os
+import subprocess
+import sys
+
+# Adicionar o diretório raiz ao path para importar os módulos
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import calculo_comissoes
+
+
+def test_import_nao_carrega_modulos_sob_demanda():
+    """Importar calculo_comissoes não carrega preparador, câmbio, PDF nem openpyxl."""
+    script = (
+        "import sys, calculo_comissoes\n"
+        "print(','.join(m for m in calculo_comissoes.MODULOS_SOB_DEMANDA + ('requests',)"
+        " if m in sys.modules))\n"
+        "print(calculo_comissoes.preparar_dados_mensais.__name__)\n"
+        "print(calculo_comissoes.RateFetcher.__name__)\n"
+        "print(calculo_comissoes.ProcessMetricsCalculator().calculate_for_process(None))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", script], cwd=RAIZ, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr
+    carregados, preparador, fetcher, metricas = proc.stdout.splitlines()[-4:]
+    assert carregados == ""
+    # Os nomes antigos do módulo continuam acessíveis
+    assert preparador == "preparar_dados_mensais"
+    assert fetcher == "RateFetcher"
+    assert metricas == "({}, {})"
+    print("[OK] Import sob demanda")
+
+
+def test_ler_importtime():
+    """Módulos de primeiro nível com seus submódulos, do mais caro ao mais barato."""
+    saida = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |     numpy.core",
+            "import time:       200 |        300 |   numpy",
+            "import time:       500 |        500 |   pytz",
+            "import time:      1000 |       1800 | pandas",
+            "import time:        50 |         50 | json",
+            "outra linha qualquer",
+        ]
+    )
+    registros = calculo_comissoes._ler_importtime(saida)
+    assert registros == [
+        ("pandas", 0.0018, [("pytz", 0.0005), ("numpy", 0.0003)]),
+        ("json", 0.00005, []),
+    ]
+    print("[OK] Leitura do -X importtime")
+
+
+def test_profile_startup(capsys):
+    """--profile-startup mede o import em um processo novo."""
+    assert calculo_comissoes._perfil_inicializacao(limite=3) == 0
+    saida = capsys.readouterr().out
+    assert "[STARTUP] import calculo_comissoes:" in saida
+    assert "pandas" in saida
+    assert "preparar_dados_mensais" in saida
+    print("[OK] --profile-startup")
+
+
+if __name__ == "__main__":
+    test_import_nao_carrega_modulos_sob_demanda()
+    test_ler_importtime()
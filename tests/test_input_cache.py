@@ -0,0 +1,83 @@
+"""
+Testes do cache de planilhas de entrada (src/io/input_cache.py).
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.io import input_cache
+from src.io.input_cache import CacheEntradas
+
+
+def test_cache_reaproveita_e_invalida(tmp_path):
+    """A segunda leitura vem do cache; alterar o arquivo força novo parse."""
+    origem = tmp_path / "Faturados.xlsx"
+    pd.DataFrame({"Processo": ["100004", "100005"], "Valor": [1.5, 2.0]}).to_excel(
+        origem, index=False
+    )
+    cache = CacheEntradas(str(tmp_path / "cache"))
+    leituras = []
+
+    def ler(caminho, **kwargs):
+        leituras.append(kwargs)
+        return pd.read_excel(caminho, **kwargs)
+
+    primeiro = cache.ler(str(origem), "excel", ler, dtype=str)
+    segundo = cache.ler(str(origem), "excel", ler, dtype=str)
+    pd.testing.assert_frame_equal(primeiro, segundo)
+    assert len(leituras) == 1 and (cache.acertos, cache.falhas) == (1, 1)
+
+    # Argumentos diferentes geram outra entrada
+    cache.ler(str(origem), "excel", ler, sheet_name=None)
+    assert len(leituras) == 2
+
+    # Conteúdo alterado: o cache não é usado
+    time.sleep(0.01)
+    pd.DataFrame({"Processo": ["100006"], "Valor": [3.0]}).to_excel(origem, index=False)
+    terceiro = cache.ler(str(origem), "excel", ler, dtype=str)
+    assert len(leituras) == 3 and terceiro["Processo"].tolist() == ["100006"]
+
+    # A entrada substituída é removida; a de outra leitura fica obsoleta
+    entradas = cache.listar()
+    assert len(entradas) == 2 and entradas["atual"].sum() == 1
+    assert cache.limpar(apenas_obsoletas=True) == 1
+    assert cache.limpar() == 1 and cache.listar().empty
+    print("[OK] Cache de entradas reaproveita e invalida")
+
+
+def test_ler_excel_configurado_por_ambiente(tmp_path, monkeypatch):
+    """ler_excel/ler_csv respeitam COMISSOES_CACHE_ENTRADAS."""
+    origem = tmp_path / "Regras.xlsx"
+    with pd.ExcelWriter(origem) as writer:
+        pd.DataFrame({"parametro": ["a"], "valor": [1]}).to_excel(writer, sheet_name="PARAMS", index=False)
+        pd.DataFrame({"cargo": ["Gerente"]}).to_excel(writer, sheet_name="CARGOS", index=False)
+    csv = tmp_path / "analise.csv"
+    pd.DataFrame({"Processo": ["001"]}).to_csv(csv, index=False)
+
+    monkeypatch.setenv("COMISSOES_CACHE_ENTRADAS", str(tmp_path / "cache"))
+    abas = input_cache.ler_excel(str(origem), sheet_name=None)
+    assert input_cache.ler_excel(str(origem), sheet_name=None).keys() == abas.keys()
+    assert input_cache.ler_csv(str(csv), dtype=str)["Processo"].tolist() == ["001"]
+    assert input_cache.ler_csv(str(csv), dtype=str)["Processo"].tolist() == ["001"]
+    cache = input_cache.obter_cache_entradas()
+    assert cache.diretorio == str(tmp_path / "cache") and cache.acertos == 2
+    assert input_cache.main(["limpar", "--diretorio", str(tmp_path / "cache")]) == 0
+
+    monkeypatch.setenv("COMISSOES_CACHE_ENTRADAS", "off")
+    assert input_cache.obter_cache_entradas() is None
+    assert list(input_cache.ler_excel(str(origem), sheet_name="CARGOS")["cargo"]) == ["Gerente"]
+    print("[OK] Cache configurado por variável de ambiente")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_reaproveita_e_invalida(Path(tmp))
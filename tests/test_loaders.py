@@ -176,6 +176,45 @@ def test_integration():
         return False
 
 
+def test_data_loader_paralelo(tmp_path):
+    """A carga paralela produz os mesmos dados e logs da carga sequencial."""
+    pd.DataFrame(
+        {"Processo": ["100004", "100005"], "Valor Realizado": [10.0, 20.0], "Operação": ["A", "B"]}
+    ).to_excel(tmp_path / "Faturados.xlsx", index=False)
+    pd.DataFrame({"Processo": ["200001"], "Valor Orçado": [5.0]}).to_excel(
+        tmp_path / "Conversoes.xlsx", index=False
+    )
+    pd.DataFrame({"Processo": ["100004"], "Status Processo": ["FATURADO"]}).to_csv(
+        tmp_path / "Analise_Comercial_Completa.csv", index=False
+    )
+
+    resultados = {}
+    for paralelo in (False, True):
+        logger = ValidationLogger()
+        tempos = []
+        data = DataLoader(validation_logger=logger).load_input_data(
+            mes=8,
+            ano=2025,
+            base_path=str(tmp_path),
+            arquivo_faturados=str(tmp_path / "Faturados.xlsx"),
+            arquivo_conversoes=str(tmp_path / "Conversoes.xlsx"),
+            paralelo=paralelo,
+            max_workers=2,
+            progress_callback=lambda nome, seg, linhas: tempos.append((nome, linhas)),
+        )
+        resultados[paralelo] = (data, logger.get_logs(), tempos)
+
+    (seq, logs_seq, tempos_seq), (par, logs_par, tempos_par) = resultados[False], resultados[True]
+    assert list(seq.keys()) == list(par.keys())
+    for nome in seq:
+        pd.testing.assert_frame_equal(seq[nome], par[nome])
+    assert logs_seq == logs_par
+    assert tempos_seq == tempos_par
+    assert ("FATURADOS", 2) in tempos_par and ("CONVERSOES", 1) in tempos_par
+    assert len(tempos_par) == len(seq)
+    print("[OK] Carga paralela equivale à sequencial")
+
+
 def main():
     """Executa todos os testes."""
     print("=" * 60)
@@ -188,6 +227,11 @@ def main():
         resultados.append(("ConfigLoader", test_config_loader()))
         resultados.append(("DataLoader", test_data_loader()))
         resultados.append(("Integração", test_integration()))
+        import tempfile
+        from pathlib import Path
+        with tempfile.TemporaryDirectory() as tmp:
+            test_data_loader_paralelo(Path(tmp))
+        resultados.append(("Carga paralela", True))
         
         print("=" * 60)
         sucessos = sum(1 for _, sucesso in resultados if sucesso)
@@ -0,0 +1,142 @@
+"""
+Testes de equivalência entre o motor vetorizado e o motor legado (iterrows)
+do cálculo de comissões por faturamento (COMISSOES_CALCULADAS).
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculo_comissoes import CalculoComissao
+
+
+def _dados_sinteticos(decisao_cs):
+    faturados = pd.DataFrame(
+        {
+            "Código Produto": ["P1", "P2", "P3", "P4", "P5", "P6"],
+            "Descrição Produto": ["d1", "d2", "d3", "d4", "d5", "d6"],
+            "Processo": [100, 100, 200, 300, 400, 500],
+            "Dt Emissão": pd.to_datetime(["2025-08-01"] * 6),
+            "Valor Realizado": [1000, 250.5, 300, 80, 999, 10],
+            "Consultor Interno": ["Ana", "Ana", " bruno", None, "Ana", "Ninguém"],
+            "Representante-pedido": ["Carlos", np.nan, "Carlos", None, "Ana", None],
+            "Gerente Comercial-Pedido": ["Carlos", "Carlos", None, None, None, None],
+            "Negócio": ["L1", "L1", "L2", "L1", "L1", "L3"],
+            "Grupo": ["G1", "G1", "G2", np.nan, "G1", "G3"],
+            "Subgrupo": ["S1", "S2", "S2", "S1", "S1", "S3"],
+            "Tipo de Mercadoria": ["Produto"] * 6,
+        }
+    )
+    colaboradores = pd.DataFrame(
+        {
+            "id_colaborador": ["C1", "C2", "C3", "C4", "C5"],
+            "nome_colaborador": ["Ana", "Bruno", "Carlos", "Diretor X", "Ana"],
+            "cargo": ["Consultor Interno", "Consultor Interno", "Consultor Externo", "Diretor", "Coordenador"],
+            "tipo_cargo": ["Operacional", "Operacional", "Externo", "Gestão", "Gestão"],
+        }
+    )
+    atribuicoes = pd.DataFrame(
+        {
+            "linha": ["L1", "L1", "L1", "L2"],
+            "grupo": ["G1", "G1", "G1", "G2"],
+            "subgrupo": ["S1", "S1", "S2", "S2"],
+            "tipo_mercadoria": ["Produto"] * 4,
+            "colaborador": ["Diretor X", " ana ", "Diretor X", "Diretor X"],
+            "cargo": ["Diretor", "Coordenador", "Diretor", "Diretor"],
+        }
+    )
+    regras = pd.DataFrame(
+        {
+            "linha": ["L1", "L1", "L1", "L1", "L2", "__legacy__"],
+            "grupo": ["G1", "G1", "G1", "G1", "G2", "__legacy__"],
+            "subgrupo": ["S1", "S1", "S1", "__legacy__", "S2", "__legacy__"],
+            "tipo_mercadoria": ["Produto", "Produto", "Produto", "Produto", "Produto", "__legacy__"],
+            "cargo": ["Consultor Interno", "Diretor", "Coordenador", "Diretor", "Diretor", "Consultor Interno"],
+            "taxa_rateio_maximo_pct": [5, 5, 5, 3, 7, 1],
+            "fatia_cargo_pct": [15, 10, 20, 10, 30, 50],
+        }
+    )
+    return {
+        "FATURADOS": faturados,
+        "COLABORADORES": colaboradores,
+        "ATRIBUICOES": atribuicoes,
+        "CONFIG_COMISSAO": regras,
+        "CROSS_SELLING": pd.DataFrame({"colaborador": ["Carlos"], "taxa_cross_selling_pct": [2.0]}),
+        "ALIASES": pd.DataFrame(columns=["entidade", "alias", "padrao"]),
+    }, {"cross_selling_default_option": decisao_cs}
+
+
+def _fc_deterministico(nome_colab, cargo_colab, item_faturado, *args, **kwargs):
+    # Depende só de campos da chave do cache de FC (colaborador, cargo, contexto, período)
+    valor = float(len(str(item_faturado["Subgrupo"])) * 100 + len(str(item_faturado["Negócio"])))
+    fc = round(0.5 + (len(str(nome_colab)) % 5) / 10.0 + (valor % 7) / 100.0, 6)
+    detalhes = {
+        "faturamento_linha": {"peso": 0.5, "realizado": valor, "meta": 1000.0,
+                              "atingimento": valor / 1000.0, "atingimento_cap": min(1.0, valor / 1000.0),
+                              "componente_fc": 0.5 * min(1.0, valor / 1000.0)},
+        "rentabilidade": {"peso": 0.5, "realizado": 12.5, "meta": 0.1},
+    }
+    return fc, detalhes
+
+
+def _executar(modo, decisao_cs, fc=_fc_deterministico):
+    calc = CalculoComissao()
+    calc.data, calc.params = _dados_sinteticos(decisao_cs)
+    calc.params["modo_calculo_faturamento"] = modo
+    calc._calcular_fc_para_item = fc
+    calc._calcular_comissoes()
+    return calc
+
+
+def test_motor_vetorizado_igual_ao_legado():
+    """COMISSOES_CALCULADAS e o log de validação devem ser idênticos nos dois motores."""
+    for decisao in ("A", "B"):
+        legado = _executar("legado", decisao)
+        vetorizado = _executar("vetorizado", decisao)
+        assert not legado.comissoes_df.empty
+        pd.testing.assert_frame_equal(legado.comissoes_df, vetorizado.comissoes_df)
+        assert legado.validation_log == vetorizado.validation_log
+        print(f"[OK] Motores equivalentes (cross-selling opção {decisao}): {len(legado.comissoes_df)} linhas")
+
+
+def test_motor_vetorizado_resolve_uma_vez_por_chave():
+    """Regra e FC são resolvidos uma vez por chave distinta, não por linha expandida."""
+    chamadas_fc = []
+
+    def fc_contado(nome_colab, cargo_colab, item_faturado, *args, **kwargs):
+        chamadas_fc.append((nome_colab, cargo_colab, item_faturado["Negócio"], item_faturado["Subgrupo"]))
+        return _fc_deterministico(nome_colab, cargo_colab, item_faturado)
+
+    legado = _executar("legado", "B", fc=fc_contado)
+    chamadas_legado = list(chamadas_fc)
+    chamadas_fc.clear()
+    vetorizado = _executar("vetorizado", "B", fc=fc_contado)
+    pd.testing.assert_frame_equal(legado.comissoes_df, vetorizado.comissoes_df)
+    # P1 e P5 têm o mesmo contexto e período: o motor legado sem o cache real
+    # calcula o FC por linha, o vetorizado uma vez por chave
+    assert len(chamadas_fc) == len(set(chamadas_fc))
+    assert set(chamadas_fc) == set(chamadas_legado)
+    assert len(chamadas_fc) < len(chamadas_legado)
+    print(f"[OK] FC calculado {len(chamadas_fc)} vez(es) para {len(chamadas_legado)} linhas")
+
+
+def test_modo_padrao_legado(monkeypatch):
+    """O motor legado é o padrão; o vetorizado é ativado por PARAMS ou variável de ambiente."""
+    calc = CalculoComissao()
+    monkeypatch.delenv("COMISSOES_MODO_FATURAMENTO", raising=False)
+    calc.params = {}
+    assert calc._modo_calculo_faturamento() == "legado"
+    monkeypatch.setenv("COMISSOES_MODO_FATURAMENTO", "vetorizado")
+    assert calc._modo_calculo_faturamento() == "vetorizado"
+    calc.params = {"modo_calculo_faturamento": "legado"}
+    assert calc._modo_calculo_faturamento() == "legado"
+    print("[OK] Motor legado como padrão")
+
+
+if __name__ == "__main__":
+    test_motor_vetorizado_igual_ao_legado()
+    test_motor_vetorizado_resolve_uma_vez_por_chave()
@@ -0,0 +1,259 @@
+"""
+Testes do pipeline de preparação mensal (preparar_dados_mensais.py):
+leitura em blocos, quadro único para as quatro saídas, reaproveitamento em
+memória e modo lote.
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import preparar_dados_mensais as preparador
+from src.io.data_loader import DataLoader
+
+
+def _analise_comercial():
+    return pd.DataFrame(
+        {
+            "Processo": ["100001", "100002", "100003", "100004", "100005", "100006"],
+            "Status Processo": ["FATURADO", "FATURADO", "faturado ", "PENDENTE", "FATURADO", "FATURADO"],
+            "Dt Emissão": ["25/08/2025", "10/08/2025", "05/03/2025", "20/08/2025", "15/08/2024", "12/08/2025"],
+            "Data Aceite": ["01/08/2025", None, "02/08/2025", "03/07/2025", None, "04/08/2025"],
+            "Valor Realizado": ["1000", "2000.5", "300", "400", "500", "600"],
+            "Consultor Interno": ["Ana", "Bruno", "Ana", "Ana", "Bruno", "Ana"],
+            "Negocio": ["SSO", "SSO", "Ambiental", "SSO", "SSO", "SSO"],
+            "Cliente": ["9001", "9002", "9003", "9001", "9004", "9001"],
+            "Operação": ["PVEN - Pedido de venda", "XPTO - Outra", "PVEN", "PVEN", "IMO2 - VENDA IMOBILIZADO", None],
+        }
+    )
+
+
+def test_montar_saidas_mensais():
+    """As quatro saídas saem de um único quadro, sem alterar a base recebida."""
+    df = _analise_comercial()
+    saidas = preparador.montar_saidas_mensais(df, 8, 2025)
+    assert list(saidas) == [
+        "Faturados.xlsx",
+        "Conversões.xlsx",
+        "Faturados_YTD.xlsx",
+        "Retencao_Clientes.xlsx",
+    ]
+    assert df["Dt Emissão"].iloc[0] == "25/08/2025"  # base original intacta
+
+    faturados = saidas["Faturados.xlsx"]
+    assert list(faturados.columns) == preparador.DEFAULT_WANTED_FATURADOS
+    assert faturados["Processo"].tolist() == ["100001", "100004"]
+    assert faturados["Negócio"].tolist() == ["SSO", "SSO"]  # coluna localizada por nome normalizado
+
+    conversoes = saidas["Conversões.xlsx"]
+    assert conversoes["Processo"].tolist() == ["100001", "100003"]
+    assert "Valor Orçado" not in conversoes.columns
+
+    ytd = saidas["Faturados_YTD.xlsx"]
+    assert ytd["Processo"].tolist() == ["100001", "100003"]
+    assert ytd["Fabricante"].isna().all()
+
+    retencao = saidas["Retencao_Clientes.xlsx"].set_index("linha")
+    assert retencao.loc["SSO"].tolist() == [1, 2]
+    assert retencao.loc["Ambiental"].tolist() == [1, 1]
+
+    # Sem coluna de data: retenção não é gerada e Faturados sai vazio com cabeçalho
+    sem_data = preparador.montar_saidas_mensais(df.drop(columns=["Dt Emissão"]), 8, 2025)
+    assert sem_data["Retencao_Clientes.xlsx"] is None
+    assert sem_data["Faturados.xlsx"].empty
+    print("[OK] Saídas mensais montadas a partir de um quadro único")
+
+
+def test_quadros_preparados_em_memoria(tmp_path, monkeypatch):
+    """Os quadros gravados equivalem ao read_excel e são invalidados se o arquivo mudar."""
+    monkeypatch.chdir(tmp_path)
+    saidas = preparador.montar_saidas_mensais(_analise_comercial(), 8, 2025)
+    resultado = preparador.gravar_saidas_mensais(saidas, 8, 2025)
+    assert all(resultado.values()) and len(resultado) == 4
+
+    arquivos = {
+        "FATURADOS": "Faturados.xlsx",
+        "CONVERSOES": "Conversões.xlsx",
+        "FATURADOS_YTD": "Faturados_YTD.xlsx",
+        "RETENCAO_CLIENTES": "Retencao_Clientes.xlsx",
+    }
+    leitura = {"FATURADOS_YTD": {"parse_dates": ["Dt Emissão"]}}
+    quadros = preparador.obter_quadros_preparados(8, 2025, arquivos, leitura)
+    assert set(quadros) == set(arquivos)
+    for chave, arquivo in arquivos.items():
+        esperado = pd.read_excel(arquivo, **leitura.get(chave, {}))
+        pd.testing.assert_frame_equal(quadros[chave], esperado)
+
+    # Outro mês ou arquivo regravado por fora: volta a ler do disco
+    assert preparador.saidas_vigentes(8, 2025)
+    assert preparador.obter_quadros_preparados(9, 2025, arquivos) == {}
+    assert not preparador.saidas_vigentes(9, 2025)
+    pd.DataFrame({"x": [1]}).to_excel("Faturados.xlsx", index=False)
+    assert "FATURADOS" not in preparador.obter_quadros_preparados(8, 2025, arquivos)
+    assert not preparador.saidas_vigentes(8, 2025)
+
+    # DataLoader não relê as entradas fornecidas em memória
+    tempos = []
+    data = DataLoader().load_input_data(
+        8,
+        2025,
+        base_path=str(tmp_path),
+        arquivo_faturados="Faturados.xlsx",
+        progress_callback=lambda nome, segundos, linhas: tempos.append((nome, linhas)),
+        quadros_preparados={"CONVERSOES": quadros["CONVERSOES"]},
+    )
+    assert list(data)[:2] == ["FATURADOS", "CONVERSOES"]
+    assert data["FATURADOS"]["x"].tolist() == [1]
+    assert ("CONVERSOES", 2) in tempos
+    print("[OK] Quadros do preparador reaproveitados em memória")
+
+
+def test_preparador_lote(tmp_path, monkeypatch):
+    """O lote lê a base uma vez e gera o mesmo que o preparador mês a mês."""
+    monkeypatch.chdir(tmp_path)
+    leituras = []
+
+    def _ler(periodo=None):
+        leituras.append(1)
+        return _analise_comercial()
+
+    monkeypatch.setattr(preparador, "_ler_analise_comercial", _ler)
+    monkeypatch.setattr(preparador, "_carregar_aliases", lambda: {})
+
+    lote = preparador.PreparadorLote()
+    for mes, ano in [(7, 2025), (8, 2025)]:
+        assert lote.gerar(mes, ano)
+        esperado = preparador.montar_saidas_mensais(_analise_comercial(), mes, ano)
+        for arquivo, quadro in esperado.items():
+            gravado = preparador.obter_quadros_preparados(mes, ano, {"X": arquivo})["X"]
+            pd.testing.assert_frame_equal(
+                gravado, preparador._como_lido_do_excel(quadro)
+            )
+    assert len(leituras) == 1
+
+    # O índice de retenção é construído uma vez e fica disponível para o FC
+    indice = lote.indice_retencao
+    assert preparador.obter_indice_retencao(8, 2025) is indice
+    assert indice.retencao("SSO", 8, 2025) == (1, 2)
+    assert preparador.obter_indice_retencao(7, 2025) is None
+    pd.DataFrame({"x": [1]}).to_excel("Retencao_Clientes.xlsx", index=False)
+    assert preparador.obter_indice_retencao(8, 2025) is None
+    print("[OK] Preparador em lote equivale ao mensal")
+
+
+def test_leitura_em_blocos(tmp_path, monkeypatch):
+    """CSV lido em blocos, podado por coluna e período, gera as mesmas saídas."""
+    monkeypatch.setenv("COMISSOES_CACHE_ENTRADAS", "off")
+    monkeypatch.setattr(preparador, "TAMANHO_BLOCO_ANALISE", 2)
+    antigas = _analise_comercial().assign(
+        **{"Dt Emissão": ["01/02/2019"] * 6, "Data Aceite": [None] * 6}
+    )
+    df = pd.concat([_analise_comercial(), antigas], ignore_index=True)
+    df["Observação"] = "não usada"
+    caminho = tmp_path / "analise.csv"
+    df.to_csv(caminho, sep=";", index=False, encoding="utf-8-sig")
+
+    lido, enc, sep = preparador._ler_analise_csv(str(caminho), (8, 2025))
+    assert (enc, sep) == ("utf-8-sig", ";")
+    assert "Observação" not in lido.columns and len(lido) == 6
+
+    completo = pd.read_csv(caminho, sep=";", dtype=str, encoding="utf-8-sig")
+    esperado = preparador.montar_saidas_mensais(completo, 8, 2025)
+    obtido = preparador.montar_saidas_mensais(lido, 8, 2025)
+    for arquivo, quadro in esperado.items():
+        pd.testing.assert_frame_equal(
+            obtido[arquivo].reset_index(drop=True), quadro.reset_index(drop=True)
+        )
+
+    # Sem período (ou no modo 'completa'), nenhuma linha é descartada
+    assert len(preparador._ler_analise_csv(str(caminho))[0]) == 12
+    monkeypatch.setenv("COMISSOES_LEITURA_ANALISE", "completa")
+    assert preparador._ler_analise_csv(str(caminho), (8, 2025))[0].shape == (12, 10)
+    print("[OK] Leitura em blocos da Análise Comercial")
+
+
+def test_prepare_dataframes_e_main_usam_o_pipeline(tmp_path, monkeypatch):
+    """prepare_dataframes_for_month e main() passam pelo mesmo quadro de run_preparador."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("COMISSOES_CACHE_ENTRADAS", "off")
+    monkeypatch.setattr(preparador, "_carregar_aliases", lambda: {})
+    df = _analise_comercial()
+    df["Negócio"] = df["Negocio"]  # duplicada pelo nome normalizado
+    df.to_csv(preparador.ARQUIVO_ANALISE_COMPLETA, sep=";", index=False, encoding="utf-8-sig")
+
+    obtido = preparador.prepare_dataframes_for_month(8, 2025)
+    lido = pd.read_csv(preparador.ARQUIVO_ANALISE_COMPLETA, sep=";", dtype=str, encoding="utf-8-sig")
+    esperado = preparador.montar_saidas_mensais(
+        preparador._consolidar_colunas_duplicadas(lido), 8, 2025
+    )
+    assert len(obtido) == 4
+    for quadro, (arquivo, quadro_esperado) in zip(obtido, esperado.items()):
+        pd.testing.assert_frame_equal(
+            quadro.reset_index(drop=True), quadro_esperado.reset_index(drop=True)
+        )
+    assert not any(os.path.exists(arquivo) for arquivo in esperado)  # nada gravado
+
+    chamadas = []
+    monkeypatch.setattr(preparador, "obter_mes_ano", lambda: (8, 2025))
+    monkeypatch.setattr(preparador, "run_preparador", lambda mes, ano: chamadas.append((mes, ano)) or True)
+    preparador.main()
+    assert chamadas == [(8, 2025)]
+    print("[OK] prepare_dataframes_for_month e main() usam o pipeline único")
+
+
+def test_periodos_lote():
+    """Períodos do lote atravessam a virada de ano em ordem cronológica."""
+    import calculo_comissoes
+
+    assert calculo_comissoes._periodos_entre(11, 2024, 2, 2025) == [
+        (11, 2024),
+        (12, 2024),
+        (1, 2025),
+        (2, 2025),
+    ]
+    assert calculo_comissoes._periodos_entre(8, 2025, 7, 2025) == []
+    assert calculo_comissoes.executar_lote([]) == []
+    print("[OK] Períodos do lote")
+
+
+
+def test_cli_mes_unico_nao_entra_no_lote(tmp_path, monkeypatch):
+    """--mes/--ano não são abreviações de --mes-final/--ano-final: só --mes-final ativa o lote."""
+    import calculo_comissoes
+
+    monkeypatch.setattr(sys, "argv", ["calculo_comissoes.py", "--mes", "8", "--ano", "2025"])
+    assert calculo_comissoes._periodo_final_cli() == (None, None)
+    assert calculo_comissoes._periodo_final_cli(["--mes=8", "--ano=2025"]) == (None, None)
+    assert calculo_comissoes._periodo_final_cli(
+        ["--mes", "8", "--ano", "2025", "--mes-final", "10"]
+    ) == (10, None)
+    assert calculo_comissoes._periodo_final_cli(
+        ["--mes", "11", "--ano", "2024", "--mes-final=2", "--ano-final", "2025"]
+    ) == (2, 2025)
+
+    # Execução do script: --mes 8 --ano 2025 roda o preparador do mês (não o lote)
+    import runpy
+
+    import pytest
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    chamadas = []
+
+    def _lote(*args, **kwargs):
+        raise AssertionError("modo lote ativado sem --mes-final")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(preparador, "run_preparador", lambda mes, ano: chamadas.append((mes, ano)) or False)
+    monkeypatch.setattr(preparador, "PreparadorLote", _lote)
+    with pytest.raises(SystemExit):  # preparador simulado falha: aborta antes do cálculo
+        runpy.run_path(os.path.join(raiz, "calculo_comissoes.py"), run_name="__main__")
+    assert chamadas == [(8, 2025)]
+    print("[OK] CLI de mês único fora do modo lote")
+
+if __name__ == "__main__":
+    test_montar_saidas_mensais()
+    test_periodos_lote()
@@ -0,0 +1,85 @@
+"""
+Testes do índice por processo (ProcessIndex) sobre a ANALISE_COMERCIAL_COMPLETA.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculo_comissoes import CalculoComissao
+from src.core.process_index import ProcessIndex
+from src.recebimento.core.identificador_colaboradores import IdentificadorColaboradores
+
+
+def _analise_comercial():
+    return pd.DataFrame(
+        {
+            "﻿Processo": ["100004", " 100004 ", "100005", np.nan, 100006, "100005"],
+            "Status Processo": ["FATURADO", "ABERTO", "ABERTO", "FATURADO", "FATURADO", "X"],
+            "Numero NF": ["048003", "048003", np.nan, "1", "777", "2"],
+            "Dt Emissão": ["2025-08-10", "2025-07-01", None, "2025-08-01", "2025-09-15", None],
+            "Valor Realizado": [100.0, 50.5, "abc", 10.0, 7.0, 3.0],
+            "Consultor Interno": ["Ana", "Bruno", "Ana", "Ana", "Carla", "Ana"],
+        }
+    )
+
+
+def test_itens_e_resumo_equivalem_ao_filtro():
+    """Itens e totais do índice equivalem ao filtro por máscara original."""
+    df = _analise_comercial()
+    indice = ProcessIndex(df)
+    assert sorted(indice.processos()) == ["100004", "100005", "100006"]
+
+    chaves = df["﻿Processo"].astype(str).str.strip()
+    for processo in ["100004", "100005", "100006", "nan", "999"]:
+        esperado = df[chaves == processo]
+        pd.testing.assert_frame_equal(indice.itens(processo), esperado)
+        total = float(pd.to_numeric(esperado["Valor Realizado"], errors="coerce").fillna(0.0).sum())
+        assert indice.valor_total(processo) == total, processo
+
+    resumo = indice.resumo(" 100004")
+    assert resumo["itens"] == 2 and resumo["status"] == "FATURADO"
+    assert resumo["numero_nf"] == "048003"
+    assert resumo["dt_emissao_convertida"] == pd.Timestamp("2025-08-10")
+    assert indice.resumo("100005")["numero_nf"] == "nan"
+    assert indice.resumo("999") is None
+    print("[OK] ProcessIndex equivale ao filtro por processo")
+
+
+def test_consumidores_compartilham_indice():
+    """CalculoComissao expõe o índice e os consumidores usam a mesma instância."""
+    df = _analise_comercial()
+    calc = CalculoComissao()
+    calc.data = {"ANALISE_COMERCIAL_COMPLETA": df}
+    indice = calc._obter_indice_processos()
+    assert calc._obter_indice_processos() is indice
+    assert calc._get_valor_total_processo(100004) == 150.5
+    assert calc._get_valor_total_processo("100006.0") == 7.0  # correspondência numérica
+    assert calc._get_valor_total_processo("999") == 0.0
+
+    identificador = IdentificadorColaboradores(
+        df_analise_comercial=df,
+        colaboradores_df=pd.DataFrame({"nome_colaborador": ["Ana"], "cargo": ["Consultor"]}),
+        atribuicoes_df=pd.DataFrame(),
+        recebe_por_recebimento_ids={"Ana"},
+        indice_processos=indice,
+    )
+    assert identificador._obter_indice_processos() is indice
+    assert identificador.identificar_colaboradores("100005") == [
+        {"nome": "Ana", "cargo": "Consultor"}
+    ]
+
+    # Trocar o DataFrame reconstrói o índice
+    calc.data["ANALISE_COMERCIAL_COMPLETA"] = df.iloc[:1].copy()
+    assert calc._obter_indice_processos() is not indice
+    assert calc._get_valor_total_processo("100004") == 100.0
+    print("[OK] Índice por processo compartilhado")
+
+
+if __name__ == "__main__":
+    test_itens_e_resumo_equivalem_ao_filtro()
+    test_consumidores_compartilham_indice()
@@ -0,0 +1,94 @@
+"""
+Testes do índice NF → processo do ProcessMapper (recebimento).
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.recebimento.core.process_mapper import ProcessMapper
+
+
+def _analise_comercial():
+    return pd.DataFrame(
+        {
+            "﻿Processo": ["100004", "100005", "100006", "100007", np.nan, "100009"],
+            "Numero NF": ["048003", "48341.0", "048003", " 777777 ", "123456", np.nan],
+        }
+    )
+
+
+def _buscar_por_nf_varredura(df, doc_6dig):
+    """Busca original (varredura da coluna inteira) usada como referência."""
+    limpo = doc_6dig.lstrip("0") or "0"
+    if limpo == "0":
+        return None  # NF vazia/zerada não identifica processo
+    nfs = df["Numero NF"].astype(str).str.strip().str.extract(r"(\d+)")[0].fillna("")
+    nfs = nfs.str.lstrip("0").replace("", "0")
+    candidatos = df[nfs == limpo]
+    if candidatos.empty:
+        return None
+    processo = str(candidatos.iloc[0]["﻿Processo"]).strip()
+    return processo if processo and processo != "nan" else None
+
+
+def test_indice_equivale_a_varredura():
+    """O índice devolve o mesmo processo que a varredura linha a linha."""
+    df = _analise_comercial()
+    mapper = ProcessMapper(df)
+    for doc in ["048003", "48003", "048341", "777777", "123456", "999999", "000000"]:
+        assert mapper._buscar_por_nf(doc) == _buscar_por_nf_varredura(df, doc), doc
+    print("[OK] Índice NF equivale à varredura")
+
+
+def test_colisoes_e_cache_negativo():
+    """NFs com mais de um processo são reportadas; negativos ficam em cache."""
+    mapper = ProcessMapper(_analise_comercial())
+    assert mapper.colisoes_nf == {"48003": ["100004", "100006"]}
+    colisoes = mapper.obter_colisoes_nf()
+    assert colisoes.iloc[0]["processo_utilizado"] == "100004"
+
+    assert mapper.mapear_documento("cot100004") == {
+        "processo": "100004",
+        "tipo": "ADIANTAMENTO",
+        "mapeado": True,
+    }
+    assert mapper.mapear_documento("048003-1")["processo"] == "100004"
+
+    primeiro = mapper.mapear_documento("999999")
+    segundo = mapper.mapear_documento("999999")
+    assert primeiro == segundo and not primeiro["mapeado"]
+    assert "999999" in mapper.cache_mapeamento
+    # Cada chamada não mapeada continua registrada (mesmo vinda do cache)
+    assert len(mapper.obter_documentos_nao_mapeados()) == 2
+    print("[OK] Colisões de NF e cache negativo")
+
+
+def test_processos_sem_nf_nao_colidem(capsys):
+    """Processos sem NF (vazia, NaN, "nan", zeros) não viram a 'NF 0' nem colisão."""
+    from src.utils import diagnostics
+
+    df = pd.DataFrame(
+        {
+            "Processo": ["1", "2", "3", "4", "5"],
+            "Numero NF": ["", np.nan, "nan", "000000", "048003"],
+        }
+    )
+    faltas = diagnostics.total_faltas("mapper")
+    mapper = ProcessMapper(df)
+    assert mapper.colisoes_nf == {}
+    assert mapper.indice_nf == {"48003": "5"}
+    assert "AVISO" not in capsys.readouterr().out
+    assert diagnostics.total_faltas("mapper") == faltas
+    assert mapper._buscar_por_nf("000000") is None
+    assert not mapper.mapear_documento("000000")["mapeado"]
+    print("[OK] Processos sem NF não colidem")
+
+
+if __name__ == "__main__":
+    test_indice_equivale_a_varredura()
+    test_colisoes_e_cache_negativo()
@@ -0,0 +1,119 @@
+"""
+Testes do índice pré-compilado de regras de comissão (CONFIG_COMISSAO).
+Verifica a hierarquia de especificidade e a equivalência com a busca por máscaras.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.regras_comissao import RegraComissao, RegraComissaoIndex
+
+LEGACY = "__legacy__"
+
+
+def _busca_por_mascaras(df_regras, linha, grupo, subgrupo, tipo_mercadoria, cargo):
+    """Implementação de referência (busca antiga por máscaras booleanas)."""
+    filtros = [
+        (df_regras["linha"] == linha)
+        & (df_regras["grupo"] == grupo)
+        & (df_regras["subgrupo"] == subgrupo)
+        & (df_regras["tipo_mercadoria"] == tipo_mercadoria),
+        (df_regras["linha"] == linha)
+        & (df_regras["grupo"] == grupo)
+        & ((df_regras["subgrupo"].isna()) | (df_regras["subgrupo"] == LEGACY))
+        & (df_regras["tipo_mercadoria"] == tipo_mercadoria),
+        (df_regras["linha"] == linha)
+        & ((df_regras["grupo"].isna()) | (df_regras["grupo"] == LEGACY))
+        & ((df_regras["subgrupo"].isna()) | (df_regras["subgrupo"] == LEGACY))
+        & (df_regras["tipo_mercadoria"] == tipo_mercadoria),
+        (df_regras["linha"] == LEGACY) & (df_regras["tipo_mercadoria"] == LEGACY),
+    ]
+    for filtro in filtros:
+        regra = df_regras[filtro & (df_regras["cargo"] == cargo)]
+        if not regra.empty:
+            return regra.iloc[0]
+    return None
+
+
+def _df_sintetico():
+    return pd.DataFrame(
+        [
+            ["L1", "G1", "S1", "Produto", "Gerente", 5, 20, True],
+            ["L1", "G1", "S1", "Produto", "Gerente", 9, 99, True],  # duplicada
+            ["L1", "G1", np.nan, "Produto", "Gerente", 4, 10, True],
+            ["L1", LEGACY, LEGACY, "Produto", "Gerente", 3, 30, True],
+            [LEGACY, "X", "Y", LEGACY, "Diretor", 1, 50, True],
+            [np.nan, "G1", "S1", "Produto", "Gerente", 7, 70, True],
+        ],
+        columns=[
+            "linha",
+            "grupo",
+            "subgrupo",
+            "tipo_mercadoria",
+            "cargo",
+            "taxa_rateio_maximo_pct",
+            "fatia_cargo_pct",
+            "ativo",
+        ],
+    )
+
+
+def test_hierarquia_especificidade():
+    """Testa os quatro níveis de busca e a regra 'primeira linha vence'."""
+    indice = RegraComissaoIndex(_df_sintetico(), LEGACY)
+
+    regra = indice.buscar("L1", "G1", "S1", "Produto", "Gerente")
+    assert isinstance(regra, RegraComissao)
+    assert regra.nivel == 1 and regra["taxa_rateio_maximo_pct"] == 5
+    assert abs(regra.taxa_efetiva - 0.05 * 0.20) < 1e-12
+
+    regra = indice.buscar("L1", "G1", "S9", "Produto", "Gerente")
+    assert regra.nivel == 2 and regra["fatia_cargo_pct"] == 10
+
+    regra = indice.buscar("L1", "G9", "S9", "Produto", "Gerente")
+    assert regra.nivel == 3 and regra.get("fatia_cargo_pct") == 30
+
+    regra = indice.buscar("L9", "G9", "S9", "Serviço", "Diretor")
+    assert regra.nivel == 4 and regra.get("ativo") is True
+
+    assert indice.buscar("L9", "G9", "S9", "Serviço", "Gerente") is None
+    assert indice.buscar(np.nan, "G1", "S1", "Produto", "Gerente") is None
+    assert regra.get("coluna_inexistente", "x") == "x"
+    print("[OK] Hierarquia de especificidade do índice de regras")
+
+
+def test_equivalencia_com_busca_por_mascaras():
+    """Compara o índice com a busca antiga para todos os contextos da configuração."""
+    df = _df_sintetico()
+    csv_path = os.path.join("config", "CONFIG_COMISSAO.csv")
+    if os.path.exists(csv_path):
+        df_cfg = pd.read_csv(csv_path, sep=";", encoding="utf-8-sig")
+        df = pd.concat([df, df_cfg], ignore_index=True)
+
+    indice = RegraComissaoIndex(df, LEGACY)
+    contextos = df[["linha", "grupo", "subgrupo", "tipo_mercadoria"]].drop_duplicates()
+    cargos = list(df["cargo"].dropna().unique()) + ["Cargo Inexistente"]
+
+    for ctx in contextos.head(30).itertuples(index=False):
+        for variante in (tuple(ctx), (ctx[0], ctx[1], "S?", ctx[3]), (ctx[0], "G?", "S?", ctx[3])):
+            for cargo in cargos:
+                esperado = _busca_por_mascaras(df, *variante, cargo)
+                obtido = indice.buscar(*variante, cargo)
+                if esperado is None:
+                    assert obtido is None, f"{variante}/{cargo}: esperado None, obtido {obtido}"
+                    continue
+                assert obtido is not None, f"{variante}/{cargo}: regra não encontrada"
+                assert obtido["taxa_rateio_maximo_pct"] == esperado["taxa_rateio_maximo_pct"]
+                assert obtido["fatia_cargo_pct"] == esperado["fatia_cargo_pct"]
+                assert obtido["cargo"] == esperado["cargo"]
+    print("[OK] Índice equivalente à busca por máscaras")
+
+
+if __name__ == "__main__":
+    test_hierarquia_especificidade()
+    test_equivalencia_com_busca_por_mascaras()
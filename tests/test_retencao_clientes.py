@@ -0,0 +1,85 @@
+"""
+Testes do índice de retenção de clientes (src/core/retencao_clientes.py).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.retencao_clientes import IndiceRetencaoClientes, indice_mes
+
+
+def _base(linhas=400, seed=7):
+    rng = np.random.default_rng(seed)
+    datas = pd.to_datetime("2022-01-01") + pd.to_timedelta(
+        rng.integers(0, 4 * 365, linhas), unit="D"
+    )
+    df = pd.DataFrame(
+        {
+            "Dt Emissão": datas,
+            "Negócio": rng.choice(["SSO", "Ambiental", "Industrial"], linhas),
+            "Cliente": rng.integers(1, 60, linhas).astype(str),
+        }
+    )
+    df.loc[::37, "Cliente"] = None
+    df.loc[::41, "Negócio"] = None
+    df.loc[::43, "Dt Emissão"] = pd.NaT
+    return df
+
+
+def test_janelas_equivalem_ao_filtro():
+    """Qualquer janela conta o mesmo que o filtro + nunique na base."""
+    df = _base()
+    indice = IndiceRetencaoClientes(df["Dt Emissão"], df["Negócio"], df["Cliente"])
+    meses = df["Dt Emissão"].dt.year * 12 + df["Dt Emissão"].dt.month - 1
+
+    for inicio in range(indice_mes(11, 2021), indice_mes(3, 2026), 5):
+        for tamanho in (1, 2, 7, 24, 60):
+            fim = inicio + tamanho - 1
+            esperado = (
+                df[(meses >= inicio) & (meses <= fim)]
+                .groupby("Negócio")["Cliente"]
+                .nunique()
+            )
+            for linha in ["SSO", "Ambiental", "Industrial", "Outra"]:
+                obtido = indice.contar(
+                    linha, (inicio % 12 + 1, inicio // 12), (fim % 12 + 1, fim // 12)
+                )
+                assert obtido == int(esperado.get(linha, 0)), (linha, inicio, fim)
+    print("[OK] Janelas do índice equivalem ao filtro na base")
+
+
+def test_retencao_por_linha():
+    """Janelas de 24 meses do mês anterior e atual, no formato do arquivo."""
+    df = pd.DataFrame(
+        {
+            "Dt Emissão": pd.to_datetime(["2023-08-31", "2023-09-01", "2025-08-10", "2025-08-20"]),
+            "Negócio": ["SSO", "SSO", "SSO", "Ambiental"],
+            "Cliente": ["9001", "9002", "9002", "9003"],
+        }
+    )
+    indice = IndiceRetencaoClientes(df["Dt Emissão"], df["Negócio"], df["Cliente"])
+    # Anterior: 08/2023..07/2025 → 9001, 9002; atual: 09/2023..08/2025 → 9002
+    assert indice.retencao("SSO", 8, 2025) == (2, 1)
+    assert indice.retencao("Ambiental", 8, 2025) == (0, 1)
+    assert indice.retencao("Outra", 8, 2025) is None
+    assert indice.retencao("SSO", 1, 2030) is None
+
+    quadro = indice.quadro_retencao(8, 2025)
+    assert quadro["linha"].tolist() == ["Ambiental", "SSO"]
+    assert quadro["clientes_mes_atual"].tolist() == [1, 1]
+    assert indice.quadro_retencao(1, 2030).empty
+
+    vazio = IndiceRetencaoClientes(pd.Series([], dtype="datetime64[ns]"), [], [])
+    assert vazio.linhas == [] and vazio.retencao("SSO", 8, 2025) is None
+    print("[OK] Retenção por linha")
+
+
+if __name__ == "__main__":
+    test_janelas_equivalem_ao_filtro()
+    test_retencao_por_linha()
@@ -0,0 +1,247 @@
+"""
+Testes da gravação de planilhas em uma passada (src/io/saida_excel.py).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.io.saida_excel import PlanilhaSaida, larguras_colunas, resolver_motor
+from src.utils.styling import cores_por_coluna
+
+
+def _df_misto():
+    return pd.DataFrame(
+        {
+            "id_colaborador": ["C1", "C2", None],
+            "faturamento_item": [10.5, np.nan, np.inf],
+            "quantidade": [1, 2, 3],
+            "ativo": [True, False, True],
+            "data": pd.to_datetime(["2025-08-01 00:00:00", None, "2025-08-03 10:30:00"]),
+            "taxas_usadas": [{1: 0.13}, "=texto", 7],
+            "PESO_FAT_LINHA": [0.5, 0.25, 0.25],
+            "META_FAT_LINHA": [100, 200, 300],
+        }
+    )
+
+
+def test_mesmos_valores_do_to_excel(tmp_path):
+    """A leitura da planilha gravada é igual à do DataFrame.to_excel."""
+    df = _df_misto()
+    referencia = tmp_path / "referencia.xlsx"
+    with pd.ExcelWriter(referencia, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="COMISSOES_CALCULADAS", index=False)
+        df.head(0).to_excel(writer, sheet_name="VAZIA", index=False)
+
+    saida = tmp_path / "saida.xlsx"
+    with PlanilhaSaida(str(saida), "openpyxl") as planilha:
+        planilha.escrever(df, "COMISSOES_CALCULADAS", cores_colunas=cores_por_coluna(df.columns))
+        planilha.escrever(df.head(0), "VAZIA")
+
+    esperado = pd.read_excel(referencia, sheet_name=None)
+    obtido = pd.read_excel(saida, sheet_name=None)
+    assert list(obtido) == list(esperado)
+    for aba in esperado:
+        pd.testing.assert_frame_equal(obtido[aba], esperado[aba])
+
+    ws_ref = load_workbook(referencia)["COMISSOES_CALCULADAS"]
+    ws = load_workbook(saida)["COMISSOES_CALCULADAS"]
+    for linha_ref, linha in zip(ws_ref.iter_rows(), ws.iter_rows()):
+        assert [c.number_format for c in linha] == [c.number_format for c in linha_ref]
+    print("[OK] Valores iguais aos do to_excel")
+
+
+def test_estilos_na_mesma_passada(tmp_path):
+    """Cores de grupo, cabeçalho e larguras já saem no arquivo gravado."""
+    df = _df_misto()
+    cores = cores_por_coluna(df.columns)
+    assert cores == {6: "E3F2FD", 7: "E3F2FD"}
+
+    saida = tmp_path / "saida.xlsx"
+    with PlanilhaSaida(str(saida), "openpyxl") as planilha:
+        planilha.escrever(df, "COMISSOES_CALCULADAS", cores_colunas=cores)
+        planilha.escrever(
+            df,
+            "RESUMO",
+            cabecalho={"negrito": True, "cor_fonte": "FFFFFF", "cor_fundo": "37474F"},
+            cor_linhas="F1F8E9",
+            larguras={0: 30},
+        )
+
+    wb = load_workbook(saida)
+    ws = wb["COMISSOES_CALCULADAS"]
+    assert [c.fill.fgColor.rgb[-6:] for c in ws["G"]] == ["E3F2FD"] * 4
+    assert ws["A2"].fill.fill_type is None
+    assert ws.column_dimensions["A"].width == larguras_colunas(df)[0] == 16
+    assert ws.column_dimensions["F"].width == len("taxas_usadas") + 2
+
+    resumo = wb["RESUMO"]
+    assert resumo["A1"].font.b and resumo["A1"].fill.fgColor.rgb[-6:] == "37474F"
+    assert resumo["A1"].font.color.rgb[-6:] == "FFFFFF"
+    assert resumo["C4"].fill.fgColor.rgb[-6:] == "F1F8E9"
+    assert resumo.column_dimensions["A"].width == 30
+    print("[OK] Estilos aplicados na escrita")
+
+
+@pytest.mark.parametrize("motor", ["openpyxl", "pandas"])
+def test_segunda_tabela_na_mesma_aba(tmp_path, motor):
+    """linha_inicial continua a aba como o startrow do to_excel."""
+    detalhe = pd.DataFrame({"processo": ["P1", "P2"], "FC_TOTAL": [1.0, 0.8]})
+    resumo = pd.DataFrame({"total": [2]})
+    saida = tmp_path / "saida.xlsx"
+    with PlanilhaSaida(str(saida), motor) as planilha:
+        planilha.escrever(detalhe, "RECONCILIACAO", cores_colunas=cores_por_coluna(detalhe.columns))
+        planilha.escrever(resumo, "RECONCILIACAO", linha_inicial=len(detalhe) + 3)
+        with pytest.raises(ValueError):
+            planilha.escrever(resumo, "RECONCILIACAO")
+        with pytest.raises(ValueError):
+            planilha.escrever(resumo, "RECONCILIACAO", linha_inicial=1)
+
+    ws = load_workbook(saida)["RECONCILIACAO"]
+    valores = [[c.value for c in linha] for linha in ws.iter_rows()]
+    assert valores[:3] == [["processo", "FC_TOTAL"], ["P1", 1], ["P2", 0.8]]
+    assert valores[5][0] == "total" and valores[6][0] == 2
+    if motor == "openpyxl":
+        assert ws["B6"].fill.fgColor.rgb[-6:] == "E3F2FD"
+    print(f"[OK] Segunda tabela na mesma aba ({motor})")
+
+
+def test_escrita_em_blocos(tmp_path, monkeypatch):
+    """Blocos menores que a tabela gravam o mesmo conteúdo; falha em um bloco seguinte deixa a aba até o anterior."""
+    from src.io import saida_excel
+
+    df = pd.concat([_df_misto()] * 3, ignore_index=True)
+    cores = cores_por_coluna(df.columns)
+
+    def gravar(nome):
+        with PlanilhaSaida(str(tmp_path / nome), "openpyxl") as planilha:
+            planilha.escrever(df, "DADOS", cores_colunas=cores)
+        ws = load_workbook(tmp_path / nome)["DADOS"]
+        return [[(c.value, c.fill.fgColor.rgb, c.number_format) for c in linha] for linha in ws.iter_rows()]
+
+    inteiro = gravar("inteiro.xlsx")
+    monkeypatch.setattr(saida_excel, "LINHAS_POR_BLOCO", 2)
+    assert gravar("blocos.xlsx") == inteiro and len(inteiro) == len(df) + 1
+
+    class Invalido:
+        def __str__(self):
+            raise ValueError("valor inválido")
+
+    ruim = pd.DataFrame({"processo": ["P1", "P2", "P3", "P4", "P5"], "valor": [1, 2, 3, 4, Invalido()]})
+    saida = tmp_path / "parcial.xlsx"
+    with PlanilhaSaida(str(saida), "openpyxl") as planilha:
+        with pytest.raises(ValueError):
+            planilha.escrever(ruim.iloc[4:], "PRIMEIRO_BLOCO", larguras=False)
+        assert "PRIMEIRO_BLOCO" not in planilha.abas
+        with pytest.raises(ValueError):
+            planilha.escrever(ruim, "PARCIAL", larguras=False)
+    valores = [[c.value for c in linha] for linha in load_workbook(saida)["PARCIAL"].iter_rows()]
+    assert valores == [["processo", "valor"], ["P1", 1], ["P2", 2], ["P3", 3], ["P4", 4]]
+    print("[OK] Escrita em blocos")
+
+
+def test_recebimento_igual_ao_motor_legado(tmp_path):
+    """Comissoes_Recebimento: mesmos valores, cores e cabeçalho do motor anterior, salvo uma vez."""
+    from src.recebimento.io.output_generator import RecebimentoOutputGenerator
+
+    dados = {
+        "adiantamentos": pd.DataFrame(
+            {
+                "processo": ["P2", "P1"],
+                "nome_colaborador": ["Ana", "Bia"],
+                "valor_pago": [1500.0, 20.5],
+                "data_pagamento": pd.to_datetime(["2025-08-05", "2025-08-06"]),
+                "tcmp": [0.1 * 0.1, 0.02],
+            }
+        ),
+        "estado": pd.DataFrame({"PROCESSO": ["P1"], "STATUS_PAGAMENTO": ["PENDENTE"]}),
+    }
+    arquivos = {}
+    for motor in ("pandas", "openpyxl"):
+        pasta = tmp_path / motor
+        pasta.mkdir()
+        arquivos[motor] = RecebimentoOutputGenerator(motor=motor).gerar(8, 2025, dados, str(pasta))
+
+    legado, novo = load_workbook(arquivos["pandas"]), load_workbook(arquivos["openpyxl"])
+    assert novo.sheetnames == legado.sheetnames
+    for aba in legado.sheetnames:
+        for linha_ref, linha in zip(legado[aba].iter_rows(), novo[aba].iter_rows()):
+            for ref, celula in zip(linha_ref, linha):
+                assert celula.value == ref.value
+                assert celula.fill.fgColor.rgb == ref.fill.fgColor.rgb
+                assert (celula.font.b, celula.alignment.horizontal) == (ref.font.b, ref.alignment.horizontal)
+    ws = novo["COMISSOES_ADIANTAMENTOS"]
+    assert ws["A1"].fill.fgColor.rgb[-6:] == "37474F" and ws["A1"].font.color.rgb[-6:] == "FFFFFF"
+    assert ws["B3"].fill.fgColor.rgb[-6:] == "E3F2FD"
+    # 'tcmp' e 0.010000000000000002 (gravado como 0.01) têm 4 caracteres
+    assert ws.column_dimensions["E"].width == 6
+    print("[OK] Recebimento igual ao motor legado")
+
+
+def test_perfil_saida(monkeypatch):
+    """Abas fora do perfil não são construídas; as do perfil têm o tempo registrado."""
+    import calculo_comissoes
+
+    monkeypatch.delenv("COMISSOES_PERFIL_SAIDA", raising=False)
+    calc = calculo_comissoes.CalculoComissao()
+    assert calc._perfil_saida() == "depuracao"
+    monkeypatch.setenv("COMISSOES_PERFIL_SAIDA", "audit")
+    assert calc._perfil_saida() == "auditoria"
+    calc.params["perfil_saida"] = "production"
+    assert calc._perfil_saida() == "producao"
+
+    class Planilha:
+        abas = []
+
+        def escrever(self, df, nome):
+            self.abas.append(nome)
+
+    construidas = []
+
+    def construir(nome):
+        def _construir():
+            construidas.append(nome)
+            return pd.DataFrame({"a": [1]}) if nome != "DEBUG_ENV" else None
+
+        return _construir
+
+    writer = Planilha()
+    for nome in ("ESTADO", "VALIDACAO", "DEBUG_FORNECEDORES", "DEBUG_ENV"):
+        calc._escrever_aba(writer, nome, construir(nome))
+    assert construidas == writer.abas == ["ESTADO"]
+    assert calc.abas_fora_do_perfil == ["VALIDACAO", "DEBUG_FORNECEDORES", "DEBUG_ENV"]
+
+    calc.params["perfil_saida"] = "auditoria"
+    calc._escrever_aba(writer, "VALIDACAO", construir("VALIDACAO"))
+    calc.params["perfil_saida"] = "debug"
+    calc._escrever_aba(writer, "DEBUG_ENV", construir("DEBUG_ENV"))
+    assert writer.abas == ["ESTADO", "VALIDACAO"]
+    assert set(calc.tempos_abas_saida) == {"ESTADO", "VALIDACAO", "DEBUG_ENV"}
+    print("[OK] Perfil de saída")
+
+
+def test_resolver_motor(monkeypatch):
+    """xlsxwriter ausente cai para openpyxl; nomes legados viram 'pandas'."""
+    monkeypatch.setattr("importlib.util.find_spec", lambda nome: None)
+    assert resolver_motor("xlsxwriter") == "openpyxl"
+    assert resolver_motor("auto") == "openpyxl"
+    assert resolver_motor(None) == "openpyxl"
+    assert resolver_motor("legado") == "pandas"
+    print("[OK] Escolha do motor")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_mesmos_valores_do_to_excel(Path(tmp))
+        test_estilos_na_mesma_passada(Path(tmp))
+        test_recebimento_igual_ao_motor_legado(Path(tmp))
@@ -0,0 +1,202 @@
+"""
+Testes dos backends de estado (SQLite) e da importação de estados em Excel.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.recebimento.estado.state_backend import (
+    EstadoBackend,
+    SQLiteEstadoBackend,
+    criar_backend_estado,
+    exportar_aba_estado,
+    importar_estados_excel,
+)
+from src.recebimento.estado.state_manager import StateManager
+from src.recebimento.estado.state_schema import COLUNAS_ESTADO
+
+
+def test_state_manager_com_backend_sqlite(tmp_path):
+    """O estado gravado no SQLite é recarregado e atualizado incrementalmente."""
+    backend = criar_backend_estado("sqlite", base_path=str(tmp_path))
+    assert isinstance(backend, SQLiteEstadoBackend) and not backend.existe()
+
+    sm = StateManager(backend=backend)
+    assert sm.carregar_estado_anterior(str(tmp_path / "inexistente.xlsx")) is False
+    sm.criar_processo("100004", valor_total=500.0)
+    sm.atualizar_pagamento_adiantamento("100004", 100.0, 1.0, datetime(2025, 8, 5))
+    sm.definir_metricas("100005", {"Ana": 0.01}, {"Ana": 1.0}, "08/2025")
+    assert sm.salvar_estado() == 2
+    assert sm.salvar_estado() == 0  # nada alterado desde a última gravação
+
+    registro = backend.buscar(" 100004 ")
+    assert registro["TOTAL_ANTECIPACOES"] == 100.0
+    assert registro["DATA_PRIMEIRO_PAGAMENTO"] == pd.Timestamp(2025, 8, 5)
+    assert backend.buscar("999") is None
+
+    # Nova execução: estado vem do backend (o Excel informado é ignorado)
+    sm2 = StateManager(backend=backend)
+    assert sm2.carregar_estado_anterior("nao_usado.xlsx") is True
+    assert sm2.obter_processos_cadastrados() == ["100004", "100005"]
+    assert sm2.obter_metricas("100005") == {"TCMP": {"Ana": 0.01}, "FCMP": {"Ana": 1.0}}
+    sm2.atualizar_pagamento_regular("100004", 400.0, 4.0)
+    assert sm2.salvar_estado() == 1
+
+    df = backend.carregar()
+    assert df.set_index("PROCESSO").loc["100004", "STATUS_PAGAMENTO"] == "COMPLETO"
+    assert len(df) == 2
+
+    saida = tmp_path / "ESTADO.xlsx"
+    assert exportar_aba_estado(backend, str(saida), COLUNAS_ESTADO) == 2
+    assert list(pd.read_excel(saida, sheet_name="ESTADO").columns) == COLUNAS_ESTADO
+    print("[OK] StateManager com backend SQLite")
+
+
+def test_importar_estados_excel(tmp_path):
+    """Estados históricos são aplicados em ordem cronológica (o mais recente vence)."""
+    def _salvar(nome, linhas):
+        caminho = tmp_path / nome
+        pd.DataFrame(linhas).to_excel(caminho, sheet_name="ESTADO", index=False)
+        return str(caminho)
+
+    setembro = _salvar(
+        "Comissoes_Recebimento_09_2025.xlsx",
+        [{"PROCESSO": 100004, "TOTAL_ANTECIPACOES": 300.0}],
+    )
+    agosto = _salvar(
+        "Comissoes_Recebimento_08_2025.xlsx",
+        [
+            {"PROCESSO": 100004, "TOTAL_ANTECIPACOES": 100.0},
+            {"PROCESSO": 100004, "TOTAL_ANTECIPACOES": 999.0},
+            {"PROCESSO": 100005, "TOTAL_ANTECIPACOES": 50.0},
+        ],
+    )
+    backend = SQLiteEstadoBackend(str(tmp_path / "estado.sqlite"))
+    assert importar_estados_excel([setembro, agosto], backend) == 2
+
+    df = backend.carregar().set_index("PROCESSO")
+    assert df.loc["100004", "TOTAL_ANTECIPACOES"] == 300.0
+    assert df.loc["100005", "TOTAL_ANTECIPACOES"] == 50.0
+
+    assert criar_backend_estado("excel") is None
+    try:
+        criar_backend_estado("csv")
+        raise AssertionError("backend desconhecido deveria falhar")
+    except ValueError:
+        pass
+    print("[OK] Importação de estados em Excel")
+
+
+def test_reexecucao_de_mes_anterior(tmp_path):
+    """Mês anterior ao último gravado no backend não parte do estado futuro nem o sobrescreve."""
+    backend = criar_backend_estado("sqlite", base_path=str(tmp_path))
+    sm = StateManager(backend=backend)
+    sm.carregar_estado_anterior(str(tmp_path / "inexistente.xlsx"), 9, 2025)
+    sm.atualizar_pagamento_adiantamento("100004", 300.0, 3.0, datetime(2025, 9, 5))
+    assert sm.salvar_estado(9, 2025) == 1
+    assert backend.ultimo_periodo() == (2025, 9)
+
+    # Mesmo mês ou posterior: estado do backend
+    sm = StateManager(backend=backend)
+    assert sm.carregar_estado_anterior("nao_usado.xlsx", 9, 2025) is True
+    assert sm.obter_processos_cadastrados() == ["100004"]
+
+    # Reexecução de agosto: estado do Excel do próprio mês, backend intocado
+    agosto = tmp_path / "Comissoes_Recebimento_08_2025.xlsx"
+    pd.DataFrame([{"PROCESSO": "100004", "TOTAL_ANTECIPACOES": 100.0}]).to_excel(
+        agosto, sheet_name="ESTADO", index=False
+    )
+    sm = StateManager(backend=backend)
+    assert sm.carregar_estado_anterior(str(agosto), 8, 2025) is True
+    assert sm.backend is None
+    assert sm.obter_processo("100004")["TOTAL_ANTECIPACOES"] == 100.0
+    sm.atualizar_pagamento_adiantamento("100004", 50.0, 0.5, datetime(2025, 8, 20))
+    assert sm.salvar_estado(8, 2025) == 0
+    assert backend.buscar("100004")["TOTAL_ANTECIPACOES"] == 300.0
+    assert backend.ultimo_periodo() == (2025, 9)
+
+    # Importação registra o mês mais recente dos arquivos
+    outro = SQLiteEstadoBackend(str(tmp_path / "importado.sqlite"))
+    importar_estados_excel([str(agosto)], outro)
+    assert outro.ultimo_periodo() == (2025, 8)
+    print("[OK] Reexecução de mês anterior")
+
+
+def test_lote_com_primeiro_mes_sem_pagamentos(tmp_path, monkeypatch):
+    """Mês sem pagamentos carrega o estado antes de repassá-lo ao mês seguinte do lote."""
+    import calculo_comissoes
+    from src.recebimento.io.analise_financeira_loader import AnaliseFinanceiraLoader
+    from src.recebimento.recebimento_orchestrator import RecebimentoOrchestrator
+
+    backend = criar_backend_estado("sqlite", base_path=str(tmp_path))
+    sm = StateManager(backend=backend)
+    sm.atualizar_pagamento_adiantamento("100004", 300.0, 3.0, datetime(2025, 7, 5))
+    sm.salvar_estado(7, 2025)
+
+    calc = calculo_comissoes.CalculoComissao()
+    calc.base_path = str(tmp_path)
+    calc.params["estado_backend"] = "sqlite"
+    calc.recebe_por_recebimento = set()
+    monkeypatch.setattr(AnaliseFinanceiraLoader, "carregar", lambda self, **kw: pd.DataFrame())
+    monkeypatch.setattr(RecebimentoOrchestrator, "_gerar_pdf_auditoria", lambda self: None)
+
+    agosto = RecebimentoOrchestrator(calc, 8, 2025, str(tmp_path))
+    agosto.executar()
+    assert agosto.state_manager.obter_processo("100004")["TOTAL_ANTECIPACOES"] == 300.0
+
+    setembro = RecebimentoOrchestrator(calc, 9, 2025, str(tmp_path), state_manager=agosto.state_manager)
+    setembro.executar()
+    assert setembro.state_manager.obter_processo("100004")["TOTAL_ANTECIPACOES"] == 300.0
+    setembro.state_manager.atualizar_pagamento_regular("100004", 100.0, 1.0)
+    setembro.state_manager.salvar_estado(9, 2025)
+    registro = backend.buscar("100004")
+    assert registro["TOTAL_ANTECIPACOES"] == 300.0 and registro["TOTAL_PAGAMENTOS_REGULARES"] == 100.0
+    print("[OK] Lote com primeiro mês sem pagamentos")
+
+
+
+def test_backend_incompleto_falha_ao_instanciar(tmp_path):
+    """EstadoBackend é abstrato: faltar um método falha na criação, não no uso."""
+    import pytest
+
+    class SemSalvarRegistros(EstadoBackend):
+        def __init__(self, caminho):
+            self.caminho = caminho
+
+        def existe(self):
+            return False
+
+        def carregar(self):
+            return pd.DataFrame()
+
+        def buscar(self, processo):
+            return None
+
+        def salvar(self, df):
+            pass
+
+    with pytest.raises(TypeError, match="salvar_registros"):
+        SemSalvarRegistros(str(tmp_path / "estado"))
+    with pytest.raises(TypeError):
+        EstadoBackend()
+    assert isinstance(criar_backend_estado("sqlite", base_path=str(tmp_path)), EstadoBackend)
+    print("[OK] Backend incompleto falha ao instanciar")
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_state_manager_com_backend_sqlite(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_importar_estados_excel(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reexecucao_de_mes_anterior(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_backend_incompleto_falha_ao_instanciar(Path(tmp))
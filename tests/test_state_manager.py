@@ -0,0 +1,84 @@
+"""
+Testes do StateManager de recebimento (estado por PROCESSO em dict).
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.recebimento.estado.state_manager import RegistroEstado, StateManager
+from src.recebimento.estado.state_schema import COLUNAS_ESTADO
+
+
+def test_atualizacoes_no_lugar():
+    """Pagamentos, métricas e comissões atualizam o registro do processo."""
+    sm = StateManager()
+    assert sm.obter_processo("100") is None and sm.estado_df.empty
+
+    sm.criar_processo(" 200 ", valor_total=1000.0)
+    sm.atualizar_pagamento_adiantamento("200", 300.0, 3.0, datetime(2025, 8, 1))
+    sm.atualizar_pagamento_regular("200", 700.0, 7.0, datetime(2025, 8, 20))
+    sm.atualizar_pagamento_regular("100", 50.0, 0.5)  # cria o processo
+    sm.definir_metricas("200", {"Ana": 0.01}, {"Ana": 1.0}, "08/2025")
+    sm.armazenar_comissoes_adiantadas("200", {"Ana": 1.5})
+    sm.armazenar_comissoes_adiantadas("200", {"Ana": 1.5})
+    sm.marcar_reconciliacao_calculada("200")
+    sm.marcar_reconciliacao_calculada("999")  # inexistente: ignorado
+
+    p = sm.obter_processo("200")
+    assert p["TOTAL_PAGO_ACUMULADO"] == 1000.0 and p["SALDO_A_RECEBER"] == 0.0
+    assert p["TOTAL_COMISSAO_ACUMULADA"] == 10.0 and p["QUANTIDADE_PAGAMENTOS"] == 2
+    assert p["STATUS_PAGAMENTO"] == "COMPLETO" and p["STATUS_RECONCILIACAO"] == "CALCULADO"
+    assert p["DATA_PRIMEIRO_PAGAMENTO"] == datetime(2025, 8, 1)
+    assert sm.obter_metricas("200") == {"TCMP": {"Ana": 0.01}, "FCMP": {"Ana": 1.0}}
+    assert sm.obter_comissoes_adiantadas("200") == {"Ana": 3.0}
+    # Criado sem valor total: qualquer pagamento completa o processo
+    assert sm.obter_processo("100")["STATUS_PAGAMENTO"] == "COMPLETO"
+    assert sm.obter_processos_cadastrados() == ["200", "100"]
+
+    # O dict retornado é uma cópia
+    p["TOTAL_ANTECIPACOES"] = -1
+    assert sm.obter_processo("200")["TOTAL_ANTECIPACOES"] == 300.0
+
+    df = sm.obter_dataframe_estado()
+    assert list(df.columns) == COLUNAS_ESTADO
+    assert df["PROCESSO"].tolist() == ["100", "200"]
+    assert not hasattr(RegistroEstado(), "__dict__")
+    print("[OK] Atualizações no lugar do StateManager")
+
+
+def test_round_trip_aba_estado(tmp_path):
+    """O estado salvo na aba ESTADO é recarregado com o mesmo conteúdo."""
+    sm = StateManager()
+    sm.criar_processo("100004", valor_total=500.0)
+    sm.atualizar_pagamento_adiantamento("100004", 100.0, 1.0, datetime(2025, 8, 5))
+    sm.criar_processo("100005", valor_total=10.0)
+
+    arquivo = tmp_path / "Comissoes_Recebimento_08_2025.xlsx"
+    df = sm.obter_dataframe_estado()
+    # Linha com processo duplicado é preservada, mas não consultada
+    extras = pd.DataFrame([dict(df.iloc[0], TOTAL_ANTECIPACOES=999.0)])
+    pd.concat([df, extras]).drop(columns=["OBSERVACOES"]).to_excel(
+        arquivo, sheet_name="ESTADO", index=False
+    )
+
+    carregado = StateManager()
+    assert carregado.carregar_estado_anterior(str(arquivo)) is True
+    assert carregado.obter_processos_cadastrados() == ["100004", "100005"]
+    p = carregado.obter_processo(100004)
+    assert p["TOTAL_ANTECIPACOES"] == 100.0 and p["QUANTIDADE_PAGAMENTOS"] == 1
+    assert len(carregado.obter_dataframe_estado()) == 3
+
+    carregado.atualizar_pagamento_regular("100004", 400.0, 4.0)
+    assert carregado.obter_processo("100004")["STATUS_PAGAMENTO"] == "COMPLETO"
+    assert StateManager().carregar_estado_anterior(str(tmp_path / "x.xlsx")) is False
+    print("[OK] Round-trip da aba ESTADO")
+
+
+if __name__ == "__main__":
+    test_atualizacoes_no_lugar()
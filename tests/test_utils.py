@@ -12,7 +12,12 @@ from openpyxl.styles import PatternFill
 # Adicionar o diretório raiz ao path para importar os módulos
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.normalization import normalize_text, calcular_atingimento
+from src.utils.normalization import (
+    normalize_text,
+    calcular_atingimento,
+    normalize_dataframes,
+    categorize_shared_columns,
+)
 from src.utils.styling import style_output_workbook, light_fill, PALETTE, match_group
 from src.utils.logging import ValidationLogger
 
@@ -86,6 +91,50 @@ def test_calcular_atingimento():
     print("[OK] Todos os testes de calcular_atingimento() passaram!\n")
 
 
+def test_normalize_dataframes():
+    """Testa o trim vetorizado (equivalente ao apply por elemento)."""
+    print("\n=== Testando normalize_dataframes() ===")
+
+    df = pd.DataFrame(
+        {
+            " Negócio ": [" Linha A ", "Linha B", None, float("nan")],
+            "Misto": [" x ", 10, None, pd.Timestamp("2025-08-01")],
+            "Valor": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    esperado = df.copy()
+    esperado.columns = ["Negócio", "Misto", "Valor"]
+    for col in ["Negócio", "Misto"]:
+        esperado[col] = esperado[col].apply(lambda v: v.strip() if isinstance(v, str) else v)
+
+    data = normalize_dataframes({"FATURADOS": df, "VAZIO": pd.DataFrame(), "X": None})
+    pd.testing.assert_frame_equal(data["FATURADOS"], esperado)
+    assert data["X"] is None
+    print("[OK] Trim vetorizado equivale ao apply")
+
+
+def test_categorize_shared_columns():
+    """Testa categorias compartilhadas entre tabelas de um mesmo domínio."""
+    print("\n=== Testando categorize_shared_columns() ===")
+
+    data = {
+        "FATURADOS": pd.DataFrame({"Negócio": ["A", "B", "A", "A"], "Processo": ["1", "2", "3", "4"]}),
+        "CONFIG_COMISSAO": pd.DataFrame({"linha": ["A", "C", "C", None], "cargo": ["G", "G", "G", "G"]}),
+        "COLABORADORES": pd.DataFrame({"nome_colaborador": ["Ana", "Bia"], "cargo": ["G", 1]}),
+    }
+    aplicadas = categorize_shared_columns(data)
+    assert aplicadas == {"linha": 3, "cargo": 1}, aplicadas
+    fat, cfg = data["FATURADOS"]["Negócio"], data["CONFIG_COMISSAO"]["linha"]
+    assert fat.dtype == cfg.dtype and list(fat.cat.categories) == ["A", "B", "C"]
+    assert cfg.isna().sum() == 1 and (fat == "A").sum() == 3
+    # Colunas com valores não-string permanecem como estão
+    assert data["COLABORADORES"]["cargo"].dtype == object
+    assert isinstance(data["CONFIG_COMISSAO"]["cargo"].dtype, pd.CategoricalDtype)
+    merged = data["FATURADOS"].merge(data["CONFIG_COMISSAO"], left_on="Negócio", right_on="linha")
+    assert len(merged) == 3
+    print("[OK] Categorias compartilhadas")
+
+
 def test_styling_functions():
     """Testa as funções de estilização."""
     print("\n=== Testando funções de estilização ===")
@@ -203,6 +252,8 @@ def main():
     try:
         test_normalize_text()
         test_calcular_atingimento()
+        test_normalize_dataframes()
+        test_categorize_shared_columns()
         test_styling_functions()
         test_style_output_workbook()
         test_validation_logger()